@@ -36,6 +36,18 @@ class AppSettings:
         auto_reconnect: Auto-reconnect on connection loss
         reconnect_interval: Interval between reconnection attempts in seconds
         auto_connect_discovered: Auto-connect to discovered MAVLink devices
+        discovery_ports: Ports and ranges scanned by discovery (e.g. "14550,14540-14549")
+        background_discovery: Rescan the discovery ports periodically
+        stream_profile: Name of the stream profile requested from vehicles ("" = vehicle defaults)
+        stream_profiles: Stream profiles by name: {name: {'rates': {message: hz}, 'disable_unlisted': bool}}
+            (empty = the built-in profiles)
+        adaptive_rate_control: Slow telemetry, then setpoints, down on congested links
+        adaptive_max_loss: Packet loss fraction above which a link is congested
+        adaptive_max_rtt_ms: Round-trip time above which a link is congested
+        adaptive_max_utilization: Fraction of the egress limit above which a link is congested
+        link_test_rate_hz: PING rate of the connection test
+        engine_process: Run the MAVLink links in a child process (applied on restart)
+        fleet_table_name: Shared memory name of the fleet telemetry table (empty = off)
         window_geometry: Optional window geometry dict {'x':..,'y':..,'w':..,'h':..}
         active_panel: Tag of the active dock panel at shutdown
         last_locked_object: Name of the object the viewport was locked to (or empty)
@@ -64,6 +76,17 @@ class AppSettings:
     auto_reconnect: bool = True
     reconnect_interval: float = 5.0
     auto_connect_discovered: bool = False
+    discovery_ports: str = "14550,14540,14560"
+    background_discovery: bool = False
+    stream_profile: str = ""
+    stream_profiles: dict = field(default_factory=dict)
+    adaptive_rate_control: bool = False
+    adaptive_max_loss: float = 0.05
+    adaptive_max_rtt_ms: float = 250.0
+    adaptive_max_utilization: float = 0.9
+    link_test_rate_hz: float = 20.0
+    engine_process: bool = False
+    fleet_table_name: str = ""
 
     # UI / session state (new)
     window_geometry: Optional[dict] = None
@@ -1,5 +1,5 @@
 from enum import Enum, auto
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 from typing import Optional
 import time
 
@@ -43,6 +43,8 @@ class MavlinkConnectionConfig:
         mocap_rate_hz: Target rate for motion capture data in Hz
         name: User-friendly name for this connection (must be unique)
         linked_object_name: Name of the scene object linked to this connection
+        egress_rate_limit_bps: Outbound bandwidth limit in bytes per second
+            (0 = unlimited); low-priority traffic is delayed or shed first
     """
     connection_string: str
     system_id: int = 1
@@ -55,6 +57,36 @@ class MavlinkConnectionConfig:
     mocap_rate_hz: float = 100.0
     name: str = ""  # User-friendly name, auto-generated if empty
     linked_object_name: str = ""  # Name of linked scene object
+    egress_rate_limit_bps: float = 0.0
+
+
+@dataclass
+class MavlinkForwardConfig:
+    """Downstream ground station output of the built-in MAVLink forwarder.
+
+    Attributes:
+        address: Where to forward: udpout:<host>:<port> sends to a listening
+            ground station, udpin:<host>:<port> listens and answers whoever
+            sends to it, tcp:<host>:<port> connects to a TCP server and
+            tcpin:<host>:<port> accepts TCP clients
+        name: Unique name of the output (defaults to the address)
+        system_ids: Vehicles forwarded to and accepted from this output (empty = all)
+        include_messages: Message names or IDs forwarded in either direction (empty = all)
+        exclude_messages: Message names or IDs never forwarded in either direction
+        downlink_rate_limit_bps: Vehicle-to-output limit in bytes per second (0 = unlimited)
+        uplink_rate_limit_bps: Output-to-vehicle limit in bytes per second (0 = unlimited);
+            frames over the limit are dropped so a ground station cannot
+            saturate the vehicle link
+        uplink_enabled: Relay frames sent by the output to the vehicles
+    """
+    address: str
+    name: str = ""
+    system_ids: list = field(default_factory=list)
+    include_messages: list = field(default_factory=list)
+    exclude_messages: list = field(default_factory=list)
+    downlink_rate_limit_bps: float = 0.0
+    uplink_rate_limit_bps: float = 0.0
+    uplink_enabled: bool = True
 
 
 @dataclass
@@ -123,6 +155,61 @@ class MavlinkTelemetryData:
     estimator_status: int = 0
 
 
+_TELEMETRY_FIELDS = tuple(f.name for f in fields(MavlinkTelemetryData))
+
+
+@dataclass(frozen=True)
+class MavlinkTelemetrySnapshot:
+    """Immutable copy of MavlinkTelemetryData published to consumers.
+
+    Has the same fields as MavlinkTelemetryData, so it can be read the same
+    way, plus a per-vehicle sequence number that increases with every
+    snapshot taken.  A field added to MavlinkTelemetryData must be added
+    here too (the telemetry publisher tests check that the two match).
+
+    Attributes:
+        sequence: Snapshot counter for the vehicle (newer snapshots are larger)
+    """
+    timestamp: float = 0.0
+    system_id: int = 0
+
+    # Attitude
+    roll: float = 0.0
+    pitch: float = 0.0
+    yaw: float = 0.0
+    rollspeed: float = 0.0
+    pitchspeed: float = 0.0
+    yawspeed: float = 0.0
+
+    # Position (local NED)
+    x: float = 0.0
+    y: float = 0.0
+    z: float = 0.0
+    vx: float = 0.0
+    vy: float = 0.0
+    vz: float = 0.0
+
+    # Status
+    armed: bool = False
+    mode: str = "UNKNOWN"
+    battery_voltage: float = 0.0
+    battery_remaining: int = 0
+
+    # Health
+    gps_fix_type: int = 0
+    satellites_visible: int = 0
+    estimator_status: int = 0
+
+    sequence: int = 0
+
+    @classmethod
+    def from_telemetry(cls, telemetry: MavlinkTelemetryData,
+                       sequence: int = 0) -> "MavlinkTelemetrySnapshot":
+        """Copy the current values of a telemetry container."""
+        values = {name: getattr(telemetry, name) for name in _TELEMETRY_FIELDS}
+        return cls(sequence=sequence, **values)
+
+
 @dataclass
 class MavlinkConnectionStatus:
     """Status information for a MAVLink connection.
@@ -135,6 +222,9 @@ class MavlinkConnectionStatus:
         messages_sent: Total messages sent
         messages_received: Total messages received
         latency_ms: Estimated round-trip latency in milliseconds
+        message_type_rates: Receive rate in Hz for each message type name
+        bytes_sent: Total bytes written to the link
+        bytes_received: Total bytes of valid frames received
     """
     connected: bool = False
     system_id: int = 0
@@ -143,6 +233,9 @@ class MavlinkConnectionStatus:
     messages_sent: int = 0
     messages_received: int = 0
     latency_ms: float = 0.0
+    message_type_rates: dict = field(default_factory=dict)
+    bytes_sent: int = 0
+    bytes_received: int = 0
 
 
 @dataclass
@@ -220,6 +313,43 @@ class MavlinkObjectConfig:
     linked_connection_name: str = ""  # Name of linked MAVLink connection
 
 
+@dataclass
+class MavlinkStreamProfile:
+    """Telemetry streams requested from every vehicle with SET_MESSAGE_INTERVAL.
+
+    Attributes:
+        rates: Message name -> requested rate in Hz (0 disables the stream,
+            a negative rate restores the vehicle's default)
+        disable_unlisted: Also disable streams the vehicle sends that are not
+            listed (command, parameter and text traffic is never disabled)
+    """
+    rates: dict = field(default_factory=dict)
+    disable_unlisted: bool = True
+
+
+def default_stream_profiles() -> dict:
+    """Built-in stream profiles: lean streams for training, more for debugging."""
+    return {
+        "training": MavlinkStreamProfile(rates={
+            'ATTITUDE': 50.0,
+            'LOCAL_POSITION_NED': 50.0,
+            'SYS_STATUS': 2.0,
+            'ESTIMATOR_STATUS': 2.0,
+            'GPS_RAW_INT': 1.0,
+        }),
+        "debug": MavlinkStreamProfile(rates={
+            'ATTITUDE': 100.0,
+            'LOCAL_POSITION_NED': 100.0,
+            'SYS_STATUS': 5.0,
+            'ESTIMATOR_STATUS': 10.0,
+            'GPS_RAW_INT': 5.0,
+            'ATTITUDE_TARGET': 50.0,
+            'POSITION_TARGET_LOCAL_NED': 50.0,
+            'VFR_HUD': 5.0,
+        }, disable_unlisted=False),
+    }
+
+
 @dataclass
 class MavlinkGlobalSettings:
     """Global MAVLink settings that apply to all connections.
@@ -234,6 +364,7 @@ class MavlinkGlobalSettings:
         telemetry_rate_hz: Telemetry receive/process rate in Hz
         heartbeat_interval: Interval for heartbeat messages in seconds
         connection_timeout: Timeout for connection attempts in seconds
+        connect_workers: Connection attempts run concurrently by connect_async
         enable_setpoint_sanitization: Enable safety checks on setpoints
         max_position_magnitude: Maximum position setpoint distance in meters
         max_velocity_magnitude: Maximum velocity setpoint in m/s
@@ -243,6 +374,51 @@ class MavlinkGlobalSettings:
         auto_reconnect: Automatically attempt to reconnect on connection loss
         reconnect_interval: Interval between reconnection attempts in seconds
         auto_connect_discovered: Automatically connect to discovered MAVLink devices
+        discovery_ports: UDP ports scanned by discovery, as a comma-separated
+            list of ports and ranges (e.g. "14550,14540-14549")
+        discovery_timeout_s: Listen window of a discovery scan (all ports at once)
+        background_discovery: Rescan the discovery ports periodically
+        discovery_interval_s: Seconds between background discovery scans
+        receive_mode: How inbound messages are read: "poll" (service timer),
+            "thread" (one blocking I/O thread per connection) or "selector"
+            (one I/O thread multiplexing all connections)
+        receive_queue_size: Capacity of each connection's receive queue when an
+            I/O thread is used; the oldest messages are dropped when full
+        selector_messages_per_link: Messages read from one connection per
+            selector round before moving on (fairness between vehicles)
+        fast_telemetry_decode: Decode the hot telemetry messages straight from
+            the frame bytes instead of through pymavlink
+        mocap_miss_policy: What the mocap sender does with deadlines it missed:
+            "skip" (wait for the next slot) or "catch_up" (send them late)
+        ui_telemetry_rate_hz: Rate at which telemetry snapshots are published
+            to the UI (telemetry_updated); updates in between are coalesced
+        telemetry_history_s: Telemetry history kept per vehicle, in seconds at
+            telemetry_history_rate_hz (0 disables the history)
+        telemetry_history_rate_hz: Update rate the history buffers are sized
+            for; faster vehicles keep proportionally less time
+        recording_directory: Directory flight recordings (.tlog) are written to
+        recording_max_mb: Start a new recording file after this many megabytes
+        recording_max_duration_s: Start a new recording file after this many
+            seconds (0 = only rotate by size)
+        stream_profile: Name of the stream profile requested from every vehicle
+            after its first heartbeat and again after a reconnect ("" leaves
+            the vehicle's default streams alone)
+        stream_profiles: Available stream profiles by name (MavlinkStreamProfile)
+        adaptive_rate_control: Lower telemetry stream rates, then setpoint rates,
+            on a congested link and restore them when it recovers (mocap is
+            never slowed down)
+        adaptive_max_loss: Inbound packet loss fraction above which a link is congested
+        adaptive_max_rtt_ms: PING round-trip time above which a link is congested
+        adaptive_max_utilization: Fraction of a link's egress rate limit above
+            which it is congested (links without a limit are judged by loss and RTT)
+        link_test_rate_hz: PING rate of the connection quality test
+        engine_process: Run the vehicle links, mocap and setpoint streaming in a
+            child process, fed through shared memory (read when the service
+            starts; custom message handlers and replay controls only work
+            without it)
+        fleet_table_name: Shared memory name under which the latest telemetry
+            of every vehicle is published for external tools (see
+            services.fleet_table; empty = not published)
     """
     default_connection_string: str = "udpin:0.0.0.0:14550"
     default_mocap_rate_hz: float = 100.0
@@ -250,6 +426,7 @@ class MavlinkGlobalSettings:
     telemetry_rate_hz: float = 20.0
     heartbeat_interval: float = 1.0
     connection_timeout: float = 5.0
+    connect_workers: int = 8
     enable_setpoint_sanitization: bool = True
     max_position_magnitude: float = 100.0
     max_velocity_magnitude: float = 10.0
@@ -259,6 +436,30 @@ class MavlinkGlobalSettings:
     auto_reconnect: bool = True
     reconnect_interval: float = 5.0
     auto_connect_discovered: bool = False  # Auto-connect to discovered devices
+    discovery_ports: str = "14550,14540,14560"
+    discovery_timeout_s: float = 1.5
+    background_discovery: bool = False
+    discovery_interval_s: float = 10.0
+    receive_mode: str = "poll"
+    receive_queue_size: int = 1000
+    selector_messages_per_link: int = 32
+    fast_telemetry_decode: bool = False
+    mocap_miss_policy: str = "skip"
+    ui_telemetry_rate_hz: float = 10.0
+    telemetry_history_s: float = 600.0
+    telemetry_history_rate_hz: float = 250.0
+    recording_directory: str = "logs/mavlink"
+    recording_max_mb: float = 256.0
+    recording_max_duration_s: float = 3600.0
+    stream_profile: str = ""
+    stream_profiles: dict = field(default_factory=default_stream_profiles)
+    adaptive_rate_control: bool = False
+    adaptive_max_loss: float = 0.05
+    adaptive_max_rtt_ms: float = 250.0
+    adaptive_max_utilization: float = 0.9
+    link_test_rate_hz: float = 20.0
+    engine_process: bool = False
+    fleet_table_name: str = ""
 
 
 # Lookup tables used by DiscoveredDevice (defined outside the class to keep
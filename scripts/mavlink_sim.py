@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+"""
+Local multi-vehicle MAVLink stand-in for load testing MavlinkService.
+
+Spins up N simulated PX4-like vehicles, each on its own local UDP port, all
+served by one selector thread.  Like PX4 behind mavlink-router, a vehicle is
+passive until it receives a packet: the first datagram (normally one of the
+GCS heartbeats sent by MavlinkConnection._prime_connection) registers the
+sender's address and telemetry is unicast back to it from then on.  Connect
+to vehicle i with the connection string udpout:127.0.0.1:<base-port + i>.
+
+Each vehicle streams HEARTBEAT, ATTITUDE, LOCAL_POSITION_NED and SYS_STATUS
+at configurable rates, answers PING, and consumes ATT_POS_MOCAP and
+SET_POSITION_TARGET_LOCAL_NED.  Like PX4, stream rates can be changed with
+MAV_CMD_SET_MESSAGE_INTERVAL (acknowledged with COMMAND_ACK).  Everything it
+receives is measured (rate, gaps, and latency for messages that carry a Unix
+timestamp such as mocap), so the simulator is both load generator and sink.
+
+Usage:
+    python scripts/mavlink_sim.py [--vehicles N] [--base-port PORT]
+        [--attitude-rate HZ] [--position-rate HZ] [--duration SECS] [--json]
+"""
+import argparse
+import collections
+import importlib
+import json
+import math
+import os
+import selectors
+import socket
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+DEFAULT_RATES = {
+    'HEARTBEAT': 1.0,
+    'ATTITUDE': 50.0,
+    'LOCAL_POSITION_NED': 30.0,
+    'SYS_STATUS': 2.0,
+}
+
+# Streams the simulated vehicle can send (SET_MESSAGE_INTERVAL accepts these)
+STREAMS = ('ATTITUDE', 'LOCAL_POSITION_NED', 'SYS_STATUS')
+
+MAV_CMD_SET_MESSAGE_INTERVAL = 511
+MAV_RESULT_ACCEPTED = 0
+MAV_RESULT_UNSUPPORTED = 3
+
+# A reception gap is an interval this many times longer than the average
+GAP_FACTOR = 3.0
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class StreamStats:
+    """Reception statistics for one message type."""
+
+    def __init__(self, latency_samples: int = 4096):
+        self.count = 0
+        self.first = None
+        self.last = None
+        self.mean_interval = None
+        self.intervals = 0
+        self.interval_sum = 0.0
+        self.interval_sq_sum = 0.0
+        self.max_gap = 0.0
+        self.gaps = 0
+        self.latencies = collections.deque(maxlen=latency_samples)
+
+    def record(self, now: float, latency: float = None):
+        """Count a message received at monotonic time ``now``."""
+        if self.last is not None:
+            interval = now - self.last
+            if self.mean_interval is not None and interval > GAP_FACTOR * self.mean_interval:
+                self.gaps += 1
+            self.mean_interval = interval if self.mean_interval is None \
+                else 0.95 * self.mean_interval + 0.05 * interval
+            if interval > self.max_gap:
+                self.max_gap = interval
+            self.intervals += 1
+            self.interval_sum += interval
+            self.interval_sq_sum += interval * interval
+        else:
+            self.first = now
+        self.last = now
+        self.count += 1
+        if latency is not None:
+            self.latencies.append(latency)
+
+    def summary(self) -> dict:
+        """Get count, rate, gaps, interval jitter and (if measured) latency in ms."""
+        span = (self.last - self.first) if self.count > 1 else 0.0
+        summary = {
+            'count': self.count,
+            'rate_hz': (self.count - 1) / span if span > 0 else 0.0,
+            'gaps': self.gaps,
+            'max_gap_ms': self.max_gap * 1000.0,
+        }
+        if self.intervals:
+            mean = self.interval_sum / self.intervals
+            variance = max(0.0, self.interval_sq_sum / self.intervals - mean * mean)
+            summary['interval_mean_ms'] = mean * 1000.0
+            summary['interval_std_ms'] = math.sqrt(variance) * 1000.0
+        if self.latencies:
+            latencies = sorted(self.latencies)
+            summary['latency_p50_ms'] = _percentile(latencies, 0.5) * 1000.0
+            summary['latency_p99_ms'] = _percentile(latencies, 0.99) * 1000.0
+            summary['latency_max_ms'] = latencies[-1] * 1000.0
+        return summary
+
+
+class SimVehicle:
+    """One simulated vehicle bound to a local UDP port."""
+
+    def __init__(self, dialect, system_id: int, port: int, rates: Dict[str, float],
+                 host: str = "127.0.0.1", target: Optional[Tuple[str, int]] = None):
+        """Initialize the vehicle.
+
+        Args:
+            dialect: pymavlink dialect module
+            system_id: MAVLink system ID
+            port: Local UDP port to bind
+            rates: Send rate in Hz per message name (0 disables a stream)
+            host: Local address to bind
+            target: Send to this address immediately instead of waiting for
+                the first packet
+        """
+        self.dialect = dialect
+        self.system_id = system_id
+        self.port = port
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, port))
+        self.sock.setblocking(False)
+        self.peer = target
+        self.mav = dialect.MAVLink(None, srcSystem=system_id, srcComponent=1)
+        self.parser = dialect.MAVLink(None)
+        self.parser.robust_parsing = True
+
+        self.boot = time.monotonic()
+        self.periods = {name: 1.0 / hz for name, hz in rates.items() if hz > 0}
+        self.default_periods = dict(self.periods)
+        self.next_send = {name: self.boot for name in self.periods}
+        self.position = [0.0, 0.0, 0.0]
+        self.quaternion = (1.0, 0.0, 0.0, 0.0)
+        self.received: Dict[str, StreamStats] = collections.defaultdict(StreamStats)
+        self.sent = collections.Counter()
+        self.send_errors = 0
+        self.bad_data = 0
+
+    def next_deadline(self) -> float:
+        """Monotonic time of the next scheduled send."""
+        return min(self.next_send.values()) if self.next_send and self.peer else math.inf
+
+    def on_readable(self):
+        """Read and handle every pending datagram."""
+        while True:
+            try:
+                data, address = self.sock.recvfrom(65535)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                return
+            if self.peer is None:
+                self.peer = address
+                now = time.monotonic()
+                self.next_send = {name: now for name in self.periods}
+            try:
+                messages = self.parser.parse_buffer(data) or []
+            except Exception:
+                self.bad_data += 1
+                continue
+            for msg in messages:
+                self._handle(msg)
+
+    def send_due(self, now: float):
+        """Send every stream whose deadline has passed."""
+        if self.peer is None:
+            return
+        for name, due in self.next_send.items():
+            if due <= now:
+                self._send(self._encode(name, now))
+                period = self.periods[name]
+                due += period
+                if due <= now:
+                    due = now + period  # Fell behind; skip the missed slots
+                self.next_send[name] = due
+
+    def close(self):
+        """Close the socket."""
+        self.sock.close()
+
+    def report(self) -> dict:
+        """Get what this vehicle sent and received."""
+        return {
+            'system_id': self.system_id,
+            'port': self.port,
+            'peer': f"{self.peer[0]}:{self.peer[1]}" if self.peer else None,
+            'sent': dict(self.sent),
+            'send_errors': self.send_errors,
+            'bad_data': self.bad_data,
+            'received': {name: stats.summary() for name, stats in sorted(self.received.items())},
+        }
+
+    def _handle(self, msg):
+        msg_type = msg.get_type()
+        if msg_type == 'BAD_DATA':
+            self.bad_data += 1
+            return
+        now = time.monotonic()
+        latency = None
+        if msg_type == 'ATT_POS_MOCAP':
+            latency = time.time() - msg.time_usec / 1e6
+            self.position = [msg.x, msg.y, msg.z]
+            self.quaternion = tuple(msg.q)
+        elif msg_type == 'SET_POSITION_TARGET_LOCAL_NED':
+            pass
+        elif msg_type == 'PING' and msg.target_system == 0 and msg.target_component == 0:
+            # Echo requests back to the sender; a nonzero target marks a reply (PX4/ArduPilot)
+            self._send(self.mav.ping_encode(msg.time_usec, msg.seq,
+                                            msg.get_srcSystem(), msg.get_srcComponent()))
+        elif (msg_type == 'COMMAND_LONG' and msg.target_system in (0, self.system_id)
+              and msg.command == MAV_CMD_SET_MESSAGE_INTERVAL):
+            result = self._set_message_interval(int(msg.param1), msg.param2, now)
+            self._send(self.mav.command_ack_encode(msg.command, result))
+        self.received[msg_type].record(now, latency)
+
+    def _set_message_interval(self, msg_id: int, interval_us: float, now: float) -> int:
+        """Apply SET_MESSAGE_INTERVAL (-1 disables, 0 restores the default rate)."""
+        msg_class = self.dialect.mavlink_map.get(msg_id)
+        name = msg_class.msgname if msg_class is not None else None
+        if name not in STREAMS:
+            return MAV_RESULT_UNSUPPORTED
+        if interval_us > 0:
+            self.periods[name] = interval_us / 1e6
+        elif interval_us == 0 and name in self.default_periods:
+            self.periods[name] = self.default_periods[name]
+        else:
+            self.periods.pop(name, None)
+            self.next_send.pop(name, None)
+            return MAV_RESULT_ACCEPTED
+        self.next_send[name] = now
+        return MAV_RESULT_ACCEPTED
+
+    def _encode(self, name: str, now: float):
+        mav = self.mav
+        boot_ms = int((now - self.boot) * 1000) & 0xFFFFFFFF
+        if name == 'HEARTBEAT':
+            return mav.heartbeat_encode(2, 12, 129, 0, 4)  # Quadrotor, PX4, armed, active
+        if name == 'ATTITUDE':
+            w, x, y, z = self.quaternion
+            roll = math.atan2(2 * (w * x + y * z), 1 - 2 * (x * x + y * y))
+            pitch = math.asin(max(-1.0, min(1.0, 2 * (w * y - z * x))))
+            yaw = math.atan2(2 * (w * z + x * y), 1 - 2 * (y * y + z * z))
+            return mav.attitude_encode(boot_ms, roll, pitch, yaw, 0.0, 0.0, 0.0)
+        if name == 'LOCAL_POSITION_NED':
+            x, y, z = self.position
+            return mav.local_position_ned_encode(boot_ms, x, y, z, 0.0, 0.0, 0.0)
+        if name == 'SYS_STATUS':
+            return mav.sys_status_encode(1, 1, 1, 250, 12400, 500, 80, 0, 0, 0, 0, 0, 0)
+        raise ValueError(f"Unsupported stream: {name}")
+
+    def _send(self, msg):
+        try:
+            self.sock.sendto(msg.pack(self.mav), self.peer)
+            self.sent[msg.get_type()] += 1
+        except OSError:
+            self.send_errors += 1
+
+
+class VehicleFleet(threading.Thread):
+    """N simulated vehicles served by one selector thread."""
+
+    def __init__(self, count: int, base_port: int = 14540, base_system_id: int = 1,
+                 rates: Dict[str, float] = None, host: str = "127.0.0.1",
+                 target: Optional[Tuple[str, int]] = None, mavlink1: bool = False):
+        """Create the vehicles and bind their ports.
+
+        Args:
+            count: Number of vehicles
+            base_port: UDP port of the first vehicle (the rest follow)
+            base_system_id: System ID of the first vehicle (the rest follow)
+            rates: Stream rates in Hz (default: DEFAULT_RATES)
+            host: Local address to bind
+            target: Push telemetry to this address without waiting for priming
+            mavlink1: Send MAVLink 1 frames instead of MAVLink 2
+        """
+        super().__init__(name="mavlink-sim", daemon=True)
+        from pymavlink import mavutil
+        version = "v10" if mavlink1 else "v20"
+        dialect = importlib.import_module(f"pymavlink.dialects.{version}.{mavutil.current_dialect}")
+        rates = dict(DEFAULT_RATES if rates is None else rates)
+        self.host = host
+        self.vehicles = [
+            SimVehicle(dialect, base_system_id + i, base_port + i, rates, host, target)
+            for i in range(count)
+        ]
+        self._selector = selectors.DefaultSelector()
+        for vehicle in self.vehicles:
+            self._selector.register(vehicle.sock, selectors.EVENT_READ, vehicle)
+        self._stop_event = threading.Event()
+        self.started_at = None
+
+    def connection_strings(self) -> List[str]:
+        """Connection strings MavlinkService should use for each vehicle."""
+        return [f"udpout:{self.host}:{v.port}" for v in self.vehicles]
+
+    def stop(self, timeout: float = 2.0):
+        """Stop the thread and close every socket."""
+        self._stop_event.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
+
+    def run(self):
+        """Serve every vehicle until stop() is called."""
+        self.started_at = time.monotonic()
+        try:
+            while not self._stop_event.is_set():
+                deadline = min((v.next_deadline() for v in self.vehicles), default=math.inf)
+                timeout = min(0.1, max(0.0, deadline - time.monotonic()))
+                for key, _ in self._selector.select(timeout):
+                    key.data.on_readable()
+                now = time.monotonic()
+                for vehicle in self.vehicles:
+                    vehicle.send_due(now)
+        finally:
+            self._selector.close()
+            for vehicle in self.vehicles:
+                vehicle.close()
+
+    def report(self) -> dict:
+        """Get per-vehicle reports plus fleet totals."""
+        vehicles = [v.report() for v in self.vehicles]
+        totals = collections.Counter()
+        for report in vehicles:
+            for name, stats in report['received'].items():
+                totals[name] += stats['count']
+        return {
+            'vehicles': vehicles,
+            'received_totals': dict(totals),
+            'sent_total': sum(sum(r['sent'].values()) for r in vehicles),
+            'uptime_s': time.monotonic() - self.started_at if self.started_at else 0.0,
+        }
+
+
+def _print_summary(report: dict):
+    for vehicle in report['vehicles']:
+        received = vehicle['received']
+        mocap = received.get('ATT_POS_MOCAP', {})
+        setpoint = received.get('SET_POSITION_TARGET_LOCAL_NED', {})
+        print(f"sys {vehicle['system_id']:3d} port {vehicle['port']} "
+              f"peer {vehicle['peer'] or '-':21s} "
+              f"mocap {mocap.get('rate_hz', 0.0):6.1f} Hz "
+              f"p99 {mocap.get('latency_p99_ms', 0.0):6.2f} ms gaps {mocap.get('gaps', 0):4d} | "
+              f"setpoint {setpoint.get('rate_hz', 0.0):6.1f} Hz gaps {setpoint.get('gaps', 0):4d}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate PX4-like MAVLink vehicles on local UDP ports")
+    parser.add_argument('--vehicles', type=int, default=4, help="Number of vehicles")
+    parser.add_argument('--base-port', type=int, default=14540, help="UDP port of the first vehicle")
+    parser.add_argument('--base-sysid', type=int, default=1, help="System ID of the first vehicle")
+    parser.add_argument('--host', default="127.0.0.1", help="Local address to bind")
+    parser.add_argument('--target', help="Push telemetry to HOST:PORT without waiting for priming")
+    parser.add_argument('--heartbeat-rate', type=float, default=DEFAULT_RATES['HEARTBEAT'])
+    parser.add_argument('--attitude-rate', type=float, default=DEFAULT_RATES['ATTITUDE'])
+    parser.add_argument('--position-rate', type=float, default=DEFAULT_RATES['LOCAL_POSITION_NED'])
+    parser.add_argument('--sys-status-rate', type=float, default=DEFAULT_RATES['SYS_STATUS'])
+    parser.add_argument('--mavlink1', action='store_true', help="Send MAVLink 1 frames")
+    parser.add_argument('--duration', type=float, default=0.0, help="Stop after this many seconds (0 = Ctrl+C)")
+    parser.add_argument('--report-interval', type=float, default=5.0, help="Seconds between summaries")
+    parser.add_argument('--json', action='store_true', help="Print the final report as JSON")
+    args = parser.parse_args()
+
+    target = None
+    if args.target:
+        host, _, port = args.target.rpartition(':')
+        target = (host or "127.0.0.1", int(port))
+    rates = {
+        'HEARTBEAT': args.heartbeat_rate,
+        'ATTITUDE': args.attitude_rate,
+        'LOCAL_POSITION_NED': args.position_rate,
+        'SYS_STATUS': args.sys_status_rate,
+    }
+    fleet = VehicleFleet(args.vehicles, args.base_port, args.base_sysid, rates,
+                         host=args.host, target=target, mavlink1=args.mavlink1)
+    fleet.start()
+    # With --json, stdout carries only the report; the banner (which also
+    # tells a parent process the ports are bound) goes to stderr
+    banner = sys.stderr if args.json else sys.stdout
+    print(f"Simulating {args.vehicles} vehicle(s); connect with:", file=banner)
+    for connection_string in fleet.connection_strings():
+        print(f"  {connection_string}", file=banner)
+    banner.flush()
+
+    end = time.monotonic() + args.duration if args.duration > 0 else math.inf
+    next_report = time.monotonic() + args.report_interval
+    try:
+        while time.monotonic() < end:
+            time.sleep(min(0.2, max(0.0, end - time.monotonic())))
+            if not args.json and time.monotonic() >= next_report:
+                _print_summary(fleet.report())
+                next_report += args.report_interval
+    except KeyboardInterrupt:
+        pass
+    fleet.stop()
+
+    report = fleet.report()
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_summary(report)
+
+
+if __name__ == '__main__':
+    main()
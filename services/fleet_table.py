@@ -0,0 +1,260 @@
+"""
+Shared-memory fleet telemetry table.
+
+The service publishes the newest telemetry of every connected vehicle into a
+named multiprocessing.shared_memory block so analysis scripts running next to
+the trainer can read fleet state without sockets or serialization.  This
+module has no Qt dependency; external tools only need NumPy:
+
+    from services.fleet_table import FleetTableReader
+
+    with FleetTableReader("mavlink_fleet") as table:
+        row = table.read(1)             # one vehicle, or None
+        fleet = table.snapshot()        # every vehicle in the table
+
+Layout (all little-endian, fixed for a given LAYOUT_VERSION):
+
+- Header (HEADER_BYTES): magic, layout version, slot count, row size and
+  the number of row writes so far (uint64 each).  Readers can poll the
+  write counter to see whether anything changed.
+- Versions: one uint64 per slot.
+- Rows: one FLEET_ROW_DTYPE row per slot, indexed by system ID.  A row with
+  system_id 0 is unused (0 is the MAVLink broadcast ID, never a vehicle).
+
+Each slot is a seqlock: the writer makes the slot's version odd, writes the
+row, then makes it even again.  A reader copies the row between two reads of
+the version and retries when they differ or are odd, so it never returns a
+half-written row and never blocks the writer.  A Python writer can be
+preempted mid-write for a whole GIL switch interval, so a reader that finds a
+slot odd yields and keeps retrying for up to READ_TIMEOUT_S, then falls back
+to the last consistent copy it read.  This relies on the writer's stores
+becoming visible in program order, as they do on x86-64.
+"""
+import operator
+import time
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from services.shm_ring import attach_shared_memory
+from services.telemetry_store import CONTINUOUS_FIELDS
+
+FLEET_TABLE_MAGIC = 0x464C454554544231  # "FLEETTB1"
+LAYOUT_VERSION = 1
+
+# Header: magic, layout version, slots, row bytes, writes (uint64 each)
+HEADER_BYTES = 64
+_MAGIC, _LAYOUT, _SLOTS, _ROW_BYTES, _WRITES = range(5)
+
+# One slot per MAVLink system ID
+SLOTS = 256
+
+FLEET_ROW_DTYPE = np.dtype(
+    [
+        ('t', 'f8'),              # Monotonic time of the update
+        ('system_id', 'u1'),      # 0 = unused slot
+        ('connected', '?'),
+    ]
+    + [(name, 'f8') for name in CONTINUOUS_FIELDS]
+    + [
+        ('armed', '?'),
+        ('mode', 'U16'),
+        ('battery_remaining', 'i1'),
+        ('gps_fix_type', 'u1'),
+        ('satellites_visible', 'u1'),
+        ('estimator_status', 'u2'),
+    ]
+)
+TELEMETRY_FIELDS = FLEET_ROW_DTYPE.names[3:]
+_read_telemetry = operator.attrgetter(*TELEMETRY_FIELDS)
+
+# How long a reader keeps retrying a row that is being written (a preempted
+# writer holds a slot odd for at least one GIL switch interval, 5 ms)
+READ_TIMEOUT_S = 0.05
+
+
+def table_size() -> int:
+    """Size of a fleet table block in bytes."""
+    return HEADER_BYTES + SLOTS * 8 + SLOTS * FLEET_ROW_DTYPE.itemsize
+
+
+def _views(block: shared_memory.SharedMemory):
+    """Header, version and row arrays over a table block."""
+    header = np.ndarray((HEADER_BYTES // 8,), dtype='<u8', buffer=block.buf)
+    versions = np.ndarray((SLOTS,), dtype='<u8', buffer=block.buf, offset=HEADER_BYTES)
+    rows = np.ndarray((SLOTS,), dtype=FLEET_ROW_DTYPE, buffer=block.buf,
+                      offset=HEADER_BYTES + SLOTS * 8)
+    return header, versions, rows
+
+
+class FleetTableWriter:
+    """Owns the table block and writes vehicle rows (one writer thread only)."""
+
+    def __init__(self, name: str):
+        """Create the table block.
+
+        Args:
+            name: Shared memory name readers attach to
+
+        Raises:
+            FileExistsError: If a block with that name already exists
+        """
+        self._shm = shared_memory.SharedMemory(name=name, create=True, size=table_size())
+        self._header, self._versions, self._rows = _views(self._shm)
+        self._versions[:] = 0
+        self._rows[:] = np.zeros(1, dtype=FLEET_ROW_DTYPE)
+        self._header[:] = 0
+        self._header[_LAYOUT] = LAYOUT_VERSION
+        self._header[_SLOTS] = SLOTS
+        self._header[_ROW_BYTES] = FLEET_ROW_DTYPE.itemsize
+        # Written last: readers treat a block without the magic as not ready
+        self._header[_MAGIC] = FLEET_TABLE_MAGIC
+
+    @property
+    def name(self) -> str:
+        """Shared memory name of the table."""
+        return self._shm.name
+
+    def update(self, system_id: int, telemetry, connected: bool = True, t: Optional[float] = None):
+        """Write a vehicle's latest telemetry.
+
+        Matches the TelemetryPublisher subscriber signature, so the writer
+        can be subscribed directly.
+
+        Args:
+            system_id: System ID of the vehicle (1-255)
+            telemetry: MavlinkTelemetryData or MavlinkTelemetrySnapshot
+            connected: Whether the link is up
+            t: Monotonic update time (default: now)
+        """
+        if not 0 < system_id < SLOTS:
+            return
+        t = time.monotonic() if t is None else t
+        row = (t, system_id, connected) + _read_telemetry(telemetry)
+        self._write(system_id, row)
+
+    def set_connected(self, system_id: int, connected: bool):
+        """Flag a vehicle's link as up or down, keeping its last telemetry."""
+        if not 0 < system_id < SLOTS or self._rows[system_id]['system_id'] != system_id:
+            return
+        row = self._rows[system_id].copy()
+        row['connected'] = connected
+        self._write(system_id, row)
+
+    def remove(self, system_id: int):
+        """Clear a vehicle's row."""
+        if not 0 < system_id < SLOTS or self._rows[system_id]['system_id'] == 0:
+            return
+        self._write(system_id, np.zeros(1, dtype=FLEET_ROW_DTYPE)[0])
+
+    def _write(self, slot: int, row):
+        version = int(self._versions[slot])
+        self._versions[slot] = version + 1
+        self._rows[slot] = row
+        self._versions[slot] = version + 2
+        self._header[_WRITES] += 1
+
+    def close(self):
+        """Destroy the table; attached readers keep their mapping until they close."""
+        self._header = self._versions = self._rows = None
+        self._shm.close()
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class FleetTableReader:
+    """Attaches to a fleet table and reads consistent vehicle rows."""
+
+    def __init__(self, name: str):
+        """Attach to a table.
+
+        Args:
+            name: Shared memory name the writer was created with
+
+        Raises:
+            FileNotFoundError: If no table with that name exists
+            ValueError: If the block is not a fleet table of this layout
+        """
+        self._shm = attach_shared_memory(name)
+        if self._shm.size < table_size():
+            self._shm.close()
+            raise ValueError(f"Shared memory block {name!r} is too small for a fleet table")
+        self._header, self._versions, self._rows = _views(self._shm)
+        self._last: Dict[int, Optional[np.void]] = {}
+        layout = (int(self._header[_MAGIC]), int(self._header[_LAYOUT]),
+                  int(self._header[_SLOTS]), int(self._header[_ROW_BYTES]))
+        if layout != (FLEET_TABLE_MAGIC, LAYOUT_VERSION, SLOTS, FLEET_ROW_DTYPE.itemsize):
+            self.close()
+            raise ValueError(f"Shared memory block {name!r} is not a fleet table "
+                             f"of layout version {LAYOUT_VERSION}")
+
+    def __enter__(self) -> 'FleetTableReader':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def writes(self) -> int:
+        """Row writes so far; unchanged means nothing new to read."""
+        return int(self._header[_WRITES])
+
+    def read(self, system_id: int) -> Optional[np.void]:
+        """Get a consistent copy of one vehicle's row.
+
+        If the row is still being written after READ_TIMEOUT_S, the last
+        consistent copy this reader got is returned instead.
+
+        Args:
+            system_id: System ID of the vehicle
+
+        Returns:
+            FLEET_ROW_DTYPE row, or None if the vehicle is not in the table
+        """
+        if not 0 < system_id < SLOTS:
+            return None
+        versions, rows = self._versions, self._rows
+        deadline = None
+        while True:
+            before = int(versions[system_id])
+            if not before & 1:
+                row = rows[system_id].copy()
+                if int(versions[system_id]) == before:
+                    row = row if row['system_id'] == system_id else None
+                    self._last[system_id] = row
+                    return row
+            if deadline is None:
+                deadline = time.monotonic() + READ_TIMEOUT_S
+            elif time.monotonic() >= deadline:
+                return self._last.get(system_id)
+            # Yield so a writer thread in this process can finish the row
+            time.sleep(0)
+
+    def snapshot(self) -> np.ndarray:
+        """Get a consistent copy of every vehicle's row.
+
+        Rows are individually consistent; the table as a whole is not a
+        single point in time (compare the 't' fields when that matters).
+
+        Returns:
+            FLEET_ROW_DTYPE array ordered by system ID
+        """
+        before = self._versions.copy()
+        rows = self._rows.copy()
+        after = self._versions.copy()
+        for slot in np.flatnonzero((before != after) | (before & 1).astype(bool)):
+            row = self.read(int(slot))
+            rows[slot] = row if row is not None else np.zeros(1, dtype=FLEET_ROW_DTYPE)[0]
+        return rows[rows['system_id'] != 0]
+
+    def system_ids(self) -> List[int]:
+        """System IDs currently in the table."""
+        return self.snapshot()['system_id'].tolist()
+
+    def close(self):
+        """Detach from the table."""
+        self._header = self._versions = self._rows = None
+        self._shm.close()
@@ -0,0 +1,184 @@
+"""
+Adaptive link-aware rate control.
+
+A LinkRateController watches one link's inbound packet loss (sequence gaps),
+PING round-trip time and outbound throughput.  Once per evaluation interval
+it judges the link congested if any of them is above its threshold and then
+slows the link down one step: telemetry stream rates first (through the
+connection's stream subscription), setpoint rates once telemetry is at its
+minimum.  Mocap is never slowed down, since it is what the vehicle's
+estimator needs most on a bad link.
+
+When every measurement has stayed below half of its threshold for
+RECOVERY_HOLD seconds the link is sped back up one step, in reverse order
+(setpoints first).  Every adjustment is logged with the measurements that
+caused it.
+"""
+import logging
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Each step multiplies (or, when recovering, divides) a rate by this factor
+STEP_FACTOR = 0.5
+MIN_TELEMETRY_SCALE = 0.125
+MIN_SETPOINT_SCALE = 0.25
+
+# Seconds between congestion checks
+EVALUATION_INTERVAL = 1.0
+
+# Seconds a link has to stay healthy before each recovery step
+RECOVERY_HOLD = 5.0
+
+# A link is healthy when every measurement is below this fraction of its threshold
+RECOVERY_MARGIN = 0.5
+
+
+class LinkRateController:
+    """Decides how far to slow down telemetry and setpoints on one link.
+
+    Not thread-safe: the service calls it from its own thread only.
+    """
+
+    def __init__(self, label: str = "", max_loss: float = 0.05, max_rtt_ms: float = 250.0,
+                 max_utilization: float = 0.9, evaluation_interval: float = EVALUATION_INTERVAL,
+                 recovery_hold: float = RECOVERY_HOLD):
+        """Initialize a controller with both rates at full speed.
+
+        Args:
+            label: Link name used in log messages
+            max_loss: Inbound loss fraction above which the link is congested
+            max_rtt_ms: Round-trip time above which the link is congested
+            max_utilization: Fraction of the egress rate limit above which the
+                link is congested
+            evaluation_interval: Seconds between congestion checks
+            recovery_hold: Seconds of health required before each recovery step
+        """
+        self.label = label
+        self.evaluation_interval = evaluation_interval
+        self.recovery_hold = recovery_hold
+        self.configure(max_loss, max_rtt_ms, max_utilization)
+
+        self.telemetry_scale = 1.0
+        self.setpoint_scale = 1.0
+        self.adjustments = 0
+
+        # Latest measurements
+        self.loss = 0.0
+        self.rtt_ms = 0.0
+        self.throughput_bps = 0.0
+        self.utilization: Optional[float] = None
+
+        self._last: Optional[tuple] = None  # (time, dropped, received, bytes sent)
+        self._healthy_since: Optional[float] = None
+
+    def configure(self, max_loss: float, max_rtt_ms: float, max_utilization: float):
+        """Change the congestion thresholds (0 disables a threshold)."""
+        self.max_loss = max_loss
+        self.max_rtt_ms = max_rtt_ms
+        self.max_utilization = max_utilization
+
+    @property
+    def is_throttled(self) -> bool:
+        """Whether any rate is currently lowered."""
+        return self.telemetry_scale < 1.0 or self.setpoint_scale < 1.0
+
+    def update(self, now: float, packets_dropped: int, messages_received: int, bytes_sent: int,
+               latency_ms: float, rate_limit_bps: float = 0.0,
+               can_lower_telemetry: bool = True) -> bool:
+        """Take a measurement and adjust the rates if an evaluation is due.
+
+        Args:
+            now: Current time (time.monotonic())
+            packets_dropped: Total inbound packets lost on the link
+            messages_received: Total messages received on the link
+            bytes_sent: Total bytes written to the link
+            latency_ms: Current PING round-trip time (0 = not measured)
+            rate_limit_bps: The link's egress limit in bytes per second (0 = none)
+            can_lower_telemetry: Whether telemetry rates can be changed (they can
+                only be lowered while a stream profile is active)
+
+        Returns:
+            True if telemetry_scale or setpoint_scale changed
+        """
+        sample = (now, packets_dropped, messages_received, bytes_sent)
+        if self._last is None:
+            self._last = sample
+            return False
+        elapsed = now - self._last[0]
+        if elapsed < self.evaluation_interval:
+            return False
+        dropped = max(0, packets_dropped - self._last[1])
+        received = max(0, messages_received - self._last[2])
+        sent = max(0, bytes_sent - self._last[3])
+        self._last = sample
+
+        self.loss = dropped / (dropped + received) if dropped + received else 0.0
+        self.rtt_ms = latency_ms
+        self.throughput_bps = sent / elapsed
+        self.utilization = self.throughput_bps / rate_limit_bps if rate_limit_bps > 0 else None
+
+        reasons = self._over(1.0)
+        if reasons:
+            self._healthy_since = None
+            return self._slow_down(reasons, can_lower_telemetry)
+        if not self.is_throttled or self._over(RECOVERY_MARGIN):
+            self._healthy_since = None
+            return False
+        if self._healthy_since is None:
+            self._healthy_since = now
+            return False
+        if now - self._healthy_since < self.recovery_hold:
+            return False
+        self._healthy_since = now
+        return self._speed_up()
+
+    def get_stats(self) -> dict:
+        """Get the current scales and the latest measurements."""
+        return {
+            'telemetry_scale': self.telemetry_scale,
+            'setpoint_scale': self.setpoint_scale,
+            'adjustments': self.adjustments,
+            'loss': self.loss,
+            'rtt_ms': self.rtt_ms,
+            'throughput_bps': self.throughput_bps,
+            'utilization': self.utilization,
+        }
+
+    def _over(self, margin: float) -> List[str]:
+        """Describe every measurement above margin times its threshold."""
+        reasons = []
+        if self.max_loss > 0 and self.loss > self.max_loss * margin:
+            reasons.append(f"loss {self.loss:.1%}")
+        if self.max_rtt_ms > 0 and self.rtt_ms > self.max_rtt_ms * margin:
+            reasons.append(f"rtt {self.rtt_ms:.0f} ms")
+        if (self.max_utilization > 0 and self.utilization is not None
+                and self.utilization > self.max_utilization * margin):
+            reasons.append(f"egress {self.utilization:.0%} of limit")
+        return reasons
+
+    def _slow_down(self, reasons: List[str], can_lower_telemetry: bool) -> bool:
+        if can_lower_telemetry and self.telemetry_scale > MIN_TELEMETRY_SCALE:
+            self.telemetry_scale = max(MIN_TELEMETRY_SCALE, self.telemetry_scale * STEP_FACTOR)
+        elif self.setpoint_scale > MIN_SETPOINT_SCALE:
+            self.setpoint_scale = max(MIN_SETPOINT_SCALE, self.setpoint_scale * STEP_FACTOR)
+        else:
+            return False
+        self._log("congested", reasons)
+        return True
+
+    def _speed_up(self) -> bool:
+        if self.setpoint_scale < 1.0:
+            self.setpoint_scale = min(1.0, self.setpoint_scale / STEP_FACTOR)
+        elif self.telemetry_scale < 1.0:
+            self.telemetry_scale = min(1.0, self.telemetry_scale / STEP_FACTOR)
+        else:
+            return False
+        self._log("recovered", [f"loss {self.loss:.1%}", f"rtt {self.rtt_ms:.0f} ms"])
+        return True
+
+    def _log(self, state: str, reasons: List[str]):
+        self.adjustments += 1
+        logger.info("Link %s %s (%s, out %.0f B/s): telemetry x%.3g, setpoints x%.3g",
+                    self.label, state, ", ".join(reasons), self.throughput_bps,
+                    self.telemetry_scale, self.setpoint_scale)
@@ -0,0 +1,564 @@
+"""
+Low-level MAVLink frame helpers.
+
+These work directly on raw MAVLink v1/v2 frames so hot paths can look at a
+message's header without asking pymavlink to build a message object.
+"""
+import hashlib
+import importlib
+import logging
+import re
+import struct
+import sys
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# fastcrc is an optional C implementation of the MAVLink CRC (pymavlink uses
+# it too when installed); fall back to a table-driven pure Python version.
+try:
+    from fastcrc.crc16 import mcrf4xx as _mcrf4xx
+except ImportError:
+    _mcrf4xx = None
+
+MAVLINK_STX_V1 = 0xFE
+MAVLINK_STX_V2 = 0xFD
+HEADER_LEN_V1 = 6
+HEADER_LEN_V2 = 10
+MAVLINK_IFLAG_SIGNED = 0x01
+SIGNATURE_LEN = 13
+
+# Messages whose payload pymavlink's mavutil.post_message() reads itself
+# (HEARTBEAT, PARAM_VALUE, HIGH_LATENCY2); these are never filtered.
+ALWAYS_DECODE = frozenset((0, 22, 235))
+
+
+def _build_crc_table():
+    table = []
+    for i in range(256):
+        tmp = (i ^ (i << 4)) & 0xFF
+        table.append(((tmp << 8) ^ (tmp << 3) ^ (tmp >> 4)) & 0xFFFF)
+    return tuple(table)
+
+
+_CRC_TABLE = _build_crc_table()
+
+
+def x25crc(data, crc: int = 0xFFFF) -> int:
+    """Compute the MAVLink X.25 (CRC-16/MCRF4XX) checksum.
+
+    Args:
+        data: Bytes-like buffer to checksum
+        crc: Running CRC to continue from
+
+    Returns:
+        16-bit CRC
+    """
+    if _mcrf4xx is not None:
+        return _mcrf4xx(data, crc)
+    table = _CRC_TABLE
+    for b in data:
+        crc = (crc >> 8) ^ table[(crc ^ b) & 0xFF]
+    return crc
+
+
+def v2_dialect(dialect=None):
+    """Get a MAVLink 2 dialect module (which also decodes MAVLink 1 frames).
+
+    Args:
+        dialect: Preferred dialect module; used as is if it is MAVLink 2
+
+    Returns:
+        The given dialect, or pymavlink's current dialect for MAVLink 2
+    """
+    if dialect is not None and getattr(dialect, 'WIRE_PROTOCOL_VERSION', '') == '2.0':
+        return dialect
+    from pymavlink import mavutil
+    return importlib.import_module(f"pymavlink.dialects.v20.{mavutil.current_dialect}")
+
+
+def peek_header(frame) -> Optional[Tuple[int, int, int, int]]:
+    """Read the routing fields from a raw MAVLink frame header.
+
+    Args:
+        frame: Bytes-like buffer starting at the frame's magic byte
+
+    Returns:
+        Tuple of (msg_id, seq, src_system, src_component), or None if the
+        buffer is not a complete v1/v2 header
+    """
+    if not frame:
+        return None
+    magic = frame[0]
+    if magic == MAVLINK_STX_V2:
+        if len(frame) < HEADER_LEN_V2:
+            return None
+        return frame[7] | (frame[8] << 8) | (frame[9] << 16), frame[4], frame[5], frame[6]
+    if magic == MAVLINK_STX_V1:
+        if len(frame) < HEADER_LEN_V1:
+            return None
+        return frame[5], frame[2], frame[3], frame[4]
+    return None
+
+
+# One struct format code per wire field, with its array/string length
+_FORMAT_FIELD = re.compile(r'(\d*)([xcbB?hHiIlLqQefdspP])')
+
+
+def target_system_offsets(dialect) -> Dict[int, Optional[int]]:
+    """Locate the target_system byte in the payload of every message.
+
+    Args:
+        dialect: pymavlink dialect module
+
+    Returns:
+        Mapping of message ID to the payload offset of target_system, or
+        to None for messages without one
+    """
+    offsets = {}
+    for msg_id, msg_class in getattr(dialect, 'mavlink_map', {}).items():
+        offsets[msg_id] = None
+        fields = _FORMAT_FIELD.findall(msg_class.unpacker.format.lstrip('<>=!@'))
+        offset = 0
+        for name, (count, code) in zip(msg_class.ordered_fieldnames, fields):
+            if name == 'target_system':
+                offsets[msg_id] = offset
+                break
+            offset += struct.calcsize(f"<{count}{code}")
+    return offsets
+
+
+def peek_target_system(frame, offsets: Dict[int, Optional[int]]) -> Optional[int]:
+    """Read a frame's target_system without decoding its payload.
+
+    Args:
+        frame: Complete raw frame starting at the magic byte
+        offsets: Result of target_system_offsets() for the frame's dialect
+
+    Returns:
+        Target system (0 for broadcast messages and messages without a
+        target), or None if the header is invalid or the message ID unknown
+    """
+    header = peek_header(frame)
+    if header is None or header[0] not in offsets:
+        return None
+    offset = offsets[header[0]]
+    if offset is None or offset >= frame[1]:
+        return 0  # No target field, or trimmed as a trailing zero by MAVLink 2
+    start = HEADER_LEN_V2 if frame[0] == MAVLINK_STX_V2 else HEADER_LEN_V1
+    return frame[start + offset]
+
+
+def frame_length(buf, pos: int = 0) -> Optional[int]:
+    """Get the total length of the MAVLink frame starting at ``pos``.
+
+    Args:
+        buf: Bytes-like buffer
+        pos: Offset of the frame's magic byte
+
+    Returns:
+        Frame length in bytes including CRC and signature, or None if there
+        is no v1/v2 magic byte or header at ``pos``
+    """
+    if pos + 2 > len(buf):
+        return None
+    magic = buf[pos]
+    if magic == MAVLINK_STX_V2:
+        if pos + 3 > len(buf):
+            return None
+        length = HEADER_LEN_V2 + buf[pos + 1] + 2
+        if buf[pos + 2] & MAVLINK_IFLAG_SIGNED:
+            length += SIGNATURE_LEN
+        return length
+    if magic == MAVLINK_STX_V1:
+        return HEADER_LEN_V1 + buf[pos + 1] + 2
+    return None
+
+
+class FilteredMessage:
+    """Header-only stand-in for a message whose payload was never decoded.
+
+    Produced by the decode filter for message IDs nobody handles.  It carries
+    enough of the pymavlink message interface for sequence/loss accounting,
+    rate metering and raw-frame consumers, but has no payload fields.
+    """
+
+    _instance_field = None  # read by mavutil when caching the latest message
+
+    def __init__(self, msg_id: int, msg_type: str, seq: int, src_system: int,
+                 src_component: int, msgbuf):
+        self._msg_id = msg_id
+        self._type = msg_type
+        self._seq = seq
+        self._src_system = src_system
+        self._src_component = src_component
+        self._msgbuf = msgbuf
+
+    def get_msgId(self) -> int:
+        return self._msg_id
+
+    def get_type(self) -> str:
+        return self._type
+
+    def get_seq(self) -> int:
+        return self._seq
+
+    def get_srcSystem(self) -> int:
+        return self._src_system
+
+    def get_srcComponent(self) -> int:
+        return self._src_component
+
+    def get_msgbuf(self):
+        return self._msgbuf
+
+    def get_signed(self) -> bool:
+        buf = self._msgbuf
+        return buf[0] == MAVLINK_STX_V2 and bool(buf[2] & MAVLINK_IFLAG_SIGNED)
+
+    def get_link_id(self) -> int:
+        return self._msgbuf[-SIGNATURE_LEN] if self.get_signed() else 0
+
+
+class FastMessage(FilteredMessage):
+    """Message decoded by FastTelemetryDecoder.
+
+    Payload fields are plain attributes with the same names pymavlink uses,
+    so handlers written against pymavlink messages work unchanged.
+    """
+
+
+class _FastLayout:
+    """Precompiled wire layout for one message ID."""
+
+    __slots__ = ('name', 'unpacker', 'fields', 'crc_extra', 'size')
+
+    def __init__(self, name: str, unpacker: struct.Struct, fields, crc_extra: int):
+        self.name = name
+        self.unpacker = unpacker
+        self.fields = tuple(fields)
+        self.crc_extra = bytes((crc_extra,))
+        self.size = unpacker.size
+
+
+# Bulk of the inbound traffic: HEARTBEAT, SYS_STATUS, ATTITUDE, LOCAL_POSITION_NED
+HOT_MESSAGE_IDS = (0, 1, 30, 32)
+
+
+class FastTelemetryDecoder:
+    """Decode the hot telemetry messages straight from frame bytes.
+
+    Layouts (struct format, wire field order and CRC extra) are taken once
+    from the pymavlink dialect and compiled into struct.Struct objects.  Each
+    frame is CRC-checked; frames that fail, are signed, use array fields or
+    have an unexpected length are left to pymavlink (decode() returns None).
+    """
+
+    def __init__(self, dialect, message_ids: Iterable[int] = HOT_MESSAGE_IDS):
+        """Initialize the decoder.
+
+        Args:
+            dialect: pymavlink dialect module the layouts are read from; this
+                must be the dialect the connection itself decodes with
+            message_ids: Message IDs to decode on the fast path
+        """
+        self._layouts: Dict[int, _FastLayout] = {}
+        mavlink_map = getattr(dialect, 'mavlink_map', {})
+        for msg_id in message_ids:
+            msg_class = mavlink_map.get(msg_id)
+            if msg_class is None or any(getattr(msg_class, 'array_lengths', ())):
+                logger.debug("No fast layout for message %s", msg_id)
+                continue
+            self._layouts[msg_id] = _FastLayout(
+                msg_class.msgname,
+                struct.Struct(msg_class.unpacker.format),
+                msg_class.ordered_fieldnames,
+                msg_class.crc_extra,
+            )
+        self.message_ids = frozenset(self._layouts)
+        self.decoded = 0
+        self.fallbacks = 0
+
+    def decode(self, frame, header: Tuple[int, int, int, int] = None) -> Optional[FastMessage]:
+        """Decode one complete frame.
+
+        Args:
+            frame: Raw frame starting at the magic byte
+            header: Result of peek_header(frame), if already known
+
+        Returns:
+            FastMessage, or None if the frame must be decoded by pymavlink
+        """
+        if header is None:
+            header = peek_header(frame)
+            if header is None:
+                return None
+        msg_id, seq, src_system, src_component = header
+        layout = self._layouts.get(msg_id)
+        if layout is None:
+            return None
+
+        if frame[0] == MAVLINK_STX_V2:
+            if frame[2] & MAVLINK_IFLAG_SIGNED:
+                # Signature checks stay with pymavlink
+                self.fallbacks += 1
+                return None
+            start = HEADER_LEN_V2
+        else:
+            start = HEADER_LEN_V1
+        length = frame[1]
+        end = start + length
+        if length > layout.size or len(frame) < end + 2:
+            self.fallbacks += 1
+            return None
+
+        crc = x25crc(bytes(frame[1:end]) + layout.crc_extra)
+        if crc != frame[end] | (frame[end + 1] << 8):
+            self.fallbacks += 1
+            return None
+
+        payload = bytes(frame[start:end])
+        if length < layout.size:
+            # MAVLink 2 trims trailing zero bytes from the payload
+            payload += bytes(layout.size - length)
+
+        msg = FastMessage(msg_id, layout.name, seq, src_system, src_component, frame)
+        msg.__dict__.update(zip(layout.fields, layout.unpacker.unpack(payload)))
+        self.decoded += 1
+        return msg
+
+    def get_stats(self) -> dict:
+        """Get decode counters.
+
+        Returns:
+            Dictionary with decoded and fallbacks counts
+        """
+        return {'decoded': self.decoded, 'fallbacks': self.fallbacks}
+
+
+def max_frame_length(mav, message_name: str) -> int:
+    """Get the largest on-wire size of a message for a MAVLink object.
+
+    Args:
+        mav: pymavlink MAVLink object (its dialect and signing state are used)
+        message_name: Message name such as 'ATT_POS_MOCAP'
+
+    Returns:
+        Frame length in bytes including header, CRC and any signature
+    """
+    dialect = sys.modules[type(mav).__module__]
+    msg_id = getattr(dialect, f"MAVLINK_MSG_ID_{message_name}")
+    payload = dialect.mavlink_map[msg_id].unpacker.size
+    if float(dialect.WIRE_PROTOCOL_VERSION) >= 2.0:
+        signature = SIGNATURE_LEN if mav.signing.sign_outgoing else 0
+        return HEADER_LEN_V2 + payload + 2 + signature
+    return HEADER_LEN_V1 + payload + 2
+
+
+def message_type_name(dialect, msg_id: int) -> str:
+    """Look up the type name for a message ID in a pymavlink dialect.
+
+    Args:
+        dialect: pymavlink dialect module (e.g. mavutil.mavlink)
+        msg_id: Numeric MAVLink message ID
+
+    Returns:
+        Message name such as 'ATTITUDE', or 'UNKNOWN_<id>'
+    """
+    msg_class = getattr(dialect, 'mavlink_map', {}).get(msg_id) if dialect is not None else None
+    if msg_class is not None:
+        return getattr(msg_class, 'msgname', None) or msg_class.__name__
+    return f"UNKNOWN_{msg_id}"
+
+
+def install_decode_filter(mav, wants: Callable[[int], bool], dialect=None,
+                          fast_decoder: FastTelemetryDecoder = None):
+    """Skip payload decoding for message IDs that nobody consumes.
+
+    pymavlink's parser frames each packet and then calls ``mav.decode`` to
+    check the CRC and build a message object.  This shadows ``decode`` on the
+    given MAVLink instance so frames whose ID is rejected by ``wants`` are
+    returned as FilteredMessage objects instead.  Filtered frames are not
+    CRC-checked or signature-checked since their contents are never used.
+
+    Args:
+        mav: pymavlink MAVLink protocol object (``connection.mav``)
+        wants: Returns True for message IDs that must be fully decoded
+        dialect: Dialect used to name filtered messages (for rate metering)
+        fast_decoder: Optional decoder tried before pymavlink for its IDs
+    """
+    original = type(mav).decode.__get__(mav)
+    names = {}
+    fast_ids = fast_decoder.message_ids if fast_decoder is not None else frozenset()
+
+    def decode(msgbuf):
+        header = peek_header(msgbuf)
+        if header is None:
+            return original(msgbuf)
+        if header[0] in fast_ids:
+            return fast_decoder.decode(msgbuf, header) or original(msgbuf)
+        if header[0] in ALWAYS_DECODE or wants(header[0]):
+            return original(msgbuf)
+        msg_id, seq, src_system, src_component = header
+        name = names.get(msg_id)
+        if name is None:
+            name = names[msg_id] = message_type_name(dialect, msg_id)
+        return FilteredMessage(msg_id, name, seq, src_system, src_component, msgbuf)
+
+    mav.decode = decode
+
+
+def remove_decode_filter(mav):
+    """Undo install_decode_filter() on a MAVLink instance."""
+    if 'decode' in getattr(mav, '__dict__', {}):
+        del mav.decode
+
+
+class _HotTemplate:
+    """Reusable frame buffer for one outgoing message type.
+
+    The header constants and any constant payload tail are written once;
+    each send only packs the variable fields, the sequence number and the
+    CRC into the same bytearray.
+    """
+
+    def __init__(self, dialect, msg_id: int, fields_format: str = None, tail: bytes = b''):
+        msg_class = dialect.mavlink_map[msg_id]
+        self.msg_id = msg_id
+        self.v2 = float(dialect.WIRE_PROTOCOL_VERSION) >= 2.0
+        self.header_len = HEADER_LEN_V2 if self.v2 else HEADER_LEN_V1
+        self.fields = struct.Struct(fields_format or msg_class.unpacker.format)
+        self.payload_len = self.fields.size + len(tail)
+        self.crc_extra = bytes((msg_class.crc_extra,))
+        self.buf = bytearray(self.header_len + self.payload_len + 2 + SIGNATURE_LEN)
+        self.view = memoryview(self.buf)
+
+        hl = self.header_len
+        self.buf[hl + self.fields.size:hl + self.payload_len] = tail
+        if self.v2:
+            self.buf[0] = MAVLINK_STX_V2
+            self.buf[3] = 0  # compat flags
+            self.buf[7] = msg_id & 0xFF
+            self.buf[8] = (msg_id >> 8) & 0xFF
+            self.buf[9] = (msg_id >> 16) & 0xFF
+        else:
+            self.buf[0] = MAVLINK_STX_V1
+            self.buf[5] = msg_id
+
+    def send(self, mav, *values) -> int:
+        """Pack the fields into the buffer and write the frame to mav.file.
+
+        Returns:
+            Number of bytes written
+        """
+        buf = self.buf
+        hl = self.header_len
+        self.fields.pack_into(buf, hl, *values)
+        plen = self.payload_len
+        seq = mav.seq
+        if self.v2:
+            # MAVLink 2 strips trailing zero bytes from the payload
+            while plen > 1 and buf[hl + plen - 1] == 0:
+                plen -= 1
+            signed = mav.signing.sign_outgoing
+            buf[2] = MAVLINK_IFLAG_SIGNED if signed else 0
+            buf[4] = seq
+            buf[5] = mav.srcSystem
+            buf[6] = mav.srcComponent
+        else:
+            signed = False
+            buf[2] = seq
+            buf[3] = mav.srcSystem
+            buf[4] = mav.srcComponent
+        buf[1] = plen
+
+        end = hl + plen
+        crc = x25crc(self.view[1:end])
+        crc = x25crc(self.crc_extra, crc)
+        buf[end] = crc & 0xFF
+        buf[end + 1] = crc >> 8
+        end += 2
+        if signed:
+            end = self._sign(mav, end)
+
+        mav.file.write(self.view[:end])
+        mav.seq = (seq + 1) % 256
+        mav.total_packets_sent += 1
+        mav.total_bytes_sent += end
+        return end
+
+    def _sign(self, mav, end: int) -> int:
+        """Append a MAVLink 2 signature exactly as pymavlink's sign_packet()."""
+        signing = mav.signing
+        self.buf[end:end + 7] = struct.pack("<BQ", signing.link_id, signing.timestamp)[:7]
+        end += 7
+        digest = hashlib.sha256(signing.secret_key + bytes(self.view[:end])).digest()
+        self.buf[end:end + 6] = digest[:6]
+        signing.timestamp += 1
+        return end + 6
+
+
+class HotMessageEncoder:
+    """Allocation-free encoder for the high-rate outgoing messages.
+
+    Packs ATT_POS_MOCAP and SET_POSITION_TARGET_LOCAL_NED into preallocated
+    buffers with cached struct formats and writes them through an existing
+    pymavlink MAVLink object, using and advancing its sequence number and
+    signing state just as ``mav.<message>_send()`` would.
+
+    pymavlink replaces ``connection.mav`` when it switches protocol version,
+    so callers should rebuild the encoder when ``encoder.mav`` is stale.
+    """
+
+    # ATT_POS_MOCAP fields before the covariance extension
+    _MOCAP_FIELDS = '<Q4ffff'
+
+    def __init__(self, mav):
+        """Initialize the encoder.
+
+        Args:
+            mav: pymavlink MAVLink object (``connection.mav``) to send through
+        """
+        self.mav = mav
+        dialect = sys.modules[type(mav).__module__]
+        mocap_id = dialect.MAVLINK_MSG_ID_ATT_POS_MOCAP
+        mocap_size = dialect.mavlink_map[mocap_id].unpacker.size
+        # Unused covariance is a constant NaN matrix (absent on MAVLink 1)
+        tail_floats = (mocap_size - struct.calcsize(self._MOCAP_FIELDS)) // 4
+        tail = struct.pack(f'<{tail_floats}f', *([float('nan')] * tail_floats))
+        self._mocap = _HotTemplate(dialect, mocap_id, self._MOCAP_FIELDS, tail)
+        self._setpoint = _HotTemplate(dialect, dialect.MAVLINK_MSG_ID_SET_POSITION_TARGET_LOCAL_NED)
+
+    @property
+    def usable(self) -> bool:
+        """False if the MAVLink object has a send callback we would bypass."""
+        return self.mav.send_callback is None
+
+    def send_att_pos_mocap(self, time_usec: int, q, x: float, y: float, z: float) -> int:
+        """Send ATT_POS_MOCAP with an unset (NaN) covariance.
+
+        Args:
+            time_usec: Timestamp in microseconds
+            q: Attitude quaternion (w, x, y, z)
+            x, y, z: Position in meters (NED)
+
+        Returns:
+            Number of bytes written
+        """
+        return self._mocap.send(self.mav, time_usec, q[0], q[1], q[2], q[3], x, y, z)
+
+    def send_set_position_target_local_ned(self, time_boot_ms: int, target_system: int,
+                                           target_component: int, coordinate_frame: int,
+                                           type_mask: int, x: float, y: float, z: float,
+                                           vx: float, vy: float, vz: float,
+                                           afx: float, afy: float, afz: float,
+                                           yaw: float, yaw_rate: float) -> int:
+        """Send SET_POSITION_TARGET_LOCAL_NED (same argument order as pymavlink).
+
+        Returns:
+            Number of bytes written
+        """
+        return self._setpoint.send(
+            self.mav, time_boot_ms, x, y, z, vx, vy, vz, afx, afy, afz, yaw, yaw_rate,
+            type_mask, target_system, target_component, coordinate_frame,
+        )
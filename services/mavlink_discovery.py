@@ -0,0 +1,269 @@
+"""
+MAVLink device discovery.
+
+DiscoveryScanner listens for HEARTBEATs on many UDP ports at once from a
+single selector, probing each port with a GCS heartbeat so that passive
+drones (PX4 + mavlink-router style setups) start sending.  The total scan
+time is the listen window, independent of the number of ports.
+
+Ports already bound by an active connection must not be scanned (with
+SO_REUSEADDR a second socket would silently steal its datagrams); devices
+on those ports are found from the connections' own heartbeats instead (see
+device_from_heartbeat).
+"""
+import logging
+import selectors
+import socket
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from models.structs import DiscoveredDevice
+from services.mavlink_codec import frame_length
+
+logger = logging.getLogger(__name__)
+
+MAV_TYPE_GCS = 6
+MAV_AUTOPILOT_INVALID = 8  # Companion computers / routers, not a real FC
+
+
+def parse_port_list(spec: str) -> List[int]:
+    """Parse a port list such as "14550,14540-14549".
+
+    Args:
+        spec: Comma-separated ports and inclusive ranges
+
+    Returns:
+        Sorted list of unique ports
+
+    Raises:
+        ValueError: If an entry is not a valid port or range
+    """
+    ports = set()
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition('-')
+        low = int(first)
+        high = int(last) if last else low
+        if not 0 < low <= high <= 65535:
+            raise ValueError(f"Invalid port range: {part}")
+        ports.update(range(low, high + 1))
+    return sorted(ports)
+
+
+def bound_udp_port(connection_string: str) -> Optional[int]:
+    """Get the local UDP port a listening connection string binds, if any."""
+    scheme, _, rest = connection_string.partition('?')[0].partition(':')
+    if scheme not in ('udpin', 'udp', 'shared'):
+        return None
+    try:
+        return int(rest.rpartition(':')[2])
+    except ValueError:
+        return None
+
+
+def _x25_crc(data: bytes) -> int:
+    """CRC-16/MCRF4XX as used by MAVLink."""
+    crc = 0xFFFF
+    for b in data:
+        tmp = b ^ (crc & 0xFF)
+        tmp ^= (tmp << 4) & 0xFF
+        crc = ((crc >> 8) ^ (tmp << 8) ^ (tmp << 3) ^ (tmp >> 4)) & 0xFFFF
+    return crc
+
+
+def gcs_heartbeat_packet() -> bytes:
+    """Build a MAVLink v1 GCS HEARTBEAT from system 255 without pymavlink.
+
+    Payload: custom_mode (uint32) = 0, type = MAV_TYPE_GCS,
+    autopilot = MAV_AUTOPILOT_INVALID, base_mode = 0, system_status = 0,
+    mavlink_version = 3; CRC extra for HEARTBEAT is 50.
+    """
+    header = bytes([9, 0, 255, 0, 0])  # len=9, seq=0, sys=255, comp=0, msg_id=0
+    payload = bytes([0, 0, 0, 0, MAV_TYPE_GCS, MAV_AUTOPILOT_INVALID, 0, 0, 3])
+    crc = _x25_crc(header + payload + bytes([50]))
+    return bytes([0xFE]) + header + payload + bytes([crc & 0xFF, crc >> 8])
+
+
+def parse_heartbeats(data: bytes) -> List[Tuple[int, int, int, int, bool, int]]:
+    """Extract HEARTBEATs from a datagram (which may hold several frames).
+
+    Returns:
+        List of (system_id, component_id, vehicle_type, autopilot, armed,
+        mavlink_version)
+    """
+    found = []
+    pos = 0
+    while pos < len(data):
+        magic = data[pos]
+        if magic not in (0xFE, 0xFD):
+            pos += 1
+            continue
+        length = frame_length(data, pos)
+        if length is None or pos + length > len(data):
+            break
+        if magic == 0xFE:
+            plen, sys_id, comp_id, msg_id = data[pos + 1], data[pos + 3], data[pos + 4], data[pos + 5]
+            payload_start, version = pos + 6, 1
+        else:
+            plen, sys_id, comp_id = data[pos + 1], data[pos + 5], data[pos + 6]
+            msg_id = data[pos + 7] | (data[pos + 8] << 8) | (data[pos + 9] << 16)
+            payload_start, version = pos + 10, 2
+        if msg_id == 0:
+            # MAVLink 2 truncates trailing zero bytes of the payload
+            payload = bytes(data[payload_start:payload_start + plen]).ljust(9, b'\0')
+            found.append((sys_id, comp_id, payload[4], payload[5], bool(payload[6] & 0x80), version))
+        pos += length
+    return found
+
+
+def device_key(device: DiscoveredDevice) -> Tuple[str, int, int]:
+    """Identity of a discovered device: (address, port, system_id)."""
+    return device.address, device.port, device.system_id
+
+
+def prefer_device(current: Optional[DiscoveredDevice], candidate: DiscoveredDevice) -> bool:
+    """Whether candidate should replace the device recorded for its key.
+
+    The flight controller's heartbeat is preferred over a companion or
+    router forwarding heartbeats for the same system; otherwise the newest
+    heartbeat wins when something visible (type, autopilot, armed) changed.
+    """
+    if current is None:
+        return True
+    if current.autopilot != MAV_AUTOPILOT_INVALID and candidate.autopilot == MAV_AUTOPILOT_INVALID:
+        return False
+    return (candidate.autopilot, candidate.vehicle_type, candidate.armed, candidate.component_id) != \
+        (current.autopilot, current.vehicle_type, current.armed, current.component_id)
+
+
+def device_from_heartbeat(msg, connection_string: str, address: str = None) -> Optional[DiscoveredDevice]:
+    """Describe the sender of a HEARTBEAT received on an active connection.
+
+    Args:
+        msg: Decoded pymavlink HEARTBEAT
+        connection_string: Connection the heartbeat arrived on
+        address: Sender address, if known
+
+    Returns:
+        DiscoveredDevice, or None for ground stations
+    """
+    if msg.type == MAV_TYPE_GCS:
+        return None
+    try:
+        port = int(connection_string.partition('?')[0].rpartition(':')[2])
+    except ValueError:
+        port = 0  # Serial links and other non-network connections
+    return DiscoveredDevice(
+        address=address or "",
+        port=port,
+        system_id=msg.get_srcSystem(),
+        component_id=msg.get_srcComponent(),
+        connection_string=connection_string,
+        vehicle_type=msg.type,
+        autopilot=msg.autopilot,
+        armed=bool(msg.base_mode & 0x80),
+        mavlink_version=2 if msg.get_msgbuf()[:1] == b'\xfd' else 1,
+    )
+
+
+class DiscoveryScanner:
+    """Listen for MAVLink heartbeats on several UDP ports concurrently."""
+
+    def __init__(self, bind_address: str = "0.0.0.0", probe_interval: float = 0.5):
+        """Initialize the scanner.
+
+        Args:
+            bind_address: Local address the listening sockets bind
+            probe_interval: Seconds between GCS heartbeat probes on each port
+        """
+        self.bind_address = bind_address
+        self.probe_interval = probe_interval
+        self._probe = gcs_heartbeat_packet()
+
+    def scan(self, ports: List[int], timeout_secs: float,
+             on_device: Callable[[DiscoveredDevice], None] = None) -> List[DiscoveredDevice]:
+        """Listen on every port for timeout_secs.
+
+        Args:
+            ports: UDP ports to listen on (ports that cannot be bound are skipped)
+            timeout_secs: Listen window
+            on_device: Called from this thread for each new or updated device
+
+        Returns:
+            Devices found, one per (address, port, system_id)
+        """
+        selector = selectors.DefaultSelector()
+        sockets: Dict[socket.socket, int] = {}
+        for port in ports:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            try:
+                # Bind to all interfaces to receive MAVLink packets from any network source
+                # This is required for device discovery - drones may be on any network interface
+                # CodeQL: py/bind-socket-all-network-interfaces - intentional for discovery
+                sock.bind((self.bind_address, port))  # nosec B104
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+                sock.setblocking(False)
+            except OSError:
+                logger.info("Discovery skipped port %s: already in use", port)
+                sock.close()
+                continue
+            sockets[sock] = port
+            selector.register(sock, selectors.EVENT_READ, port)
+
+        devices: Dict[Tuple[str, int, int], DiscoveredDevice] = {}
+        try:
+            deadline = time.monotonic() + timeout_secs
+            next_probe = 0.0
+            while sockets:
+                now = time.monotonic()
+                if now >= deadline:
+                    break
+                if now >= next_probe:
+                    self._send_probes(sockets)
+                    next_probe = now + self.probe_interval
+                for key, _ in selector.select(max(0.0, min(deadline, next_probe) - now)):
+                    self._read(key.fileobj, key.data, devices, on_device)
+        finally:
+            selector.close()
+            for sock in sockets:
+                sock.close()
+        return list(devices.values())
+
+    def _send_probes(self, sockets: Dict[socket.socket, int]):
+        for sock, port in sockets.items():
+            try:
+                sock.sendto(self._probe, ('<broadcast>', port))
+            except OSError:
+                pass  # Broadcast may fail on some interfaces; carry on listening anyway
+
+    def _read(self, sock: socket.socket, port: int, devices: dict, on_device):
+        while True:
+            try:
+                data, addr = sock.recvfrom(65535)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                return
+            for sys_id, comp_id, vehicle_type, autopilot, armed, version in parse_heartbeats(data):
+                if vehicle_type == MAV_TYPE_GCS:
+                    continue  # Our own probe (or another ground station)
+                candidate = DiscoveredDevice(
+                    address=addr[0],
+                    port=port,
+                    system_id=sys_id,
+                    component_id=comp_id,
+                    connection_string=f"udpin:0.0.0.0:{port}",
+                    vehicle_type=vehicle_type,
+                    autopilot=autopilot,
+                    armed=armed,
+                    mavlink_version=version,
+                )
+                key = device_key(candidate)
+                if prefer_device(devices.get(key), candidate):
+                    devices[key] = candidate
+                    if on_device is not None:
+                        on_device(candidate)
+                else:
+                    devices[key].last_seen = candidate.last_seen
@@ -0,0 +1,180 @@
+"""
+Table-driven MAVLink message dispatch.
+
+MessageDispatcher maps numeric message IDs to handler callables.  Lookups are
+a single dict access per message, handlers can be added or removed at run
+time (e.g. for DTRG dialect messages or analytics consumers), and every
+handler keeps call counts and cumulative run time for profiling.
+"""
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+
+def resolve_message_id(message: Union[int, str], dialect=None) -> int:
+    """Convert a message name or ID into a numeric message ID.
+
+    Args:
+        message: Numeric ID, or a message name such as 'ATTITUDE'
+        dialect: pymavlink dialect module used to look names up
+
+    Returns:
+        Numeric MAVLink message ID
+
+    Raises:
+        ValueError: If the name is not defined in the dialect
+    """
+    if isinstance(message, int):
+        return message
+    name = str(message).upper()
+    msg_id = getattr(dialect, f"MAVLINK_MSG_ID_{name}", None) if dialect is not None else None
+    if msg_id is None:
+        raise ValueError(f"Unknown MAVLink message: {message}")
+    return msg_id
+
+
+class _HandlerEntry:
+    """Registered handler plus its profiling counters."""
+
+    __slots__ = ('callback', 'name', 'calls', 'total_time', 'errors')
+
+    def __init__(self, callback: Callable[[object], None], name: str):
+        self.callback = callback
+        self.name = name
+        self.calls = 0
+        self.total_time = 0.0
+        self.errors = 0
+
+
+class MessageDispatcher:
+    """Routes decoded messages to handlers by numeric message ID.
+
+    Registration is copy-on-write, so handlers may be added from any thread
+    while another thread is dispatching.  Exceptions raised by a handler are
+    logged and counted without stopping the remaining handlers.
+    """
+
+    def __init__(self, profiling: bool = True):
+        """Initialize the dispatcher.
+
+        Args:
+            profiling: Time every handler call (two perf_counter() reads each)
+        """
+        self._table: Dict[int, Tuple[_HandlerEntry, ...]] = {}
+        self._lock = threading.Lock()
+        self.profiling = profiling
+        self.unhandled = 0
+
+    def register(self, msg_id: int, handler: Callable[[object], None], name: str = None):
+        """Add a handler for a message ID.
+
+        Handlers for the same ID run in registration order.
+
+        Args:
+            msg_id: Numeric MAVLink message ID
+            handler: Callable taking the decoded message
+            name: Label used in profiling output (defaults to the callable's name)
+        """
+        if name is None:
+            name = getattr(handler, '__qualname__', None) or repr(handler)
+        entry = _HandlerEntry(handler, name)
+        with self._lock:
+            table = dict(self._table)
+            table[msg_id] = table.get(msg_id, ()) + (entry,)
+            self._table = table
+
+    def unregister(self, msg_id: int, handler: Callable[[object], None] = None) -> bool:
+        """Remove a handler, or every handler, for a message ID.
+
+        Args:
+            msg_id: Numeric MAVLink message ID
+            handler: Handler to remove (None removes all handlers for the ID)
+
+        Returns:
+            True if anything was removed
+        """
+        with self._lock:
+            entries = self._table.get(msg_id)
+            if not entries:
+                return False
+            if handler is None:
+                remaining = ()
+            else:
+                remaining = tuple(e for e in entries if e.callback != handler)
+                if len(remaining) == len(entries):
+                    return False
+            table = dict(self._table)
+            if remaining:
+                table[msg_id] = remaining
+            else:
+                del table[msg_id]
+            self._table = table
+            return True
+
+    def handles(self, msg_id: int) -> bool:
+        """Check whether any handler is registered for a message ID."""
+        return msg_id in self._table
+
+    @property
+    def message_ids(self) -> List[int]:
+        """Message IDs that have at least one handler."""
+        return sorted(self._table)
+
+    def dispatch(self, msg) -> bool:
+        """Run the handlers registered for a message.
+
+        Args:
+            msg: Decoded MAVLink message
+
+        Returns:
+            True if at least one handler was registered for the message
+        """
+        entries = self._table.get(msg.get_msgId())
+        if not entries:
+            self.unhandled += 1
+            return False
+        profiling = self.profiling
+        for entry in entries:
+            start = time.perf_counter() if profiling else 0.0
+            try:
+                entry.callback(msg)
+            except Exception as e:
+                entry.errors += 1
+                logger.warning("MAVLink handler %s failed on %s: %s", entry.name, msg.get_type(), e)
+            if profiling:
+                entry.total_time += time.perf_counter() - start
+            entry.calls += 1
+        return True
+
+    def get_stats(self) -> List[dict]:
+        """Get per-handler profiling counters.
+
+        Returns:
+            List of dicts with msg_id, handler, calls, errors, total_time_s and
+            mean_us, ordered by total time (most expensive first)
+        """
+        stats = []
+        for msg_id, entries in self._table.items():
+            for entry in entries:
+                stats.append({
+                    'msg_id': msg_id,
+                    'handler': entry.name,
+                    'calls': entry.calls,
+                    'errors': entry.errors,
+                    'total_time_s': entry.total_time,
+                    'mean_us': (entry.total_time / entry.calls * 1e6) if entry.calls else 0.0,
+                })
+        stats.sort(key=lambda s: s['total_time_s'], reverse=True)
+        return stats
+
+    def reset_stats(self):
+        """Zero every handler's counters."""
+        for entries in self._table.values():
+            for entry in entries:
+                entry.calls = 0
+                entry.total_time = 0.0
+                entry.errors = 0
+        self.unhandled = 0
@@ -0,0 +1,417 @@
+"""
+Priority egress scheduling for outbound MAVLink traffic.
+
+All sends for a link are queued by priority (MavlinkMessagePriority) and
+written by a single sender thread, which also keeps each link's MAVLink
+sequence numbers in wire order.  A token bucket per link limits outbound
+bandwidth; when a link is saturated, higher priorities go first and
+lower-priority traffic is delayed, then shed:
+
+- Periodic streams (mocap, setpoints, heartbeats) are submitted with a
+  coalesce key so a newer sample replaces one still waiting in the queue,
+  and samples older than the priority's max age are dropped.
+- Each priority queue has a maximum depth; the oldest entry is dropped
+  when it overflows.
+- NORMAL traffic only uses the bucket while a reserve is left over for
+  CRITICAL/HIGH traffic.
+
+Queued entries are callables that encode and write the message at send
+time and return the number of bytes written.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from models.structs import MavlinkMessagePriority
+from services.mavlink_metrics import LogHistogram
+
+logger = logging.getLogger(__name__)
+
+# Largest MAVLink 2 frame: 10-byte header, 255-byte payload, 2-byte CRC and
+# 13-byte signature
+MAX_FRAME_BYTES = 280
+
+PRIORITY_ORDER = (
+    MavlinkMessagePriority.CRITICAL,
+    MavlinkMessagePriority.HIGH,
+    MavlinkMessagePriority.NORMAL,
+)
+
+
+@dataclass
+class PrioritizedMessage:
+    """Message wrapper for priority queue ordering.
+
+    Lower priority values are processed first (CRITICAL=1, HIGH=2, NORMAL=3).
+    """
+    priority: int
+    timestamp: float
+    message: object
+    size: int = 0
+    key: object = None
+
+    def __lt__(self, other):
+        # Compare by priority first, then by timestamp for FIFO within same priority
+        if self.priority != other.priority:
+            return self.priority < other.priority
+        return self.timestamp < other.timestamp
+
+
+class TokenBucket:
+    """Byte-rate limiter.
+
+    Tokens (bytes) refill continuously at ``rate`` up to ``burst``.  Sends
+    are charged their actual size afterwards, so the balance may briefly go
+    negative; a rate of 0 disables limiting.
+    """
+
+    def __init__(self, rate: float = 0.0, burst: float = None):
+        """Initialize the bucket.
+
+        Args:
+            rate: Refill rate in bytes per second (0 = unlimited)
+            burst: Bucket capacity in bytes (default: 100 ms of traffic,
+                at least two maximum-size frames)
+        """
+        self.rate = 0.0
+        self.burst = 0.0
+        self._tokens = 0.0
+        self._last = time.monotonic()
+        self.configure(rate, burst)
+
+    @property
+    def unlimited(self) -> bool:
+        """True if the bucket does not limit traffic."""
+        return self.rate <= 0
+
+    def configure(self, rate: float, burst: float = None):
+        """Change the rate and capacity; the bucket starts full."""
+        self.rate = max(0.0, float(rate or 0.0))
+        if burst is None:
+            burst = max(self.rate * 0.1, 2 * MAX_FRAME_BYTES)
+        self.burst = float(burst)
+        self._tokens = self.burst
+        self._last = time.monotonic()
+
+    def available(self, now: float) -> float:
+        """Refill and return the current token balance."""
+        if now > self._last:
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+        return self._tokens
+
+    def consume(self, amount: float, now: float):
+        """Charge sent bytes against the bucket."""
+        if not self.unlimited:
+            self.available(now)
+            self._tokens -= amount
+
+    def delay_for(self, amount: float, now: float) -> float:
+        """Seconds until ``amount`` tokens are available (0 if already)."""
+        if self.unlimited:
+            return 0.0
+        missing = amount - self.available(now)
+        return missing / self.rate if missing > 0 else 0.0
+
+
+class EgressLink:
+    """Outbound priority queues and token bucket for one link."""
+
+    # Maximum queued entries per priority before the oldest is shed
+    MAX_DEPTH = {
+        MavlinkMessagePriority.CRITICAL: 32,
+        MavlinkMessagePriority.HIGH: 32,
+        MavlinkMessagePriority.NORMAL: 256,
+    }
+
+    # Age after which a coalescable (periodic) sample is no longer worth sending
+    MAX_AGE = {
+        MavlinkMessagePriority.CRITICAL: 0.05,
+        MavlinkMessagePriority.HIGH: 0.25,
+        MavlinkMessagePriority.NORMAL: 2.0,
+    }
+
+    # Fraction of the bucket NORMAL traffic must leave for higher priorities
+    NORMAL_RESERVE = 0.25
+
+    def __init__(self, key, bytes_per_sec: float = 0.0, burst_bytes: float = None):
+        """Initialize the link.
+
+        Args:
+            key: Link identifier
+            bytes_per_sec: Outbound bandwidth limit (0 = unlimited)
+            burst_bytes: Token bucket capacity
+        """
+        self.key = key
+        self.bucket = TokenBucket(bytes_per_sec, burst_bytes)
+        self._queues = {p.value: deque() for p in PRIORITY_ORDER}
+        self._by_key: Dict[object, PrioritizedMessage] = {}
+        self.sent = {p.value: 0 for p in PRIORITY_ORDER}
+        self.shed = {p.value: 0 for p in PRIORITY_ORDER}
+        self.coalesced = {p.value: 0 for p in PRIORITY_ORDER}
+        self.errors = 0
+        self.bytes_sent = 0
+        # Time from submit() to the socket write, per priority
+        self.queue_delay = {p.value: LogHistogram() for p in PRIORITY_ORDER}
+
+    def push(self, item: PrioritizedMessage):
+        """Queue an entry, coalescing with a pending entry of the same key."""
+        if item.key is not None:
+            pending = self._by_key.get(item.key)
+            if pending is not None and pending.priority == item.priority:
+                pending.message = item.message
+                pending.size = item.size
+                pending.timestamp = item.timestamp
+                self.coalesced[item.priority] += 1
+                return
+            self._by_key[item.key] = item
+
+        queue = self._queues[item.priority]
+        if len(queue) >= self.MAX_DEPTH[MavlinkMessagePriority(item.priority)]:
+            self._forget(queue.popleft())
+            self.shed[item.priority] += 1
+        queue.append(item)
+
+    def head(self, now: float):
+        """Find the entry to send next.
+
+        Returns:
+            Tuple of (item, delay): item is the highest-priority entry if the
+            bucket allows sending it now; otherwise item is None and delay is
+            the time until it may be sent (None if nothing is queued)
+        """
+        for priority in PRIORITY_ORDER:
+            queue = self._queues[priority.value]
+            max_age = self.MAX_AGE[priority]
+            while queue and queue[0].key is not None and now - queue[0].timestamp > max_age:
+                self._forget(queue.popleft())
+                self.shed[priority.value] += 1
+            if not queue:
+                continue
+            item = queue[0]
+            required = item.size
+            if priority == MavlinkMessagePriority.NORMAL:
+                required += self.bucket.burst * self.NORMAL_RESERVE
+            delay = self.bucket.delay_for(required, now)
+            return (item, 0.0) if delay <= 0 else (None, delay)
+        return None, None
+
+    def pop(self, item: PrioritizedMessage):
+        """Remove an entry returned by head()."""
+        queue = self._queues[item.priority]
+        if queue and queue[0] is item:
+            queue.popleft()
+            self._forget(item)
+
+    def clear(self):
+        """Drop everything queued."""
+        for queue in self._queues.values():
+            queue.clear()
+        self._by_key.clear()
+
+    def get_stats(self) -> dict:
+        """Get queue and bandwidth counters.
+
+        Returns:
+            Dictionary with rate_limit_bps, bytes_sent, errors and per-priority
+            depth, sent, shed and coalesced counts plus the queue_delay
+            (submit to write) histogram
+        """
+        priorities = {}
+        for priority in PRIORITY_ORDER:
+            value = priority.value
+            priorities[priority.name.lower()] = {
+                'depth': len(self._queues[value]),
+                'sent': self.sent[value],
+                'shed': self.shed[value],
+                'coalesced': self.coalesced[value],
+                'queue_delay': self.queue_delay[value].get_stats(),
+            }
+        return {
+            'rate_limit_bps': self.bucket.rate,
+            'bytes_sent': self.bytes_sent,
+            'errors': self.errors,
+            'priorities': priorities,
+        }
+
+    def _forget(self, item: PrioritizedMessage):
+        if item.key is not None and self._by_key.get(item.key) is item:
+            del self._by_key[item.key]
+
+
+class EgressScheduler(threading.Thread):
+    """Single sender thread draining every link's priority queues.
+
+    Across links, the highest-priority sendable entry goes first; links with
+    entries of equal priority are served round-robin.
+    """
+
+    def __init__(self, name: str = "mavlink-egress"):
+        """Initialize the scheduler.
+
+        Args:
+            name: Thread name
+        """
+        super().__init__(name=name, daemon=True)
+        self._links: Dict[object, EgressLink] = {}
+        self._order: List[object] = []
+        self._next = 0
+        self._cond = threading.Condition()
+        self._stop_requested = False
+
+    def add_link(self, key, bytes_per_sec: float = 0.0, burst_bytes: float = None) -> EgressLink:
+        """Register a link (thread-safe).
+
+        Args:
+            key: Link identifier used with submit()
+            bytes_per_sec: Outbound bandwidth limit (0 = unlimited)
+            burst_bytes: Token bucket capacity
+
+        Returns:
+            The link's EgressLink
+        """
+        with self._cond:
+            link = self._links.get(key)
+            if link is None:
+                link = EgressLink(key, bytes_per_sec, burst_bytes)
+                self._links[key] = link
+                self._order.append(key)
+            else:
+                link.bucket.configure(bytes_per_sec, burst_bytes)
+            self._cond.notify()
+            return link
+
+    def remove_link(self, key):
+        """Unregister a link, dropping anything still queued (thread-safe)."""
+        with self._cond:
+            link = self._links.pop(key, None)
+            if link is not None:
+                link.clear()
+                self._order.remove(key)
+
+    def set_link_rate(self, key, bytes_per_sec: float, burst_bytes: float = None) -> bool:
+        """Change a link's bandwidth limit.
+
+        Returns:
+            True if the link exists
+        """
+        with self._cond:
+            link = self._links.get(key)
+            if link is None:
+                return False
+            link.bucket.configure(bytes_per_sec, burst_bytes)
+            self._cond.notify()
+            return True
+
+    def submit(self, key, priority: MavlinkMessagePriority, send: Callable[[], int],
+               size: int = MAX_FRAME_BYTES, coalesce_key=None) -> bool:
+        """Queue an outbound message (thread-safe).
+
+        Args:
+            key: Link identifier
+            priority: Message priority
+            send: Callable that encodes and writes the message, returning the
+                number of bytes written
+            size: Expected frame size in bytes (used for the bandwidth check)
+            coalesce_key: If given, replaces a pending entry with the same key
+
+        Returns:
+            True if queued, False if the link is not registered
+        """
+        item = PrioritizedMessage(priority.value, time.monotonic(), send, size, coalesce_key)
+        with self._cond:
+            link = self._links.get(key)
+            if link is None or self._stop_requested:
+                return False
+            link.push(item)
+            self._cond.notify()
+        return True
+
+    def get_link_stats(self, key) -> Optional[dict]:
+        """Get a link's counters, or None if it is not registered."""
+        with self._cond:
+            link = self._links.get(key)
+            return link.get_stats() if link is not None else None
+
+    def reset_link_timing(self, key) -> bool:
+        """Clear a link's queue delay histograms.
+
+        Returns:
+            True if the link is registered
+        """
+        with self._cond:
+            link = self._links.get(key)
+            if link is None:
+                return False
+            for histogram in link.queue_delay.values():
+                histogram.reset()
+            return True
+
+    def stop(self, timeout: float = 1.0):
+        """Stop the sender thread; queued messages are discarded.
+
+        Args:
+            timeout: Maximum time to wait for the thread to finish
+        """
+        with self._cond:
+            self._stop_requested = True
+            self._cond.notify()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
+
+    def run(self):
+        """Send queued messages until stop() is called."""
+        while True:
+            with self._cond:
+                if self._stop_requested:
+                    return
+                link, item, delay = self._pick(time.monotonic())
+                if item is None:
+                    self._cond.wait(delay if delay is not None else 1.0)
+                    continue
+                link.pop(item)
+
+            # Write outside the lock so submitters never wait on the socket
+            try:
+                written = item.message()
+            except Exception as e:
+                written = 0
+                link.errors += 1
+                logger.warning("Egress to %s failed: %s", link.key, e)
+
+            with self._cond:
+                now = time.monotonic()
+                written = item.size if written is None else written
+                link.bucket.consume(written, now)
+                link.bytes_sent += written
+                link.sent[item.priority] += 1
+                link.queue_delay[item.priority].record(now - item.timestamp)
+
+    def _pick(self, now: float):
+        """Choose the next entry across all links.
+
+        Returns:
+            Tuple of (link, item, delay); item is None when nothing can be sent
+            now, with delay the time until something can (None if idle)
+        """
+        best = None
+        best_link = None
+        best_index = 0
+        min_delay = None
+        count = len(self._order)
+        for offset in range(count):
+            index = (self._next + offset) % count
+            link = self._links[self._order[index]]
+            item, delay = link.head(now)
+            if item is not None:
+                if best is None or item.priority < best.priority:
+                    best, best_link, best_index = item, link, index
+            elif delay is not None and (min_delay is None or delay < min_delay):
+                min_delay = delay
+        if best is not None:
+            self._next = (best_index + 1) % max(1, count)
+            return best_link, best, 0.0
+        return None, None, min_delay
@@ -0,0 +1,443 @@
+"""
+MAVLink engine in a child process.
+
+With MavlinkGlobalSettings.engine_process enabled, MavlinkService keeps its
+API but hands every link to an engine process: a second, headless
+MavlinkService running in its own interpreter, so rendering, input polling
+and the UI cannot hold the GIL while mocap and setpoints are due.
+
+The two processes talk through:
+
+- a pose ring (SharedRing of POSE_DTYPE): the UI side pushes the pose of
+  every mocap source; the engine's mocap scheduler reads the newest one at
+  each send deadline (see PoseReader).  Scene objects have no pose-change
+  callback, so the UI side polls them from a QTimer at the fastest mocap
+  rate: a busy UI thread no longer delays mocap sends, but it can still
+  delay how fresh the sent pose is;
+- a telemetry ring (SharedRing of TELEMETRY_RECORD_DTYPE): the engine
+  pushes every telemetry update; the UI side replays them into its
+  publisher and history store;
+- a pipe carrying commands (connect, setpoints, console, settings, ...)
+  one way and events (connection results, signals, status and statistics)
+  the other.
+
+EngineProcess is the UI-side handle; run_engine() is the child's entry
+point and EngineHost adapts the pipe and rings to the engine's service.
+"""
+import dataclasses
+import logging
+import multiprocessing
+import operator
+import threading
+import time
+from typing import Dict, Optional
+
+import numpy as np
+from PyQt5.QtCore import QCoreApplication, QObject, QTimer
+
+from models.structs import MavlinkGlobalSettings, MavlinkObjectConfig, MavlinkTelemetryData
+from services.shm_ring import SharedRing
+from services.telemetry_store import CONTINUOUS_FIELDS
+
+logger = logging.getLogger(__name__)
+
+# One mocap source pose: scene object pose (x, y, z, qw, qx, qy, qz)
+POSE_DTYPE = np.dtype([
+    ('system_id', 'u1'),
+    ('t', 'f8'),          # Monotonic time the pose was pushed
+    ('pose', 'f8', (7,)),
+])
+
+# One telemetry update: push time and vehicle, then the MavlinkTelemetryData
+# fields (not mode: nothing sets it, and the text would be most of each record)
+TELEMETRY_RECORD_DTYPE = np.dtype(
+    [('t', 'f8'), ('system_id', 'u1')]
+    + [(name, 'f8') for name in CONTINUOUS_FIELDS]
+    + [
+        ('armed', '?'),
+        ('battery_remaining', 'i1'),
+        ('gps_fix_type', 'u1'),
+        ('satellites_visible', 'u1'),
+        ('estimator_status', 'u2'),
+    ]
+)
+TELEMETRY_FIELDS = TELEMETRY_RECORD_DTYPE.names[2:]
+_read_telemetry = operator.attrgetter(*TELEMETRY_FIELDS)
+
+POSE_RING_CAPACITY = 1024
+TELEMETRY_RING_CAPACITY = 16384
+
+# How often the engine checks the pipe for commands
+COMMAND_POLL_INTERVAL_MS = 5
+
+# Seconds between connection status and full statistics events
+STATUS_INTERVAL = 0.25
+STATISTICS_INTERVAL = 1.0
+
+# Seconds to wait for the engine to exit before terminating it
+STOP_TIMEOUT = 3.0
+
+
+def engine_settings(settings: MavlinkGlobalSettings) -> MavlinkGlobalSettings:
+    """Settings for the engine's own service.
+
+    Discovery stays with the UI-side service (it owns the discovery ports);
+    the engine reports heartbeats it sees on its links instead.  The fleet
+    table is also written by the UI-side service, from the telemetry ring.
+    """
+    return dataclasses.replace(settings, engine_process=False, background_discovery=False,
+                               auto_connect_discovered=False, fleet_table_name="")
+
+
+def apply_telemetry_record(telemetry: MavlinkTelemetryData, record) -> MavlinkTelemetryData:
+    """Copy a telemetry ring record into a telemetry container."""
+    telemetry.system_id = int(record['system_id'])
+    for name in TELEMETRY_FIELDS:
+        setattr(telemetry, name, record[name].item())
+    return telemetry
+
+
+class EngineProcess:
+    """UI-side handle of the engine process: pipe ends and ring owners."""
+
+    def __init__(self, settings: MavlinkGlobalSettings, pose_capacity: int = POSE_RING_CAPACITY,
+                 telemetry_capacity: int = TELEMETRY_RING_CAPACITY):
+        """Initialize the handle; start() launches the process.
+
+        Args:
+            settings: Global settings the engine starts with
+            pose_capacity: Slots in the pose ring
+            telemetry_capacity: Slots in the telemetry ring
+        """
+        self._settings = settings
+        self._pose_capacity = pose_capacity
+        self._telemetry_capacity = telemetry_capacity
+        self._process: Optional[multiprocessing.Process] = None
+        self._pipe = None
+        self._poses: Optional[SharedRing] = None
+        self._telemetry: Optional[SharedRing] = None
+        self._send_lock = threading.Lock()  # Commands come from the UI and service threads
+        self.commands_sent = 0
+        self.events_received = 0
+
+    @property
+    def is_alive(self) -> bool:
+        """Whether the engine process is running."""
+        return self._process is not None and self._process.is_alive()
+
+    @property
+    def pid(self) -> Optional[int]:
+        """Process ID of the engine."""
+        return self._process.pid if self._process is not None else None
+
+    def start(self):
+        """Create the rings and launch the engine process."""
+        # Spawn, not fork: the parent's Qt and I/O threads must not be copied
+        context = multiprocessing.get_context("spawn")
+        self._poses = SharedRing(POSE_DTYPE, self._pose_capacity, create=True)
+        self._telemetry = SharedRing(TELEMETRY_RECORD_DTYPE, self._telemetry_capacity, create=True)
+        self._pipe, child_pipe = context.Pipe()
+        self._process = context.Process(
+            target=run_engine,
+            name="mavlink-engine",
+            args=(child_pipe, self._settings,
+                  (self._poses.name, self._poses.capacity),
+                  (self._telemetry.name, self._telemetry.capacity),
+                  logging.getLogger().getEffectiveLevel()),
+            daemon=True,
+        )
+        self._process.start()
+        child_pipe.close()
+        logger.info("MAVLink engine process started (pid %s)", self._process.pid)
+
+    def send(self, command: str, *args) -> bool:
+        """Send a command to the engine.
+
+        Returns:
+            False if the engine is gone
+        """
+        with self._send_lock:
+            if self._pipe is None:
+                return False
+            try:
+                self._pipe.send((command,) + args)
+            except (OSError, ValueError):
+                return False
+            self.commands_sent += 1
+        return True
+
+    def poll_events(self) -> list:
+        """Get every event the engine sent since the last call."""
+        events = []
+        pipe = self._pipe
+        try:
+            while pipe is not None and pipe.poll():
+                events.append(pipe.recv())
+        except (EOFError, OSError):
+            pass
+        self.events_received += len(events)
+        return events
+
+    def push_pose(self, system_id: int, pose):
+        """Publish a mocap source's current pose to the engine."""
+        self._poses.push((system_id, time.monotonic(), pose[:7]))
+
+    def read_telemetry(self) -> np.ndarray:
+        """Get the telemetry records the engine pushed since the last call."""
+        return self._telemetry.read()
+
+    def stop(self, timeout: float = STOP_TIMEOUT):
+        """Stop the engine (its links are closed) and free the rings."""
+        process = self._process
+        if process is not None:
+            self.send('stop')
+            deadline = time.monotonic() + timeout
+            while process.is_alive() and time.monotonic() < deadline:
+                self.poll_events()  # A full pipe would block the engine's last events
+                process.join(0.05)
+            if process.is_alive():
+                logger.warning("MAVLink engine did not stop in %.1f s; terminating it", timeout)
+                process.terminate()
+                process.join(timeout)
+            self._process = None
+        with self._send_lock:
+            if self._pipe is not None:
+                self._pipe.close()
+                self._pipe = None
+        for ring in (self._poses, self._telemetry):
+            if ring is not None:
+                ring.close()
+        self._poses = None
+        self._telemetry = None
+
+    def get_stats(self) -> dict:
+        """Get process and ring counters."""
+        return {
+            'pid': self.pid,
+            'alive': self.is_alive,
+            'commands_sent': self.commands_sent,
+            'events_received': self.events_received,
+            'poses': self._poses.get_stats() if self._poses is not None else None,
+            'telemetry': self._telemetry.get_stats() if self._telemetry is not None else None,
+        }
+
+
+class PoseReader:
+    """Newest pose of every mocap source, read from the pose ring.
+
+    Called from the engine's mocap scheduler thread, so reads are locked.
+    """
+
+    def __init__(self, ring: SharedRing):
+        self._ring = ring
+        self._latest: Dict[int, tuple] = {}
+        self._lock = threading.Lock()
+
+    def latest(self, system_id: int) -> Optional[tuple]:
+        """Get the newest pose pushed for a vehicle, or None."""
+        with self._lock:
+            rows = self._ring.read()
+            if len(rows):
+                for sid, pose in zip(rows['system_id'].tolist(), rows['pose'].tolist()):
+                    self._latest[sid] = tuple(pose)
+            return self._latest.get(system_id)
+
+
+class SharedPose:
+    """Mocap source object for the engine's service: pose comes from the ring."""
+
+    def __init__(self, reader: PoseReader, system_id: int):
+        self._reader = reader
+        self._system_id = system_id
+
+    @property
+    def pose(self) -> Optional[tuple]:
+        """Newest pose pushed by the UI side (same layout as a scene object's)."""
+        return self._reader.latest(self._system_id)
+
+
+class EngineHost(QObject):
+    """Runs a MavlinkService for the UI-side service, through the pipe and rings."""
+
+    def __init__(self, pipe, settings: MavlinkGlobalSettings, poses: SharedRing,
+                 telemetry: SharedRing):
+        """Initialize the host and its service (not started yet).
+
+        Args:
+            pipe: Engine end of the command/event pipe
+            settings: Global settings from the UI side
+            poses: Pose ring (read side)
+            telemetry: Telemetry ring (write side)
+        """
+        super().__init__()
+        # Imported here: mavlink_service imports this module for EngineProcess
+        from services.mavlink_service import MavlinkService
+
+        self._pipe = pipe
+        self._send_lock = threading.Lock()
+        self._settings = settings
+        self._poses = PoseReader(poses)
+        self._pose_ring = poses
+        self._telemetry = telemetry
+        self._mocap_objects: Dict[int, SharedPose] = {}
+        self._stopped = False
+        self._next_status = 0.0
+        self._next_statistics = 0.0
+
+        self._commands = {
+            'settings': self._on_settings,
+            'connect': self._on_connect,
+            'cancel': self._service_call('cancel_connect'),
+            'remove': self._service_call('remove_connection'),
+            'mocap': self._on_mocap,
+            'setpoint': self._service_call('send_setpoint'),
+            'setpoint_source': self._on_setpoint_source,
+            'console': self._service_call('send_console_command'),
+            'command_long': self._service_call('send_command_long'),
+            'bandwidth': self._service_call('set_link_bandwidth'),
+            'test': self._service_call('run_connection_test'),
+            'reset_timing': self._service_call('reset_timing_statistics'),
+            'record': self._service_call('start_recording'),
+            'stop_recording': self._service_call('stop_recording'),
+            'forward': self._service_call('add_forward_output'),
+            'unforward': self._service_call('remove_forward_output'),
+            'stop': self.stop,
+        }
+
+        service = MavlinkService()
+        service.connection_changed.connect(
+            lambda system_id, connected: self._emit('connection_changed', system_id, connected))
+        service.health_updated.connect(
+            lambda rate_hz, active: self._emit('health', rate_hz, active))
+        service.console_output.connect(
+            lambda system_id, text: self._emit('console', system_id, text))
+        service.device_discovered.connect(lambda device: self._emit('device', device))
+        service.connection_test_complete.connect(lambda results: self._emit('test_complete', results))
+        service.subscribe_telemetry(self._push_telemetry)
+        self._service = service
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(COMMAND_POLL_INTERVAL_MS)
+        self._timer.timeout.connect(self._poll)
+
+    def start(self):
+        """Start the service and begin serving commands."""
+        self._service.update_global_settings(engine_settings(self._settings))
+        self._service.on_start()
+        self._timer.start()
+
+    def stop(self):
+        """Close every link, stop the service and quit the event loop."""
+        if self._stopped:
+            return
+        self._stopped = True
+        self._timer.stop()
+        service = self._service
+        for system_id in list(service.get_active_connections()):
+            service.remove_connection(system_id)
+        service.on_stop()
+        self._emit('stopped')
+        self._pose_ring.close()
+        self._telemetry.close()
+        QCoreApplication.quit()
+
+    def _poll(self):
+        """Run pending commands and send periodic status (engine event loop)."""
+        try:
+            while self._pipe.poll():
+                command, *args = self._pipe.recv()
+                handler = self._commands.get(command)
+                if handler is None:
+                    logger.warning("Unknown MAVLink engine command %r", command)
+                    continue
+                try:
+                    handler(*args)
+                except Exception:
+                    logger.exception("MAVLink engine command %r failed", command)
+                if self._stopped:
+                    return
+        except (EOFError, OSError):
+            logger.warning("MAVLink engine lost its parent; stopping")
+            self.stop()
+            return
+
+        now = time.monotonic()
+        if now >= self._next_status:
+            self._next_status = now + STATUS_INTERVAL
+            self._emit('status', {
+                system_id: (conn.state.value, conn.status)
+                for system_id, conn in self._service.get_active_connections().items()
+            })
+        if now >= self._next_statistics:
+            self._next_statistics = now + STATISTICS_INTERVAL
+            self._emit('statistics', self._service.get_connection_statistics())
+
+    def _emit(self, event: str, *args):
+        """Send an event to the UI side (any thread)."""
+        with self._send_lock:
+            try:
+                self._pipe.send((event,) + args)
+            except (OSError, ValueError):
+                pass
+
+    def _push_telemetry(self, system_id: int, snapshot):
+        """Full-rate telemetry subscriber: one ring record per update."""
+        self._telemetry.push((time.monotonic(), system_id) + _read_telemetry(snapshot))
+
+    def _service_call(self, method: str):
+        """Command handler that calls a service method with the command's arguments."""
+        return lambda *args: getattr(self._service, method)(*args)
+
+    def _on_settings(self, settings: MavlinkGlobalSettings):
+        self._settings = settings
+        self._service.update_global_settings(engine_settings(settings))
+
+    def _on_connect(self, config):
+        name = config.name
+        future = self._service.connect_async(config)
+        future.add_done_callback(
+            lambda f: self._emit('connect_finished', name, f.result(), config))
+
+    def _on_mocap(self, system_id: int, rate_hz: float):
+        """Start, retime (rate_hz > 0) or stop (rate_hz = 0) a vehicle's mocap."""
+        service = self._service
+        source = self._mocap_objects.get(system_id)
+        if not rate_hz:
+            if source is not None:
+                service.unregister_mavlink_object(source)
+                del self._mocap_objects[system_id]
+            return
+        config = MavlinkObjectConfig(enabled=True, system_id=system_id, send_mocap=True,
+                                     mocap_rate_hz=rate_hz)
+        if source is None:
+            source = self._mocap_objects[system_id] = SharedPose(self._poses, system_id)
+            service.register_mavlink_object(source, config)
+        else:
+            service.update_object_config(source, config)
+
+    def _on_setpoint_source(self, system_id: int, setpoint):
+        if setpoint is None:
+            self._service.unregister_setpoint_source(system_id)
+        else:
+            self._service.register_setpoint_source(system_id, setpoint)
+
+
+def run_engine(pipe, settings: MavlinkGlobalSettings, pose_ring: tuple, telemetry_ring: tuple,
+               log_level: int = logging.INFO):
+    """Entry point of the engine process.
+
+    Args:
+        pipe: Engine end of the command/event pipe
+        settings: Global settings to start with
+        pose_ring: (name, capacity) of the pose ring
+        telemetry_ring: (name, capacity) of the telemetry ring
+        log_level: Logging level of the UI process
+    """
+    logging.basicConfig(level=log_level,
+                        format="%(asctime)s [%(levelname)s] [engine] %(name)s: %(message)s")
+    app = QCoreApplication.instance() or QCoreApplication([])
+    host = EngineHost(pipe, settings,
+                      SharedRing(POSE_DTYPE, pose_ring[1], pose_ring[0]),
+                      SharedRing(TELEMETRY_RECORD_DTYPE, telemetry_ring[1], telemetry_ring[0]))
+    host.start()
+    app.exec_()
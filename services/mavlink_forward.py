@@ -0,0 +1,574 @@
+"""
+Built-in MAVLink forwarding to downstream ground stations.
+
+MavlinkForwarder re-emits raw inbound vehicle frames to local UDP/TCP
+outputs (QGroundControl, loggers) and relays the frames those outputs send
+back to the vehicles, replacing an external mavlink-router hop.  Downlink
+frames are forwarded byte for byte from the receive path (the I/O thread
+in threaded and selector modes), so nothing is re-encoded and frames that
+no local handler consumes are never decoded.  Uplink frames are read by
+the forwarder's own thread and only their header and target_system byte
+are inspected to pick the vehicle.
+
+Each output filters by vehicle system ID and message ID and has its own
+token-bucket rate limit per direction; frames over a limit are dropped,
+so a ground station cannot saturate the vehicle link.
+
+Output addresses:
+
+    udpout:<host>:<port>   send to a ground station listening on host:port
+    udpin:<host>:<port>    listen on host:port and send to every peer heard
+    tcp:<host>:<port>      connect to a TCP server (reconnects when it drops)
+    tcpin:<host>:<port>    accept TCP clients on host:port
+"""
+import logging
+import selectors
+import socket
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+from services.mavlink_codec import (
+    frame_length,
+    peek_header,
+    peek_target_system,
+    target_system_offsets,
+    v2_dialect,
+)
+from services.mavlink_egress import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+OUTPUT_KINDS = ('udpout', 'udpin', 'tcp', 'tcpin')
+
+# Bytes queued per TCP client before whole frames are dropped
+MAX_STREAM_BACKLOG = 64 * 1024
+
+# Seconds between reconnection attempts of tcp: outputs
+RECONNECT_INTERVAL = 1.0
+
+# udpin: peers not heard from for this long stop receiving frames
+PEER_TIMEOUT = 30.0
+
+
+def parse_output_address(address: str) -> Tuple[str, str, int]:
+    """Split an output address into (kind, host, port).
+
+    Raises:
+        ValueError: If the kind is unknown or the port is invalid
+    """
+    kind, _, rest = address.partition(':')
+    host, _, port_text = rest.rpartition(':')
+    if kind not in OUTPUT_KINDS or not host:
+        raise ValueError(f"Invalid forward output address: {address}")
+    port = int(port_text)
+    if not 0 <= port <= 65535:
+        raise ValueError(f"Invalid forward output port: {address}")
+    return kind, host, port
+
+
+def split_frames(data) -> Tuple[List[bytes], int]:
+    """Cut a byte stream into complete MAVLink frames.
+
+    Bytes before a magic byte are skipped.
+
+    Returns:
+        Tuple of (frames, consumed); bytes from consumed on are the start of
+        an incomplete frame
+    """
+    frames = []
+    pos = 0
+    size = len(data)
+    while pos < size:
+        length = frame_length(data, pos)
+        if length is None:
+            if data[pos] in (0xFE, 0xFD) and size - pos < 3:
+                break  # Header still arriving
+            pos += 1
+            continue
+        if pos + length > size:
+            break
+        frames.append(bytes(data[pos:pos + length]))
+        pos += length
+    return frames, pos
+
+
+class _StreamPeer:
+    """TCP connection with a send backlog and a partial-frame receive buffer.
+
+    A send error only marks the peer failed: the forwarder thread owns the
+    socket's selector registration and drops the peer (see
+    MavlinkForwarder._service_outputs).
+    """
+
+    def __init__(self, sock: socket.socket, address):
+        sock.setblocking(False)
+        self.sock = sock
+        self.address = address
+        self.backlog = bytearray()
+        self.received = bytearray()
+        self.failed = False
+        self.closed = False
+
+    def send(self, frame: bytes) -> bool:
+        """Queue a frame and write as much of the backlog as the socket takes."""
+        if self.failed or self.closed or len(self.backlog) + len(frame) > MAX_STREAM_BACKLOG:
+            return False
+        self.backlog += frame
+        self.flush()
+        return True
+
+    def flush(self):
+        if not self.backlog or self.failed or self.closed:
+            return
+        try:
+            sent = self.sock.send(self.backlog)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            self.failed = True
+            return
+        del self.backlog[:sent]
+
+    def close(self):
+        self.closed = True
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class ForwardOutput:
+    """One downstream output: its sockets, filters, rate limits and counters."""
+
+    def __init__(self, name: str, address: str, system_ids=(), include_ids=(), exclude_ids=(),
+                 downlink_rate_limit_bps: float = 0.0, uplink_rate_limit_bps: float = 0.0,
+                 uplink_enabled: bool = True):
+        """Open the output's socket.
+
+        Args:
+            name: Unique name of the output
+            address: Output address (see module docstring)
+            system_ids: Vehicles forwarded to and accepted from this output (empty = all)
+            include_ids: Message IDs forwarded (empty = all)
+            exclude_ids: Message IDs never forwarded
+            downlink_rate_limit_bps: Vehicle-to-output byte rate limit (0 = unlimited)
+            uplink_rate_limit_bps: Output-to-vehicle byte rate limit (0 = unlimited)
+            uplink_enabled: Relay frames sent by the output to the vehicles
+
+        Raises:
+            ValueError: If the address is invalid
+            OSError: If the socket cannot be opened
+        """
+        self.name = name
+        self.address = address
+        self.kind, self.host, self.port = parse_output_address(address)
+        self.system_ids = frozenset(system_ids)
+        self.include_ids = frozenset(include_ids)
+        self.exclude_ids = frozenset(exclude_ids)
+        self.uplink_enabled = uplink_enabled
+        self._downlink = TokenBucket(downlink_rate_limit_bps)
+        self._uplink = TokenBucket(uplink_rate_limit_bps)
+        self._lock = threading.Lock()
+
+        self.sock: Optional[socket.socket] = None    # UDP socket or TCP listener
+        self.peers: Dict[tuple, float] = {}          # UDP address -> last heard
+        self.streams: List[_StreamPeer] = []
+        self._next_connect = 0.0
+        self._closed = threading.Event()
+
+        self.frames_out = 0
+        self.frames_in = 0
+        self.filtered = 0
+        self.downlink_dropped = 0
+        self.uplink_dropped = 0
+
+        if self.kind in ('udpout', 'udpin'):
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            try:
+                if self.kind == 'udpin':
+                    sock.bind((self.host, self.port))
+                else:
+                    self.peers[(self.host, self.port)] = time.monotonic()
+                sock.setblocking(False)
+            except OSError:
+                sock.close()
+                raise
+            self.sock = sock
+        elif self.kind == 'tcpin':
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                sock.bind((self.host, self.port))
+                sock.listen(4)
+                sock.setblocking(False)
+            except OSError:
+                sock.close()
+                raise
+            self.sock = sock
+
+    def wants_message(self, msg_id: int) -> bool:
+        """Whether the message filters pass a message ID (in either direction)."""
+        if msg_id in self.exclude_ids:
+            return False
+        return not self.include_ids or msg_id in self.include_ids
+
+    def wants_system(self, system_id: int) -> bool:
+        """Whether a vehicle is forwarded to and accepted from this output."""
+        return not self.system_ids or system_id in self.system_ids
+
+    def send(self, frame: bytes, msg_id: int, system_id: int) -> bool:
+        """Forward a vehicle frame to the output (thread-safe).
+
+        Returns:
+            True if the frame was sent to at least one peer
+        """
+        if not self.wants_system(system_id):
+            return False
+        if not self.wants_message(msg_id):
+            self.filtered += 1
+            return False
+        with self._lock:
+            if not self._admit(self._downlink, len(frame)):
+                self.downlink_dropped += 1
+                return False
+            sent = False
+            if self.sock is not None and self.kind != 'tcpin':
+                for address in self.peers:
+                    try:
+                        self.sock.sendto(frame, address)
+                        sent = True
+                    except OSError:
+                        pass
+            for stream in self.streams:
+                sent = stream.send(frame) or sent
+            if sent:
+                self.frames_out += 1
+            return sent
+
+    def admit_uplink(self, frame: bytes) -> bool:
+        """Charge an uplink frame against the uplink rate limit."""
+        with self._lock:
+            if self._admit(self._uplink, len(frame)):
+                self.frames_in += 1
+                return True
+            self.uplink_dropped += 1
+            return False
+
+    def close(self):
+        with self._lock:
+            for stream in self.streams:
+                stream.close()
+            self.streams = []
+            if self.sock is not None:
+                self.sock.close()
+                self.sock = None
+        self._closed.set()
+
+    def wait_closed(self, timeout: float) -> bool:
+        """Wait until the output's sockets are closed.
+
+        Returns:
+            True if they were closed within the timeout
+        """
+        return self._closed.wait(timeout)
+
+    def get_stats(self) -> dict:
+        """Get the output's counters."""
+        with self._lock:
+            clients = len(self.peers) if self.kind in ('udpout', 'udpin') else len(self.streams)
+        return {
+            'name': self.name,
+            'address': self.address,
+            'clients': clients,
+            'frames_out': self.frames_out,
+            'frames_in': self.frames_in,
+            'filtered': self.filtered,
+            'downlink_dropped': self.downlink_dropped,
+            'uplink_dropped': self.uplink_dropped,
+        }
+
+    @staticmethod
+    def _admit(bucket: TokenBucket, size: int) -> bool:
+        if bucket.unlimited:
+            return True
+        now = time.monotonic()
+        if bucket.available(now) < size:
+            return False
+        bucket.consume(size, now)
+        return True
+
+
+class MavlinkForwarder(threading.Thread):
+    """Forwards vehicle frames to outputs and relays their frames back.
+
+    forward() may be called from any thread; sockets are read, accepted and
+    reconnected on the forwarder's own thread.
+    """
+
+    def __init__(self, relay: Callable[[bytes, int, int], None], dialect=None,
+                 name: str = "mavlink-forward"):
+        """Initialize the forwarder.
+
+        Args:
+            relay: Called from the forwarder thread with (frame, target_system,
+                output) for every uplink frame that passes the output's
+                filters and rate limit; target_system 0 means every vehicle
+                the output accepts
+            dialect: pymavlink dialect module used to locate uplink target fields
+            name: Thread name
+        """
+        super().__init__(name=name, daemon=True)
+        self._relay = relay
+        self._target_offsets = target_system_offsets(v2_dialect(dialect))
+        self._outputs: Dict[str, ForwardOutput] = {}
+        self._selector = selectors.DefaultSelector()
+        self._changes = deque()
+        self._stop_event = threading.Event()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+        self.uplink_undecodable = 0
+
+    def add_output(self, output: ForwardOutput):
+        """Start forwarding to an open output (replacing one with the same name)."""
+        previous = self._outputs.get(output.name)
+        outputs = dict(self._outputs)
+        outputs[output.name] = output
+        self._outputs = outputs  # Swapped whole so forward() never sees a dict mid-update
+        if previous is not None:
+            self._post(('remove', previous))
+        self._post(('add', output))
+
+    def remove_output(self, name: str, timeout: float = 0.0) -> bool:
+        """Stop forwarding to an output and close it.
+
+        Args:
+            name: Output name
+            timeout: Seconds to wait for the forwarder thread to close the
+                output's sockets, so its address can be bound again right
+                away (0 = return without waiting)
+
+        Returns:
+            True if the output existed
+        """
+        outputs = dict(self._outputs)
+        output = outputs.pop(name, None)
+        if output is None:
+            return False
+        self._outputs = outputs
+        self._post(('remove', output))
+        if timeout > 0 and self.is_alive():
+            output.wait_closed(timeout)
+        return True
+
+    def get_outputs(self) -> List[ForwardOutput]:
+        """Get the active outputs."""
+        return list(self._outputs.values())
+
+    def forward(self, frame) -> int:
+        """Send a raw vehicle frame to every output whose filters pass it.
+
+        Returns:
+            Number of outputs the frame was sent to
+        """
+        outputs = self._outputs
+        if not outputs:
+            return 0
+        header = peek_header(frame)
+        if header is None:
+            return 0
+        msg_id, _, system_id, _ = header
+        count = 0
+        for output in outputs.values():
+            if output.send(frame, msg_id, system_id):
+                count += 1
+        return count
+
+    def stop(self, timeout: float = 1.0):
+        """Stop the thread and close every output."""
+        self._stop_event.set()
+        self._wake()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
+        # Outputs removed while the thread was stopping were never closed by it
+        removed = [output for action, output in self._changes if action == 'remove']
+        self._changes.clear()
+        for output in removed + list(self._outputs.values()):
+            output.close()
+        self._outputs = {}
+
+    def get_stats(self) -> dict:
+        """Get per-output counters."""
+        return {
+            'outputs': [output.get_stats() for output in self._outputs.values()],
+            'uplink_undecodable': self.uplink_undecodable,
+        }
+
+    def run(self):
+        """Read outputs until stop() is called."""
+        try:
+            while not self._stop_event.is_set():
+                self._apply_changes()
+                self._reconnect()
+                for key, _ in self._selector.select(RECONNECT_INTERVAL / 2):
+                    if key.data is None:
+                        self._drain_wakeups()
+                    else:
+                        self._on_readable(*key.data)
+                self._service_outputs()
+        finally:
+            self._selector.close()
+            for sock in (self._wake_r, self._wake_w):
+                sock.close()
+
+    def _service_outputs(self):
+        """Flush TCP backlogs, drop failed TCP peers and forget silent udpin peers."""
+        expired = time.monotonic() - PEER_TIMEOUT
+        for output in list(self._outputs.values()):
+            with output._lock:
+                for stream in output.streams:
+                    stream.flush()
+                failed = [stream for stream in output.streams if stream.failed]
+                if output.kind == 'udpin':
+                    for address in [a for a, seen in output.peers.items() if seen < expired]:
+                        del output.peers[address]
+            # A dropped tcp: peer lets _reconnect() open a new connection
+            for stream in failed:
+                self._drop_stream(output, stream)
+
+    def _on_readable(self, output: ForwardOutput, stream: Optional[_StreamPeer]):
+        if stream is not None:
+            self._read_stream(output, stream)
+        elif output.kind == 'tcpin':
+            self._accept(output)
+        else:
+            self._read_datagrams(output)
+
+    def _read_datagrams(self, output: ForwardOutput):
+        sock = output.sock
+        while sock is not None:
+            try:
+                data, address = sock.recvfrom(65535)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                return
+            if output.kind == 'udpin':
+                with output._lock:
+                    output.peers[address] = time.monotonic()
+            self._relay_frames(output, split_frames(data)[0])
+
+    def _accept(self, output: ForwardOutput):
+        try:
+            sock, address = output.sock.accept()
+        except (BlockingIOError, InterruptedError, OSError, AttributeError):
+            return
+        self._add_stream(output, _StreamPeer(sock, address))
+        logger.info("Forward output %s: client %s:%s connected", output.name, *address[:2])
+
+    def _add_stream(self, output: ForwardOutput, stream: _StreamPeer):
+        with output._lock:
+            output.streams.append(stream)
+        self._selector.register(stream.sock, selectors.EVENT_READ, (output, stream))
+
+    def _read_stream(self, output: ForwardOutput, stream: _StreamPeer):
+        try:
+            data = stream.sock.recv(65536)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b''
+        if not data:
+            self._drop_stream(output, stream)
+            return
+        stream.received += data
+        frames, consumed = split_frames(stream.received)
+        del stream.received[:consumed]
+        self._relay_frames(output, frames)
+
+    def _drop_stream(self, output: ForwardOutput, stream: _StreamPeer):
+        try:
+            self._selector.unregister(stream.sock)
+        except (KeyError, ValueError):
+            pass
+        stream.close()
+        with output._lock:
+            if stream in output.streams:
+                output.streams.remove(stream)
+        logger.info("Forward output %s: client disconnected", output.name)
+
+    def _relay_frames(self, output: ForwardOutput, frames: List[bytes]):
+        """Pass frames from an output on to the vehicles (forwarder thread)."""
+        if not output.uplink_enabled:
+            return
+        for frame in frames:
+            msg_id = peek_header(frame)[0]
+            if not output.wants_message(msg_id):
+                output.filtered += 1
+                continue
+            # Ground stations send as their own system; route on the target
+            target = self._target_system(frame)
+            if target is None:
+                continue
+            if target and not output.wants_system(target):
+                output.filtered += 1
+                continue
+            if output.admit_uplink(frame):
+                self._relay(frame, target, output)
+
+    def _target_system(self, frame: bytes) -> Optional[int]:
+        """Read a frame's target_system (0 = broadcast), or None for unknown messages."""
+        target = peek_target_system(frame, self._target_offsets)
+        if target is None:
+            self.uplink_undecodable += 1
+        return target
+
+    def _reconnect(self):
+        """Connect tcp: outputs that have no live connection."""
+        now = time.monotonic()
+        for output in list(self._outputs.values()):
+            if output.kind != 'tcp' or output.streams or now < output._next_connect:
+                continue
+            output._next_connect = now + RECONNECT_INTERVAL
+            try:
+                sock = socket.create_connection((output.host, output.port), timeout=0.2)
+            except OSError:
+                continue
+            self._add_stream(output, _StreamPeer(sock, (output.host, output.port)))
+            logger.info("Forward output %s: connected", output.name)
+
+    def _apply_changes(self):
+        while self._changes:
+            action, output = self._changes.popleft()
+            if action == 'add':
+                if output.sock is not None:
+                    self._selector.register(output.sock, selectors.EVENT_READ, (output, None))
+            else:
+                for sock in [output.sock] + [s.sock for s in output.streams]:
+                    if sock is None:
+                        continue
+                    try:
+                        self._selector.unregister(sock)
+                    except (KeyError, ValueError):
+                        pass
+                output.close()
+
+    def _post(self, change: tuple):
+        self._changes.append(change)
+        self._wake()
+
+    def _wake(self):
+        try:
+            self._wake_w.send(b'\0')
+        except (BlockingIOError, OSError):
+            pass
+
+    def _drain_wakeups(self):
+        try:
+            while self._wake_r.recv(4096):
+                pass
+        except (BlockingIOError, OSError):
+            pass
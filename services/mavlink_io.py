@@ -0,0 +1,385 @@
+"""
+MAVLink I/O engines.
+
+The default MavlinkService receive path polls every connection from a QTimer
+in the service thread.  The classes in this module move socket reads off that
+timer:
+
+- MessageInbox: bounded hand-off queue between an I/O thread and the service
+- ReceiveThread: one blocking reader thread per connection
+- SelectorEngine: one thread multiplexing every connection with selectors
+
+Decoded messages are delivered to the service through a MessageInbox so the
+service thread stays the only writer of telemetry state.
+"""
+import threading
+import logging
+import selectors
+import socket
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class MessageInbox:
+    """Bounded, thread-safe queue of received messages.
+
+    When the inbox is full the oldest message is discarded so the consumer
+    always sees the most recent telemetry.  Discards are counted so
+    backpressure is visible in the connection statistics.
+
+    The optional on_ready callback fires once when the inbox goes from
+    "nothing pending" to "something pending" and is re-armed by drain(),
+    so a fast producer wakes the consumer at most once per drain.
+    """
+
+    def __init__(self, maxsize: int = 1000, on_ready: Optional[Callable[[], None]] = None):
+        """Initialize the inbox.
+
+        Args:
+            maxsize: Maximum number of queued messages before the oldest is dropped
+            on_ready: Called (from the producer thread) when new messages are pending
+        """
+        self._maxsize = max(1, int(maxsize))
+        self._items = deque()
+        self._lock = threading.Lock()
+        self._on_ready = on_ready
+        self._notified = False
+        self.dropped = 0
+        self.high_watermark = 0
+
+    @property
+    def capacity(self) -> int:
+        """Maximum number of messages held before dropping."""
+        return self._maxsize
+
+    @property
+    def depth(self) -> int:
+        """Number of messages currently queued."""
+        return len(self._items)
+
+    def put(self, item) -> bool:
+        """Queue a message.
+
+        Args:
+            item: Message to queue
+
+        Returns:
+            True if queued without loss, False if the oldest message was dropped
+        """
+        with self._lock:
+            lossless = True
+            if len(self._items) >= self._maxsize:
+                self._items.popleft()
+                self.dropped += 1
+                lossless = False
+            self._items.append(item)
+            depth = len(self._items)
+            if depth > self.high_watermark:
+                self.high_watermark = depth
+            notify = not self._notified
+            self._notified = True
+
+        if notify and self._on_ready is not None:
+            try:
+                self._on_ready()
+            except Exception as e:
+                logger.debug("Inbox ready callback failed: %s", e)
+        return lossless
+
+    def drain(self, max_items: int = None) -> List[object]:
+        """Remove and return queued messages in arrival order.
+
+        Args:
+            max_items: Maximum number of messages to return (None = all)
+
+        Returns:
+            List of messages
+        """
+        with self._lock:
+            self._notified = False
+            count = len(self._items)
+            if max_items is not None:
+                count = min(count, max_items)
+            return [self._items.popleft() for _ in range(count)]
+
+    def get_stats(self) -> dict:
+        """Get queue statistics.
+
+        Returns:
+            Dictionary with depth, capacity, dropped and high_watermark
+        """
+        return {
+            'depth': len(self._items),
+            'capacity': self._maxsize,
+            'dropped': self.dropped,
+            'high_watermark': self.high_watermark,
+        }
+
+
+class ReceiveThread(threading.Thread):
+    """Dedicated I/O thread that blocks on one connection's socket.
+
+    The thread repeatedly calls ``receive(timeout)``, which should block for
+    up to ``timeout`` seconds and return a decoded message or None, and hands
+    each message to ``deliver``.  The timeout bounds how long stop() waits.
+    """
+
+    def __init__(self, name: str, receive: Callable[[float], object],
+                 deliver: Callable[[object], None], poll_timeout: float = 0.25):
+        """Initialize the receive thread.
+
+        Args:
+            name: Thread name (shown in debuggers and logs)
+            receive: Blocking receive function taking a timeout in seconds
+            deliver: Called with every decoded message
+            poll_timeout: Maximum time a single receive call may block
+        """
+        super().__init__(name=name, daemon=True)
+        self._receive = receive
+        self._deliver = deliver
+        self._poll_timeout = poll_timeout
+        self._stop_event = threading.Event()
+
+    def run(self):
+        """Read messages until stop() is called."""
+        while not self._stop_event.is_set():
+            try:
+                msg = self._receive(self._poll_timeout)
+            except Exception as e:
+                if self._stop_event.is_set():
+                    break
+                logger.warning("%s: receive failed: %s", self.name, e)
+                # Avoid a hot loop if the socket is persistently failing
+                self._stop_event.wait(self._poll_timeout)
+                continue
+            if msg is not None:
+                self._deliver(msg)
+
+    def stop(self, timeout: float = 1.0):
+        """Signal the thread to exit and wait for it.
+
+        Args:
+            timeout: Maximum time to wait for the thread to finish
+        """
+        self._stop_event.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
+
+
+class SelectorEngine(threading.Thread):
+    """Single I/O thread that services many links with one selector.
+
+    Links are registered with a file descriptor and a ``pump(budget)``
+    callable.  When the selector reports a descriptor readable the engine
+    calls ``pump`` with the per-link budget; pump should read and deliver at
+    most ``budget`` messages without blocking and return how many it read.
+
+    A link that uses its whole budget may still have data buffered (in the
+    kernel or in the MAVLink parser), so it is serviced again on the next
+    round without waiting for the selector.  Links are serviced round-robin,
+    which stops one chatty vehicle from starving the others.  Links without
+    a selectable descriptor are pumped every round with a short timeout.
+    """
+
+    def __init__(self, messages_per_link: int = 32, poll_timeout: float = 0.1,
+                 unselectable_poll_interval: float = 0.005):
+        """Initialize the engine.
+
+        Args:
+            messages_per_link: Maximum messages read from one link per round
+            poll_timeout: Maximum time the selector blocks when idle
+            unselectable_poll_interval: Selector timeout while links without
+                a file descriptor are registered
+        """
+        super().__init__(name="mavlink-selector", daemon=True)
+        self.messages_per_link = max(1, int(messages_per_link))
+        self._poll_timeout = poll_timeout
+        self._unselectable_poll_interval = unselectable_poll_interval
+
+        self._selector = selectors.DefaultSelector()
+        self._links: Dict[object, tuple] = {}     # key -> (fd, pump)
+        self._unselectable: Dict[object, Callable[[int], int]] = {}
+        self._carry_over: List[object] = []       # links that hit their budget
+        self._changes = deque()
+        self._changes_lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+        # Self-pipe used to interrupt select() when links are added or removed
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+
+        self.rounds = 0
+        self.messages = 0
+        self.budget_exhausted = 0
+
+    @property
+    def link_count(self) -> int:
+        """Number of registered links."""
+        return len(self._links) + len(self._unselectable)
+
+    def add_link(self, key, fd: Optional[int], pump: Callable[[int], int]):
+        """Register a link with the engine (thread-safe).
+
+        Args:
+            key: Hashable identifier used to remove the link later
+            fd: Readable file descriptor, or None if the link cannot be selected
+            pump: Non-blocking read function taking a message budget
+        """
+        self._post(('add', key, fd, pump))
+
+    def remove_link(self, key):
+        """Unregister a link (thread-safe).
+
+        Args:
+            key: Identifier passed to add_link()
+        """
+        self._post(('remove', key, None, None))
+
+    def stop(self, timeout: float = 1.0):
+        """Stop the engine thread and release the selector.
+
+        Args:
+            timeout: Maximum time to wait for the thread to finish
+        """
+        self._stop_event.set()
+        self._wake()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
+
+    def get_stats(self) -> dict:
+        """Get engine counters.
+
+        Returns:
+            Dictionary with links, rounds, messages and budget_exhausted
+        """
+        return {
+            'links': self.link_count,
+            'messages_per_link': self.messages_per_link,
+            'rounds': self.rounds,
+            'messages': self.messages,
+            'budget_exhausted': self.budget_exhausted,
+        }
+
+    def run(self):
+        """Dispatch readable links until stop() is called."""
+        try:
+            while not self._stop_event.is_set():
+                self._apply_changes()
+
+                if self._carry_over:
+                    timeout = 0
+                elif self._unselectable:
+                    timeout = self._unselectable_poll_interval
+                else:
+                    timeout = self._poll_timeout
+
+                ready = []
+                for key, _events in self._selector.select(timeout):
+                    if key.data is None:
+                        self._drain_wakeups()
+                    else:
+                        ready.append(key.data)
+
+                self._service_round(ready)
+        finally:
+            self._close()
+
+    def _service_round(self, ready: List[object]):
+        """Pump carried-over, readable and unselectable links once each."""
+        # Carried-over links go first so they are not starved by fresh events
+        order = list(self._carry_over)
+        seen = set(order)
+        for key in ready:
+            if key not in seen:
+                order.append(key)
+                seen.add(key)
+        for key in self._unselectable:
+            if key not in seen:
+                order.append(key)
+                seen.add(key)
+
+        self._carry_over = []
+        budget = self.messages_per_link
+        for key in order:
+            entry = self._links.get(key)
+            pump = entry[1] if entry is not None else self._unselectable.get(key)
+            if pump is None:
+                continue  # removed during this round
+            try:
+                count = pump(budget)
+            except Exception as e:
+                logger.warning("Selector engine: link %s read failed: %s", key, e)
+                continue
+            self.messages += count
+            if count >= budget:
+                self.budget_exhausted += 1
+                if key in self._links:
+                    self._carry_over.append(key)
+        self.rounds += 1
+
+    def _post(self, change: tuple):
+        with self._changes_lock:
+            self._changes.append(change)
+        self._wake()
+
+    def _wake(self):
+        try:
+            self._wake_w.send(b'\0')
+        except (BlockingIOError, OSError):
+            pass  # Pipe full or closed; the engine is already awake
+
+    def _drain_wakeups(self):
+        try:
+            while self._wake_r.recv(4096):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+
+    def _apply_changes(self):
+        while True:
+            with self._changes_lock:
+                if not self._changes:
+                    return
+                action, key, fd, pump = self._changes.popleft()
+            if action == 'add':
+                self._unregister(key)
+                if fd is None:
+                    self._unselectable[key] = pump
+                    continue
+                try:
+                    self._selector.register(fd, selectors.EVENT_READ, key)
+                    self._links[key] = (fd, pump)
+                except (ValueError, OSError) as e:
+                    logger.info("Selector engine: polling link %s (fd not selectable: %s)", key, e)
+                    self._unselectable[key] = pump
+            else:
+                self._unregister(key)
+
+    def _unregister(self, key):
+        entry = self._links.pop(key, None)
+        if entry is not None:
+            try:
+                self._selector.unregister(entry[0])
+            except (KeyError, ValueError, OSError):
+                pass
+        self._unselectable.pop(key, None)
+        if key in self._carry_over:
+            self._carry_over.remove(key)
+
+    def _close(self):
+        for key in list(self._links):
+            self._unregister(key)
+        self._unselectable.clear()
+        try:
+            self._selector.close()
+        except Exception:
+            pass
+        for sock in (self._wake_r, self._wake_w):
+            try:
+                sock.close()
+            except Exception:
+                pass
@@ -0,0 +1,137 @@
+"""
+Active MAVLink link test.
+
+A LinkProbe measures one connection with a train of PING requests sent at
+a fixed rate, each with its own sequence number.  Replies are matched by
+sequence, which gives per-ping round-trip times (reported as percentiles),
+loss, reordering and duplicates.  The service runs one probe per
+connection in parallel and grades each link from the RTT percentiles and
+loss (see grade_link_quality).
+
+Pings are timed from the moment they are submitted, so time spent in the
+egress queue counts towards the RTT and pings shed by a saturated link
+count as lost: the probe measures the link as the trainer experiences it.
+"""
+import threading
+from typing import Dict, List
+
+# Quality grades: (max p95 RTT in ms, max p99 RTT in ms, max loss fraction)
+GOOD_LINK = (50.0, 100.0, 0.01)
+FAIR_LINK = (150.0, 300.0, 0.05)
+
+# Seconds to wait for late replies after the last ping of a train
+REPLY_GRACE = 1.0
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+def grade_link_quality(result: dict) -> str:
+    """Grade a link test result as 'good', 'fair' or 'poor'.
+
+    Args:
+        result: LinkProbe.get_results() output
+
+    Returns:
+        Quality grade; 'poor' when no ping was answered
+    """
+    if not result.get('pings_received'):
+        return 'poor'
+    for grade, (p95_ms, p99_ms, loss) in (('good', GOOD_LINK), ('fair', FAIR_LINK)):
+        if (result['rtt_p95_ms'] <= p95_ms and result['rtt_p99_ms'] <= p99_ms
+                and result['loss_rate'] <= loss):
+            return grade
+    return 'poor'
+
+
+class LinkProbe:
+    """PING train bookkeeping for one connection.
+
+    next_seq() is called by the sending thread and on_reply() by the thread
+    that handles received messages, so the state is locked.
+    """
+
+    def __init__(self):
+        self._sent_at: Dict[int, float] = {}   # ping sequence -> monotonic send time
+        self._rtts: List[float] = []
+        self._answered = set()
+        self._next_seq = 1
+        self._highest_answered = 0
+        self.sent = 0
+        self.reordered = 0
+        self.duplicates = 0
+        self._lock = threading.Lock()
+
+    def next_seq(self, now: float) -> int:
+        """Register a ping about to be sent and get its sequence number.
+
+        Args:
+            now: Monotonic send time
+        """
+        with self._lock:
+            seq = self._next_seq
+            self._next_seq += 1
+            self._sent_at[seq] = now
+            self.sent += 1
+            return seq
+
+    def on_reply(self, seq: int, now: float) -> bool:
+        """Match a PING reply.
+
+        Only replies addressed to this ground station may be passed in: a
+        vehicle's own PING requests (target 0/0) can carry any sequence.
+
+        Args:
+            seq: Sequence number echoed by the vehicle
+            now: Monotonic receive time
+
+        Returns:
+            True if the reply belongs to this probe
+        """
+        with self._lock:
+            sent_at = self._sent_at.get(seq)
+            if sent_at is None:
+                return False
+            if seq in self._answered:
+                self.duplicates += 1
+                return True
+            self._answered.add(seq)
+            self._rtts.append(now - sent_at)
+            if seq < self._highest_answered:
+                self.reordered += 1
+            else:
+                self._highest_answered = seq
+            return True
+
+    def get_results(self) -> dict:
+        """Get the RTT percentiles, loss and reordering of the train so far.
+
+        Returns:
+            Dictionary with pings_sent, pings_received, lost, loss_rate,
+            reordered, duplicates and rtt_min/p50/p95/p99/max/mean_ms
+        """
+        with self._lock:
+            rtts = sorted(self._rtts)
+            sent = self.sent
+            reordered, duplicates = self.reordered, self.duplicates
+        received = len(rtts)
+        lost = sent - received
+        return {
+            'pings_sent': sent,
+            'pings_received': received,
+            'lost': lost,
+            'loss_rate': lost / sent if sent else 0.0,
+            'reordered': reordered,
+            'duplicates': duplicates,
+            'rtt_min_ms': (rtts[0] if rtts else 0.0) * 1000.0,
+            'rtt_p50_ms': _percentile(rtts, 0.50) * 1000.0,
+            'rtt_p95_ms': _percentile(rtts, 0.95) * 1000.0,
+            'rtt_p99_ms': _percentile(rtts, 0.99) * 1000.0,
+            'rtt_max_ms': (rtts[-1] if rtts else 0.0) * 1000.0,
+            'rtt_mean_ms': (sum(rtts) / received if received else 0.0) * 1000.0,
+        }
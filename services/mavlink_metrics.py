@@ -0,0 +1,570 @@
+"""
+Lightweight metrics for the MAVLink receive and send paths.
+
+Everything here is designed to be updated once per message on the hot path,
+so updates are O(1) and do not allocate.
+"""
+import threading
+import time
+from typing import Dict
+
+
+class RateMeter:
+    """Sliding-window event rate backed by a fixed ring of time buckets.
+
+    The window is split into ``buckets`` equal slots.  mark() adds to the slot
+    for the current time and rate() reports the events in the whole window
+    divided by its length.  Advancing the ring clears at most ``buckets``
+    slots, so both operations are O(1) regardless of the event rate.
+
+    Not thread-safe on its own; see MessageRateMeter for a locked wrapper.
+    """
+
+    def __init__(self, window_secs: float = 1.0, buckets: int = 10):
+        """Initialize the meter.
+
+        Args:
+            window_secs: Length of the averaging window in seconds
+            buckets: Number of slots the window is divided into
+        """
+        self._window = float(window_secs)
+        self._num_buckets = max(1, int(buckets))
+        self._bucket_secs = self._window / self._num_buckets
+        self._counts = [0] * self._num_buckets
+        self._total = 0
+        self._current = None  # absolute index of the newest bucket
+
+    def mark(self, now: float, count: int = 1):
+        """Record events.
+
+        Args:
+            now: Current monotonic time in seconds
+            count: Number of events to record
+        """
+        index = int(now / self._bucket_secs)
+        self._advance(index)
+        self._counts[index % self._num_buckets] += count
+        self._total += count
+
+    def rate(self, now: float) -> float:
+        """Get the event rate over the window ending at now.
+
+        Args:
+            now: Current monotonic time in seconds
+
+        Returns:
+            Events per second
+        """
+        self._advance(int(now / self._bucket_secs))
+        return self._total / self._window
+
+    def reset(self):
+        """Clear all recorded events."""
+        self._counts = [0] * self._num_buckets
+        self._total = 0
+        self._current = None
+
+    def _advance(self, index: int):
+        """Expire buckets that have fallen out of the window."""
+        current = self._current
+        if current is None:
+            self._current = index
+            return
+        steps = index - current
+        if steps <= 0:
+            return  # Same bucket (or the clock stepped back); nothing expires
+        if steps >= self._num_buckets:
+            for i in range(self._num_buckets):
+                self._counts[i] = 0
+            self._total = 0
+        else:
+            for i in range(current + 1, index + 1):
+                slot = i % self._num_buckets
+                self._total -= self._counts[slot]
+                self._counts[slot] = 0
+        self._current = index
+
+
+class MessageRateMeter:
+    """Per-link and per-message-type receive rates.
+
+    Wraps one RateMeter for the link and one per message type seen.  A lock
+    makes it safe to mark from an I/O thread while the service reads rates.
+    """
+
+    def __init__(self, window_secs: float = 1.0, buckets: int = 10):
+        """Initialize the meter.
+
+        Args:
+            window_secs: Length of the averaging window in seconds
+            buckets: Number of slots per window
+        """
+        self._window_secs = window_secs
+        self._buckets = buckets
+        self._total = RateMeter(window_secs, buckets)
+        self._by_type: Dict[str, RateMeter] = {}
+        self._lock = threading.Lock()
+
+    def mark(self, msg_type: str, now: float = None) -> float:
+        """Record one received message.
+
+        Args:
+            msg_type: MAVLink message type name (e.g. 'ATTITUDE')
+            now: Monotonic timestamp (defaults to time.monotonic())
+
+        Returns:
+            Updated total link rate in Hz
+        """
+        if now is None:
+            now = time.monotonic()
+        with self._lock:
+            meter = self._by_type.get(msg_type)
+            if meter is None:
+                meter = RateMeter(self._window_secs, self._buckets)
+                self._by_type[msg_type] = meter
+            meter.mark(now)
+            self._total.mark(now)
+            return self._total.rate(now)
+
+    def rate(self, now: float = None) -> float:
+        """Get the total link rate in Hz."""
+        if now is None:
+            now = time.monotonic()
+        with self._lock:
+            return self._total.rate(now)
+
+    def type_rates(self, now: float = None) -> Dict[str, float]:
+        """Get the rate of every message type seen, in Hz.
+
+        Types that have gone quiet report 0.0 once they leave the window.
+        """
+        if now is None:
+            now = time.monotonic()
+        with self._lock:
+            return {name: meter.rate(now) for name, meter in self._by_type.items()}
+
+    def reset(self):
+        """Clear all rates."""
+        with self._lock:
+            self._total.reset()
+            self._by_type.clear()
+
+
+def _percentile(sorted_values, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+class JitterStats:
+    """Send-interval jitter for a periodic sender.
+
+    record() is called with the time of every send; the deviation of each
+    interval from the nominal period is kept in a fixed ring of the most
+    recent samples, from which percentiles are computed on demand.
+    """
+
+    def __init__(self, period_s: float, window: int = 1000):
+        """Initialize the statistics.
+
+        Args:
+            period_s: Nominal send period in seconds
+            window: Number of most recent intervals kept
+        """
+        self.period_s = period_s
+        self._window = max(1, int(window))
+        self._samples = [0.0] * self._window
+        self._count = 0
+        self._last = None
+        self._interval_sum = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, now: float):
+        """Record a send.
+
+        Args:
+            now: Monotonic time of the send in seconds
+        """
+        last = self._last
+        self._last = now
+        if last is None:
+            return
+        interval = now - last
+        with self._lock:
+            self._samples[self._count % self._window] = interval - self.period_s
+            self._count += 1
+            self._interval_sum += interval
+
+    def reset(self, period_s: float = None):
+        """Clear all samples, optionally changing the nominal period."""
+        with self._lock:
+            if period_s is not None:
+                self.period_s = period_s
+            self._count = 0
+            self._last = None
+            self._interval_sum = 0.0
+
+    def get_stats(self) -> dict:
+        """Get jitter percentiles over the recent window.
+
+        Returns:
+            Dictionary with samples, period_ms, mean_interval_ms and the
+            absolute jitter percentiles p50_ms, p99_ms and max_ms
+        """
+        with self._lock:
+            n = min(self._count, self._window)
+            deviations = sorted(abs(d) for d in self._samples[:n])
+            mean_interval = self._interval_sum / self._count if self._count else 0.0
+        return {
+            'samples': n,
+            'period_ms': self.period_s * 1000.0,
+            'mean_interval_ms': mean_interval * 1000.0,
+            'p50_ms': _percentile(deviations, 0.50) * 1000.0,
+            'p99_ms': _percentile(deviations, 0.99) * 1000.0,
+            'max_ms': (deviations[-1] if deviations else 0.0) * 1000.0,
+        }
+
+
+class LogHistogram:
+    """HDR-style histogram of durations with bounded relative error.
+
+    Values are recorded in microseconds.  Every power-of-two range is split
+    into 2**sub_bucket_bits linear slots, so a recorded value is off by at
+    most 1 / 2**sub_bucket_bits (6.25% by default) while values up to
+    ``max_value_s`` fit in a few hundred preallocated counters.  record() is
+    O(1) and does not allocate; percentiles are computed on demand.
+
+    Not locked: a single writer thread may record while another thread
+    reads, at the cost of a reading that is a few samples out of date.
+    """
+
+    def __init__(self, max_value_s: float = 60.0, sub_bucket_bits: int = 4):
+        """Initialize an empty histogram.
+
+        Args:
+            max_value_s: Largest value tracked exactly; larger values are
+                counted in the top bucket
+            sub_bucket_bits: Linear slots per power of two, as a power of two
+        """
+        self._sub_bits = sub_bucket_bits
+        self._sub_count = 1 << sub_bucket_bits
+        self._max_us = max(int(max_value_s * 1e6), 2 * self._sub_count)
+        self._counts = [0] * (self._index(self._max_us) + 1)
+        self.reset()
+
+    def record(self, value_s: float):
+        """Record one duration.
+
+        Args:
+            value_s: Duration in seconds (negative values count as 0)
+        """
+        us = int(value_s * 1e6)
+        if us < 0:
+            us = 0
+        elif us > self._max_us:
+            us = self._max_us
+        self._counts[self._index(us)] += 1
+        self.count += 1
+        self._sum_us += us
+        if us < self._min_us:
+            self._min_us = us
+        if us > self._max_seen_us:
+            self._max_seen_us = us
+
+    def percentile(self, fraction: float) -> float:
+        """Get the value below which the given fraction of samples fall, in seconds."""
+        count = self.count
+        if count == 0:
+            return 0.0
+        rank = max(1, int(round(fraction * count)))
+        seen = 0
+        for index, bucket_count in enumerate(self._counts):
+            seen += bucket_count
+            if seen >= rank:
+                low, high = self._bounds(index)
+                value = (low + high) / 2.0
+                return min(max(value, self._min_us), self._max_seen_us) / 1e6
+        return self._max_seen_us / 1e6
+
+    def reset(self):
+        """Discard every sample (in place, without reallocating)."""
+        counts = self._counts
+        for i in range(len(counts)):
+            counts[i] = 0
+        self.count = 0
+        self._sum_us = 0
+        self._min_us = self._max_us
+        self._max_seen_us = 0
+
+    def get_stats(self) -> dict:
+        """Get the sample count, mean, extremes and percentiles in milliseconds."""
+        count = self.count
+        if count == 0:
+            return {'count': 0}
+        return {
+            'count': count,
+            'min_ms': self._min_us / 1000.0,
+            'mean_ms': self._sum_us / count / 1000.0,
+            'p50_ms': self.percentile(0.50) * 1000.0,
+            'p90_ms': self.percentile(0.90) * 1000.0,
+            'p99_ms': self.percentile(0.99) * 1000.0,
+            'p999_ms': self.percentile(0.999) * 1000.0,
+            'max_ms': self._max_seen_us / 1000.0,
+        }
+
+    def _index(self, us: int) -> int:
+        """Counter index of a value: exact below 2 * sub_count, then log-linear."""
+        if us < 2 * self._sub_count:
+            return us
+        shift = us.bit_length() - self._sub_bits - 1
+        return (shift << self._sub_bits) + (us >> shift)
+
+    def _bounds(self, index: int):
+        """Range of microsecond values [low, high) counted at an index."""
+        if index < 2 * self._sub_count:
+            return index, index + 1
+        shift = (index >> self._sub_bits) - 1
+        top = index - (shift << self._sub_bits)
+        return top << shift, (top + 1) << shift
+
+
+class LinkTimingStats:
+    """Per-message-type timing histograms for one link.
+
+    Tracks the inter-arrival time of each message type and the latency from
+    a message's arrival to the UI tick that published the telemetry it
+    updated.  arrival() runs on the receive path (possibly an I/O thread);
+    processed() and published() run on the service thread.
+    """
+
+    def __init__(self):
+        self._arrivals: Dict[str, list] = {}   # type -> [last arrival, LogHistogram]
+        self._ui_latency: Dict[str, LogHistogram] = {}
+        self._unpublished: Dict[str, float] = {}  # type -> oldest unpublished arrival
+        self._lock = threading.Lock()  # guards new types against concurrent reads
+
+    def arrival(self, msg_type: str, now: float):
+        """Record a received message.
+
+        Args:
+            msg_type: MAVLink message type name
+            now: Monotonic arrival time in seconds
+        """
+        entry = self._arrivals.get(msg_type)
+        if entry is None:
+            with self._lock:
+                self._arrivals[msg_type] = [now, LogHistogram()]
+            return
+        entry[1].record(now - entry[0])
+        entry[0] = now
+
+    def processed(self, msg_type: str, arrival: float):
+        """Note that a message updated the telemetry waiting to be published.
+
+        Args:
+            msg_type: MAVLink message type name
+            arrival: Monotonic arrival time of the message
+        """
+        if msg_type not in self._unpublished:
+            self._unpublished[msg_type] = arrival
+
+    def published(self, now: float):
+        """Record the latency of everything processed since the last UI tick."""
+        unpublished = self._unpublished
+        if not unpublished:
+            return
+        for msg_type, arrival in unpublished.items():
+            histogram = self._ui_latency.get(msg_type)
+            if histogram is None:
+                histogram = LogHistogram()
+                with self._lock:
+                    self._ui_latency[msg_type] = histogram
+            histogram.record(now - arrival)
+        unpublished.clear()
+
+    def reset(self):
+        """Clear every histogram (message types already seen are kept)."""
+        with self._lock:
+            for entry in self._arrivals.values():
+                entry[1].reset()
+            for histogram in self._ui_latency.values():
+                histogram.reset()
+            self._unpublished.clear()
+
+    def get_stats(self) -> dict:
+        """Get inter-arrival and UI latency statistics by message type."""
+        with self._lock:
+            arrivals = [(name, entry[1]) for name, entry in self._arrivals.items()]
+            ui_latency = list(self._ui_latency.items())
+        return {
+            'inter_arrival': {name: histogram.get_stats() for name, histogram in sorted(arrivals)},
+            'ui_latency': {name: histogram.get_stats() for name, histogram in sorted(ui_latency)},
+        }
+
+
+# A sequence number this many frames or more ahead of the expected one is not
+# taken as a gap on its own: it is a late (reordered) frame unless the arrival
+# gap says that many frames could have been sent (a burst loss)
+SEQ_REORDER_WINDOW = 128
+
+# A frame numbered below this after a burst-length silence is a sender that
+# restarted its sequence (pymavlink and autopilots number from 0)
+SEQ_RESTART_MAX = 16
+
+# SourceStatsTable row columns
+(_LAST_SEQ, _RECEIVED, _LOST, _OUT_OF_ORDER, _BYTES, _SEEN, _FRAME_RATE, _BYTE_RATE,
+ _FIRST_TIME, _LAST_TIME) = range(10)
+
+_SEQ_MASK = (1 << 256) - 1
+
+
+class SourceStatsTable:
+    """Receive counters per (system ID, component ID) on one link.
+
+    Every MAVLink sender numbers its frames with its own 8-bit sequence, so
+    with several components on a link (autopilot, companion computer,
+    camera) loss can only be measured per sender.  Each sender gets one
+    small fixed row: newest sequence, a 256-bit map (one bit per sequence
+    number) of the frames seen among the last SEQ_REORDER_WINDOW, frames,
+    lost frames, late or duplicated frames, bytes and frame/byte rate
+    meters.  record() is O(1).
+
+    A frame up to SEQ_REORDER_WINDOW behind the newest sequence is a
+    duplicate when it is in the map and late otherwise (and no longer
+    lost); neither moves the expected sequence, so neither is mistaken for
+    a gap.  The same numbers
+    are also SEQ_REORDER_WINDOW or more ahead, which is only taken as a
+    burst loss when the silence before the frame was long enough, at the
+    sender's measured rate, for that many frames to have been sent.
+    """
+
+    def __init__(self, window_secs: float = 1.0, buckets: int = 10):
+        """Initialize an empty table.
+
+        Args:
+            window_secs: Rate averaging window in seconds
+            buckets: Slots per rate window
+        """
+        self._window_secs = window_secs
+        self._buckets = buckets
+        self._rows: Dict[int, list] = {}  # (system_id << 8) | component_id -> row
+        self.received = 0
+        self.lost = 0
+        self._lock = threading.Lock()
+
+    def record(self, system_id: int, component_id: int, seq: int, size: int, now: float) -> int:
+        """Count one frame.
+
+        Args:
+            system_id: Sender system ID
+            component_id: Sender component ID
+            seq: Frame sequence number
+            size: Frame length in bytes
+            now: Monotonic receive time
+
+        Returns:
+            Change in the lost count: frames newly found lost before this
+            one, or -1 for a late frame that had been counted lost
+        """
+        key = (system_id << 8) | component_id
+        lost = 0
+        with self._lock:
+            row = self._rows.get(key)
+            if row is None:
+                row = [seq, 0, 0, 0, 0, 1 << seq,
+                       RateMeter(self._window_secs, self._buckets),
+                       RateMeter(self._window_secs, self._buckets),
+                       now, now]
+                self._rows[key] = row
+            else:
+                gap = (seq - row[_LAST_SEQ] - 1) & 0xFF
+                if gap < SEQ_REORDER_WINDOW:
+                    lost = gap
+                    self._advance(row, seq, gap)
+                else:
+                    # Frames the sender would have sent during the silence
+                    elapsed = (now - row[_LAST_TIME]) * self._frame_rate(row)
+                    if elapsed < SEQ_REORDER_WINDOW / 2:
+                        row[_OUT_OF_ORDER] += 1
+                        if not (row[_SEEN] >> seq) & 1:
+                            lost = -1  # Late: counted lost when its gap was found
+                            row[_SEEN] |= 1 << seq
+                    elif seq < SEQ_RESTART_MAX:
+                        # Sender restarted its sequence (the map is stale after such a silence)
+                        row[_LAST_SEQ] = seq
+                        row[_SEEN] = 1 << seq
+                    else:
+                        # Burst loss, possibly wrapping the sequence more than once
+                        lost = gap + 256 * max(0, round((elapsed - 1 - gap) / 256))
+                        self._advance(row, seq, gap)
+            row[_RECEIVED] += 1
+            row[_LOST] += lost
+            row[_BYTES] += size
+            row[_FRAME_RATE].mark(now)
+            row[_BYTE_RATE].mark(now, size)
+            row[_LAST_TIME] = now
+            self.received += 1
+            self.lost += lost
+        return lost
+
+    @staticmethod
+    def _advance(row: list, seq: int, gap: int):
+        """Make seq the newest sequence, dropping numbers that left the window."""
+        if gap + 1 >= SEQ_REORDER_WINDOW:
+            row[_SEEN] = 1 << seq
+        else:
+            start = (row[_LAST_SEQ] + 1 - SEQ_REORDER_WINDOW) & 0xFF
+            cleared = ((1 << (gap + 1)) - 1) << start
+            cleared = (cleared | (cleared >> 256)) & _SEQ_MASK
+            row[_SEEN] = (row[_SEEN] & ~cleared) | (1 << seq)
+        row[_LAST_SEQ] = seq
+
+    def _frame_rate(self, row: list) -> float:
+        """Sender's frame rate up to its previous frame (0 if not known yet)."""
+        last = row[_LAST_TIME]
+        span = min(self._window_secs, last - row[_FIRST_TIME])
+        if span <= 0:
+            return 0.0
+        return row[_FRAME_RATE].rate(last) * self._window_secs / span
+
+    @property
+    def loss_rate(self) -> float:
+        """Fraction of frames lost across all senders."""
+        total = self.received + self.lost
+        return self.lost / total if total else 0.0
+
+    def reset(self):
+        """Forget every sender."""
+        with self._lock:
+            self._rows.clear()
+            self.received = 0
+            self.lost = 0
+
+    def get_stats(self, now: float = None) -> list:
+        """Get one entry per sender, ordered by system and component ID.
+
+        Returns:
+            List of dictionaries with system_id, component_id, received,
+            lost, loss_rate, out_of_order, bytes, rate_hz and bytes_per_sec
+        """
+        if now is None:
+            now = time.monotonic()
+        rows = []
+        with self._lock:
+            for key in sorted(self._rows):
+                row = self._rows[key]
+                expected = row[_RECEIVED] + row[_LOST]
+                rows.append({
+                    'system_id': key >> 8,
+                    'component_id': key & 0xFF,
+                    'received': row[_RECEIVED],
+                    'lost': row[_LOST],
+                    'loss_rate': row[_LOST] / expected if expected else 0.0,
+                    'out_of_order': row[_OUT_OF_ORDER],
+                    'bytes': row[_BYTES],
+                    'rate_hz': row[_FRAME_RATE].rate(now),
+                    'bytes_per_sec': row[_BYTE_RATE].rate(now),
+                })
+        return rows
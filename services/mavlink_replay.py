@@ -0,0 +1,298 @@
+"""
+Playback of recorded tlogs as a virtual MAVLink connection.
+
+ReplayLink implements the part of pymavlink's mavfile interface that
+MavlinkConnection uses (recv_match, wait_heartbeat, mav, write, close), so a
+recording can be fed through the normal decode/dispatch/telemetry pipeline.
+Connection strings of the form
+
+    replay:<path>.tlog[?speed=<N|max>][&loop=1]
+
+are opened as a ReplayLink instead of a socket.  Inbound frames are paced by
+their recorded timestamps divided by the speed factor (``max`` or 0 plays
+as fast as the consumer reads); outbound frames in the log and anything sent
+to the link are ignored.  The log's sidecar index (see mavlink_tlog) is
+built on first open and used for seeking.
+"""
+import mmap
+import os
+import threading
+import time
+from typing import Optional, Tuple
+from urllib.parse import parse_qs
+
+import numpy as np
+
+from services.mavlink_codec import frame_length, v2_dialect
+from services.mavlink_tlog import LINK_INBOUND, load_tlog_index
+
+REPLAY_PREFIX = "replay:"
+
+
+def is_replay_string(connection_string: str) -> bool:
+    """Check whether a connection string names a tlog replay."""
+    return connection_string.startswith(REPLAY_PREFIX)
+
+
+def parse_replay_string(connection_string: str) -> Tuple[str, float, bool]:
+    """Split a replay connection string into its options.
+
+    Args:
+        connection_string: String of the form replay:<path>[?speed=N&loop=1]
+
+    Returns:
+        Tuple of (path, speed, loop); speed 0 means as fast as possible
+
+    Raises:
+        ValueError: If the string is not a replay string or an option is invalid
+    """
+    if not is_replay_string(connection_string):
+        raise ValueError(f"Not a replay connection string: {connection_string}")
+    path, _, query = connection_string[len(REPLAY_PREFIX):].partition('?')
+    options = {key: values[-1] for key, values in parse_qs(query).items()}
+    speed_text = options.get('speed', '1').lower()
+    speed = 0.0 if speed_text == 'max' else float(speed_text)
+    if speed < 0:
+        raise ValueError(f"Replay speed must not be negative: {speed_text}")
+    loop = options.get('loop', '0').lower() in ('1', 'true', 'yes')
+    return path, speed, loop
+
+
+class ReplayLink:
+    """Recorded tlog exposed through the pymavlink connection interface.
+
+    Playback controls (pause, resume, seek, set_speed) are thread-safe and
+    take effect on the next read.
+    """
+
+    def __init__(self, path: str, speed: float = 1.0, loop: bool = False, dialect=None,
+                 source_system: int = 255, source_component: int = 0):
+        """Open a recording.
+
+        Args:
+            path: Path of the .tlog file
+            speed: Playback speed factor (0 = as fast as possible)
+            loop: Restart from the beginning at the end of the log
+            dialect: pymavlink dialect module used to decode frames
+            source_system: System ID for the (discarded) outbound messages
+            source_component: Component ID for the (discarded) outbound messages
+        """
+        self.path = path
+        self.loop = loop
+        index = load_tlog_index(path)
+        index = index[(index['usec'] & np.uint64(3)) == LINK_INBOUND]
+        self._offsets = index['offset'].astype(np.int64)
+        self._msg_ids = index['msg_id']
+        # Threads recording the same log can interleave slightly out of order;
+        # pace and seek on a non-decreasing clock
+        times = (index['usec'] & ~np.uint64(3)).astype(np.float64) / 1e6
+        self._times = np.maximum.accumulate(times) if len(times) else times
+
+        self._file = open(path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+
+        self.mav = v2_dialect(dialect).MAVLink(self, srcSystem=source_system,
+                                                    srcComponent=source_component)
+        self.mav.robust_parsing = True
+
+        self._cond = threading.Condition()
+        self._pos = 0
+        self._speed = max(0.0, float(speed))
+        self._paused = False
+        self._closed = False
+        self._anchor_wall = time.monotonic()
+        self._anchor_log = self._times[0] if len(self._times) else 0.0
+        self.frames_replayed = 0
+        self.decode_errors = 0
+        self.bytes_discarded = 0
+
+    @property
+    def duration_s(self) -> float:
+        """Time covered by the recording."""
+        return float(self._times[-1] - self._times[0]) if len(self._times) else 0.0
+
+    @property
+    def position_s(self) -> float:
+        """Log time of the next frame, relative to the start of the log."""
+        if not len(self._times):
+            return 0.0
+        pos = min(self._pos, len(self._times) - 1)
+        return float(self._times[pos] - self._times[0])
+
+    @property
+    def speed(self) -> float:
+        """Playback speed factor (0 = as fast as possible)."""
+        return self._speed
+
+    @property
+    def paused(self) -> bool:
+        """True while playback is paused."""
+        return self._paused
+
+    @property
+    def finished(self) -> bool:
+        """True once every frame was played and the link does not loop."""
+        return self._pos >= len(self._offsets) and not self.loop
+
+    def pause(self):
+        """Stop delivering frames until resume()."""
+        with self._cond:
+            if not self._paused:
+                self._paused = True
+                self._cond.notify_all()
+
+    def resume(self):
+        """Continue playback from the current position."""
+        with self._cond:
+            if self._paused:
+                self._paused = False
+                self._rebase()
+                self._cond.notify_all()
+
+    def set_speed(self, speed: float):
+        """Change the playback speed factor (0 = as fast as possible)."""
+        with self._cond:
+            self._speed = max(0.0, float(speed))
+            self._rebase()
+            self._cond.notify_all()
+
+    def seek(self, position_s: float):
+        """Jump to a time relative to the start of the log.
+
+        Args:
+            position_s: Seconds from the first frame (clamped to the log)
+        """
+        with self._cond:
+            if len(self._times):
+                target = self._times[0] + max(0.0, position_s)
+                self._pos = int(np.searchsorted(self._times, target, side='left'))
+            self._rebase()
+            self._cond.notify_all()
+
+    def recv_match(self, condition=None, type=None, blocking: bool = False,
+                   timeout: float = None):
+        """Get the next frame that is due, decoded.
+
+        Args:
+            condition: Unsupported; must be None
+            type: Message type name (or list of names) to wait for
+            blocking: Wait until a frame is due (or timeout expires)
+            timeout: Maximum time to wait in seconds when blocking
+
+        Returns:
+            Decoded message, or None if nothing is due
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        types = [type] if isinstance(type, str) else type
+        while True:
+            pos = self._next_frame(blocking, deadline)
+            if pos is None:
+                return None
+            msg = self._decode(pos)
+            if msg is None:
+                self.decode_errors += 1
+                continue
+            self.frames_replayed += 1
+            if types is None or msg.get_type() in types:
+                return msg
+
+    def recv_msg(self):
+        """Get the next due message without blocking."""
+        return self.recv_match(blocking=False)
+
+    def wait_heartbeat(self, blocking: bool = True, timeout: float = None):
+        """Get the first HEARTBEAT in the log without consuming any frames.
+
+        Returns:
+            Decoded HEARTBEAT, or None if the log has none
+        """
+        for i in np.flatnonzero(self._msg_ids == 0):
+            msg = self._decode(int(i))
+            if msg is not None and msg.get_type() == 'HEARTBEAT':
+                return msg
+        return None
+
+    def write(self, buf) -> int:
+        """Discard an outbound frame."""
+        self.bytes_discarded += len(buf)
+        return len(buf)
+
+    def close(self):
+        """Close the log file."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._data:
+            self._data.close()
+        self._file.close()
+
+    def get_status(self) -> dict:
+        """Get playback state.
+
+        Returns:
+            Dictionary with path, position_s, duration_s, speed, paused,
+            finished, frames_replayed, frames_total and decode_errors
+        """
+        return {
+            'path': self.path,
+            'position_s': self.position_s,
+            'duration_s': self.duration_s,
+            'speed': self._speed,
+            'paused': self._paused,
+            'finished': self.finished,
+            'frames_replayed': self.frames_replayed,
+            'frames_total': len(self._offsets),
+            'decode_errors': self.decode_errors,
+        }
+
+    def _next_frame(self, blocking: bool, deadline: Optional[float]) -> Optional[int]:
+        """Claim the next due frame, waiting for it if blocking.
+
+        Returns:
+            Index of the frame, or None if nothing is due
+        """
+        with self._cond:
+            while not self._closed:
+                if self._pos >= len(self._offsets) and self.loop and len(self._offsets):
+                    self._pos = 0
+                    self._rebase()
+                delay = self._due_in()
+                if delay is not None and delay <= 0:
+                    self._pos += 1
+                    return self._pos - 1
+                if not blocking:
+                    return None
+                wait = delay
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return None
+                    wait = remaining if wait is None else min(wait, remaining)
+                self._cond.wait(wait)
+            return None
+
+    def _due_in(self) -> Optional[float]:
+        """Seconds until the next frame is due (None if paused or at the end)."""
+        if self._paused or self._pos >= len(self._offsets):
+            return None
+        if self._speed <= 0:
+            return 0.0
+        due = self._anchor_wall + (self._times[self._pos] - self._anchor_log) / self._speed
+        return due - time.monotonic()
+
+    def _rebase(self):
+        """Restart the playback clock at the current position."""
+        self._anchor_wall = time.monotonic()
+        if self._pos < len(self._times):
+            self._anchor_log = self._times[self._pos]
+
+    def _decode(self, i: int):
+        start = int(self._offsets[i]) + 8
+        length = frame_length(self._data, start)
+        if length is None:
+            return None
+        try:
+            return self.mav.decode(bytearray(self._data[start:start + length]))
+        except Exception:
+            return None
@@ -0,0 +1,216 @@
+"""
+Deadline-driven schedulers for time-critical MAVLink sends.
+
+DeadlineScheduler runs periodic tasks on a dedicated thread against the
+monotonic clock rather than a QTimer, so sends are not delayed by whatever
+else the service's event loop is doing.  Each task records its send-interval
+jitter (see JitterStats), either when its callback runs or, for callbacks that
+only queue the send, when the owner reports the actual write (record_send()).
+"""
+import logging
+import threading
+import time
+from enum import Enum
+from typing import Callable, Dict, Optional
+
+from services.mavlink_metrics import JitterStats
+
+logger = logging.getLogger(__name__)
+
+
+class MissPolicy(Enum):
+    """What to do with deadlines that passed while the task could not run.
+
+    SKIP: Drop the missed slots and wait for the next slot on the grid.
+    CATCH_UP: Run the missed slots back to back (up to max_catch_up).
+    """
+    SKIP = "skip"
+    CATCH_UP = "catch_up"
+
+
+class _Task:
+    """One periodic task and its counters."""
+
+    def __init__(self, key, period_s: float, callback: Callable[[], object],
+                 policy: MissPolicy, start: float, external_timing: bool = False):
+        self.key = key
+        self.period_s = period_s
+        self.callback = callback
+        self.policy = policy
+        self.external_timing = external_timing
+        self.next_deadline = start
+        self.jitter = JitterStats(period_s)
+        self.sends = 0
+        self.missed = 0
+        self.errors = 0
+        self.max_lateness = 0.0
+
+
+class DeadlineScheduler(threading.Thread):
+    """Thread running periodic callbacks on monotonic-clock deadlines.
+
+    Deadlines are fixed on a grid (start + n * period), so a late call does
+    not push later ones back.  When a task falls behind by more than one
+    period its MissPolicy decides whether the missed slots are skipped or
+    run back to back.  A callback returning False is treated as "nothing to
+    send" and is not counted as a send.
+    """
+
+    def __init__(self, name: str = "mavlink-deadline", max_catch_up: int = 3):
+        """Initialize the scheduler.
+
+        Args:
+            name: Thread name
+            max_catch_up: Maximum missed slots replayed by CATCH_UP tasks;
+                anything older is skipped
+        """
+        super().__init__(name=name, daemon=True)
+        self.max_catch_up = max(0, int(max_catch_up))
+        self._tasks: Dict[object, _Task] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+
+    def add_task(self, key, period_s: float, callback: Callable[[], object],
+                 policy: MissPolicy = MissPolicy.SKIP, external_timing: bool = False):
+        """Add or replace a periodic task (thread-safe).
+
+        Args:
+            key: Hashable task identifier
+            period_s: Period in seconds
+            callback: Called on the scheduler thread at every deadline
+            policy: How missed deadlines are handled
+            external_timing: The callback only queues its send; jitter is
+                recorded from record_send() calls instead of callback times
+        """
+        task = _Task(key, max(1e-4, float(period_s)), callback, policy, time.monotonic(),
+                     external_timing)
+        with self._lock:
+            self._tasks[key] = task
+        self._wake.set()
+
+    def remove_task(self, key) -> bool:
+        """Remove a task (thread-safe).
+
+        Returns:
+            True if the task existed
+        """
+        with self._lock:
+            removed = self._tasks.pop(key, None) is not None
+        self._wake.set()
+        return removed
+
+    def set_period(self, key, period_s: float, policy: MissPolicy = None):
+        """Change a task's period (and optionally its miss policy).
+
+        The jitter statistics are reset since they refer to the old period.
+        Nothing happens when neither the period nor the policy changes, so
+        callers can re-apply settings without losing the statistics.
+        """
+        period_s = max(1e-4, float(period_s))
+        with self._lock:
+            task = self._tasks.get(key)
+            if task is None:
+                return
+            if period_s == task.period_s and policy in (None, task.policy):
+                return
+            task.period_s = period_s
+            if policy is not None:
+                task.policy = policy
+            task.next_deadline = time.monotonic()
+            task.jitter.reset(task.period_s)
+        self._wake.set()
+
+    def record_send(self, key, now: Optional[float] = None):
+        """Record the actual write of an external_timing task's send (thread-safe).
+
+        Args:
+            key: Task identifier
+            now: Monotonic time of the write (default: now)
+        """
+        task = self._tasks.get(key)
+        if task is not None and task.external_timing:
+            task.jitter.record(time.monotonic() if now is None else now)
+
+    def has_task(self, key) -> bool:
+        """Check whether a task is registered."""
+        return key in self._tasks
+
+    def get_task_stats(self, key) -> Optional[dict]:
+        """Get counters and jitter percentiles for a task.
+
+        Returns:
+            Dictionary with rate_hz, policy, sends, missed, errors,
+            max_lateness_ms and a 'jitter' dict, or None if unknown
+        """
+        task = self._tasks.get(key)
+        if task is None:
+            return None
+        return {
+            'rate_hz': 1.0 / task.period_s,
+            'policy': task.policy.value,
+            'sends': task.sends,
+            'missed': task.missed,
+            'errors': task.errors,
+            'max_lateness_ms': task.max_lateness * 1000.0,
+            'jitter': task.jitter.get_stats(),
+        }
+
+    def stop(self, timeout: float = 1.0):
+        """Stop the scheduler thread.
+
+        Args:
+            timeout: Maximum time to wait for the thread to finish
+        """
+        self._stop_event.set()
+        self._wake.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
+
+    def run(self):
+        """Run tasks as their deadlines come due until stop() is called."""
+        while not self._stop_event.is_set():
+            with self._lock:
+                task = min(self._tasks.values(), key=lambda t: t.next_deadline, default=None)
+            if task is None:
+                self._wake.wait(1.0)
+                self._wake.clear()
+                continue
+
+            delay = task.next_deadline - time.monotonic()
+            if delay > 0:
+                # Woken early when tasks change; re-evaluate either way
+                self._wake.wait(delay)
+                self._wake.clear()
+                continue
+
+            self._run_task(task)
+
+    def _run_task(self, task: _Task):
+        now = time.monotonic()
+        lateness = now - task.next_deadline
+        if lateness > task.max_lateness:
+            task.max_lateness = lateness
+        try:
+            sent = task.callback()
+        except Exception as e:
+            task.errors += 1
+            sent = False
+            logger.warning("%s: task %s failed: %s", self.name, task.key, e)
+        if sent is not False:
+            task.sends += 1
+            if not task.external_timing:
+                task.jitter.record(now)
+
+        period = task.period_s
+        next_deadline = task.next_deadline + period
+        behind = time.monotonic() - next_deadline
+        if behind >= 0:
+            missed = int(behind / period) + 1
+            if task.policy == MissPolicy.SKIP:
+                skipped = missed
+            else:
+                skipped = max(0, missed - self.max_catch_up)
+            next_deadline += skipped * period
+            task.missed += skipped
+        task.next_deadline = next_deadline
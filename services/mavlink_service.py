@@ -18,25 +18,65 @@ defined in libs/dtrg-mavlink/message_definitions/v1.0/dtrg.xml
 import os
 import sys
 import time
+import dataclasses
+import functools
 import threading
 import logging
-from queue import PriorityQueue
-from dataclasses import dataclass
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Dict, Optional, List, Callable
 from enum import Enum
 
 from PyQt5.QtCore import pyqtSignal, QTimer, QThread
 
 from services.service_base import ServiceBase, DebugLevel, ServiceLevel
+from services.mavlink_io import MessageInbox, ReceiveThread, SelectorEngine
+from services.mavlink_metrics import LinkTimingStats, MessageRateMeter, SourceStatsTable
+from services.mavlink_scheduler import DeadlineScheduler, MissPolicy
+from services.mavlink_egress import MAX_FRAME_BYTES, EgressScheduler
+from services.mavlink_tlog import TlogRecorder
+from services.mavlink_forward import ForwardOutput, MavlinkForwarder
+from services.mavlink_replay import ReplayLink, is_replay_string, parse_replay_string
+from services.mavlink_streams import StreamSubscription
+from services.mavlink_adaptive import LinkRateController
+from services.mavlink_linktest import REPLY_GRACE, LinkProbe, grade_link_quality
+from services.mavlink_engine import EngineProcess, apply_telemetry_record
+from services.fleet_table import FleetTableWriter
+from services.mavlink_shared import (
+    SharedLink,
+    get_shared_endpoints,
+    is_shared_string,
+    open_shared_link,
+)
+from services.mavlink_discovery import (
+    DiscoveryScanner,
+    bound_udp_port,
+    device_from_heartbeat,
+    device_key,
+    parse_port_list,
+    prefer_device,
+)
+from services.mavlink_dispatch import MessageDispatcher, resolve_message_id
+from services.telemetry_publisher import TelemetryPublisher
+from services.telemetry_store import TelemetryStore
+from services.mavlink_codec import (
+    FastTelemetryDecoder,
+    FilteredMessage,
+    HotMessageEncoder,
+    install_decode_filter,
+    max_frame_length,
+)
 from models.structs import (
     MavlinkConnectionConfig,
     MavlinkTelemetryData,
+    MavlinkTelemetrySnapshot,
     MavlinkConnectionStatus,
     MavlinkMessagePriority,
     SetpointData,
     MocapData,
     MavlinkGlobalSettings,
     MavlinkObjectConfig,
+    MavlinkForwardConfig,
+    MavlinkStreamProfile,
 )
 
 logger = logging.getLogger(__name__)
@@ -106,6 +146,18 @@ class ConnectionState(Enum):
     ERROR = "error"
 
 
+class ReceiveMode(Enum):
+    """How inbound MAVLink messages are read from the connections.
+
+    POLL: The service timer polls every connection without blocking.
+    THREAD: Each connection owns an I/O thread blocking on its socket.
+    SELECTOR: One shared I/O thread multiplexes all connections.
+    """
+    POLL = "poll"
+    THREAD = "thread"
+    SELECTOR = "selector"
+
+
 class ConnectionTestWorker(QThread):
     """Worker thread to run connection tests off the UI thread.
     
@@ -116,17 +168,20 @@ class ConnectionTestWorker(QThread):
     test_complete = pyqtSignal(object)  # dict of test results
     error = pyqtSignal(str)
     
-    def __init__(self, mavlink_service, duration_secs: float = 2.0, parent=None):
+    def __init__(self, mavlink_service, duration_secs: float = 2.0, rate_hz: float = None,
+                 parent=None):
         """Initialize the connection test worker.
         
         Args:
             mavlink_service: MavlinkService instance to test
             duration_secs: Test duration in seconds
+            rate_hz: PING rate (None = service default)
             parent: Parent QObject
         """
         super().__init__(parent)
         self._mavlink_service = mavlink_service
         self._duration_secs = duration_secs
+        self._rate_hz = rate_hz
     
     def run(self):
         """Run the connection test in a background thread."""
@@ -136,29 +191,13 @@ class ConnectionTestWorker(QThread):
         
         try:
             # Use the synchronous test method
-            results = self._mavlink_service._run_connection_test_sync(self._duration_secs)
+            results = self._mavlink_service._run_connection_test_sync(self._duration_secs,
+                                                                      self._rate_hz)
             self.test_complete.emit(results)
         except Exception as e:
             self.error.emit(str(e))
 
 
-@dataclass
-class PrioritizedMessage:
-    """Message wrapper for priority queue ordering.
-    
-    Lower priority values are processed first (CRITICAL=1, HIGH=2, NORMAL=3).
-    """
-    priority: int
-    timestamp: float
-    message: object
-    
-    def __lt__(self, other):
-        # Compare by priority first, then by timestamp for FIFO within same priority
-        if self.priority != other.priority:
-            return self.priority < other.priority
-        return self.timestamp < other.timestamp
-
-
 class MavlinkConnection:
     """Manages a single MAVLink connection to a drone.
     
@@ -173,6 +212,20 @@ class MavlinkConnection:
     
     # Heartbeat timeout in seconds before connection is considered lost
     HEARTBEAT_TIMEOUT = 5.0
+
+    # Built-in dispatch table entries: (message ID, handler method)
+    _BUILTIN_HANDLERS = (
+        (0, '_handle_heartbeat'),             # HEARTBEAT
+        (1, '_handle_sys_status'),            # SYS_STATUS
+        (4, '_handle_ping'),                  # PING
+        (24, '_handle_gps_raw_int'),          # GPS_RAW_INT
+        (30, '_handle_attitude'),             # ATTITUDE
+        (32, '_handle_local_position_ned'),   # LOCAL_POSITION_NED
+        (77, '_handle_command_ack'),          # COMMAND_ACK
+        (126, '_handle_serial_control'),      # SERIAL_CONTROL
+        (230, '_handle_estimator_status'),    # ESTIMATOR_STATUS
+        (253, '_handle_statustext'),          # STATUSTEXT
+    )
     
     def __init__(self, config: MavlinkConnectionConfig):
         """Initialize a MAVLink connection.
@@ -187,23 +240,61 @@ class MavlinkConnection:
         self._connection = None
         self._state = ConnectionState.DISCONNECTED
         self._last_heartbeat_sent = 0.0
-        self._message_count_window: List[float] = []
+        self._rate_meter = MessageRateMeter()
+        self._timing = LinkTimingStats()
         self._lock = threading.Lock()
         self._console_output_callback = None  # set via set_console_output_callback()
 
-        # Packet loss tracking
-        self._last_seq_num = None  # Last received sequence number
+        # Packet loss tracking, per sending system/component
+        self._sources = SourceStatsTable()
         self._packets_dropped = 0  # Total dropped packets
 
         # Round-trip time tracking
         self._ping_start_time = None
         self._last_ping_sent = 0.0
+        self._probe: Optional[LinkProbe] = None  # Active link test (see start_link_probe)
+
+        # Threaded receive (see start_receive_thread / attach_selector_engine)
+        self._inbox: Optional[MessageInbox] = None
+        self._receive_thread: Optional[ReceiveThread] = None
+        self._selector_engine: Optional[SelectorEngine] = None
+
+        # Message dispatch table (see register_message_handler)
+        self._dispatcher = MessageDispatcher()
+        self._messages_filtered = 0
+        self._fast_decoder: Optional[FastTelemetryDecoder] = None
+        self._encoder: Optional[HotMessageEncoder] = None
+        self._encoder_mav = None  # MAVLink object the encoder was built for
+
+        # Outbound priority queues (see attach_egress); None = send directly
+        self._egress: Optional[EgressScheduler] = None
+        self._frame_sizes: Dict[str, int] = {}
+
+        # Flight recorder receiving every raw frame (see attach_recorder)
+        self._recorder: Optional[TlogRecorder] = None
+
+        # Downstream ground stations receiving every raw frame (see attach_forwarder)
+        self._forwarder: Optional[MavlinkForwarder] = None
+
+        # Requested vehicle stream rates (see set_stream_profile)
+        self._streams: Optional[StreamSubscription] = None
+
+        # Adaptive telemetry/setpoint rates (see attach_rate_controller)
+        self._rate_controller: Optional[LinkRateController] = None
+        self._setpoint_credit = 0.0
+        self._register_builtin_handlers()
 
     @property
     def state(self) -> ConnectionState:
         """Get current connection state."""
         return self._state
     
+    @property
+    def peer_address(self) -> Optional[str]:
+        """IP address the last packet came from (UDP listening links only)."""
+        address = getattr(self._connection, 'last_address', None)
+        return address[0] if address else None
+
     @property
     def is_connected(self) -> bool:
         """Check if connection is established and healthy."""
@@ -219,9 +310,42 @@ class MavlinkConnection:
         """Get the total number of dropped packets detected."""
         return self._packets_dropped
 
-    def connect(self) -> bool:
+    @property
+    def loss_rate(self) -> float:
+        """Fraction of inbound frames lost, over every sender on the link."""
+        return self._sources.loss_rate
+
+    @property
+    def replay(self) -> Optional[ReplayLink]:
+        """Get the playback controls if this connection replays a tlog."""
+        connection = self._connection
+        return connection if isinstance(connection, ReplayLink) else None
+
+    @property
+    def shared_link(self) -> Optional[SharedLink]:
+        """Get the routing state if this connection is on a shared UDP endpoint."""
+        connection = self._connection
+        return connection if isinstance(connection, SharedLink) else None
+
+    @property
+    def receive_mode(self) -> ReceiveMode:
+        """Get how this connection's inbound messages are currently read."""
+        if self._receive_thread is not None:
+            return ReceiveMode.THREAD
+        if self._selector_engine is not None:
+            return ReceiveMode.SELECTOR
+        return ReceiveMode.POLL
+
+    def connect(self, timeout: float = 5.0, cancel: threading.Event = None) -> bool:
         """Establish the MAVLink connection.
-        
+
+        Blocks until the vehicle's first HEARTBEAT arrives, the timeout expires
+        or cancel is set.  Safe to call from a worker thread.
+
+        Args:
+            timeout: Seconds to wait for the first heartbeat
+            cancel: Event that aborts the attempt when set
+
         Returns:
             True if connection was established successfully, False otherwise.
         """
@@ -232,23 +356,37 @@ class MavlinkConnection:
         
         try:
             self._state = ConnectionState.CONNECTING
-            self._connection = mavutil.mavlink_connection(
-                self.config.connection_string,
-                source_system=self.config.source_system,
-                source_component=self.config.source_component,
-            )
-
-            # Prime the drone's MAVLink router by sending GCS heartbeats before
-            # waiting for a response.  Many drones (PX4 + MAVLink router) won't
-            # start unicasting back to our UDP address until they see at least one
-            # incoming packet from us.  QGC triggers this same behaviour when you
-            # manually add a UDP comm link and hit Connect.
-            self._prime_connection()
+            if is_replay_string(self.config.connection_string):
+                # Recorded tlog played back as a virtual connection
+                path, speed, loop = parse_replay_string(self.config.connection_string)
+                self._connection = ReplayLink(
+                    path, speed=speed, loop=loop, dialect=mavlink_dialect,
+                    source_system=self.config.source_system,
+                    source_component=self.config.source_component,
+                )
+                msg = self._connection.wait_heartbeat()
+            elif is_shared_string(self.config.connection_string):
+                # One vehicle on a UDP port shared with others, routed by system ID
+                self._connection = open_shared_link(
+                    self.config.connection_string, dialect=mavlink_dialect,
+                    source_system=self.config.source_system,
+                    source_component=self.config.source_component,
+                )
+                msg = self._wait_for_heartbeat(timeout, cancel)
+            else:
+                self._connection = mavutil.mavlink_connection(
+                    self.config.connection_string,
+                    source_system=self.config.source_system,
+                    source_component=self.config.source_component,
+                )
+                msg = self._wait_for_heartbeat(timeout, cancel)
 
-            # Wait for heartbeat with timeout
-            msg = self._connection.wait_heartbeat(timeout=5.0)
             if msg is None:
-                print(f"[MavlinkConnection] ERROR: No heartbeat received (timeout)")
+                if cancel is not None and cancel.is_set():
+                    print(f"[MavlinkConnection] Connection attempt cancelled")
+                else:
+                    print(f"[MavlinkConnection] ERROR: No heartbeat received (timeout)")
+                self._close_link()
                 self._state = ConnectionState.DISCONNECTED
                 return False
             
@@ -263,16 +401,41 @@ class MavlinkConnection:
             self.status.connected = True
             self.status.last_heartbeat = time.time()
             self._state = ConnectionState.CONNECTED
+            self._install_decode_filter()
+            self._install_write_tap()
             return True
             
         except Exception as e:
             print(f"[MavlinkConnection] ERROR: Connection failed: {e}")
+            self._close_link()
             self._state = ConnectionState.ERROR
             self.status.connected = False
             return False
+
+    def _wait_for_heartbeat(self, timeout: float, cancel: threading.Event = None,
+                            prime_interval: float = 0.5):
+        """Prime the link and wait for the vehicle's first heartbeat.
+
+        A priming heartbeat is sent every prime_interval seconds until the
+        vehicle answers, so a responsive vehicle connects within one round
+        trip instead of after a fixed priming delay.
+
+        Returns:
+            The first HEARTBEAT, or None on timeout or cancellation
+        """
+        deadline = time.monotonic() + max(0.0, timeout)
+        while cancel is None or not cancel.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            self._prime_connection()
+            msg = self._connection.wait_heartbeat(timeout=min(prime_interval, remaining))
+            if msg is not None:
+                return msg
+        return None
     
-    def _prime_connection(self, num_heartbeats: int = 3, interval: float = 0.5):
-        """Send GCS heartbeats to prime the drone's MAVLink router.
+    def _prime_connection(self):
+        """Send a GCS heartbeat to prime the drone's MAVLink router.
 
         Some drones (PX4 with mavlink-router or similar) are passive: they only
         start unicasting telemetry back to a UDP endpoint after receiving at
@@ -280,27 +443,34 @@ class MavlinkConnection:
         heartbeats immediately on a manual UDP connect, which registers our
         IP:port with the router.  We replicate that behaviour here so the
         connection works on first attempt without needing QGC as a middleman.
-
-        Args:
-            num_heartbeats: Number of heartbeat packets to send before listening.
-            interval: Delay in seconds between each heartbeat.
         """
         if self._connection is None:
             return
         try:
-            for _ in range(num_heartbeats):
-                self._connection.mav.heartbeat_send(
-                    mavutil.mavlink.MAV_TYPE_GCS,
-                    mavutil.mavlink.MAV_AUTOPILOT_INVALID,
-                    0, 0, 0
-                )
-                time.sleep(interval)
+            self._connection.mav.heartbeat_send(
+                mavutil.mavlink.MAV_TYPE_GCS,
+                mavutil.mavlink.MAV_AUTOPILOT_INVALID,
+                0, 0, 0
+            )
         except Exception as e:
             # Non-fatal – we still try wait_heartbeat afterwards
             print(f"[MavlinkConnection] Warning: priming heartbeat send failed: {e}")
 
+    def _close_link(self):
+        """Close the underlying link after a failed connection attempt."""
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
+
     def disconnect(self):
         """Close the MAVLink connection."""
+        self.stop_receive_io()
+        self.detach_egress()
+        self.detach_recorder()
+        self.detach_forwarder()
         with self._lock:
             if self._connection is not None:
                 try:
@@ -327,17 +497,15 @@ class MavlinkConnection:
         if now - self._last_heartbeat_sent < self.config.heartbeat_interval:
             return True  # Not time yet
         
-        try:
-            self._connection.mav.heartbeat_send(
-                mavutil.mavlink.MAV_TYPE_GCS,  # Ground Control Station
-                mavutil.mavlink.MAV_AUTOPILOT_INVALID,
-                0, 0, 0
-            )
-            self._last_heartbeat_sent = now
-            self.status.messages_sent += 1
-            return True
-        except Exception:
+        if not self._emit(MavlinkMessagePriority.NORMAL, 'HEARTBEAT', self._write_mav,
+                          'heartbeat_send',
+                          mavutil.mavlink.MAV_TYPE_GCS,  # Ground Control Station
+                          mavutil.mavlink.MAV_AUTOPILOT_INVALID,
+                          0, 0, 0,
+                          coalesce_key='heartbeat'):
             return False
+        self._last_heartbeat_sent = now
+        return True
 
     def send_ping(self) -> bool:
         """Send a PING message to measure round-trip time.
@@ -354,23 +522,42 @@ class MavlinkConnection:
         if now - self._last_ping_sent < 1.0:
             return True
 
-        try:
-            # Send PING message with current timestamp in microseconds
-            timestamp_usec = int(now * 1e6)
-            self._connection.mav.ping_send(
-                timestamp_usec,  # Time since system boot (we use current time)
-                0,  # Ping sequence
-                self.status.system_id,  # Target system
-                0  # Target component (0 = all)
-            )
-            self._ping_start_time = now
-            self._last_ping_sent = now
-            self.status.messages_sent += 1
-            return True
-        except Exception:
+        if not self._emit(MavlinkMessagePriority.NORMAL, 'PING', self._write_ping,
+                          coalesce_key='ping'):
             return False
+        self._last_ping_sent = now
+        return True
+
+    def start_link_probe(self) -> LinkProbe:
+        """Start an active link test; replies are matched until stop_link_probe()."""
+        self._probe = LinkProbe()
+        return self._probe
 
-    def send_mocap_data(self, mocap: MocapData) -> bool:
+    def send_probe_ping(self) -> bool:
+        """Send the next ping of the active link test.
+
+        Returns:
+            True if the ping was queued or written
+        """
+        probe = self._probe
+        if probe is None or self._connection is None:
+            return False
+        seq = probe.next_seq(time.monotonic())
+        # Autopilots only answer requests targeted at 0/0 (nonzero targets mark replies)
+        return self._emit(MavlinkMessagePriority.NORMAL, 'PING', self._write_mav, 'ping_send',
+                          int(time.time() * 1e6), seq, 0, 0)
+
+    def stop_link_probe(self) -> Optional[dict]:
+        """End the active link test.
+
+        Returns:
+            The probe's results, or None if no test was running
+        """
+        probe, self._probe = self._probe, None
+        return probe.get_results() if probe is not None else None
+
+    def send_mocap_data(self, mocap: MocapData,
+                        on_written: Optional[Callable[[], None]] = None) -> bool:
         """Send motion capture position/orientation data to the drone.
         
         This is the highest priority message and should be sent at the motion
@@ -378,6 +565,9 @@ class MavlinkConnection:
         
         Args:
             mocap: Motion capture data with position and orientation
+            on_written: Called when the frame is actually written, which with
+                an egress scheduler is later than this call (and never for a
+                sample replaced by a newer one)
             
         Returns:
             True if message was sent successfully, False otherwise.
@@ -385,22 +575,10 @@ class MavlinkConnection:
         if self._connection is None:
             return False
         
-        try:
-            timestamp = mocap.timestamp_usec if mocap.timestamp_usec > 0 else int(time.time() * 1e6)
-            
-            self._connection.mav.att_pos_mocap_send(
-                timestamp,
-                list(mocap.q),  # Quaternion [w, x, y, z]
-                mocap.x,
-                mocap.y,
-                mocap.z,
-                [float('nan')] * 21  # Covariance matrix (unused)
-            )
-            self.status.messages_sent += 1
-            return True
-        except Exception as e:
-            print(f"[MavlinkConnection] ERROR: Error sending mocap data: {e}")
-            return False
+        timestamp = mocap.timestamp_usec if mocap.timestamp_usec > 0 else int(time.time() * 1e6)
+        return self._emit(MavlinkMessagePriority.CRITICAL, 'ATT_POS_MOCAP', self._write_mocap,
+                          timestamp, mocap.q, mocap.x, mocap.y, mocap.z, on_written,
+                          coalesce_key='mocap')
     
     def send_setpoint(self, setpoint: SetpointData) -> bool:
         """Send a position/velocity setpoint to the drone.
@@ -417,27 +595,250 @@ class MavlinkConnection:
         if self._connection is None:
             return False
         
+        # Prefer the system ID learned from heartbeat if available, fall back to configured ID
+        target_system = self.status.system_id or self.config.system_id
+        target_component = self.config.component_id
+
+        return self._emit(
+            MavlinkMessagePriority.HIGH, 'SET_POSITION_TARGET_LOCAL_NED', self._write_hot,
+            'send_set_position_target_local_ned', 'set_position_target_local_ned_send',
+            0,  # time_boot_ms (not used)
+            target_system,
+            target_component,
+            setpoint.coordinate_frame,
+            setpoint.type_mask,
+            setpoint.x, setpoint.y, setpoint.z,
+            setpoint.vx or 0, setpoint.vy or 0, setpoint.vz or 0,
+            0, 0, 0,  # Acceleration (not used)
+            setpoint.yaw,
+            setpoint.yaw_rate or 0,
+            coalesce_key='setpoint',
+        )
+
+    def attach_egress(self, egress: EgressScheduler):
+        """Route this connection's sends through a priority egress scheduler.
+
+        Args:
+            egress: Running EgressScheduler shared by all connections
+        """
+        egress.add_link(self, self.config.egress_rate_limit_bps)
+        self._egress = egress
+
+    def detach_egress(self):
+        """Send directly from the calling thread again (queued sends are dropped)."""
+        egress = self._egress
+        if egress is not None:
+            self._egress = None
+            egress.remove_link(self)
+
+    def attach_recorder(self, recorder: TlogRecorder):
+        """Copy every raw inbound and outbound frame to a flight recorder.
+
+        Args:
+            recorder: Running TlogRecorder (may be shared by all connections)
+        """
+        self._recorder = recorder
+        self._install_write_tap()
+
+    def detach_recorder(self):
+        """Stop copying frames to the flight recorder."""
+        self._recorder = None
+        connection = self._connection
+        if connection is not None:
+            connection.__dict__.pop('write', None)
+
+    def attach_forwarder(self, forwarder: MavlinkForwarder):
+        """Forward every raw inbound frame to downstream ground stations.
+
+        Args:
+            forwarder: Running MavlinkForwarder (shared by all connections)
+        """
+        self._forwarder = forwarder
+
+    def detach_forwarder(self):
+        """Stop forwarding inbound frames."""
+        self._forwarder = None
+
+    def send_raw(self, frame,
+                 priority: MavlinkMessagePriority = MavlinkMessagePriority.NORMAL) -> bool:
+        """Send an already encoded frame unchanged (e.g. relayed from a ground station).
+
+        Args:
+            frame: Complete MAVLink frame
+            priority: Egress priority of the frame
+
+        Returns:
+            True if the frame was queued or written
+        """
+        if self._connection is None:
+            return False
+        egress = self._egress
+        if egress is not None and egress.submit(self, priority,
+                                                functools.partial(self._write_raw, frame), len(frame)):
+            return True
         try:
-            # Prefer the system ID learned from heartbeat if available, fall back to configured ID
-            target_system = self.status.system_id or self.config.system_id
-            target_component = self.config.component_id
-
-            self._connection.mav.set_position_target_local_ned_send(
-                0,  # time_boot_ms (not used)
-                target_system,
-                target_component,
-                setpoint.coordinate_frame,
-                setpoint.type_mask,
-                setpoint.x, setpoint.y, setpoint.z,
-                setpoint.vx or 0, setpoint.vy or 0, setpoint.vz or 0,
-                0, 0, 0,  # Acceleration (not used)
-                setpoint.yaw,
-                setpoint.yaw_rate or 0
-            )
-            self.status.messages_sent += 1
+            self._write_raw(frame)
             return True
-        except Exception:
+        except Exception as e:
+            logger.debug("Error sending raw frame: %s", e)
             return False
+
+    def _write_raw(self, frame) -> int:
+        connection = self._connection
+        if connection is None:
+            return 0
+        connection.write(frame)
+        self.status.messages_sent += 1
+        self.status.bytes_sent += len(frame)
+        return len(frame)
+
+    def _install_write_tap(self):
+        """Record outbound frames by wrapping the connection's write().
+
+        pymavlink and the hot message encoder both write whole frames through
+        connection.write(), so shadowing it on the instance sees every send.
+        """
+        connection = self._connection
+        if connection is None or self._recorder is None or 'write' in connection.__dict__:
+            return
+        write = type(connection).write.__get__(connection)
+
+        def write_recorded(buf):
+            result = write(buf)
+            recorder = self._recorder
+            if recorder is not None:
+                recorder.record(buf, outbound=True)
+            return result
+
+        connection.write = write_recorded
+
+    def get_egress_stats(self) -> Optional[dict]:
+        """Get egress queue and bandwidth counters, or None if sending directly."""
+        egress = self._egress
+        return egress.get_link_stats(self) if egress is not None else None
+
+    def _emit(self, priority: MavlinkMessagePriority, message_name: str,
+              write: Callable, *args, coalesce_key=None, log_errors: bool = False) -> bool:
+        """Send a message now, or queue it with the egress scheduler.
+
+        Args:
+            priority: Egress priority of the message
+            message_name: MAVLink message name (used to size the frame)
+            write: Method that encodes and writes the message, returning bytes written
+            *args: Arguments for write
+            coalesce_key: Key under which a newer queued sample replaces an older one
+            log_errors: Log a failed direct write with its traceback (for
+                one-off sends such as commands, not high-rate streams)
+
+        Returns:
+            True if the message was queued or written
+        """
+        egress = self._egress
+        if egress is not None:
+            send = functools.partial(write, *args) if args else write
+            if egress.submit(self, priority, send, self._frame_size(message_name), coalesce_key):
+                return True
+        try:
+            write(*args)
+            return True
+        except Exception as e:
+            if log_errors:
+                logger.exception("Error sending %s", message_name)
+            else:
+                logger.debug("Error sending %s: %s", message_name, e)
+            return False
+
+    def _frame_size(self, message_name: str) -> int:
+        """Get the largest frame size of a message on this connection."""
+        size = self._frame_sizes.get(message_name)
+        if size is None:
+            try:
+                size = max_frame_length(self._connection.mav, message_name)
+            except (AttributeError, KeyError):
+                # Unknown message or not connected yet: assume the largest frame
+                size = MAX_FRAME_BYTES
+            self._frame_sizes[message_name] = size
+        return size
+
+    def _write_mav(self, method: str, *args) -> int:
+        """Write a message with a pymavlink ``<message>_send`` method.
+
+        Returns:
+            Number of bytes written
+        """
+        connection = self._connection
+        if connection is None:
+            return 0
+        mav = connection.mav
+        before = mav.total_bytes_sent
+        getattr(mav, method)(*args)
+        written = mav.total_bytes_sent - before
+        self.status.messages_sent += 1
+        self.status.bytes_sent += written
+        return written
+
+    def _write_hot(self, encoder_method: str, mav_method: str, *args) -> int:
+        """Write a message with the preallocated encoder, or pymavlink as fallback."""
+        connection = self._connection
+        if connection is None:
+            return 0
+        encoder = self._get_encoder()
+        if encoder is None:
+            return self._write_mav(mav_method, *args)
+        written = getattr(encoder, encoder_method)(*args)
+        self.status.messages_sent += 1
+        self.status.bytes_sent += written
+        return written
+
+    def _write_mocap(self, timestamp: int, q, x: float, y: float, z: float,
+                     on_written: Optional[Callable[[], None]] = None) -> int:
+        if self._connection is None:
+            return 0
+        encoder = self._get_encoder()
+        if encoder is None:
+            written = self._write_mav('att_pos_mocap_send', timestamp, list(q), x, y, z,
+                                      [float('nan')] * 21)  # Covariance matrix (unused)
+        else:
+            written = encoder.send_att_pos_mocap(timestamp, q, x, y, z)
+            self.status.messages_sent += 1
+            self.status.bytes_sent += written
+        if on_written is not None:
+            on_written()
+        return written
+
+    def _write_ping(self) -> int:
+        # Timestamp at write time so time spent queued is not counted as latency
+        now = time.time()
+        self._ping_start_time = now
+        return self._write_mav(
+            'ping_send',
+            int(now * 1e6),  # Time since system boot (we use current time)
+            0,  # Ping sequence
+            0,  # Target system (0/0 = request; autopilots treat other targets as replies)
+            0  # Target component
+        )
+
+    def _get_encoder(self) -> Optional[HotMessageEncoder]:
+        """Get the preallocated encoder for the current MAVLink object.
+
+        pymavlink swaps connection.mav when it switches protocol version, so
+        the encoder is rebuilt whenever the object it was built for changes.
+
+        Returns:
+            The encoder, or None to fall back to pymavlink's send methods
+        """
+        mav = self._connection.mav
+        if self._encoder_mav is not mav:
+            try:
+                self._encoder = HotMessageEncoder(mav)
+            except (AttributeError, KeyError) as e:
+                logger.debug("Hot message encoder unavailable: %s", e)
+                self._encoder = None
+            self._encoder_mav = mav
+        encoder = self._encoder
+        if encoder is None or not encoder.usable:
+            return None
+        return encoder
     
     def receive_messages(self, max_messages: int = 10) -> List[object]:
         """Receive pending MAVLink messages.
@@ -445,6 +846,10 @@ class MavlinkConnection:
         Non-blocking receive of available messages from the connection.
         Also tracks packet loss by monitoring sequence numbers.
 
+        When a receive thread or selector engine owns the socket, this drains
+        the messages it has already decoded instead.  Frames skipped by the
+        decode filter are counted but never returned.
+
         Args:
             max_messages: Maximum number of messages to receive per call
             
@@ -453,6 +858,10 @@ class MavlinkConnection:
         """
         if self._connection is None:
             return []
+
+        inbox = self._inbox
+        if inbox is not None:
+            return inbox.drain(max_messages)
         
         messages = []
         for _ in range(max_messages):
@@ -460,129 +869,393 @@ class MavlinkConnection:
                 msg = self._connection.recv_match(blocking=False)
                 if msg is None:
                     break
+                self._account_message(msg)
+                if type(msg) is FilteredMessage:
+                    self._messages_filtered += 1
+                    continue
                 messages.append(msg)
-                self.status.messages_received += 1
-                self._update_message_rate()
-
-                # Track packet loss using sequence numbers
-                # MAVLink v1 and v2 both have sequence numbers in the header
-                seq = msg.get_seq()
-                if self._last_seq_num is not None:
-                    # Calculate expected sequence (wraps at 256)
-                    expected_seq = (self._last_seq_num + 1) % 256
-                    if seq != expected_seq:
-                        # Packets were dropped
-                        if seq > expected_seq:
-                            dropped = seq - expected_seq
-                        else:
-                            # Wrapped around
-                            dropped = (256 - expected_seq) + seq
-                        self._packets_dropped += dropped
-
-                self._last_seq_num = seq
-
             except Exception:
                 break
         
         return messages
+
+    def _account_message(self, msg):
+        """Update receive counters, rate and packet loss for one message.
+
+        Args:
+            msg: Received MAVLink message
+        """
+        self.status.messages_received += 1
+        msg_type = msg.get_type()
+        now = time.monotonic()
+        msg._arrival = now  # Read back by process_message for the UI latency
+        self._update_message_rate(msg_type, now)
+        self._timing.arrival(msg_type, now)
+
+        recorder = self._recorder
+        if recorder is not None and msg_type != 'BAD_DATA':
+            recorder.record(msg.get_msgbuf())
+        forwarder = self._forwarder
+        if forwarder is not None and msg_type != 'BAD_DATA':
+            forwarder.forward(msg.get_msgbuf())
+
+        # Track packet loss using sequence numbers, which every sending
+        # system/component counts separately (MAVLink v1 and v2 alike)
+        if msg_type != 'BAD_DATA':
+            size = len(msg.get_msgbuf())
+            self.status.bytes_received += size
+            self._packets_dropped += self._sources.record(
+                msg.get_srcSystem(), msg.get_srcComponent(), msg.get_seq(), size, now)
+
+    def start_receive_thread(self, queue_size: int = 1000,
+                             on_ready: Callable[[], None] = None) -> bool:
+        """Move socket reads for this connection onto a dedicated I/O thread.
+
+        The thread blocks on the socket, decodes every datagram as it arrives
+        and queues the messages in a bounded inbox that receive_messages()
+        drains.  If the inbox overflows the oldest messages are dropped and
+        counted (see get_receive_queue_stats()).
+
+        Args:
+            queue_size: Capacity of the receive queue
+            on_ready: Called from the I/O thread when new messages are pending
+
+        Returns:
+            True if the thread is running, False if not connected
+        """
+        if self._connection is None:
+            return False
+        if self._receive_thread is not None:
+            return True
+        self.stop_receive_io()
+
+        self._inbox = MessageInbox(queue_size, on_ready=on_ready)
+        self._receive_thread = ReceiveThread(
+            name=f"mavlink-rx-{self.status.system_id}",
+            receive=self._receive_blocking,
+            deliver=self._deliver_received,
+        )
+        self._receive_thread.start()
+        return True
+
+    def attach_selector_engine(self, engine: SelectorEngine, queue_size: int = 1000,
+                               on_ready: Callable[[], None] = None) -> bool:
+        """Hand socket reads for this connection to a shared selector engine.
+
+        The engine calls back into this connection when its descriptor is
+        readable; decoded messages are queued exactly as with a receive thread.
+
+        Args:
+            engine: Running SelectorEngine shared by all connections
+            queue_size: Capacity of the receive queue
+            on_ready: Called from the engine thread when new messages are pending
+
+        Returns:
+            True if attached, False if not connected
+        """
+        if self._connection is None:
+            return False
+        if self._selector_engine is engine:
+            return True
+        self.stop_receive_io()
+
+        self._inbox = MessageInbox(queue_size, on_ready=on_ready)
+        self._selector_engine = engine
+        engine.add_link(self, getattr(self._connection, 'fd', None), self._pump_receive)
+        return True
+
+    def stop_receive_io(self):
+        """Stop threaded receive and return to polled receive.
+
+        Works for both a dedicated receive thread and a selector engine.
+        Messages still queued in the inbox are discarded.
+        """
+        thread = self._receive_thread
+        if thread is not None:
+            thread.stop()
+            self._receive_thread = None
+        engine = self._selector_engine
+        if engine is not None:
+            engine.remove_link(self)
+            self._selector_engine = None
+        self._inbox = None
+
+    def get_receive_queue_stats(self) -> dict:
+        """Get receive queue depth and drop counters.
+
+        Returns:
+            Dictionary with mode, depth, capacity, dropped and high_watermark
+        """
+        inbox = self._inbox
+        stats = inbox.get_stats() if inbox is not None else {
+            'depth': 0, 'capacity': 0, 'dropped': 0, 'high_watermark': 0,
+        }
+        stats['mode'] = self.receive_mode.value
+        return stats
+
+    def _receive_blocking(self, timeout: float):
+        """Block until a message arrives or the timeout expires (I/O thread).
+
+        Args:
+            timeout: Maximum time to block in seconds
+
+        Returns:
+            Decoded MAVLink message, or None on timeout
+        """
+        connection = self._connection
+        if connection is None:
+            return None
+        return connection.recv_match(blocking=True, timeout=timeout)
+
+    def _deliver_received(self, msg):
+        """Account for a message and queue it for the service (I/O thread)."""
+        inbox = self._inbox
+        if inbox is None:
+            return
+        self._account_message(msg)
+        if type(msg) is FilteredMessage:
+            self._messages_filtered += 1
+            return
+        inbox.put(msg)
+
+    def _pump_receive(self, budget: int) -> int:
+        """Read up to budget messages without blocking (selector engine thread).
+
+        Args:
+            budget: Maximum number of messages to read
+
+        Returns:
+            Number of messages read
+        """
+        connection = self._connection
+        if connection is None:
+            return 0
+        count = 0
+        while count < budget:
+            msg = connection.recv_match(blocking=False)
+            if msg is None:
+                break
+            self._deliver_received(msg)
+            count += 1
+        return count
     
-    def _update_message_rate(self):
-        """Update the message rate calculation."""
-        now = time.time()
-        # Keep messages from last second
-        self._message_count_window = [
-            t for t in self._message_count_window 
-            if now - t < 1.0
-        ]
-        self._message_count_window.append(now)
-        self.status.message_rate_hz = len(self._message_count_window)
+    def _update_message_rate(self, msg_type: str, now: float = None):
+        """Update the message rate calculation (O(1) per message).
+
+        Args:
+            msg_type: Type name of the received message
+            now: Monotonic arrival time (defaults to time.monotonic())
+        """
+        self.status.message_rate_hz = self._rate_meter.mark(msg_type, now)
+
+    def refresh_rates(self):
+        """Refresh the rates in status so they decay when traffic stops.
+
+        Rates are only updated per message, so this should be called
+        periodically (the service does it on every telemetry tick).
+        """
+        now = time.monotonic()
+        self.status.message_rate_hz = self._rate_meter.rate(now)
+        self.status.message_type_rates = self._rate_meter.type_rates(now)
     
     def process_message(self, msg) -> bool:
         """Process a received MAVLink message and update telemetry.
-        
+
+        Messages are routed through the dispatch table by numeric message ID
+        (see register_message_handler()).
+
         Args:
             msg: MAVLink message to process
             
         Returns:
             True if message was processed, False if message type is not handled
         """
-        msg_type = msg.get_type()
-        
-        if msg_type == 'HEARTBEAT':
-            self.status.last_heartbeat = time.time()
-            self.status.connected = True
-            self._state = ConnectionState.CONNECTED
-            # Parse mode and armed state from heartbeat
-            self.telemetry.armed = (msg.base_mode & mavutil.mavlink.MAV_MODE_FLAG_SAFETY_ARMED) != 0
-            return True
-        
-        elif msg_type == 'PING':
-            # Respond to PING with same timestamp to measure RTT
-            if self._ping_start_time is not None:
-                now = time.time()
-                rtt_ms = (now - self._ping_start_time) * 1000.0
-                # Update latency with exponential moving average (smooth out spikes)
-                if self.status.latency_ms == 0:
-                    self.status.latency_ms = rtt_ms
-                else:
-                    # 80% old value, 20% new value
-                    self.status.latency_ms = (0.8 * self.status.latency_ms) + (0.2 * rtt_ms)
-                self._ping_start_time = None
-            return True
+        if not self._dispatcher.dispatch(msg):
+            return False
+        arrival = getattr(msg, '_arrival', None)
+        if arrival is not None:
+            self._timing.processed(msg.get_type(), arrival)
+        return True
 
-        elif msg_type == 'ATTITUDE':
-            self.telemetry.roll = msg.roll
-            self.telemetry.pitch = msg.pitch
-            self.telemetry.yaw = msg.yaw
-            self.telemetry.rollspeed = msg.rollspeed
-            self.telemetry.pitchspeed = msg.pitchspeed
-            self.telemetry.yawspeed = msg.yawspeed
-            self.telemetry.timestamp = time.time()
-            return True
-        
-        elif msg_type == 'LOCAL_POSITION_NED':
-            self.telemetry.x = msg.x
-            self.telemetry.y = msg.y
-            self.telemetry.z = msg.z
-            self.telemetry.vx = msg.vx
-            self.telemetry.vy = msg.vy
-            self.telemetry.vz = msg.vz
-            self.telemetry.timestamp = time.time()
-            return True
-        
-        elif msg_type == 'SYS_STATUS':
-            self.telemetry.battery_voltage = msg.voltage_battery / 1000.0
-            self.telemetry.battery_remaining = msg.battery_remaining
-            return True
-        
-        elif msg_type == 'GPS_RAW_INT':
-            self.telemetry.gps_fix_type = msg.fix_type
-            self.telemetry.satellites_visible = msg.satellites_visible
-            return True
-        
-        elif msg_type == 'ESTIMATOR_STATUS':
-            self.telemetry.estimator_status = msg.flags
-            return True
+    def mark_published(self, now: float = None):
+        """Record the UI latency of every message processed since the last publish.
 
-        elif msg_type == 'STATUSTEXT':
-            # Forward status text to console output callback if set
-            text = msg.text if hasattr(msg, 'text') else ''
-            if callable(self._console_output_callback):
-                self._console_output_callback(f"[STATUS] {text.rstrip()}")
-            return True
+        Args:
+            now: Monotonic publish time (defaults to time.monotonic())
+        """
+        self._timing.published(time.monotonic() if now is None else now)
 
-        elif msg_type == 'SERIAL_CONTROL':
-            # Response from the NuttX shell (MAVLink console)
-            if hasattr(msg, 'data') and hasattr(msg, 'count') and msg.count > 0:
-                try:
-                    text = bytes(msg.data[:msg.count]).decode('utf-8', errors='replace')
-                    if callable(self._console_output_callback):
-                        self._console_output_callback(text)
-                except Exception:
-                    pass
-            return True
+    def get_source_stats(self) -> list:
+        """Get receive counters, loss and rates per sending system/component."""
+        return self._sources.get_stats()
 
-        return False
+    def get_timing_stats(self) -> dict:
+        """Get the per-message-type inter-arrival and UI latency histograms."""
+        return self._timing.get_stats()
+
+    def reset_timing_stats(self):
+        """Clear the timing histograms of this link, including egress queue delays."""
+        self._timing.reset()
+        egress = self._egress
+        if egress is not None:
+            egress.reset_link_timing(self)
+
+    def register_message_handler(self, message, handler: Callable[[object], None],
+                                 name: str = None) -> int:
+        """Add a handler to the dispatch table.
+
+        Handlers run in the service thread with the decoded message, after any
+        handlers already registered for the same message.  Registering a
+        handler also stops the decode filter from skipping that message.
+
+        Args:
+            message: Numeric message ID or message name (e.g. 'ATTITUDE')
+            handler: Callable taking the decoded message
+            name: Label used in the handler statistics
+
+        Returns:
+            The numeric message ID the handler was registered for
+        """
+        msg_id = resolve_message_id(message, mavlink_dialect)
+        self._dispatcher.register(msg_id, handler, name)
+        return msg_id
+
+    def unregister_message_handler(self, message, handler: Callable[[object], None] = None) -> bool:
+        """Remove a handler (or all handlers) for a message from the dispatch table.
+
+        Args:
+            message: Numeric message ID or message name
+            handler: Handler to remove (None removes every handler for the message)
+
+        Returns:
+            True if a handler was removed
+        """
+        return self._dispatcher.unregister(resolve_message_id(message, mavlink_dialect), handler)
+
+    def get_handler_stats(self) -> dict:
+        """Get dispatch profiling counters.
+
+        Returns:
+            Dictionary with per-handler 'handlers' stats, the number of decoded
+            messages with no handler ('unhandled') and the number of frames the
+            decode filter skipped ('filtered')
+        """
+        decoder = self._fast_decoder
+        return {
+            'handlers': self._dispatcher.get_stats(),
+            'unhandled': self._dispatcher.unhandled,
+            'filtered': self._messages_filtered,
+            'fast_decode': decoder.get_stats() if decoder is not None else None,
+        }
+
+    def set_fast_decode(self, enabled: bool):
+        """Enable or disable the fast-path decoder for hot telemetry messages.
+
+        When enabled, HEARTBEAT, SYS_STATUS, ATTITUDE and LOCAL_POSITION_NED
+        are unpacked straight from the frame bytes (after a CRC check) instead
+        of by pymavlink.  Anything the fast path cannot handle falls back to
+        pymavlink.
+
+        Args:
+            enabled: True to use the fast decoder
+        """
+        if not enabled:
+            self._fast_decoder = None
+        elif self._fast_decoder is None and self._connection is not None:
+            dialect = sys.modules.get(type(self._connection.mav).__module__)
+            self._fast_decoder = FastTelemetryDecoder(dialect)
+        self._install_decode_filter()
+
+    def _register_builtin_handlers(self):
+        """Populate the dispatch table with the telemetry handlers."""
+        for msg_id, method_name in self._BUILTIN_HANDLERS:
+            self._dispatcher.register(msg_id, getattr(self, method_name), method_name)
+
+    def _install_decode_filter(self):
+        """Skip decoding messages that have no registered handler."""
+        if self._connection is None or not hasattr(self._connection, 'mav'):
+            return
+        install_decode_filter(self._connection.mav, self._dispatcher.handles, mavlink_dialect,
+                              fast_decoder=self._fast_decoder)
+
+    def _handle_heartbeat(self, msg):
+        now = time.time()
+        if self._streams is not None and now - self.status.last_heartbeat > self.HEARTBEAT_TIMEOUT:
+            # Back after a gap (reconnect or reboot): the vehicle's default streams are back too
+            self._streams.reapply()
+        self.status.last_heartbeat = now
+        self.status.connected = True
+        self._state = ConnectionState.CONNECTED
+        # Parse mode and armed state from heartbeat
+        self.telemetry.armed = (msg.base_mode & mavutil.mavlink.MAV_MODE_FLAG_SAFETY_ARMED) != 0
+
+    def _handle_ping(self, msg):
+        config = self.config
+        if msg.target_system != config.source_system or msg.target_component != config.source_component:
+            return  # A request (target 0/0) or a reply to another ground station
+        probe = self._probe
+        if probe is not None and msg.seq and probe.on_reply(msg.seq, time.monotonic()):
+            return  # Reply to a link test ping
+        # Respond to PING with same timestamp to measure RTT
+        if self._ping_start_time is not None:
+            now = time.time()
+            rtt_ms = (now - self._ping_start_time) * 1000.0
+            # Update latency with exponential moving average (smooth out spikes)
+            if self.status.latency_ms == 0:
+                self.status.latency_ms = rtt_ms
+            else:
+                # 80% old value, 20% new value
+                self.status.latency_ms = (0.8 * self.status.latency_ms) + (0.2 * rtt_ms)
+            self._ping_start_time = None
+
+    def _handle_attitude(self, msg):
+        self.telemetry.roll = msg.roll
+        self.telemetry.pitch = msg.pitch
+        self.telemetry.yaw = msg.yaw
+        self.telemetry.rollspeed = msg.rollspeed
+        self.telemetry.pitchspeed = msg.pitchspeed
+        self.telemetry.yawspeed = msg.yawspeed
+        self.telemetry.timestamp = time.time()
+
+    def _handle_local_position_ned(self, msg):
+        self.telemetry.x = msg.x
+        self.telemetry.y = msg.y
+        self.telemetry.z = msg.z
+        self.telemetry.vx = msg.vx
+        self.telemetry.vy = msg.vy
+        self.telemetry.vz = msg.vz
+        self.telemetry.timestamp = time.time()
+
+    def _handle_sys_status(self, msg):
+        self.telemetry.battery_voltage = msg.voltage_battery / 1000.0
+        self.telemetry.battery_remaining = msg.battery_remaining
+
+    def _handle_gps_raw_int(self, msg):
+        self.telemetry.gps_fix_type = msg.fix_type
+        self.telemetry.satellites_visible = msg.satellites_visible
+
+    def _handle_estimator_status(self, msg):
+        self.telemetry.estimator_status = msg.flags
+
+    def _handle_command_ack(self, msg):
+        if self._streams is not None:
+            self._streams.on_command_ack(msg)
+
+    def _handle_statustext(self, msg):
+        # Forward status text to console output callback if set
+        text = msg.text if hasattr(msg, 'text') else ''
+        if callable(self._console_output_callback):
+            self._console_output_callback(f"[STATUS] {text.rstrip()}")
+
+    def _handle_serial_control(self, msg):
+        # Response from the NuttX shell (MAVLink console)
+        if hasattr(msg, 'data') and hasattr(msg, 'count') and msg.count > 0:
+            try:
+                text = bytes(msg.data[:msg.count]).decode('utf-8', errors='replace')
+                if callable(self._console_output_callback):
+                    self._console_output_callback(text)
+            except Exception:
+                pass
 
     def set_console_output_callback(self, callback):
         """Register a callback to receive console output lines.
@@ -595,6 +1268,9 @@ class MavlinkConnection:
     def send_command_long(self, command: int, params: list = None) -> bool:
         """Send a MAV_CMD via COMMAND_LONG.
 
+        Commands are queued at CRITICAL priority so arm/kill requests are
+        never held behind routine traffic.
+
         Args:
             command: MAV_CMD id (e.g. mavutil.mavlink.MAV_CMD_DO_SET_MODE)
             params:  Up to 7 float parameters (padded with 0.0 if shorter)
@@ -606,19 +1282,107 @@ class MavlinkConnection:
             return False
         p = list(params or [])
         p += [0.0] * (7 - len(p))
-        try:
-            self._connection.mav.command_long_send(
-                self.status.system_id or self.config.system_id,
-                self.config.component_id,
-                command,
-                0,          # confirmation
-                p[0], p[1], p[2], p[3], p[4], p[5], p[6],
-            )
-            self.status.messages_sent += 1
+        return self._emit(
+            MavlinkMessagePriority.CRITICAL, 'COMMAND_LONG', self._write_mav,
+            'command_long_send',
+            self.status.system_id or self.config.system_id,
+            self.config.component_id,
+            command,
+            0,          # confirmation
+            p[0], p[1], p[2], p[3], p[4], p[5], p[6],
+            log_errors=True,
+        )
+
+    def set_stream_profile(self, name: str, profile: Optional[MavlinkStreamProfile]):
+        """Request the vehicle's telemetry streams according to a profile.
+
+        The requests are sent by update_stream_subscription() once the first
+        heartbeat has arrived, and sent again after a heartbeat gap.
+
+        Args:
+            name: Profile name ("" = vehicle defaults)
+            profile: Streams to request, or None to restore the vehicle defaults
+        """
+        if self._streams is None:
+            if profile is None:
+                return
+            self._streams = StreamSubscription(
+                self.send_command_long, label=self.config.name or str(self.config.system_id),
+                dialect=mavlink_dialect)
+        self._streams.set_profile(name, profile)
+
+    def update_stream_subscription(self, now: float) -> int:
+        """Send outstanding stream requests (called periodically by the service).
+
+        Args:
+            now: Current time (time.monotonic())
+
+        Returns:
+            Number of SET_MESSAGE_INTERVAL commands sent
+        """
+        if self._streams is None or self._connection is None or not self.status.last_heartbeat:
+            return 0
+        return self._streams.update(now, self.status.message_type_rates)
+
+    def get_stream_stats(self) -> Optional[dict]:
+        """Get the stream subscription statistics (None if no profile was ever set)."""
+        return self._streams.get_stats() if self._streams is not None else None
+
+    @property
+    def rate_controller(self) -> Optional[LinkRateController]:
+        """Adaptive rate controller of this link, if enabled."""
+        return self._rate_controller
+
+    def attach_rate_controller(self, controller: LinkRateController):
+        """Let a controller slow telemetry and setpoints down when the link congests."""
+        self._rate_controller = controller
+
+    def detach_rate_controller(self):
+        """Stop adapting rates and go back to the full telemetry and setpoint rates."""
+        if self._rate_controller is None:
+            return
+        self._rate_controller = None
+        self._setpoint_credit = 0.0
+        if self._streams is not None:
+            self._streams.set_rate_scale(1.0)
+
+    def update_rate_control(self, now: float) -> bool:
+        """Feed the link measurements to the rate controller and apply its decision.
+
+        Args:
+            now: Current time (time.monotonic())
+
+        Returns:
+            True if the rates changed
+        """
+        controller = self._rate_controller
+        if controller is None or self._connection is None:
+            return False
+        streams = self._streams
+        changed = controller.update(
+            now, self._packets_dropped, self.status.messages_received, self.status.bytes_sent,
+            self.status.latency_ms, self.config.egress_rate_limit_bps,
+            can_lower_telemetry=streams is not None and bool(streams.profile_name),
+        )
+        if changed and streams is not None:
+            streams.set_rate_scale(controller.telemetry_scale)
+        return changed
+
+    def setpoint_due(self) -> bool:
+        """Whether the next setpoint tick should send (thins setpoints on a congested link)."""
+        controller = self._rate_controller
+        if controller is None or controller.setpoint_scale >= 1.0:
             return True
-        except Exception as e:
-            print(f"[MavlinkConnection] ERROR sending COMMAND_LONG: {e}")
+        self._setpoint_credit += controller.setpoint_scale
+        if self._setpoint_credit < 1.0:
             return False
+        self._setpoint_credit -= 1.0
+        return True
+
+    def get_rate_control_stats(self) -> Optional[dict]:
+        """Get the rate controller's scales and measurements (None if not adaptive)."""
+        controller = self._rate_controller
+        return controller.get_stats() if controller is not None else None
 
     def send_serial_control(self, text: str) -> bool:
         """Send a shell command to the drone via SERIAL_CONTROL (NuttX console).
@@ -647,23 +1411,56 @@ class MavlinkConnection:
         line = (text.rstrip('\n') + '\n').encode('utf-8')
 
         chunk_size = 70
-        try:
-            for i in range(0, max(1, len(line)), chunk_size):
-                chunk = line[i:i + chunk_size]
-                data = list(chunk) + [0] * (chunk_size - len(chunk))
-                self._connection.mav.serial_control_send(
-                    _SERIAL_CONTROL_DEV_SHELL,
-                    _FLAGS,
-                    0,           # timeout ms
-                    0,           # baud rate (unused for shell)
-                    len(chunk),  # count
-                    data,
-                )
-                self.status.messages_sent += 1
-            return True
-        except Exception as e:
-            print(f"[MavlinkConnection] ERROR sending SERIAL_CONTROL: {e}")
-            return False
+        for i in range(0, max(1, len(line)), chunk_size):
+            chunk = line[i:i + chunk_size]
+            data = list(chunk) + [0] * (chunk_size - len(chunk))
+            sent = self._emit(
+                MavlinkMessagePriority.NORMAL, 'SERIAL_CONTROL', self._write_mav,
+                'serial_control_send',
+                _SERIAL_CONTROL_DEV_SHELL,
+                _FLAGS,
+                0,           # timeout ms
+                0,           # baud rate (unused for shell)
+                len(chunk),  # count
+                data,
+                log_errors=True,
+            )
+            if not sent:
+                return False
+        return True
+
+
+class EngineConnection:
+    """UI-side stand-in for a connection owned by the engine process.
+
+    Mirrors the configuration, status and telemetry the engine reports, so
+    code that reads connections works the same with engine_process enabled.
+
+    Attributes:
+        config: Connection configuration
+        status: Status as last reported by the engine
+        telemetry: Telemetry as last read from the telemetry ring
+    """
+
+    HEARTBEAT_TIMEOUT = MavlinkConnection.HEARTBEAT_TIMEOUT
+
+    def __init__(self, config: MavlinkConnectionConfig, system_id: int):
+        self.config = config
+        self.status = MavlinkConnectionStatus(connected=True, system_id=system_id,
+                                              last_heartbeat=time.time())
+        self.telemetry = MavlinkTelemetryData(system_id=system_id)
+        self.state = ConnectionState.CONNECTED
+        self.replay = None
+        self.shared_link = None
+
+    @property
+    def is_connected(self) -> bool:
+        """Check if connection is established and healthy."""
+        return (self.state == ConnectionState.CONNECTED
+                and time.time() - self.status.last_heartbeat <= self.HEARTBEAT_TIMEOUT)
+
+    def mark_published(self, now: float = None):
+        """Nothing to record: the engine times UI latency at its own publish ticks."""
 
 
 class MavlinkService(ServiceBase):
@@ -677,22 +1474,39 @@ class MavlinkService(ServiceBase):
     - Connection health monitoring
     
     Signals:
-        telemetry_updated: Emitted when new telemetry is received (system_id, MavlinkTelemetryData)
+        telemetry_updated: Emitted at the UI telemetry rate with the newest
+            snapshot of each vehicle updated since the last emission
+            (system_id, MavlinkTelemetrySnapshot)
         connection_changed: Emitted when connection state changes (system_id, connected)
+        connection_progress: Emitted as an asynchronous connection attempt
+            moves through "connecting", "connected", "failed" or "cancelled"
+            (connection name, state)
+        device_discovered: Emitted for each new or changed DiscoveredDevice,
+            from discovery scans and from heartbeats on active connections
         health_updated: Emitted when health metrics change (rate_hz, active_connections)
     """
     
     # Signals for UI updates
-    telemetry_updated = pyqtSignal(int, object)  # system_id, MavlinkTelemetryData
+    telemetry_updated = pyqtSignal(int, object)  # system_id, MavlinkTelemetrySnapshot
     connection_changed = pyqtSignal(int, bool)   # system_id, connected
+    connection_progress = pyqtSignal(str, str)   # connection name, state
+    device_discovered = pyqtSignal(object)       # DiscoveredDevice
     health_updated = pyqtSignal(float, int)      # rate_hz, active_connections
     console_output = pyqtSignal(int, str)        # system_id, text line
     connection_test_complete = pyqtSignal(object)  # dict of test results
 
+    # Internal: emitted from receive I/O threads when messages are queued
+    _receive_ready = pyqtSignal()
+    # Internal: emitted from connect workers with (MavlinkConnection, Future)
+    _connect_finished = pyqtSignal(object, object)
+    # Internal: emitted from discovery scans (DiscoveredDevice / list of them)
+    _device_found = pyqtSignal(object)
+    _scan_finished = pyqtSignal(object)
+
     # Service update rates
     TELEMETRY_UPDATE_INTERVAL_MS = 50   # 20Hz for telemetry (low priority)
     SETPOINT_UPDATE_INTERVAL_MS = 20    # 50Hz for setpoints (medium priority)
-    MOCAP_UPDATE_INTERVAL_MS = 10       # 100Hz for mocap (high priority)
+    MOCAP_UPDATE_INTERVAL_MS = 10       # 100Hz for mocap (high priority, own thread)
     HEARTBEAT_CHECK_INTERVAL_MS = 100   # 10Hz for heartbeat checks
     
     # Setpoint sanitization limits
@@ -709,8 +1523,10 @@ class MavlinkService(ServiceBase):
         super().__init__(debug_level=debug_level or DebugLevel.LOG)
         
         self._connections: Dict[int, MavlinkConnection] = {}
-        self._message_queue: PriorityQueue = PriorityQueue()
-        self._telemetry_callbacks: List[Callable] = []
+        # Immutable telemetry snapshots for the UI and full-rate subscribers
+        self._telemetry_publisher = TelemetryPublisher()
+        # Latest telemetry per vehicle in shared memory for external tools
+        self._fleet_table: Optional[FleetTableWriter] = None
         self._mocap_sources: Dict[int, object] = {}  # system_id -> scene object
         
         # Saved connection configs (for inactive connections linked to objects)
@@ -718,22 +1534,81 @@ class MavlinkService(ServiceBase):
         
         # Global settings for MAVLink operations
         self._global_settings = MavlinkGlobalSettings()
+
+        # Fixed-memory per-vehicle telemetry history
+        self._telemetry_store = TelemetryStore(
+            self._global_settings.telemetry_history_s,
+            self._global_settings.telemetry_history_rate_hz,
+        )
         
         # Timers for different priority tasks
         self._heartbeat_timer: Optional[QTimer] = None
         self._telemetry_timer: Optional[QTimer] = None
-        self._mocap_timer: Optional[QTimer] = None
+        self._publish_timer: Optional[QTimer] = None
         self._setpoint_timer: Optional[QTimer] = None
+
+        # Mocap is sent from its own deadline-driven thread (one task per drone)
+        self._mocap_scheduler: Optional[DeadlineScheduler] = None
+
+        # All outbound traffic is queued by priority and written by one sender
+        self._egress: Optional[EgressScheduler] = None
+
+        # Flight recorder (see start_recording)
+        self._recorder: Optional[TlogRecorder] = None
+
+        # Downstream ground station outputs (see add_forward_output)
+        self._forwarder: Optional[MavlinkForwarder] = None
+        self._forward_configs: Dict[str, MavlinkForwardConfig] = {}
+
+        # A follow-up drain of replay connections is queued (see _drain_connection)
+        self._replay_drain_scheduled = False
         
+        # Shared I/O thread for ReceiveMode.SELECTOR (created on demand)
+        self._selector_engine: Optional[SelectorEngine] = None
+
+        # Asynchronous connection attempts (see connect_async)
+        self._connect_pool: Optional[ThreadPoolExecutor] = None
+        self._pending_connects: Dict[str, tuple] = {}  # name -> (Future, cancel Event)
+        self._connect_finished.connect(self._on_connect_finished)
+
+        # Discovered devices by (address, port, system_id); see discover_devices
+        self._discovered: Dict[tuple, object] = {}
+        self._discovery_timer: Optional[QTimer] = None
+        self._discovery_scan: Optional[Future] = None
+        self._auto_connect_tried = set()
+        self._device_found.connect(self._record_device)
+        self._scan_finished.connect(self._on_scan_finished)
+
         # Health tracking
         self._total_rate_hz = 0.0
         self._active_connections = 0
+
+        # Extra message handlers applied to every connection: (message, handler, name)
+        self._message_handlers: List[tuple] = []
         
         # Setpoint sources (object -> setpoint data)
         self._setpoint_sources: Dict[int, SetpointData] = {}
         
         # MAVLink-enabled objects (object -> MavlinkObjectConfig)
         self._mavlink_objects: Dict[object, MavlinkObjectConfig] = {}
+
+        # Links run in a child process when engine_process is set (see _start_engine)
+        self._engine: Optional[EngineProcess] = None
+        self._pose_timer: Optional[QTimer] = None
+        self._engine_setpoints: Dict[int, SetpointData] = {}  # setpoint sources as last sent
+        self._engine_statistics: dict = {}
+        self._engine_recording = False
+        self._engine_events = {
+            'connect_finished': self._on_engine_connect_finished,
+            'connection_changed': self._on_engine_connection_changed,
+            'status': self._on_engine_status,
+            'statistics': self._on_engine_statistics,
+            'health': self._on_engine_health,
+            'console': self.console_output.emit,
+            'device': self._record_device,
+            'test_complete': self._on_connection_test_complete,
+            'stopped': lambda: None,
+        }
         
         self.status_label = "MAVLink: Not Connected"
         self._status_label = "Not Connected"
@@ -769,12 +1644,35 @@ class MavlinkService(ServiceBase):
         # Update timer intervals if timers exist
         if self._telemetry_timer is not None:
             self._telemetry_timer.setInterval(rate_to_interval(settings.telemetry_rate_hz, 50))
+
+        if self._publish_timer is not None:
+            self._publish_timer.setInterval(rate_to_interval(settings.ui_telemetry_rate_hz, 100))
+
+        self._telemetry_store.configure(settings.telemetry_history_s,
+                                        settings.telemetry_history_rate_hz)
         
         if self._setpoint_timer is not None:
             self._setpoint_timer.setInterval(rate_to_interval(settings.default_setpoint_rate_hz, 20))
+
+        self._apply_background_discovery()
         
-        if self._mocap_timer is not None:
-            self._mocap_timer.setInterval(rate_to_interval(settings.default_mocap_rate_hz, 10))
+        # Mocap tasks pick up the new default rate and miss policy
+        for system_id in list(self._mocap_sources):
+            self._schedule_mocap(system_id)
+
+        if self._telemetry_timer is not None:
+            self._apply_fleet_table()
+
+        if self._engine is not None:
+            self._engine.send('settings', settings)
+            return
+
+        # Switch existing connections to the configured receive mode and streams
+        for conn in list(self._connections.values()):
+            conn.set_fast_decode(settings.fast_telemetry_decode)
+            self._apply_receive_mode(conn)
+            self._apply_stream_profile(conn)
+            self._apply_rate_control(conn)
     
     def register_mavlink_object(self, obj, config: MavlinkObjectConfig = None):
         """Register a scene object for MAVLink operations.
@@ -829,6 +1727,8 @@ class MavlinkService(ServiceBase):
                 self.register_mocap_source(config.system_id, obj)
             
             self._mavlink_objects[obj] = config
+            if config.send_mocap and config.enabled:
+                self._schedule_mocap(config.system_id)  # rate may have changed
         else:
             self.register_mavlink_object(obj, config)
     
@@ -874,6 +1774,14 @@ class MavlinkService(ServiceBase):
             logger.info("Using DTRG MAVLink dialect from %s", dialect_info['dtrg_path'])
         else:
             logger.info("Using standard MAVLink dialect.")
+
+        self._apply_fleet_table()
+
+        if self._global_settings.engine_process:
+            self._start_engine()
+            self.set_status(ServiceLevel.RUNNING, "MAVLink: Ready")
+            logger.info("MAVLink service started with links in an engine process.")
+            return
         
         # Heartbeat timer - runs at 10Hz to check all connections
         self._heartbeat_timer = QTimer(self)
@@ -886,18 +1794,41 @@ class MavlinkService(ServiceBase):
         self._telemetry_timer.setInterval(self.TELEMETRY_UPDATE_INTERVAL_MS)
         self._telemetry_timer.timeout.connect(self.safe(self._process_telemetry))
         self._telemetry_timer.start()
+
+        self._start_publish_timer()
         
-        # Mocap timer - highest priority, 100Hz
-        self._mocap_timer = QTimer(self)
-        self._mocap_timer.setInterval(self.MOCAP_UPDATE_INTERVAL_MS)
-        self._mocap_timer.timeout.connect(self.safe(self._process_mocap))
-        self._mocap_timer.start()
+        # Outbound priority queues; start before anything can send
+        self._egress = EgressScheduler()
+        self._egress.start()
+        for conn in list(self._connections.values()):
+            conn.attach_egress(self._egress)
+
+        # Mocap - highest priority, sent on monotonic deadlines from its own thread
+        self._mocap_scheduler = DeadlineScheduler(name="mavlink-mocap")
+        self._mocap_scheduler.start()
+        for system_id in list(self._mocap_sources):
+            self._schedule_mocap(system_id)
         
         # Setpoint timer - medium priority, 50Hz
         self._setpoint_timer = QTimer(self)
         self._setpoint_timer.setInterval(self.SETPOINT_UPDATE_INTERVAL_MS)
         self._setpoint_timer.timeout.connect(self.safe(self._process_setpoints))
         self._setpoint_timer.start()
+
+        # Background discovery (when enabled) rescans the discovery ports
+        self._discovery_timer = QTimer(self)
+        self._discovery_timer.timeout.connect(self.safe(self._run_background_discovery))
+        self._apply_background_discovery()
+
+        # Reopen forward outputs closed by a previous stop
+        if self._forwarder is None:
+            for config in list(self._forward_configs.values()):
+                self.add_forward_output(config)
+
+        # Receive threads wake the service as soon as messages are queued
+        self._receive_ready.connect(self.safe(self._drain_receive_queues))
+        for conn in list(self._connections.values()):
+            self._apply_receive_mode(conn)
         
         self.set_status(ServiceLevel.RUNNING, "MAVLink: Ready")
         logger.info("MAVLink service started and ready.")
@@ -905,16 +1836,47 @@ class MavlinkService(ServiceBase):
     def on_stop(self):
         """Stop all timers and disconnect all connections."""
         # Stop timers
-        for timer in [self._heartbeat_timer, self._telemetry_timer, 
-                      self._mocap_timer, self._setpoint_timer]:
+        for timer in [self._heartbeat_timer, self._telemetry_timer, self._publish_timer,
+                      self._setpoint_timer, self._discovery_timer, self._pose_timer]:
             if timer is not None:
                 timer.stop()
                 timer.deleteLater()
         
         self._heartbeat_timer = None
         self._telemetry_timer = None
-        self._mocap_timer = None
+        self._publish_timer = None
         self._setpoint_timer = None
+        self._discovery_timer = None
+        self._pose_timer = None
+
+        if self._engine is not None:
+            self._stop_engine()
+        self._close_fleet_table()
+
+        if self._mocap_scheduler is not None:
+            self._mocap_scheduler.stop()
+            self._mocap_scheduler = None
+
+        for conn in list(self._connections.values()):
+            conn.detach_egress()
+        if self._egress is not None:
+            self._egress.stop()
+            self._egress = None
+
+        # Stop receive I/O threads; sockets stay open until removed
+        for conn in list(self._connections.values()):
+            conn.stop_receive_io()
+        self._stop_selector_engine()
+
+        self.stop_recording()
+        self._stop_forwarder()
+
+        # Abandon connection attempts; their results could no longer be registered
+        for name in list(self._pending_connects):
+            self.cancel_connect(name)
+        if self._connect_pool is not None:
+            self._connect_pool.shutdown(wait=False)
+            self._connect_pool = None
 
         # If a connection test worker is running, try to stop it cleanly
         if hasattr(self, '_test_worker') and self._test_worker is not None:
@@ -928,68 +1890,208 @@ class MavlinkService(ServiceBase):
             finally:
                 self._test_worker = None
 
-    def update(self):
-        """Main update loop - not used as we use separate timers for priority handling."""
-        pass
-    
-    def add_connection(self, config: MavlinkConnectionConfig) -> bool:
-        """Add and establish a new MAVLink connection.
-        
+    def update(self):
+        """Main update loop - not used as we use separate timers for priority handling."""
+        pass
+    
+    def add_connection(self, config: MavlinkConnectionConfig) -> bool:
+        """Add and establish a new MAVLink connection.
+
+        Blocks until the vehicle answers or connection_timeout expires; use
+        connect_async() to connect without blocking.
+        
+        Args:
+            config: Connection configuration
+            
+        Returns:
+            True if connection was established successfully
+        """
+        if self._engine is not None:
+            future = self.connect_async(config)
+            deadline = time.monotonic() + self._global_settings.connection_timeout + 1.0
+            while not future.done() and time.monotonic() < deadline:
+                self._process_engine()
+                time.sleep(0.005)
+            if not future.done():
+                self.cancel_connect(config.name)
+            return future.result(0) is not None
+
+        self._assign_connection_name(config)
+        connection = MavlinkConnection(config)
+        
+        if connection.connect(timeout=self._global_settings.connection_timeout):
+            self._register_connection(connection)
+            return True
+        
+        # Connection failed - do NOT save to saved_connections
+        # Failed connections should not persist in the UI
+        print(f"[MavlinkService] ERROR: Failed to establish connection: {config.name}")
+        logger.error("Failed to establish MAVLink connection: %s", config.name)
+        return False
+
+    def connect_async(self, config: MavlinkConnectionConfig) -> Future:
+        """Start establishing a connection in the connection worker pool.
+
+        Returns immediately.  Progress is reported through connection_progress
+        and, on success, connection_changed; the connection is registered in
+        the service thread before the returned future completes.
+
+        Args:
+            config: Connection configuration (its name is assigned now if empty)
+
+        Returns:
+            Future resolving to the vehicle's system ID, or None if the
+            attempt failed or was cancelled
+        """
+        self._assign_connection_name(config)
+        future = Future()
+        if self._engine is not None:
+            self._pending_connects[config.name] = (future, None)
+            self.connection_progress.emit(config.name, "connecting")
+            self._engine.send('connect', config)
+            return future
+        cancel = threading.Event()
+        self._pending_connects[config.name] = (future, cancel)
+        self.connection_progress.emit(config.name, "connecting")
+        self._worker_pool().submit(self._connect_worker, MavlinkConnection(config),
+                                   future, cancel, self._global_settings.connection_timeout)
+        return future
+
+    def connect_many(self, configs: List[MavlinkConnectionConfig]) -> List[Future]:
+        """Connect several vehicles concurrently (see connect_async).
+
+        Args:
+            configs: Connection configurations
+
+        Returns:
+            One future per config, in the same order
+        """
+        return [self.connect_async(config) for config in configs]
+
+    def cancel_connect(self, name: str) -> bool:
+        """Abort a pending asynchronous connection attempt.
+
         Args:
-            config: Connection configuration
-            
+            name: Connection name passed to (or assigned by) connect_async
+
         Returns:
-            True if connection was established successfully
+            True if an attempt was pending and has been cancelled
         """
+        pending = self._pending_connects.pop(name, None)
+        if pending is None:
+            return False
+        future, cancel = pending
+        if cancel is not None:
+            cancel.set()
+        elif self._engine is not None:
+            self._engine.send('cancel', name)
+        if not future.done():
+            future.set_result(None)
+        self.connection_progress.emit(name, "cancelled")
+        return True
+
+    def get_pending_connections(self) -> List[str]:
+        """Get the names of connections still being established."""
+        return list(self._pending_connects)
+
+    def _worker_pool(self) -> ThreadPoolExecutor:
+        """Get the pool running connection attempts and background scans."""
+        if self._connect_pool is None:
+            self._connect_pool = ThreadPoolExecutor(
+                max_workers=max(1, self._global_settings.connect_workers),
+                thread_name_prefix="mavlink-connect",
+            )
+        return self._connect_pool
+
+    def _assign_connection_name(self, config: MavlinkConnectionConfig):
+        """Give a config a name that no other connection uses."""
         # Generate a unique name if not provided
         if not config.name:
             config.name = self.generate_connection_name()
         elif not self.is_connection_name_unique(config.name):
             # Name already exists, generate a new one
             config.name = self.generate_connection_name(config.name)
-        
-        connection = MavlinkConnection(config)
-        
-        if connection.connect():
-            self._connections[connection.status.system_id] = connection
-            self._active_connections = len(self._connections)
 
-            # Wire console output from this connection back through our signal
-            sys_id = connection.status.system_id
-            connection.set_console_output_callback(
-                lambda text, sid=sys_id: self.console_output.emit(sid, text)
-            )
+    def _connect_worker(self, connection: 'MavlinkConnection', future: Future,
+                        cancel: threading.Event, timeout: float):
+        """Establish one connection (runs in the connection worker pool)."""
+        connection.connect(timeout=timeout, cancel=cancel)
+        # Bookkeeping and registration happen in the service thread
+        self._connect_finished.emit(connection, future)
+
+    def _on_connect_finished(self, connection: 'MavlinkConnection', future: Future):
+        """Register or discard a connection attempt completed by a worker."""
+        name = connection.config.name
+        if future.done():
+            # Cancelled while the attempt was in flight
+            connection.disconnect()
+            return
+        if self._pending_connects.get(name, (None,))[0] is future:
+            del self._pending_connects[name]
+        if not connection.is_connected:
+            connection.disconnect()
+            print(f"[MavlinkService] ERROR: Failed to establish connection: {name}")
+            logger.error("Failed to establish MAVLink connection: %s", name)
+            self.connection_progress.emit(name, "failed")
+            future.set_result(None)
+            return
+        self._register_connection(connection)
+        self.connection_progress.emit(name, "connected")
+        future.set_result(connection.status.system_id)
+
+    def _register_connection(self, connection: 'MavlinkConnection'):
+        """Start tracking a connected MavlinkConnection."""
+        config = connection.config
+        self._connections[connection.status.system_id] = connection
+        self._active_connections = len(self._connections)
+
+        # Wire console output from this connection back through our signal
+        sys_id = connection.status.system_id
+        connection.set_console_output_callback(
+            lambda text, sid=sys_id: self.console_output.emit(sid, text)
+        )
+        for message, handler, name in self._message_handlers:
+            connection.register_message_handler(message, handler, name)
+        # Every heartbeat on the link (including other vehicles sharing it) feeds discovery
+        connection.register_message_handler(
+            'HEARTBEAT', lambda msg, c=connection: self._observe_heartbeat(c, msg), 'discovery')
+        connection.set_fast_decode(self._global_settings.fast_telemetry_decode)
+        if self._egress is not None:
+            connection.attach_egress(self._egress)
+        if self._recorder is not None:
+            connection.attach_recorder(self._recorder)
+        if self._forwarder is not None:
+            connection.attach_forwarder(self._forwarder)
+        self._apply_receive_mode(connection)
+        self._apply_stream_profile(connection)
+        self._apply_rate_control(connection)
+        self._forget_saved_connection(config, connection.status.system_id)
+
+        self.connection_changed.emit(connection.status.system_id, True)
+        logger.info(
+            "MAVLink connected: name=%s system_id=%s connection=%s",
+            config.name,
+            connection.status.system_id,
+            config.connection_string,
+        )
+        self._update_status_label()
+    
+    def _forget_saved_connection(self, config: MavlinkConnectionConfig, system_id: int):
+        """Drop saved configs that a new connection replaces."""
+        # Remove from saved connections if it was there (by name or by matching connection string)
+        # This prevents duplicates when reconnecting with a different auto-generated name
+        if config.name in self._saved_connections:
+            del self._saved_connections[config.name]
+        
+        # Also remove any saved connection with the same connection string or system ID
+        to_remove = []
+        for saved_name, saved_config in self._saved_connections.items():
+            if (saved_config.connection_string == config.connection_string or
+                saved_config.system_id == system_id):
+                to_remove.append(saved_name)
+        for saved_name in to_remove:
+            del self._saved_connections[saved_name]
 
-            # Remove from saved connections if it was there (by name or by matching connection string)
-            # This prevents duplicates when reconnecting with a different auto-generated name
-            if config.name in self._saved_connections:
-                del self._saved_connections[config.name]
-            
-            # Also remove any saved connection with the same connection string or system ID
-            to_remove = []
-            for saved_name, saved_config in self._saved_connections.items():
-                if (saved_config.connection_string == config.connection_string or
-                    saved_config.system_id == connection.status.system_id):
-                    to_remove.append(saved_name)
-            for saved_name in to_remove:
-                del self._saved_connections[saved_name]
-
-            self.connection_changed.emit(connection.status.system_id, True)
-            logger.info(
-                "MAVLink connected: name=%s system_id=%s connection=%s",
-                config.name,
-                connection.status.system_id,
-                config.connection_string,
-            )
-            self._update_status_label()
-            return True
-        
-        # Connection failed - do NOT save to saved_connections
-        # Failed connections should not persist in the UI
-        print(f"[MavlinkService] ERROR: Failed to establish connection: {config.name}")
-        logger.error("Failed to establish MAVLink connection: %s", config.name)
-        return False
-    
     def remove_connection(self, system_id: int):
         """Remove and disconnect a MAVLink connection.
         
@@ -1007,8 +2109,14 @@ class MavlinkService(ServiceBase):
                 name = conn.config.name or f"Connection-{system_id}"
                 self._saved_connections[name] = conn.config
             
-            conn.disconnect()
+            if self._engine is not None:
+                self._engine.send('remove', system_id)
+            else:
+                conn.disconnect()
             del self._connections[system_id]
+            self._telemetry_publisher.remove(system_id)
+            if self._fleet_table is not None:
+                self._fleet_table.remove(system_id)
             self._active_connections = len(self._connections)
             self.connection_changed.emit(system_id, False)
             logger.info("MAVLink disconnected: system_id=%s", system_id)
@@ -1025,31 +2133,346 @@ class MavlinkService(ServiceBase):
         """
         return self._connections.get(system_id)
     
-    def get_telemetry(self, system_id: int) -> Optional[MavlinkTelemetryData]:
-        """Get latest telemetry data for a drone.
+    def get_telemetry(self, system_id: int) -> Optional[MavlinkTelemetrySnapshot]:
+        """Get the most recently published telemetry for a drone.
+        
+        Safe to call from any thread; the snapshot lags the live data by at
+        most one UI publication period.
         
         Args:
             system_id: System ID of the drone
             
         Returns:
-            MavlinkTelemetryData if available, None otherwise
+            MavlinkTelemetrySnapshot if connected, None otherwise
         """
         conn = self._connections.get(system_id)
-        if conn is not None:
-            return conn.telemetry
-        return None
+        if conn is None:
+            return None
+        snapshot = self._telemetry_publisher.published(system_id)
+        if snapshot is None:
+            # Nothing received yet, so the live container still holds defaults
+            snapshot = MavlinkTelemetrySnapshot.from_telemetry(conn.telemetry)
+        return snapshot
     
-    def get_all_telemetry(self) -> Dict[int, MavlinkTelemetryData]:
-        """Get telemetry data for all connected drones.
+    def get_all_telemetry(self) -> Dict[int, MavlinkTelemetrySnapshot]:
+        """Get the most recently published telemetry for all connected drones.
         
         Returns:
-            Dictionary mapping system_id to MavlinkTelemetryData
+            Dictionary mapping system_id to MavlinkTelemetrySnapshot
         """
         return {
-            sys_id: conn.telemetry 
-            for sys_id, conn in self._connections.items()
+            sys_id: self.get_telemetry(sys_id)
+            for sys_id in list(self._connections)
         }
+
+    def get_telemetry_history(self, system_id: int, seconds: float):
+        """Get a drone's recorded telemetry for the last ``seconds``.
+
+        Args:
+            system_id: System ID of the drone
+            seconds: Window length
+
+        Returns:
+            NumPy structured array (TELEMETRY_DTYPE), oldest first; field 't'
+            is the monotonic receive time
+        """
+        return self._telemetry_store.window(system_id, seconds)
+
+    def get_telemetry_resampled(self, system_id: int, seconds: float, rate_hz: float,
+                                fields=None):
+        """Get a drone's recent telemetry resampled onto a regular grid.
+
+        Args:
+            system_id: System ID of the drone
+            seconds: Window length, ending at the newest sample
+            rate_hz: Grid rate
+            fields: Field names to fill (default: all)
+
+        Returns:
+            NumPy structured array (TELEMETRY_DTYPE) with one row per grid point
+        """
+        return self._telemetry_store.resample(system_id, seconds, rate_hz, fields=fields)
+
+    def is_current_telemetry(self, system_id: int, snapshot: MavlinkTelemetrySnapshot) -> bool:
+        """Check whether a snapshot is still the newest one published.
+
+        A UI slot that fell behind can use this to skip telemetry_updated
+        deliveries that have already been superseded.
+        """
+        return self._telemetry_publisher.is_current(system_id, snapshot)
+
+    def subscribe_telemetry(self, callback: Callable[[int, MavlinkTelemetrySnapshot], None]):
+        """Receive a telemetry snapshot after every telemetry message.
+
+        Unlike telemetry_updated, nothing is coalesced: this is the full-rate
+        path for logging and control.  Callbacks run in the service thread
+        and must return quickly.
+
+        Args:
+            callback: Called with (system_id, MavlinkTelemetrySnapshot)
+        """
+        self._telemetry_publisher.subscribe(callback)
+
+    def unsubscribe_telemetry(self, callback: Callable[[int, MavlinkTelemetrySnapshot], None]) -> bool:
+        """Remove a callback added with subscribe_telemetry().
+
+        Returns:
+            True if the callback was subscribed
+        """
+        return self._telemetry_publisher.unsubscribe(callback)
     
+    def register_message_handler(self, message, handler: Callable[[object], None],
+                                 name: str = None):
+        """Add a message handler to every current and future connection.
+
+        This is the extension point for DTRG dialect messages and analytics
+        consumers; handlers run in the service thread after the built-in
+        telemetry handlers.  Use msg.get_srcSystem() to tell vehicles apart.
+
+        Args:
+            message: Numeric message ID or message name (e.g. 'ATTITUDE')
+            handler: Callable taking the decoded message
+            name: Label used in the handler statistics
+
+        Raises:
+            ValueError: If the message name is not in the loaded dialect
+        """
+        resolve_message_id(message, mavlink_dialect)
+        self._message_handlers.append((message, handler, name))
+        if self._engine is not None:
+            logger.warning("Message handler %s only runs without engine_process; "
+                           "it is kept for the next in-process start", name or handler)
+            return
+        for conn in list(self._connections.values()):
+            conn.register_message_handler(message, handler, name)
+
+    def unregister_message_handler(self, message, handler: Callable[[object], None]):
+        """Remove a handler added with register_message_handler().
+
+        Args:
+            message: Message ID or name the handler was registered for
+            handler: Handler to remove
+        """
+        self._message_handlers = [
+            entry for entry in self._message_handlers
+            if not (entry[0] == message and entry[1] == handler)
+        ]
+        if self._engine is not None:
+            return
+        for conn in list(self._connections.values()):
+            conn.unregister_message_handler(message, handler)
+
+    def get_replay(self, system_id: int) -> Optional[ReplayLink]:
+        """Get the playback controls of a replay connection.
+
+        Replay connections are added like any other, with a connection string
+        of the form replay:<path>.tlog[?speed=<N|max>][&loop=1].  The returned
+        ReplayLink can pause, resume, seek and change speed from any thread.
+
+        Args:
+            system_id: System ID of the connection
+
+        Returns:
+            ReplayLink, or None if the connection is not a replay
+        """
+        conn = self._connections.get(system_id)
+        return conn.replay if conn is not None else None
+
+    @property
+    def is_recording(self) -> bool:
+        """True while the flight recorder is running."""
+        return self._recorder is not None or self._engine_recording
+
+    def start_recording(self, directory: str = None) -> bool:
+        """Record every raw inbound and outbound frame to tlog files.
+
+        Frames are written by a background thread, rotated by the configured
+        size and duration, and each log gets a sidecar index (see
+        services.mavlink_tlog).
+
+        Args:
+            directory: Output directory (default: recording_directory setting)
+
+        Returns:
+            True if recording started, False if already recording
+        """
+        if self._engine is not None:
+            if self._engine_recording:
+                return False
+            self._engine_recording = self._engine.send('record', directory)
+            return self._engine_recording
+        if self._recorder is not None:
+            return False
+        settings = self._global_settings
+        recorder = TlogRecorder(
+            directory or settings.recording_directory,
+            max_bytes=int(settings.recording_max_mb * 1024 * 1024),
+            max_duration_s=settings.recording_max_duration_s,
+        )
+        recorder.start()
+        self._recorder = recorder
+        for conn in list(self._connections.values()):
+            conn.attach_recorder(recorder)
+        logger.info("MAVLink recording started in %s", recorder.directory)
+        return True
+
+    def stop_recording(self) -> Optional[dict]:
+        """Stop the flight recorder, writing out everything still pending.
+
+        Returns:
+            Final recorder statistics (with engine_process set, the last ones
+            the engine reported), or None if not recording
+        """
+        if self._engine is not None:
+            if not self._engine_recording:
+                return None
+            self._engine_recording = False
+            self._engine.send('stop_recording')
+            return self._engine_statistics.get('recorder')
+        recorder = self._recorder
+        if recorder is None:
+            return None
+        self._recorder = None
+        for conn in list(self._connections.values()):
+            conn.detach_recorder()
+        recorder.stop()
+        stats = recorder.get_stats()
+        logger.info("MAVLink recording stopped: %d frames in %d file(s)",
+                    stats['frames'], len(stats['files']))
+        return stats
+
+    def get_recording_stats(self) -> Optional[dict]:
+        """Get flight recorder counters, or None if not recording."""
+        if self._engine is not None:
+            return self._engine_statistics.get('recorder') if self._engine_recording else None
+        recorder = self._recorder
+        return recorder.get_stats() if recorder is not None else None
+
+    def add_forward_output(self, config: MavlinkForwardConfig) -> bool:
+        """Forward raw vehicle frames to a downstream ground station or logger.
+
+        Inbound frames are re-emitted unchanged (see services.mavlink_forward)
+        and frames the output sends back are relayed to the vehicle they
+        target, at the lowest egress priority.  An output with the same name
+        is replaced.  Outputs stay configured across service restarts.
+
+        Args:
+            config: Output address, filters and rate limits
+
+        Returns:
+            True if the output was opened
+        """
+        name = config.name or config.address
+        if self._engine is not None:
+            # Opened (and validated) by the engine, which owns the vehicle links
+            self._forward_configs[name] = config
+            return self._engine.send('forward', config)
+        if self._forwarder is not None and self._forwarder.remove_output(name, timeout=1.0):
+            # Closed first: a listening output is replaced on the address it holds
+            self._forward_configs.pop(name, None)
+        try:
+            include_ids = [self._forward_message_id(m) for m in config.include_messages]
+            exclude_ids = [self._forward_message_id(m) for m in config.exclude_messages]
+            output = ForwardOutput(
+                name, config.address,
+                system_ids=config.system_ids,
+                include_ids=include_ids,
+                exclude_ids=exclude_ids,
+                downlink_rate_limit_bps=config.downlink_rate_limit_bps,
+                uplink_rate_limit_bps=config.uplink_rate_limit_bps,
+                uplink_enabled=config.uplink_enabled,
+            )
+        except (ValueError, OSError) as e:
+            logger.warning("Cannot open forward output %s: %s", config.address, e)
+            return False
+
+        forwarder = self._forwarder
+        if forwarder is None:
+            forwarder = MavlinkForwarder(self._relay_uplink, dialect=mavlink_dialect)
+            forwarder.start()
+            self._forwarder = forwarder
+            for conn in list(self._connections.values()):
+                conn.attach_forwarder(forwarder)
+        forwarder.add_output(output)
+        self._forward_configs[name] = config
+        logger.info("Forwarding MAVLink to %s (%s)", name, config.address)
+        return True
+
+    def remove_forward_output(self, name: str) -> bool:
+        """Stop forwarding to an output and close it.
+
+        Args:
+            name: Output name (its address if no name was given)
+
+        Returns:
+            True if the output existed
+        """
+        if self._forward_configs.pop(name, None) is None:
+            return False
+        if self._engine is not None:
+            self._engine.send('unforward', name)
+        if self._forwarder is not None:
+            self._forwarder.remove_output(name)
+            if not self._forward_configs:
+                self._stop_forwarder()
+        return True
+
+    def get_forward_outputs(self) -> Dict[str, MavlinkForwardConfig]:
+        """Get the configured forward outputs by name."""
+        return dict(self._forward_configs)
+
+    def _forward_message_id(self, message) -> int:
+        """Resolve a forward filter entry (name, ID or numeric string) to an ID."""
+        if isinstance(message, str) and message.strip().isdigit():
+            message = int(message)
+        return resolve_message_id(message, mavlink_dialect)
+
+    def _relay_uplink(self, frame: bytes, target_system: int, output: ForwardOutput):
+        """Send a frame from a forward output to its vehicle(s) (forwarder thread)."""
+        if target_system:
+            conn = self._connections.get(target_system)
+            targets = [conn] if conn is not None else []
+        else:
+            targets = [conn for sys_id, conn in list(self._connections.items())
+                       if output.wants_system(sys_id)]
+        for conn in targets:
+            conn.send_raw(frame)
+
+    def _stop_forwarder(self):
+        """Close every forward output; their configuration is kept."""
+        forwarder = self._forwarder
+        if forwarder is None:
+            return
+        self._forwarder = None
+        for conn in list(self._connections.values()):
+            conn.detach_forwarder()
+        forwarder.stop()
+
+    def set_link_bandwidth(self, system_id: int, bytes_per_sec: float,
+                           burst_bytes: float = None) -> bool:
+        """Limit a connection's outbound bandwidth (e.g. for a telemetry radio).
+
+        When the limit is reached mocap goes first, then setpoints, and
+        heartbeats, pings and console traffic are delayed or shed.
+
+        Args:
+            system_id: System ID of the connection
+            bytes_per_sec: Outbound limit in bytes per second (0 = unlimited)
+            burst_bytes: Largest burst allowed above the rate
+
+        Returns:
+            True if the connection exists
+        """
+        conn = self._connections.get(system_id)
+        if conn is None:
+            return False
+        conn.config.egress_rate_limit_bps = bytes_per_sec
+        if self._engine is not None:
+            self._engine.send('bandwidth', system_id, bytes_per_sec, burst_bytes)
+        elif self._egress is not None:
+            self._egress.set_link_rate(conn, bytes_per_sec, burst_bytes)
+        return True
+
     def register_mocap_source(self, system_id: int, scene_object):
         """Register a scene object as motion capture source for a drone.
         
@@ -1060,6 +2483,7 @@ class MavlinkService(ServiceBase):
             scene_object: Scene object with pose data
         """
         self._mocap_sources[system_id] = scene_object
+        self._schedule_mocap(system_id)
     
     def unregister_mocap_source(self, system_id: int):
         """Unregister a motion capture source.
@@ -1069,6 +2493,11 @@ class MavlinkService(ServiceBase):
         """
         if system_id in self._mocap_sources:
             del self._mocap_sources[system_id]
+        if self._engine is not None:
+            self._engine.send('mocap', system_id, 0.0)
+            self._update_pose_timer()
+        if self._mocap_scheduler is not None:
+            self._mocap_scheduler.remove_task(system_id)
     
     def send_setpoint(self, system_id: int, setpoint: SetpointData) -> bool:
         """Send a setpoint to a specific drone.
@@ -1087,6 +2516,8 @@ class MavlinkService(ServiceBase):
         
         conn = self._connections.get(system_id)
         if conn is not None and conn.is_connected:
+            if self._engine is not None:
+                return self._engine.send('setpoint', system_id, setpoint)
             return conn.send_setpoint(setpoint)
         return False
     
@@ -1116,6 +2547,8 @@ class MavlinkService(ServiceBase):
         """
         conn = self._connections.get(system_id)
         if conn is not None and conn.is_connected:
+            if self._engine is not None:
+                return self._engine.send('console', system_id, text)
             return conn.send_serial_control(text)
         return False
 
@@ -1132,6 +2565,8 @@ class MavlinkService(ServiceBase):
         """
         conn = self._connections.get(system_id)
         if conn is not None and conn.is_connected:
+            if self._engine is not None:
+                return self._engine.send('command_long', system_id, command, params)
             return conn.send_command_long(command, params)
         return False
 
@@ -1143,6 +2578,8 @@ class MavlinkService(ServiceBase):
         """
         if system_id in self._setpoint_sources:
             del self._setpoint_sources[system_id]
+        if self._engine_setpoints.pop(system_id, None) is not None:
+            self._engine.send('setpoint_source', system_id, None)
     
     def get_health_metrics(self) -> tuple:
         """Get overall health metrics for the MAVLink service.
@@ -1165,7 +2602,16 @@ class MavlinkService(ServiceBase):
         
         Returns:
             Dictionary with total_sent, total_received, and connections list
+            (with engine_process set, as last reported by the engine, plus
+            'engine' process and ring counters)
         """
+        if self._engine is not None:
+            stats = dict(self._engine_statistics) or {
+                'total_sent': 0, 'total_received': 0, 'connections': []}
+            stats['telemetry_history'] = self._telemetry_store.get_stats()
+            stats['engine'] = self._engine.get_stats()
+            return stats
+
         total_sent = 0
         total_received = 0
         connections = []
@@ -1178,15 +2624,49 @@ class MavlinkService(ServiceBase):
                 'connected': conn.is_connected,
                 'messages_sent': conn.status.messages_sent,
                 'messages_received': conn.status.messages_received,
+                'packets_dropped': conn.packets_dropped,
+                'loss_rate': conn.loss_rate,
+                'sources': conn.get_source_stats(),
                 'rate_hz': conn.status.message_rate_hz,
+                'message_type_rates': dict(conn.status.message_type_rates),
+                'receive_queue': conn.get_receive_queue_stats(),
+                'dispatch': conn.get_handler_stats(),
+                'mocap': self._mocap_scheduler.get_task_stats(sys_id)
+                         if self._mocap_scheduler is not None else None,
+                'egress': conn.get_egress_stats(),
+                'replay': conn.replay.get_status() if conn.replay is not None else None,
+                'shared': conn.shared_link.get_status() if conn.shared_link is not None else None,
+                'streams': conn.get_stream_stats(),
+                'rate_control': conn.get_rate_control_stats(),
+                'timing': conn.get_timing_stats(),
             })
         
+        engine = self._selector_engine
         return {
             'total_sent': total_sent,
             'total_received': total_received,
             'connections': connections,
+            'selector_engine': engine.get_stats() if engine is not None else None,
+            'shared_endpoints': [endpoint.get_stats() for endpoint in get_shared_endpoints()],
+            'telemetry_history': self._telemetry_store.get_stats(),
+            'recorder': self.get_recording_stats(),
+            'forwarding': self._forwarder.get_stats() if self._forwarder is not None else None,
+            'engine': None,
         }
     
+    def reset_timing_statistics(self, system_id: int = None):
+        """Clear the timing histograms, e.g. at the start of a test run.
+
+        Args:
+            system_id: Connection to reset (None = all connections)
+        """
+        if self._engine is not None:
+            self._engine.send('reset_timing', system_id)
+            return
+        for sys_id, conn in list(self._connections.items()):
+            if system_id is None or sys_id == system_id:
+                conn.reset_timing_stats()
+
     def get_all_connections(self) -> Dict[str, MavlinkConnectionConfig]:
         """Get all configured connections (both active and inactive).
         
@@ -1240,6 +2720,10 @@ class MavlinkService(ServiceBase):
         for saved_name in self._saved_connections.keys():
             if saved_name == name:
                 return False
+
+        # And connections still being established
+        if name in self._pending_connects:
+            return False
         
         return True
     
@@ -1389,223 +2873,122 @@ class MavlinkService(ServiceBase):
             return True
         return False
     
-    def discover_devices(self, timeout_secs: float = 3.0) -> List:
+    def discover_devices(self, timeout_secs: float = None, ports: List[int] = None) -> List:
         """Discover MAVLink devices on the network.
 
-        Listens for MAVLink heartbeats on common ports to discover devices.
-        Before listening on each port, a GCS heartbeat is broadcast to that
-        port so that passive drones (PX4 + mavlink-router style setups) that
-        only begin sending once they receive an incoming packet will respond.
-        This mirrors the behaviour of QGC's manual UDP "Connect" button.
+        Listens for heartbeats on every discovery port at once (one selector,
+        so the scan takes timeout_secs regardless of the number of ports),
+        probing each port with a GCS heartbeat so that passive drones (PX4 +
+        mavlink-router style setups) start sending.  This mirrors the
+        behaviour of QGC's manual UDP "Connect" button.  Ports bound by active
+        connections are not scanned; devices on them are reported from the
+        heartbeats those connections receive.
 
-        Note: This is a simplified discovery that may not work if the ports
-        are already bound by other processes.
+        Blocks for the listen window; call from a worker thread.  Devices are
+        also reported incrementally through device_discovered, and new ones
+        are connected when auto_connect_discovered is set.
 
         Args:
-            timeout_secs: Time to listen for devices
+            timeout_secs: Listen window (default: discovery_timeout_s setting)
+            ports: Ports to scan (default: discovery_ports setting)
 
         Returns:
             List of DiscoveredDevice objects
         """
-        from models.structs import DiscoveredDevice
-        import socket
-        discovered = []
-        logger.info("Starting MAVLink discovery run (timeout=%.1fs)", timeout_secs)
-
-        # Common MAVLink ports to check.
-        # Each port needs at least 1.5 s to be sure of catching a 1 Hz PX4 heartbeat.
-        ports_to_check = [14550, 14540, 14560]
-        port_timeout = max(1.5, timeout_secs / len(ports_to_check))
-
-        # --- Build a minimal MAVLink v1 GCS HEARTBEAT packet by hand ---
-        # This avoids needing an active mavutil connection at this point and
-        # lets us probe each port before binding a listener to it.
-        # 
-        # MAVLink v1 HEARTBEAT layout:
-        #   Header: magic(1) + len(1) + seq(1) + sys(1) + comp(1) + msg_id(1)
-        #   Payload (9 bytes):
-        #     - custom_mode: uint32 (4 bytes, little-endian)
-        #     - type: uint8 (1 byte) - MAV_TYPE_GCS = 6
-        #     - autopilot: uint8 (1 byte) - MAV_AUTOPILOT_INVALID = 8
-        #     - base_mode: uint8 (1 byte) - 0
-        #     - system_status: uint8 (1 byte) - MAV_STATE_UNINIT = 0
-        #     - mavlink_version: uint8 (1 byte) - 3
-        #   Checksum: CRC-16/MCRF4XX (2 bytes)
-        _HEARTBEAT_PAYLOAD = bytes([
-            0, 0, 0, 0,  # custom_mode (uint32 little-endian)
-            6,           # type (MAV_TYPE_GCS)
-            8,           # autopilot (MAV_AUTOPILOT_INVALID)
-            0,           # base_mode
-            0,           # system_status (MAV_STATE_UNINIT)
-            3,           # mavlink_version
-        ])  # 9 bytes total
-        _crc_extra = 50  # HEARTBEAT CRC extra byte
-        
-        # CRC-16/MCRF4XX over (len, seq, sys, comp, msg_id) + payload + crc_extra
-        def _mavlink_crc(data: bytes) -> int:
-            crc = 0xFFFF
-            for b in data:
-                tmp = b ^ (crc & 0xFF)
-                tmp ^= (tmp << 4) & 0xFF
-                crc = ((crc >> 8) ^ (tmp << 8) ^ (tmp << 3) ^ (tmp >> 4)) & 0xFFFF
-            return crc
-
-        _header = bytes([9, 0, 255, 0, 0])  # len=9, seq=0, sys=255, comp=0, msg_id=0
-        _crc_input = _header + _HEARTBEAT_PAYLOAD + bytes([_crc_extra])
-        _crc_val = _mavlink_crc(_crc_input)
-        _HEARTBEAT_PACKET = (
-            bytes([0xFE])          # magic
-            + _header
-            + _HEARTBEAT_PAYLOAD
-            + bytes([_crc_val & 0xFF, (_crc_val >> 8) & 0xFF])
-        )
-
-        for port in ports_to_check:
+        settings = self._global_settings
+        if timeout_secs is None:
+            timeout_secs = settings.discovery_timeout_s
+        if ports is None:
             try:
-                # Create a UDP socket to listen for heartbeats
-                sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-                sock.settimeout(port_timeout)
-
-                try:
-                    # Bind to all interfaces to receive MAVLink packets from any network source
-                    # This is required for device discovery - drones may be on any network interface
-                    # CodeQL: py/bind-socket-all-network-interfaces - intentional for discovery
-                    sock.bind(('0.0.0.0', port))  # nosec B104
-
-                    # Probe: broadcast a GCS heartbeat so passive drones register our
-                    # address and start sending.  This is what QGC does on a manual
-                    # UDP connect and is the fix for the "works after QGC, not before" quirk.
-                    try:
-                        sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
-                        sock.sendto(_HEARTBEAT_PACKET, ('<broadcast>', port))
-                    except Exception:
-                        pass  # Broadcast may fail on some interfaces; carry on listening anyway
-
-                    # Listen for packets until we get the flight controller's HEARTBEAT
-                    # or the timeout expires.
-                    #
-                    # Why not just break on the first heartbeat?
-                    # A PX4 stack typically forwards heartbeats from *multiple* components:
-                    #   - The companion / MAVLink router itself (autopilot=8 INVALID, type=18)
-                    #   - The actual flight controller      (autopilot=12 PX4,     type=14)
-                    # The companion heartbeat usually arrives first.  We keep reading until
-                    # we find one with a real autopilot value, falling back to whatever we
-                    # have if time runs out.
-                    _MAV_AUTOPILOT_INVALID = 8  # MAV_AUTOPILOT_INVALID — not a real FC
-
-                    start_time = time.time()
-                    best_device = None   # best heartbeat decoded so far
-
-                    while time.time() - start_time < port_timeout:
-                        try:
-                            data, addr = sock.recvfrom(1024)
-                            if len(data) < 6:
-                                continue
-
-                            magic = data[0]
-                            if magic not in (0xFE, 0xFD):
-                                continue  # Not a MAVLink packet
-
-                            # Skip if we already have a confirmed entry for this address
-                            if any(d.address == addr[0] and d.port == port for d in discovered):
-                                break
-
-                            # --- Parse header ---
-                            try:
-                                if magic == 0xFE:
-                                    plen          = data[1]
-                                    sys_id        = data[3]
-                                    comp_id       = data[4]
-                                    msg_id        = data[5]
-                                    payload_start = 6
-                                    mav_version   = 1
-                                else:
-                                    plen          = data[1]
-                                    sys_id        = data[5]
-                                    comp_id       = data[6]
-                                    msg_id        = data[7] | (data[8] << 8) | (data[9] << 16)
-                                    payload_start = 10
-                                    mav_version   = 2
-                            except IndexError:
-                                continue
-
-                            # Only HEARTBEAT (msg_id 0) carries identity info
-                            if msg_id != 0:
-                                continue
-
-                            # --- Decode HEARTBEAT payload ---
-                            # bytes 0-3  custom_mode  (uint32 LE)
-                            # byte  4    MAV_TYPE
-                            # byte  5    MAV_AUTOPILOT
-                            # byte  6    base_mode    (0x80 = ARMED)
-                            vehicle_type   = -1
-                            autopilot_type = -1
-                            armed          = False
-                            try:
-                                if plen >= 7 and len(data) >= payload_start + plen:
-                                    p              = data[payload_start: payload_start + plen]
-                                    vehicle_type   = p[4]
-                                    autopilot_type = p[5]
-                                    armed          = bool(p[6] & 0x80)
-                                    print(f"[MavlinkService] Discovery HB: sys={sys_id} comp={comp_id} "
-                                          f"type={vehicle_type} autopilot={autopilot_type} "
-                                          f"armed={armed} mav_v={mav_version}")
-                            except IndexError:
-                                pass
-
-                            candidate = DiscoveredDevice(
-                                address=addr[0],
-                                port=port,
-                                system_id=sys_id,
-                                component_id=comp_id,
-                                connection_string=f"udpin:0.0.0.0:{port}",
-                                vehicle_type=vehicle_type,
-                                autopilot=autopilot_type,
-                                armed=armed,
-                                mavlink_version=mav_version,
-                            )
-
-                            # Prefer a real flight controller over a companion/router.
-                            # Keep reading if we only have an INVALID autopilot so far.
-                            if best_device is None:
-                                best_device = candidate
-
-                            if autopilot_type != _MAV_AUTOPILOT_INVALID:
-                                # Found the actual FC — no need to wait any longer
-                                best_device = candidate
-                                break
-                            # else: companion HB — store as fallback and keep waiting
-
-                        except socket.timeout:
-                            break
-
-                    if best_device is not None:
-                        if not any(d.address == best_device.address and d.port == port
-                                   for d in discovered):
-                            discovered.append(best_device)
-                except OSError as e:
-                    # Port already in use - skip it
-                    print(f"[MavlinkService] Discovery: Port {port} already in use")
-                    logger.info("Discovery skipped port %s: already in use", port)
-                finally:
-                    sock.close()
-            except Exception as e:
-                print(f"[MavlinkService] ERROR: Discovery error on port {port}: {e}")
-                logger.error("Discovery error on port %s: %s", port, e)
-
+                ports = parse_port_list(settings.discovery_ports)
+            except ValueError as e:
+                logger.error("Invalid discovery port list %r: %s", settings.discovery_ports, e)
+                ports = []
+        connections = list(self._connections.values())
+        in_use = {bound_udp_port(c.config.connection_string) for c in connections}
+        free_ports = [port for port in ports if port not in in_use]
+        logger.info("Starting MAVLink discovery run on %d port(s) (timeout=%.1fs)",
+                    len(free_ports), timeout_secs)
+
+        discovered = DiscoveryScanner().scan(free_ports, timeout_secs, on_device=self._device_found.emit)
+
+        # Devices heard on ports our own connections hold
+        strings = {c.config.connection_string for c in connections}
+        discovered.extend(d for d in list(self._discovered.values()) if d.connection_string in strings)
+        self._scan_finished.emit(discovered)
         logger.info("MAVLink discovery finished: %d device(s) found", len(discovered))
         return discovered
+
+    def get_discovered_devices(self) -> List:
+        """Get every device found so far by scans or on active connections."""
+        return list(self._discovered.values())
+
+    def _observe_heartbeat(self, conn: 'MavlinkConnection', msg):
+        """Feed a heartbeat received on an active connection to discovery."""
+        device = device_from_heartbeat(msg, conn.config.connection_string, conn.peer_address)
+        if device is not None:
+            self._record_device(device)
+
+    def _record_device(self, device):
+        """Remember a device and announce it if it is new or changed."""
+        key = device_key(device)
+        current = self._discovered.get(key)
+        if prefer_device(current, device):
+            self._discovered[key] = device
+            self.device_discovered.emit(device)
+        else:
+            current.last_seen = device.last_seen
+
+    def _on_scan_finished(self, devices: list):
+        """Auto-connect devices found by a scan (service thread)."""
+        if not self._global_settings.auto_connect_discovered:
+            return
+        connected = {c.config.connection_string for c in self._connections.values()}
+        for device in devices:
+            key = device_key(device)
+            if (device.system_id in self._connections or device.connection_string in connected
+                    or key in self._auto_connect_tried):
+                continue
+            # One connection per port; other vehicles on it are only reported
+            self._auto_connect_tried.add(key)
+            connected.add(device.connection_string)
+            logger.info("Auto-connecting discovered device sys=%s at %s",
+                        device.system_id, device.connection_string)
+            self.connect_async(MavlinkConnectionConfig(connection_string=device.connection_string,
+                                                       system_id=device.system_id))
+
+    def _run_background_discovery(self):
+        """Start a background scan unless one is still running."""
+        if self._discovery_scan is not None and not self._discovery_scan.done():
+            return
+        self._discovery_scan = self._worker_pool().submit(self.discover_devices)
+
+    def _apply_background_discovery(self):
+        """Start, stop or retime the background discovery timer."""
+        if self._discovery_timer is None:
+            return
+        settings = self._global_settings
+        if settings.background_discovery and settings.discovery_interval_s > 0:
+            self._discovery_timer.setInterval(max(1, int(settings.discovery_interval_s * 1000)))
+            if not self._discovery_timer.isActive():
+                self._discovery_timer.start()
+        else:
+            self._discovery_timer.stop()
     
-    def run_connection_test(self, duration_secs: float = 2.0):
+    def run_connection_test(self, duration_secs: float = 2.0, rate_hz: float = None):
         """Run a connection quality test for all active connections (non-blocking).
         
         Spawns a worker thread to run the test and emits results via the
         connection_test_complete signal. This prevents UI freezing during tests.
         
         Args:
-            duration_secs: Duration of test in seconds
+            duration_secs: Duration of the PING train in seconds
+            rate_hz: PING rate (default: global link_test_rate_hz)
         """
+        if self._engine is not None:
+            self._engine.send('test', duration_secs, rate_hz)
+            return
+
         # Clean up any previous worker to avoid memory leaks
         if hasattr(self, '_test_worker') and self._test_worker is not None:
             if self._test_worker.isRunning():
@@ -1614,7 +2997,7 @@ class MavlinkService(ServiceBase):
             self._test_worker = None
         
         # Create and start worker thread
-        self._test_worker = ConnectionTestWorker(self, duration_secs, parent=self)
+        self._test_worker = ConnectionTestWorker(self, duration_secs, rate_hz, parent=self)
         self._test_worker.test_complete.connect(self._on_connection_test_complete)
         self._test_worker.error.connect(self._on_connection_test_error)
         self._test_worker.finished.connect(self._on_test_worker_finished)
@@ -1639,36 +3022,58 @@ class MavlinkService(ServiceBase):
         """Handle connection test completion from worker thread."""
         self.connection_test_complete.emit(results)
     
-    def _run_connection_test_sync(self, duration_secs: float = 2.0) -> dict:
+    def _run_connection_test_sync(self, duration_secs: float = 2.0, rate_hz: float = None) -> dict:
         """Run a connection quality test synchronously (blocks caller).
         
         This is the internal implementation called by ConnectionTestWorker.
         Do not call from UI thread - use run_connection_test() instead.
+
+        Every connected link is probed in parallel with a train of numbered
+        PINGs; replies are matched by sequence number as the service thread
+        receives them.
         
         Args:
-            duration_secs: Duration of test in seconds
+            duration_secs: Duration of the PING train in seconds
+            rate_hz: PING rate (default: global link_test_rate_hz)
             
         Returns:
             Dictionary mapping system_id to test results with:
-            - rate_hz: Measured message rate
-            - latency_ms: Round-trip time in milliseconds
-            - lost_packets: Number of dropped packets detected
-            - messages_sent: Total messages sent on this connection
-            - messages_received: Total messages received on this connection
-            - quality: Quality rating ('good', 'fair', 'poor')
+            - pings_sent, pings_received, lost_packets, loss_rate: PING train loss
+            - reordered, duplicates: Replies received out of order or twice
+            - rtt_min_ms, rtt_p50_ms, rtt_p95_ms, rtt_p99_ms, rtt_max_ms,
+              rtt_mean_ms: Round-trip time distribution
+            - latency_ms: Median round-trip time
+            - rate_hz: Messages received per second during the test
+            - rx_bytes_per_sec, tx_bytes_per_sec: Achieved throughput
+            - messages_sent, messages_received: Messages during the test
+            - quality: Quality rating ('good', 'fair', 'poor'; see grade_link_quality)
         """
-        results = {}
-        
-        # Send pings to all connections
-        for conn in self._connections.values():
-            if conn.is_connected:
-                conn.send_ping()
+        if rate_hz is None:
+            rate_hz = self._global_settings.link_test_rate_hz
+        interval = 1.0 / max(rate_hz, 0.1)
 
-        # Wait for pings to return and metrics to stabilize over the requested duration
-        time.sleep(duration_secs)
+        # Counters at the start: (messages sent, received, bytes sent, received)
+        probes = {}
+        for sys_id, conn in list(self._connections.items()):
+            if conn.is_connected:
+                status = conn.status
+                probes[sys_id] = (conn, (status.messages_sent, status.messages_received,
+                                         status.bytes_sent, status.bytes_received))
+                conn.start_link_probe()
+
+        started = time.monotonic()
+        for tick in range(max(1, int(round(duration_secs / interval))) if probes else 0):
+            time.sleep(max(0.0, started + tick * interval - time.monotonic()))
+            for conn, _ in probes.values():
+                conn.send_probe_ping()
+        # Wait for late replies
+        if probes:
+            time.sleep(REPLY_GRACE)
+        elapsed = max(time.monotonic() - started, 1e-3)
 
-        for sys_id, conn in self._connections.items():
-            if not conn.is_connected:
+        results = {}
+        for sys_id, conn in list(self._connections.items()):
+            if sys_id not in probes:
                 results[sys_id] = {
                     'rate_hz': 0,
                     'latency_ms': 0,
@@ -1678,30 +3083,22 @@ class MavlinkService(ServiceBase):
                     'quality': 'disconnected'
                 }
                 continue
-            
-            # Get current metrics from connection status
-            rate_hz = conn.status.message_rate_hz
-            latency_ms = conn.status.latency_ms
-            messages_sent = conn.status.messages_sent
-            messages_received = conn.status.messages_received
-            lost_packets = conn.packets_dropped
-
-            # Determine quality rating based on message rate and latency
-            if rate_hz >= 50 and latency_ms < 50:
-                quality = 'good'
-            elif rate_hz >= 20 and latency_ms < 100:
-                quality = 'fair'
-            else:
-                quality = 'poor'
-            
-            results[sys_id] = {
-                'rate_hz': rate_hz,
-                'latency_ms': latency_ms,
-                'lost_packets': lost_packets,
-                'messages_sent': messages_sent,
+
+            _, (sent0, received0, tx0, rx0) = probes[sys_id]
+            result = conn.stop_link_probe()
+            status = conn.status
+            messages_received = status.messages_received - received0
+            result.update({
+                'latency_ms': result['rtt_p50_ms'],
+                'lost_packets': result['lost'],
+                'rate_hz': messages_received / elapsed,
+                'rx_bytes_per_sec': (status.bytes_received - rx0) / elapsed,
+                'tx_bytes_per_sec': (status.bytes_sent - tx0) / elapsed,
+                'messages_sent': status.messages_sent - sent0,
                 'messages_received': messages_received,
-                'quality': quality
-            }
+            })
+            result['quality'] = grade_link_quality(result)
+            results[sys_id] = result
         
         return results
     
@@ -1750,9 +3147,14 @@ class MavlinkService(ServiceBase):
     
     def _process_heartbeats(self):
         """Process heartbeat sending and connection health checks."""
+        now = time.monotonic()
         for conn in list(self._connections.values()):
             # Send heartbeat
             conn.send_heartbeat()
+            conn.update_stream_subscription(now)
+            if self._global_settings.adaptive_rate_control:
+                conn.send_ping()  # Keeps the RTT measurement fresh (at most 1 Hz)
+                conn.update_rate_control(now)
             
             # Check connection health
             if not conn.is_connected:
@@ -1761,19 +3163,138 @@ class MavlinkService(ServiceBase):
                     self.connection_changed.emit(conn.status.system_id, False)
                     self._update_status_label()
     
+    def _apply_stream_profile(self, conn: MavlinkConnection):
+        """Request the configured stream profile from a connection's vehicle."""
+        name = self._global_settings.stream_profile
+        profile = self._global_settings.stream_profiles.get(name) if name else None
+        if name and profile is None:
+            logger.warning("Unknown MAVLink stream profile %r; keeping vehicle default streams", name)
+            name = ""
+        conn.set_stream_profile(name, profile)
+
+    def _apply_rate_control(self, conn: MavlinkConnection):
+        """Attach, reconfigure or detach a connection's adaptive rate controller."""
+        settings = self._global_settings
+        if not settings.adaptive_rate_control:
+            conn.detach_rate_controller()
+            return
+        controller = conn.rate_controller
+        if controller is None:
+            conn.attach_rate_controller(LinkRateController(
+                conn.config.name or str(conn.status.system_id),
+                settings.adaptive_max_loss, settings.adaptive_max_rtt_ms,
+                settings.adaptive_max_utilization,
+            ))
+        else:
+            controller.configure(settings.adaptive_max_loss, settings.adaptive_max_rtt_ms,
+                                 settings.adaptive_max_utilization)
+
+    def _apply_receive_mode(self, conn: MavlinkConnection):
+        """Start or stop a connection's receive thread to match global settings.
+
+        Args:
+            conn: Connection to configure
+        """
+        try:
+            mode = ReceiveMode(self._global_settings.receive_mode)
+        except ValueError:
+            logger.warning("Unknown MAVLink receive mode %r; using poll",
+                           self._global_settings.receive_mode)
+            mode = ReceiveMode.POLL
+        if conn.replay is not None:
+            # No socket to wait on; the service thread pulls frames as they
+            # come due, which also keeps max-speed replay from overrunning it
+            mode = ReceiveMode.POLL
+
+        if mode == ReceiveMode.THREAD:
+            conn.start_receive_thread(
+                queue_size=self._global_settings.receive_queue_size,
+                on_ready=self._receive_ready.emit,
+            )
+        elif mode == ReceiveMode.SELECTOR:
+            conn.attach_selector_engine(
+                self._ensure_selector_engine(),
+                queue_size=self._global_settings.receive_queue_size,
+                on_ready=self._receive_ready.emit,
+            )
+        else:
+            conn.stop_receive_io()
+
+        if mode != ReceiveMode.SELECTOR and not any(
+                c.receive_mode == ReceiveMode.SELECTOR for c in self._connections.values()):
+            self._stop_selector_engine()
+
+    def _ensure_selector_engine(self) -> SelectorEngine:
+        """Get the shared selector engine, starting it if needed."""
+        engine = self._selector_engine
+        if engine is None or not engine.is_alive():
+            engine = SelectorEngine(
+                messages_per_link=self._global_settings.selector_messages_per_link,
+            )
+            engine.start()
+            self._selector_engine = engine
+            logger.info("MAVLink selector engine started")
+        engine.messages_per_link = max(1, int(self._global_settings.selector_messages_per_link))
+        return engine
+
+    def _stop_selector_engine(self):
+        """Stop the shared selector engine if it is running."""
+        if self._selector_engine is not None:
+            self._selector_engine.stop()
+            self._selector_engine = None
+            logger.info("MAVLink selector engine stopped")
+
+    def _drain_connection(self, conn: MavlinkConnection) -> int:
+        """Receive and process pending messages for one connection.
+
+        Args:
+            conn: Connection to drain
+
+        Returns:
+            Number of messages processed
+        """
+        if conn.receive_mode != ReceiveMode.POLL or conn.replay is not None:
+            # Everything queued is already decoded; drain the whole inbox
+            max_messages = max(1, self._global_settings.receive_queue_size)
+        else:
+            max_messages = 20
+        messages = conn.receive_messages(max_messages=max_messages)
+        if conn.replay is not None and len(messages) == max_messages \
+                and not self._replay_drain_scheduled:
+            # Replay is ahead of the timer (high speed); drain again as soon
+            # as the event loop is free instead of waiting for the next tick
+            self._replay_drain_scheduled = True
+            QTimer.singleShot(0, self.safe(self._drain_replays))
+        publisher = self._telemetry_publisher
+        store = self._telemetry_store
+        for msg in messages:
+            if conn.process_message(msg):
+                publisher.update(conn.status.system_id, conn.telemetry)
+                store.record(conn.status.system_id, conn.telemetry)
+        return len(messages)
+
+    def _drain_receive_queues(self):
+        """Process messages queued by receive threads (woken by _receive_ready)."""
+        for conn in list(self._connections.values()):
+            if conn.receive_mode != ReceiveMode.POLL:
+                self._drain_connection(conn)
+
+    def _drain_replays(self):
+        """Process frames that replay connections have due (see _drain_connection)."""
+        self._replay_drain_scheduled = False
+        for conn in list(self._connections.values()):
+            if conn.replay is not None:
+                self._drain_connection(conn)
+
     def _process_telemetry(self):
         """Process incoming telemetry messages (lowest priority)."""
         total_rate = 0.0
         
-        for conn in self._connections.values():
+        for conn in list(self._connections.values()):
             # Receive and process messages
-            messages = conn.receive_messages(max_messages=20)
-            for msg in messages:
-                conn.process_message(msg)
+            self._drain_connection(conn)
             
-            # Emit telemetry update
-            if messages:
-                self.telemetry_updated.emit(conn.status.system_id, conn.telemetry)
+            conn.refresh_rates()
             
             total_rate += conn.status.message_rate_hz
         
@@ -1781,26 +3302,278 @@ class MavlinkService(ServiceBase):
         self._active_connections = sum(1 for c in self._connections.values() if c.is_connected)
         self.health_updated.emit(self._total_rate_hz, self._active_connections)
     
-    def _process_mocap(self):
-        """Process motion capture data sending (highest priority)."""
-        for system_id, obj in self._mocap_sources.items():
+    def _publish_telemetry(self):
+        """Emit the newest snapshot of each vehicle updated since the last tick."""
+        for system_id, snapshot in self._telemetry_publisher.take_pending().items():
+            self.telemetry_updated.emit(system_id, snapshot)
             conn = self._connections.get(system_id)
-            if conn is None or not conn.is_connected:
-                continue
-            
-            # Extract pose from scene object
-            if hasattr(obj, 'pose') and len(obj.pose) >= 7:
-                mocap = MocapData(
-                    x=obj.pose[0],
-                    y=obj.pose[2],  # Note: swapping Y/Z for NED frame
-                    z=-obj.pose[1],  # NED: negative Z is up
-                    q=(obj.pose[3], obj.pose[4], obj.pose[5], obj.pose[6])
-                )
-                conn.send_mocap_data(mocap)
+            if conn is not None:
+                conn.mark_published()
+
+    def _start_publish_timer(self):
+        """Start the UI publication timer - coalesced telemetry snapshots, 10Hz by default."""
+        ui_rate_hz = self._global_settings.ui_telemetry_rate_hz
+        self._publish_timer = QTimer(self)
+        self._publish_timer.setInterval(max(1, int(1000 / ui_rate_hz)) if ui_rate_hz > 0 else 100)
+        self._publish_timer.timeout.connect(self.safe(self._publish_telemetry))
+        self._publish_timer.start()
+
+    def _apply_fleet_table(self):
+        """Open, rename or close the shared-memory fleet table per fleet_table_name."""
+        name = self._global_settings.fleet_table_name
+        if self._fleet_table is not None and self._fleet_table.name == name:
+            return
+        self._close_fleet_table()
+        if not name:
+            return
+        try:
+            table = FleetTableWriter(name)
+        except OSError as exc:
+            logger.error("Cannot publish fleet telemetry to shared memory %r: %s "
+                         "(is another trainer using that name?)", name, exc)
+            return
+        for system_id, conn in list(self._connections.items()):
+            table.update(system_id, conn.telemetry, conn.is_connected)
+        self._telemetry_publisher.subscribe(table.update)
+        self.connection_changed.connect(table.set_connected)
+        self._fleet_table = table
+        logger.info("Publishing fleet telemetry to shared memory %r", name)
+
+    def _close_fleet_table(self):
+        """Stop publishing fleet telemetry and destroy the table."""
+        table = self._fleet_table
+        if table is None:
+            return
+        self._fleet_table = None
+        self._telemetry_publisher.unsubscribe(table.update)
+        self.connection_changed.disconnect(table.set_connected)
+        table.close()
+
+    def _start_engine(self):
+        """Hand the links to an engine process (see services.mavlink_engine).
+
+        The service keeps its API: calls are forwarded over the engine pipe,
+        mocap poses and telemetry go through the shared-memory rings, and
+        connections are mirrored by EngineConnection objects.
+        """
+        engine = EngineProcess(self._global_settings)
+        engine.start()
+        self._engine = engine
+
+        # Engine events and telemetry records, at the telemetry rate
+        rate_hz = self._global_settings.telemetry_rate_hz
+        self._telemetry_timer = QTimer(self)
+        self._telemetry_timer.setInterval(max(1, int(1000 / rate_hz)) if rate_hz > 0 else
+                                          self.TELEMETRY_UPDATE_INTERVAL_MS)
+        self._telemetry_timer.timeout.connect(self.safe(self._process_engine))
+        self._telemetry_timer.start()
+        self._start_publish_timer()
+
+        # Mocap poses for the engine's deadline scheduler (runs while there are sources)
+        self._pose_timer = QTimer(self)
+        self._pose_timer.setInterval(self.MOCAP_UPDATE_INTERVAL_MS)
+        self._pose_timer.timeout.connect(self.safe(self._push_poses))
+        for system_id in list(self._mocap_sources):
+            self._schedule_mocap(system_id)
+        for config in list(self._forward_configs.values()):
+            engine.send('forward', config)
+
+        # Discovery scans stay in this process
+        self._discovery_timer = QTimer(self)
+        self._discovery_timer.timeout.connect(self.safe(self._run_background_discovery))
+        self._apply_background_discovery()
+
+    def _stop_engine(self):
+        """Close the engine's links and stop the engine process."""
+        for system_id in list(self._connections):
+            self.remove_connection(system_id)
+        for name in list(self._pending_connects):
+            self.cancel_connect(name)
+        self._engine.stop()
+        self._engine = None
+        self._engine_setpoints.clear()
+        self._engine_statistics = {}
+        self._engine_recording = False
+
+    def _process_engine(self):
+        """Apply engine events and telemetry, and send changed setpoint sources."""
+        engine = self._engine
+        if engine is None:
+            return
+        for event, *args in engine.poll_events():
+            handler = self._engine_events.get(event)
+            if handler is not None:
+                handler(*args)
+
+        publisher = self._telemetry_publisher
+        store = self._telemetry_store
+        for record in engine.read_telemetry():
+            system_id = int(record['system_id'])
+            conn = self._connections.get(system_id)
+            if conn is not None:
+                apply_telemetry_record(conn.telemetry, record)
+                publisher.update(system_id, conn.telemetry)
+                store.record(system_id, conn.telemetry, float(record['t']))
+
+        # Setpoint sources may be changed in place; the engine streams a copy
+        for system_id, setpoint in list(self._setpoint_sources.items()):
+            if self._engine_setpoints.get(system_id) != setpoint:
+                self._engine_setpoints[system_id] = dataclasses.replace(setpoint)
+                engine.send('setpoint_source', system_id, setpoint)
+
+        if not engine.is_alive and self._connections:
+            logger.error("MAVLink engine process exited; its connections are closed")
+            for system_id in list(self._connections):
+                self.remove_connection(system_id)
+            self.set_status(ServiceLevel.ERROR, "MAVLink: Engine process stopped")
+
+    def _push_poses(self):
+        """Push the pose of every mocap source to the engine."""
+        engine = self._engine
+        for system_id, obj in list(self._mocap_sources.items()):
+            pose = getattr(obj, 'pose', None)
+            if pose is not None and len(pose) >= 7:
+                engine.push_pose(system_id, pose)
+
+    def _on_engine_connect_finished(self, name: str, system_id: Optional[int],
+                                    config: MavlinkConnectionConfig):
+        """Mirror a connection the engine established (or report its failure)."""
+        pending = self._pending_connects.pop(name, None)
+        if pending is None:
+            # Cancelled while the engine was connecting
+            if system_id is not None:
+                self._engine.send('remove', system_id)
+            return
+        future, _ = pending
+        if system_id is None:
+            logger.error("Failed to establish MAVLink connection: %s", name)
+            self.connection_progress.emit(name, "failed")
+            future.set_result(None)
+            return
+        config.name = name
+        self._connections[system_id] = EngineConnection(config, system_id)
+        self._active_connections = len(self._connections)
+        self._forget_saved_connection(config, system_id)
+        self.connection_changed.emit(system_id, True)
+        logger.info("MAVLink connected: name=%s system_id=%s connection=%s (engine)",
+                    name, system_id, config.connection_string)
+        self._update_status_label()
+        self.connection_progress.emit(name, "connected")
+        future.set_result(system_id)
+
+    def _on_engine_connection_changed(self, system_id: int, connected: bool):
+        """Forward link loss reported by the engine."""
+        # Connecting and removing are reported by the service itself
+        if system_id in self._connections:
+            self.connection_changed.emit(system_id, connected)
+            self._update_status_label()
+
+    def _on_engine_status(self, statuses: dict):
+        """Update the mirrored connection states: {system_id: (state, status)}."""
+        for system_id, (state, status) in statuses.items():
+            conn = self._connections.get(system_id)
+            if conn is not None:
+                conn.state = ConnectionState(state)
+                conn.status = status
+
+    def _on_engine_statistics(self, statistics: dict):
+        self._engine_statistics = statistics
+
+    def _on_engine_health(self, rate_hz: float, active_connections: int):
+        self._total_rate_hz = rate_hz
+        self._active_connections = active_connections
+        self.health_updated.emit(rate_hz, active_connections)
+
+    def _mocap_period(self, system_id: int) -> float:
+        """Get the mocap send period for a drone in seconds.
+
+        The linked object's mocap_rate_hz wins when set; otherwise the global
+        default_mocap_rate_hz is used.
+        """
+        rate_hz = 0.0
+        obj = self._mocap_sources.get(system_id)
+        config = self._mavlink_objects.get(obj) if obj is not None else None
+        if config is not None and config.mocap_rate_hz and config.mocap_rate_hz > 0:
+            rate_hz = config.mocap_rate_hz
+        elif self._global_settings.default_mocap_rate_hz and self._global_settings.default_mocap_rate_hz > 0:
+            rate_hz = self._global_settings.default_mocap_rate_hz
+        if rate_hz <= 0:
+            return self.MOCAP_UPDATE_INTERVAL_MS / 1000.0
+        return 1.0 / rate_hz
+
+    def _schedule_mocap(self, system_id: int):
+        """Create or update the mocap task for a drone."""
+        if self._engine is not None:
+            if system_id in self._mocap_sources:
+                self._engine.send('mocap', system_id, 1.0 / self._mocap_period(system_id))
+                self._update_pose_timer()
+            return
+        scheduler = self._mocap_scheduler
+        if scheduler is None or system_id not in self._mocap_sources:
+            return
+        try:
+            policy = MissPolicy(self._global_settings.mocap_miss_policy)
+        except ValueError:
+            logger.warning("Unknown mocap miss policy %r; skipping missed slots",
+                           self._global_settings.mocap_miss_policy)
+            policy = MissPolicy.SKIP
+        period = self._mocap_period(system_id)
+        if scheduler.has_task(system_id):
+            scheduler.set_period(system_id, period, policy)
+        else:
+            # Jitter is timed by _send_mocap's write hook, not the (possibly queued) call
+            scheduler.add_task(system_id, period, lambda sid=system_id: self._send_mocap(sid), policy,
+                               external_timing=True)
+
+    def _update_pose_timer(self):
+        """Push poses as often as the fastest vehicle sends them (engine mode).
+
+        The timer is stopped while there are no mocap sources.
+        """
+        timer = self._pose_timer
+        if timer is None:
+            return
+        if not self._mocap_sources:
+            timer.stop()
+            return
+        period = min(self._mocap_period(sid) for sid in self._mocap_sources)
+        interval = max(1, int(period * 1000))
+        if timer.interval() != interval:
+            timer.setInterval(interval)
+        if not timer.isActive():
+            timer.start()
+
+    def _send_mocap(self, system_id: int) -> bool:
+        """Send one mocap sample to a drone (runs on the mocap scheduler thread).
+
+        Returns:
+            True if a sample was sent, False if there was nothing to send
+        """
+        obj = self._mocap_sources.get(system_id)
+        conn = self._connections.get(system_id)
+        if obj is None or conn is None or not conn.is_connected:
+            return False
+
+        # Extract pose from scene object
+        pose = getattr(obj, 'pose', None)
+        if pose is None or len(pose) < 7:
+            return False
+        mocap = MocapData(
+            x=pose[0],
+            y=pose[2],  # Note: swapping Y/Z for NED frame
+            z=-pose[1],  # NED: negative Z is up
+            q=(pose[3], pose[4], pose[5], pose[6])
+        )
+        scheduler = self._mocap_scheduler
+        on_written = functools.partial(scheduler.record_send, system_id) if scheduler is not None else None
+        return conn.send_mocap_data(mocap, on_written)
     
     def _process_setpoints(self):
         """Process setpoint sending (medium priority)."""
         for system_id, setpoint in self._setpoint_sources.items():
+            conn = self._connections.get(system_id)
+            if conn is not None and not conn.setpoint_due():
+                continue  # Thinned out by adaptive rate control
             self.send_setpoint(system_id, setpoint)
     
     def _update_status_label(self):
@@ -0,0 +1,496 @@
+"""
+One UDP endpoint shared by many vehicles, demultiplexed by system ID.
+
+With mavlink-router, a mesh radio or a simulator swarm, every vehicle
+arrives on the same UDP port.  SharedEndpoint owns that single socket,
+splits each datagram into frames and routes them by the header's source
+system (and optionally component) ID to per-vehicle SharedLinks.  Each
+link implements the part of pymavlink's mavfile interface that
+MavlinkConnection uses (recv_match, wait_heartbeat, mav, write, close,
+last_address), so a vehicle on a shared endpoint is an ordinary
+connection.  Connection strings of the form
+
+    shared:<host>:<port>[?sysid=<N>][&compid=<M>]
+
+open a SharedLink on the endpoint bound to host:port (created on first use
+and closed with its last link).  Without sysid the link claims the first
+vehicle heartbeating on the endpoint that no other link owns.  Outbound
+frames go to the address each system ID was last heard from.
+
+Whichever link reads the socket routes every vehicle's frames, so a poll
+of one connection fills the queues of the others and N vehicles cost one
+socket rather than N.  Links have no file descriptor of their own: the
+selector engine polls them, and receive threads take turns on the socket.
+"""
+import logging
+import select
+import socket
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from services.mavlink_codec import frame_length, peek_header, v2_dialect
+from services.mavlink_discovery import MAV_TYPE_GCS, parse_heartbeats
+
+logger = logging.getLogger(__name__)
+
+SHARED_PREFIX = "shared:"
+
+# Heartbeats from unowned vehicles are kept this long so a link opened just
+# after one arrived can claim the vehicle without waiting for the next
+UNCLAIMED_HEARTBEAT_TTL = 3.0
+
+
+def is_shared_string(connection_string: str) -> bool:
+    """Check whether a connection string names a shared UDP endpoint."""
+    return connection_string.startswith(SHARED_PREFIX)
+
+
+def parse_shared_string(connection_string: str) -> Tuple[str, int, Optional[int], Optional[int]]:
+    """Split a shared endpoint connection string into its parts.
+
+    Args:
+        connection_string: String of the form shared:<host>:<port>[?sysid=N&compid=M]
+
+    Returns:
+        Tuple of (host, port, system_id, component_id); the IDs are None
+        when not given
+
+    Raises:
+        ValueError: If the string is not a shared string or a part is invalid
+    """
+    if not is_shared_string(connection_string):
+        raise ValueError(f"Not a shared connection string: {connection_string}")
+    address, _, query = connection_string[len(SHARED_PREFIX):].partition('?')
+    host, _, port_text = address.rpartition(':')
+    port = int(port_text)
+    if not host or not 0 < port <= 65535:
+        raise ValueError(f"Invalid shared endpoint address: {address}")
+    options = {key: values[-1] for key, values in parse_qs(query).items()}
+    ids = []
+    for name in ('sysid', 'compid'):
+        value = int(options[name]) if name in options else None
+        if value is not None and not 0 < value <= 255:
+            raise ValueError(f"Invalid {name}: {value}")
+        ids.append(value)
+    return host, port, ids[0], ids[1]
+
+
+class SharedEndpoint:
+    """UDP socket whose inbound frames are routed to links by system ID.
+
+    All methods are thread-safe.
+    """
+
+    def __init__(self, host: str, port: int, max_datagrams: int = 256):
+        """Bind the socket.
+
+        Args:
+            host: Local address to bind
+            port: Local UDP port to bind
+            max_datagrams: Maximum datagrams read per pump
+
+        Raises:
+            OSError: If the port cannot be bound
+        """
+        self.host = host
+        self.port = port
+        self.max_datagrams = max(1, int(max_datagrams))
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            # Same socket options as pymavlink's udpin connections
+            self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self._sock.bind((host, port))
+            self._sock.setblocking(False)
+        except OSError:
+            self._sock.close()
+            raise
+
+        self._cond = threading.Condition()
+        self._reading = False
+        self._closed = False
+        self._routes: Dict[Tuple[int, Optional[int]], 'SharedLink'] = {}
+        self._unclaimed_links: List['SharedLink'] = []
+        self._addresses: Dict[int, tuple] = {}
+        self._unclaimed: Dict[int, Tuple[bytes, float]] = {}  # sysid -> (heartbeat, time)
+
+        self.datagrams = 0
+        self.frames = 0
+        self.frames_unrouted = 0
+        self.bytes_discarded = 0
+
+    @property
+    def closed(self) -> bool:
+        """True once the socket is closed."""
+        return self._closed
+
+    @property
+    def link_count(self) -> int:
+        """Number of attached links, claimed or not."""
+        with self._cond:
+            return len(self._routes) + len(self._unclaimed_links)
+
+    def attach(self, link: 'SharedLink'):
+        """Start routing frames to a link.
+
+        A link with a system ID owns that system's frames (optionally only
+        one component's); a link without one waits to claim the next vehicle.
+
+        Raises:
+            ValueError: If another link already owns the link's system/component
+        """
+        with self._cond:
+            if link.system_id is None:
+                self._unclaimed_links.append(link)
+                self._claim_recent()
+                return
+            if any(sys_id == link.system_id
+                   and (comp_id is None or link.component_id in (None, comp_id))
+                   for sys_id, comp_id in self._routes):
+                raise ValueError(f"System {link.system_id} is already connected on "
+                                 f"shared endpoint {self.host}:{self.port}")
+            self._routes[(link.system_id, link.component_id)] = link
+            recent = self._unclaimed.pop(link.system_id, None)
+            if recent is not None and time.monotonic() - recent[1] < UNCLAIMED_HEARTBEAT_TTL:
+                link._push(recent[0])
+
+    def detach(self, link: 'SharedLink'):
+        """Stop routing frames to a link."""
+        with self._cond:
+            if link in self._unclaimed_links:
+                self._unclaimed_links.remove(link)
+            if link.system_id is not None and \
+                    self._routes.get((link.system_id, link.component_id)) is link:
+                del self._routes[(link.system_id, link.component_id)]
+            self._cond.notify_all()
+
+    def address_of(self, system_id: int) -> Optional[tuple]:
+        """Get the address a system was last heard from."""
+        return self._addresses.get(system_id)
+
+    def unclaimed_systems(self) -> List[int]:
+        """System IDs recently heartbeating on the endpoint without a link."""
+        now = time.monotonic()
+        with self._cond:
+            return sorted(sys_id for sys_id, (_, seen) in self._unclaimed.items()
+                          if now - seen < UNCLAIMED_HEARTBEAT_TTL)
+
+    def sendto(self, buf, system_id: Optional[int]) -> int:
+        """Send a frame to a system's learned address.
+
+        Returns:
+            Bytes sent; 0 if the system has not been heard from yet
+        """
+        address = self._addresses.get(system_id) if system_id is not None else None
+        if address is None or self._closed:
+            self.bytes_discarded += len(buf)
+            return 0
+        try:
+            return self._sock.sendto(buf, address)
+        except OSError:
+            return 0
+
+    def pump(self, timeout: float = 0.0):
+        """Read pending datagrams and route their frames.
+
+        Only one thread reads the socket at a time; a caller that finds a
+        read in progress waits (up to timeout) for it to finish instead.
+
+        Args:
+            timeout: Maximum time to wait for the first datagram
+        """
+        with self._cond:
+            if self._closed:
+                return
+            if self._reading:
+                if timeout > 0:
+                    self._cond.wait(timeout)
+                return
+            self._reading = True
+        datagrams = []
+        try:
+            if timeout > 0:
+                select.select([self._sock], [], [], timeout)
+            while len(datagrams) < self.max_datagrams:
+                datagrams.append(self._sock.recvfrom(65535))
+        except (BlockingIOError, InterruptedError):
+            pass
+        except (OSError, ValueError):
+            pass  # Closed by another thread
+        finally:
+            with self._cond:
+                self._reading = False
+                for data, address in datagrams:
+                    self._route(data, address)
+                self._cond.notify_all()
+
+    def close(self):
+        """Close the socket; attached links stop receiving."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._sock.close()
+
+    def get_stats(self) -> dict:
+        """Get endpoint counters.
+
+        Returns:
+            Dictionary with address, links, datagrams, frames, frames_unrouted
+            and unclaimed_systems
+        """
+        return {
+            'address': f"{self.host}:{self.port}",
+            'links': self.link_count,
+            'datagrams': self.datagrams,
+            'frames': self.frames,
+            'frames_unrouted': self.frames_unrouted,
+            'unclaimed_systems': self.unclaimed_systems(),
+        }
+
+    def _route(self, data: bytes, address: tuple):
+        """Split a datagram into frames and queue each with its link (lock held)."""
+        self.datagrams += 1
+        pos = 0
+        while pos < len(data):
+            length = frame_length(data, pos)
+            if length is None:
+                pos += 1  # Not a frame start; resynchronize on the next magic byte
+                continue
+            frame = data[pos:pos + length]
+            pos += length
+            header = peek_header(frame)
+            if header is None or len(frame) < length:
+                break
+            msg_id, _, sys_id, comp_id = header
+            self.frames += 1
+            self._addresses[sys_id] = address
+            link = self._routes.get((sys_id, comp_id)) or self._routes.get((sys_id, None))
+            if link is None and msg_id == 0:
+                link = self._claim(sys_id, frame)
+            if link is None:
+                self.frames_unrouted += 1
+                continue
+            link._push(frame)
+
+    def _claim(self, sys_id: int, heartbeat: bytes) -> Optional['SharedLink']:
+        """Hand a vehicle's system ID to the oldest unclaimed link (lock held)."""
+        beats = parse_heartbeats(heartbeat)
+        if not beats or beats[0][2] == MAV_TYPE_GCS:
+            return None  # Other ground stations on the same router
+        if any(key[0] == sys_id for key in self._routes):
+            return None  # Owned component by component; this one has no link
+        if not self._unclaimed_links:
+            self._unclaimed[sys_id] = (heartbeat, time.monotonic())
+            return None
+        link = self._unclaimed_links.pop(0)
+        link.system_id = sys_id
+        self._routes[(sys_id, None)] = link
+        self._unclaimed.pop(sys_id, None)
+        logger.info("Shared endpoint %s:%s: system %s claimed", self.host, self.port, sys_id)
+        return link
+
+    def _claim_recent(self):
+        """Give remembered heartbeats to waiting links, newest first (lock held)."""
+        now = time.monotonic()
+        recent = sorted(((seen, sys_id, beat) for sys_id, (beat, seen) in self._unclaimed.items()
+                         if now - seen < UNCLAIMED_HEARTBEAT_TTL), reverse=True)
+        for _, sys_id, beat in recent:
+            if not self._unclaimed_links:
+                break
+            link = self._claim(sys_id, beat)
+            if link is not None:
+                link._push(beat)
+
+
+class SharedLink:
+    """One vehicle on a SharedEndpoint, exposed as a pymavlink connection."""
+
+    def __init__(self, endpoint: SharedEndpoint, system_id: int = None, component_id: int = None,
+                 dialect=None, source_system: int = 255, source_component: int = 0,
+                 queue_size: int = 1000):
+        """Create a link (attach it with endpoint.attach()).
+
+        Args:
+            endpoint: Endpoint the vehicle's frames arrive on
+            system_id: Vehicle system ID, or None to claim the next vehicle
+            component_id: Only receive this component's frames (None = all)
+            dialect: pymavlink dialect module used to decode frames
+            source_system: System ID for outbound messages
+            source_component: Component ID for outbound messages
+            queue_size: Frames queued for this link before the oldest are dropped
+        """
+        self.endpoint = endpoint
+        self.system_id = system_id
+        self.component_id = component_id
+        self.mav = v2_dialect(dialect).MAVLink(self, srcSystem=source_system,
+                                                srcComponent=source_component)
+        self.mav.robust_parsing = True
+        self._frames = deque()
+        self._queue_size = max(1, int(queue_size))
+        self._closed = False
+        self.frames_received = 0
+        self.frames_dropped = 0
+        self.decode_errors = 0
+
+    @property
+    def last_address(self) -> Optional[tuple]:
+        """Address the vehicle was last heard from."""
+        if self.system_id is None:
+            return None
+        return self.endpoint.address_of(self.system_id)
+
+    def recv_match(self, condition=None, type=None, blocking: bool = False,
+                   timeout: float = None):
+        """Get the next message routed to this link.
+
+        Args:
+            condition: Unsupported; must be None
+            type: Message type name (or list of names) to wait for
+            blocking: Wait for a message (or until timeout expires)
+            timeout: Maximum time to wait in seconds when blocking
+
+        Returns:
+            Decoded message, or None if nothing arrived
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        types = [type] if isinstance(type, str) else type
+        while True:
+            frame = self._next_frame(blocking, deadline)
+            if frame is None:
+                return None
+            try:
+                msg = self.mav.decode(bytearray(frame))
+            except Exception:
+                self.decode_errors += 1
+                continue
+            if types is None or msg.get_type() in types:
+                return msg
+
+    def recv_msg(self):
+        """Get the next message without blocking."""
+        return self.recv_match(blocking=False)
+
+    def wait_heartbeat(self, blocking: bool = True, timeout: float = None):
+        """Wait for the vehicle's next HEARTBEAT (claiming a vehicle if needed)."""
+        return self.recv_match(type='HEARTBEAT', blocking=blocking, timeout=timeout)
+
+    def write(self, buf) -> int:
+        """Send an outbound frame to the vehicle's learned address."""
+        return self.endpoint.sendto(buf, self.system_id)
+
+    def close(self):
+        """Detach from the endpoint (closing it with its last link)."""
+        if self._closed:
+            return
+        self._closed = True
+        _release(self)
+
+    def get_status(self) -> dict:
+        """Get the link's routing state.
+
+        Returns:
+            Dictionary with endpoint, system_id, component_id, address,
+            frames_received, frames_dropped, decode_errors and queued
+        """
+        address = self.last_address
+        return {
+            'endpoint': f"{self.endpoint.host}:{self.endpoint.port}",
+            'system_id': self.system_id,
+            'component_id': self.component_id,
+            'address': f"{address[0]}:{address[1]}" if address else None,
+            'frames_received': self.frames_received,
+            'frames_dropped': self.frames_dropped,
+            'decode_errors': self.decode_errors,
+            'queued': len(self._frames),
+        }
+
+    def _push(self, frame: bytes):
+        """Queue a routed frame (endpoint lock held)."""
+        if len(self._frames) >= self._queue_size:
+            self._frames.popleft()
+            self.frames_dropped += 1
+        self._frames.append(frame)
+        self.frames_received += 1
+
+    def _next_frame(self, blocking: bool, deadline: Optional[float]) -> Optional[bytes]:
+        """Pop a queued frame, reading the endpoint when the queue is empty."""
+        frames = self._frames
+        while not self._closed:
+            if frames:
+                return frames.popleft()
+            if not blocking:
+                self.endpoint.pump(0.0)
+                return frames.popleft() if frames else None
+            wait = 0.1
+            if deadline is not None:
+                wait = deadline - time.monotonic()
+                if wait <= 0:
+                    return None
+            if self.endpoint.closed:
+                return None
+            self.endpoint.pump(min(wait, 0.1))
+        return None
+
+
+_endpoints: Dict[Tuple[str, int], SharedEndpoint] = {}
+_endpoints_lock = threading.Lock()
+
+
+def open_shared_link(connection_string: str, dialect=None, source_system: int = 255,
+                     source_component: int = 0) -> SharedLink:
+    """Open a link on the shared endpoint named by a connection string.
+
+    The endpoint is bound on first use and shared by every link on the same
+    host and port until the last one closes.
+
+    Args:
+        connection_string: String of the form shared:<host>:<port>[?sysid=N&compid=M]
+        dialect: pymavlink dialect module used to decode frames
+        source_system: System ID for outbound messages
+        source_component: Component ID for outbound messages
+
+    Returns:
+        Attached SharedLink
+
+    Raises:
+        ValueError: If the string is invalid or the vehicle already has a link
+        OSError: If the endpoint cannot be bound
+    """
+    host, port, system_id, component_id = parse_shared_string(connection_string)
+    with _endpoints_lock:
+        endpoint = _endpoints.get((host, port))
+        if endpoint is None or endpoint.closed:
+            endpoint = _endpoints[(host, port)] = SharedEndpoint(host, port)
+        link = SharedLink(endpoint, system_id, component_id, dialect=dialect,
+                          source_system=source_system, source_component=source_component)
+        try:
+            endpoint.attach(link)
+        except ValueError:
+            _close_if_unused(endpoint)
+            raise
+    return link
+
+
+def get_shared_endpoints() -> List[SharedEndpoint]:
+    """Get the open shared endpoints."""
+    with _endpoints_lock:
+        return list(_endpoints.values())
+
+
+def _release(link: SharedLink):
+    with _endpoints_lock:
+        link.endpoint.detach(link)
+        _close_if_unused(link.endpoint)
+
+
+def _close_if_unused(endpoint: SharedEndpoint):
+    """Close an endpoint without links (registry lock held)."""
+    if endpoint.link_count:
+        return
+    endpoint.close()
+    if _endpoints.get((endpoint.host, endpoint.port)) is endpoint:
+        del _endpoints[(endpoint.host, endpoint.port)]
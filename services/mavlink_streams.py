@@ -0,0 +1,311 @@
+"""
+Vehicle telemetry stream subscriptions.
+
+By default an autopilot streams whatever its link profile says, and most of
+it is discarded on arrival.  StreamSubscription asks the vehicle for just the
+messages a MavlinkStreamProfile lists, at the listed rates, with
+MAV_CMD_SET_MESSAGE_INTERVAL, and (optionally) switches off every other
+stream it sees once the link has settled.
+
+The subscription only tracks what was requested; the owning connection
+decides when to apply it (after the first heartbeat) and calls reapply()
+when the vehicle comes back after a heartbeat gap, since a reboot restores
+the vehicle's default streams.  Each request is retried until the vehicle
+acknowledges it, up to MAX_ATTEMPTS times.
+"""
+import logging
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+from models.structs import MavlinkStreamProfile
+from services.mavlink_codec import v2_dialect
+from services.mavlink_dispatch import resolve_message_id
+
+logger = logging.getLogger(__name__)
+
+MAV_CMD_SET_MESSAGE_INTERVAL = 511
+MAV_RESULT_ACCEPTED = 0
+
+# SET_MESSAGE_INTERVAL interval values with a special meaning
+INTERVAL_DEFAULT = 0
+INTERVAL_DISABLED = -1
+
+# Seconds to wait for a COMMAND_ACK before resending a request
+ACK_TIMEOUT = 1.0
+MAX_ATTEMPTS = 3
+
+# Seconds after a profile is applied before unlisted streams are disabled,
+# so the observed rates reflect what the vehicle sends on its own
+SETTLE_TIME = 2.0
+
+# Command, parameter, mission and text traffic is not a stream and is never disabled
+UNMANAGED_MESSAGES = frozenset((
+    'BAD_DATA', 'HEARTBEAT', 'PING', 'COMMAND_ACK', 'COMMAND_LONG', 'COMMAND_INT',
+    'STATUSTEXT', 'SERIAL_CONTROL', 'TIMESYNC', 'AUTOPILOT_VERSION', 'PROTOCOL_VERSION',
+    'FILE_TRANSFER_PROTOCOL', 'MESSAGE_INTERVAL',
+))
+UNMANAGED_PREFIXES = ('PARAM_', 'MISSION_', 'LOG_')
+
+
+def rate_to_interval(rate_hz: float) -> int:
+    """Convert a profile rate into a SET_MESSAGE_INTERVAL interval.
+
+    Args:
+        rate_hz: Rate in Hz (0 disables the stream, negative restores the default)
+
+    Returns:
+        Interval in microseconds, INTERVAL_DISABLED or INTERVAL_DEFAULT
+    """
+    if rate_hz > 0:
+        return max(1, int(round(1e6 / rate_hz)))
+    if rate_hz == 0:
+        return INTERVAL_DISABLED
+    return INTERVAL_DEFAULT
+
+
+def is_unmanaged(message_type: str) -> bool:
+    """Whether a message type is left alone when disabling unlisted streams."""
+    return message_type in UNMANAGED_MESSAGES or message_type.startswith(UNMANAGED_PREFIXES)
+
+
+class StreamSubscription:
+    """Requests one vehicle's telemetry streams according to a profile.
+
+    Not thread-safe: the service calls it from its own thread only.
+    """
+
+    def __init__(self, send_command: Callable[[int, list], bool], label: str = "",
+                 dialect=None, settle_s: float = SETTLE_TIME, ack_timeout_s: float = ACK_TIMEOUT):
+        """Initialize a subscription with no profile.
+
+        Args:
+            send_command: Sends a COMMAND_LONG to the vehicle: (command, params) -> sent
+            label: Vehicle name used in log messages
+            dialect: pymavlink dialect used to resolve message names
+            settle_s: Delay before unlisted streams are disabled
+            ack_timeout_s: Delay before an unacknowledged request is resent
+        """
+        self._send_command = send_command
+        self._label = label
+        self._dialect = dialect if dialect is not None else v2_dialect()
+        self._settle_s = settle_s
+        self._ack_timeout_s = ack_timeout_s
+
+        self._profile_name = ""
+        self._profile: Optional[MavlinkStreamProfile] = None
+        self._profile_intervals: Dict[int, int] = {}  # message ID -> interval listed in the profile
+        self._rate_scale = 1.0
+        self._targets: Dict[int, int] = {}     # message ID -> wanted interval
+        self._applied: Dict[int, int] = {}     # message ID -> interval settled with the vehicle
+        self._pending: "OrderedDict[int, list]" = OrderedDict()  # ID -> [interval, sent_at, attempts]
+        self._started_at: Optional[float] = None
+        self._names: Dict[int, str] = {}
+
+        self.commands_sent = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.unanswered = 0
+        self.reapplied = 0
+
+    @property
+    def profile_name(self) -> str:
+        """Name of the active profile ("" = vehicle defaults)."""
+        return self._profile_name
+
+    @property
+    def rate_scale(self) -> float:
+        """Factor applied to every rate the profile lists (see set_rate_scale)."""
+        return self._rate_scale
+
+    @property
+    def is_settled(self) -> bool:
+        """Whether every requested interval has been acknowledged or given up on."""
+        return not self._pending and all(
+            self._applied.get(msg_id) == interval for msg_id, interval in self._targets.items())
+
+    def set_profile(self, name: str, profile: Optional[MavlinkStreamProfile]):
+        """Switch to another profile (None restores the vehicle's default streams).
+
+        Streams requested by the previous profile but not listed in the new one
+        are disabled if the new profile disables unlisted streams and restored
+        to their default rate otherwise.
+
+        Args:
+            name: Profile name, for logs and statistics
+            profile: Streams to request, or None
+        """
+        if name == self._profile_name and profile == self._profile:
+            return
+        intervals = {}
+        if profile is not None:
+            for message, rate_hz in profile.rates.items():
+                msg_id = self._resolve(message)
+                if msg_id is not None:
+                    intervals[msg_id] = rate_to_interval(float(rate_hz))
+        targets = {msg_id: self._scaled(interval) for msg_id, interval in intervals.items()}
+        disable = profile is not None and profile.disable_unlisted
+        for msg_id, interval in self._targets.items():
+            if msg_id not in targets and interval != INTERVAL_DEFAULT:
+                targets[msg_id] = INTERVAL_DISABLED if disable else INTERVAL_DEFAULT
+
+        logger.info("Streams %s: profile %s", self._label, name or "(vehicle defaults)")
+        self._profile_name = name
+        self._profile = profile
+        self._profile_intervals = intervals
+        self._targets = targets
+        self._started_at = None
+
+    def set_rate_scale(self, scale: float):
+        """Request every stream the profile lists at a fraction of its rate.
+
+        Used to slow telemetry down on a congested link; disabled streams and
+        streams left at their default rate are not affected.
+
+        Args:
+            scale: Rate factor in (0, 1]
+        """
+        scale = min(1.0, max(0.01, scale))
+        if scale == self._rate_scale:
+            return
+        self._rate_scale = scale
+        for msg_id, interval in self._profile_intervals.items():
+            self._targets[msg_id] = self._scaled(interval)
+
+    def reapply(self):
+        """Request every stream again, e.g. after the vehicle rebooted."""
+        self._targets = {msg_id: interval for msg_id, interval in self._targets.items()
+                         if interval != INTERVAL_DEFAULT}
+        if not self._targets and self._profile is None:
+            return
+        logger.info("Streams %s: reapplying profile %s", self._label,
+                    self._profile_name or "(vehicle defaults)")
+        self._applied.clear()
+        self._pending.clear()
+        self._started_at = None
+        self.reapplied += 1
+
+    def update(self, now: float, observed_rates: Dict[str, float] = None) -> int:
+        """Send outstanding requests and resend unacknowledged ones.
+
+        Args:
+            now: Current time (time.monotonic())
+            observed_rates: Message type -> received rate in Hz, used to find
+                unlisted streams to disable
+
+        Returns:
+            Number of commands sent
+        """
+        if self._started_at is None:
+            self._started_at = now
+        profile = self._profile
+        if (profile is not None and profile.disable_unlisted and observed_rates
+                and now - self._started_at >= self._settle_s):
+            self._disable_unlisted(observed_rates)
+
+        sent = 0
+        for msg_id, entry in list(self._pending.items()):
+            interval, sent_at, attempts = entry
+            if now - sent_at < self._ack_timeout_s:
+                continue
+            if attempts >= MAX_ATTEMPTS:
+                logger.warning("Streams %s: no COMMAND_ACK for %s after %d attempts",
+                               self._label, self._name(msg_id), attempts)
+                del self._pending[msg_id]
+                self._applied[msg_id] = interval
+                self.unanswered += 1
+                continue
+            if self._request(msg_id, interval):
+                entry[1] = now
+                entry[2] += 1
+                sent += 1
+
+        for msg_id, interval in self._targets.items():
+            if msg_id in self._pending or self._applied.get(msg_id) == interval:
+                continue
+            if self._request(msg_id, interval):
+                self._pending[msg_id] = [interval, now, 1]
+                sent += 1
+        return sent
+
+    def on_command_ack(self, msg):
+        """Match a COMMAND_ACK to the oldest outstanding request.
+
+        Args:
+            msg: Received COMMAND_ACK message
+        """
+        if msg.command != MAV_CMD_SET_MESSAGE_INTERVAL or not self._pending:
+            return
+        msg_id, (interval, _, _) = self._pending.popitem(last=False)
+        self._applied[msg_id] = interval
+        if msg.result == MAV_RESULT_ACCEPTED:
+            self.accepted += 1
+        else:
+            self.rejected += 1
+            logger.warning("Streams %s: vehicle rejected interval for %s (result %s)",
+                           self._label, self._name(msg_id), msg.result)
+
+    def get_stats(self) -> dict:
+        """Get the active profile and request counters."""
+        return {
+            'profile': self._profile_name,
+            'rate_scale': self._rate_scale,
+            'requested': {self._name(msg_id): interval for msg_id, interval in self._targets.items()},
+            'pending': len(self._pending),
+            'settled': self.is_settled,
+            'commands_sent': self.commands_sent,
+            'accepted': self.accepted,
+            'rejected': self.rejected,
+            'unanswered': self.unanswered,
+            'reapplied': self.reapplied,
+        }
+
+    def _scaled(self, interval: int) -> int:
+        """Stretch a profile interval by the rate scale."""
+        if interval <= 0 or self._rate_scale >= 1.0:
+            return interval
+        return int(round(interval / self._rate_scale))
+
+    def _disable_unlisted(self, observed_rates: Dict[str, float]):
+        """Add a disable request for every unlisted stream the vehicle sends."""
+        for message_type, rate_hz in observed_rates.items():
+            if rate_hz <= 0 or is_unmanaged(message_type):
+                continue
+            msg_id = self._resolve(message_type, warn=False)
+            if msg_id is not None and msg_id not in self._targets:
+                self._targets[msg_id] = INTERVAL_DISABLED
+
+    def _request(self, msg_id: int, interval: int) -> bool:
+        """Send one SET_MESSAGE_INTERVAL command."""
+        if interval == INTERVAL_DISABLED:
+            action = "disable"
+        elif interval == INTERVAL_DEFAULT:
+            action = "default rate"
+        else:
+            action = f"{1e6 / interval:.1f} Hz"
+        logger.info("Streams %s: %s -> %s", self._label, self._name(msg_id), action)
+        if not self._send_command(MAV_CMD_SET_MESSAGE_INTERVAL, [msg_id, interval]):
+            return False
+        self.commands_sent += 1
+        return True
+
+    def _resolve(self, message, warn: bool = True) -> Optional[int]:
+        """Resolve a message name to its ID, remembering the name for logs."""
+        try:
+            msg_id = resolve_message_id(message, self._dialect)
+        except ValueError:
+            if warn:
+                logger.warning("Streams %s: unknown message %s in stream profile",
+                               self._label, message)
+            return None
+        if isinstance(message, str):
+            self._names[msg_id] = message.upper()
+        return msg_id
+
+    def _name(self, msg_id: int) -> str:
+        """Message name for logs and statistics."""
+        name = self._names.get(msg_id)
+        if name is None:
+            msg_class = getattr(self._dialect, 'mavlink_map', {}).get(msg_id)
+            name = msg_class.msgname if msg_class is not None else str(msg_id)
+            self._names[msg_id] = name
+        return name
@@ -0,0 +1,307 @@
+"""
+MAVLink telemetry log (.tlog) recording and indexing.
+
+A tlog is the format written by MAVProxy/QGroundControl and read by
+pymavlink's mavlogfile: every record is an 8-byte big-endian timestamp in
+microseconds since the Unix epoch followed by one raw MAVLink frame.  The
+low two bits of the timestamp carry a link number (pymavlink exposes it as
+msg._link); TlogRecorder uses them to mark the direction of each frame.
+
+Each log gets a sidecar index (<log>.idx) of fixed-size records giving the
+timestamp, file offset and message ID of every frame, so a reader can seek by
+time or pick out one message type without scanning the log.  Indexes can be
+rebuilt from the log itself with scan_tlog().
+"""
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import List, Optional
+
+import numpy as np
+
+from services.mavlink_codec import frame_length, peek_header
+
+logger = logging.getLogger(__name__)
+
+LINK_INBOUND = 0
+LINK_OUTBOUND = 1
+
+INDEX_SUFFIX = ".idx"
+
+# One index record per frame: timestamp (us), offset of the timestamp in the
+# log, message ID.  Offsets are 32-bit, so logs rotate before 4 GiB.
+TLOG_INDEX_DTYPE = np.dtype([('usec', '<u8'), ('offset', '<u4'), ('msg_id', '<u4')])
+MAX_TLOG_BYTES = 0xFFFFFFFF
+
+_TIMESTAMP = struct.Struct('>Q')
+
+
+def scan_tlog(path: str) -> np.ndarray:
+    """Build the index of a tlog by reading it.
+
+    Records whose frame is truncated or does not start with a MAVLink magic
+    byte end the scan (a log cut short by a crash keeps its valid prefix).
+
+    Args:
+        path: Path of the .tlog file
+
+    Returns:
+        Array of TLOG_INDEX_DTYPE, one entry per frame
+    """
+    usecs: List[int] = []
+    offsets: List[int] = []
+    msg_ids: List[int] = []
+    with open(path, 'rb') as f:
+        end = os.fstat(f.fileno()).st_size
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if end else b''
+        try:
+            pos = 0
+            unpack = _TIMESTAMP.unpack_from
+            while pos + 8 < end:
+                length = frame_length(data, pos + 8)
+                if length is None or pos + 8 + length > end:
+                    break
+                header = peek_header(data[pos + 8:pos + 18])
+                usecs.append(unpack(data, pos)[0])
+                offsets.append(pos)
+                msg_ids.append(header[0] if header is not None else 0)
+                pos += 8 + length
+        finally:
+            if end:
+                data.close()
+    index = np.zeros(len(offsets), dtype=TLOG_INDEX_DTYPE)
+    index['usec'] = usecs
+    index['offset'] = offsets
+    index['msg_id'] = msg_ids
+    return index
+
+
+def load_tlog_index(path: str, build: bool = True) -> Optional[np.ndarray]:
+    """Load a tlog's sidecar index, building and saving it if missing or stale.
+
+    Args:
+        path: Path of the .tlog file
+        build: Scan the log when the index is missing or older than the log
+
+    Returns:
+        Array of TLOG_INDEX_DTYPE, or None if there is no index and build is False
+    """
+    index_path = path + INDEX_SUFFIX
+    try:
+        if os.path.getmtime(index_path) >= os.path.getmtime(path):
+            return np.fromfile(index_path, dtype=TLOG_INDEX_DTYPE)
+    except OSError:
+        pass
+    if not build:
+        return None
+    index = scan_tlog(path)
+    try:
+        index.tofile(index_path)
+    except OSError as e:
+        logger.warning("Could not save tlog index %s: %s", index_path, e)
+    return index
+
+
+class TlogRecorder(threading.Thread):
+    """Background writer streaming raw MAVLink frames to rotating tlog files.
+
+    record() only timestamps the frame and appends it to a pending list, so
+    receive and send paths never wait on the disk.  The writer thread turns
+    the pending frames into one large buffer per file write, every
+    flush_interval or as soon as chunk_bytes are pending.  If the disk
+    cannot keep up, frames beyond max_pending_bytes are dropped and counted.
+    """
+
+    def __init__(self, directory: str, prefix: str = "flight",
+                 max_bytes: int = 256 * 1024 * 1024, max_duration_s: float = 3600.0,
+                 chunk_bytes: int = 256 * 1024, flush_interval: float = 0.5,
+                 max_pending_bytes: int = 16 * 1024 * 1024, name: str = "mavlink-tlog"):
+        """Initialize the recorder.
+
+        Args:
+            directory: Directory the logs are written to (created if needed)
+            prefix: File name prefix
+            max_bytes: Start a new file once a log reaches this size
+            max_duration_s: Start a new file once a log covers this long (0 = never)
+            chunk_bytes: Pending size that wakes the writer early
+            flush_interval: Maximum time frames stay in memory
+            max_pending_bytes: Pending size beyond which frames are dropped
+            name: Thread name
+        """
+        super().__init__(name=name, daemon=True)
+        self.directory = directory
+        self.prefix = prefix
+        self.max_bytes = min(int(max_bytes), MAX_TLOG_BYTES)
+        self.max_duration_s = max_duration_s
+        self.chunk_bytes = chunk_bytes
+        self.flush_interval = flush_interval
+        self.max_pending_bytes = max_pending_bytes
+
+        self._lock = threading.Lock()
+        self._pending: list = []
+        self._pending_bytes = 0
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+
+        self._file = None
+        self._index_file = None
+        self._file_bytes = 0
+        self._file_started = 0.0
+        self.files: List[str] = []
+        self.frames = 0
+        self.bytes_written = 0
+        self.dropped = 0
+        self.errors = 0
+
+    @property
+    def current_path(self) -> Optional[str]:
+        """Path of the log being written, if any."""
+        return self.files[-1] if self._file is not None else None
+
+    def record(self, frame, outbound: bool = False, t: float = None):
+        """Queue a raw frame (thread-safe, never blocks on I/O).
+
+        Args:
+            frame: Complete MAVLink frame; copied if it is a memoryview or
+                bytearray that the caller may reuse
+            outbound: True for frames we sent
+            t: Unix time of the frame (default: now)
+        """
+        if not isinstance(frame, bytes):
+            frame = bytes(frame)
+        usec = int((t if t is not None else time.time()) * 1e6) & ~3
+        if outbound:
+            usec |= LINK_OUTBOUND
+        size = len(frame) + 8
+        with self._lock:
+            if self._pending_bytes + size > self.max_pending_bytes:
+                self.dropped += 1
+                return
+            self._pending.append((usec, frame))
+            self._pending_bytes += size
+            wake = self._pending_bytes >= self.chunk_bytes
+        if wake:
+            self._wake.set()
+
+    def stop(self, timeout: float = 5.0):
+        """Write out everything pending, close the log and stop the thread.
+
+        Args:
+            timeout: Maximum time to wait for the thread to finish
+        """
+        self._stop_event.set()
+        self._wake.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
+
+    def run(self):
+        """Write pending frames until stop() is called."""
+        try:
+            while not self._stop_event.is_set():
+                self._wake.wait(self.flush_interval)
+                self._wake.clear()
+                self._write_pending()
+            self._write_pending()
+        finally:
+            self._close_file()
+
+    def get_stats(self) -> dict:
+        """Get recorder counters.
+
+        Returns:
+            Dictionary with path, files, frames, bytes_written, pending_bytes,
+            dropped and errors
+        """
+        return {
+            'path': self.current_path,
+            'files': list(self.files),
+            'frames': self.frames,
+            'bytes_written': self.bytes_written,
+            'pending_bytes': self._pending_bytes,
+            'dropped': self.dropped,
+            'errors': self.errors,
+        }
+
+    def _write_pending(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+            self._pending_bytes = 0
+        if not pending:
+            return
+
+        chunk = bytearray()
+        index = []
+        for i, (usec, frame) in enumerate(pending):
+            size = 8 + len(frame)
+            if self._file is None or self._needs_rotation(self._file_bytes + len(chunk), size):
+                self._flush(chunk, index)
+                chunk = bytearray()
+                index = []
+                self._open_file()
+                if self._file is None:
+                    self.dropped += len(pending) - i
+                    return
+            header = peek_header(frame)
+            index.append((usec, self._file_bytes + len(chunk), header[0] if header else 0))
+            chunk += _TIMESTAMP.pack(usec)
+            chunk += frame
+        self._flush(chunk, index)
+
+    def _needs_rotation(self, written: int, size: int) -> bool:
+        """Check whether a record of ``size`` must go to a new file.
+
+        Args:
+            written: Bytes of the current file (flushed plus chunked)
+            size: Size of the next record
+        """
+        if written and written + size > self.max_bytes:
+            return True
+        return (self.max_duration_s > 0
+                and time.monotonic() - self._file_started > self.max_duration_s)
+
+    def _flush(self, chunk: bytearray, index: list):
+        if not chunk or self._file is None:
+            return
+        try:
+            self._file.write(chunk)
+            self._file.flush()
+            self._index_file.write(np.array(index, dtype=TLOG_INDEX_DTYPE).tobytes())
+            self._index_file.flush()
+        except OSError as e:
+            self.errors += 1
+            logger.error("tlog write to %s failed: %s", self.current_path, e)
+            return
+        self._file_bytes += len(chunk)
+        self.bytes_written += len(chunk)
+        self.frames += len(index)
+
+    def _open_file(self):
+        self._close_file()
+        stamp = time.strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(self.directory, f"{self.prefix}_{stamp}_{len(self.files):03d}.tlog")
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            self._file = open(path, 'wb')
+            self._index_file = open(path + INDEX_SUFFIX, 'wb')
+        except OSError as e:
+            self.errors += 1
+            logger.error("Could not open tlog %s: %s", path, e)
+            self._close_file()
+            return
+        self._file_bytes = 0
+        self._file_started = time.monotonic()
+        self.files.append(path)
+        logger.info("Recording MAVLink traffic to %s", path)
+
+    def _close_file(self):
+        for f in (self._file, self._index_file):
+            if f is not None:
+                try:
+                    f.close()
+                except OSError:
+                    pass
+        self._file = None
+        self._index_file = None
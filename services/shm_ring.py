@@ -0,0 +1,164 @@
+"""
+Shared-memory ring buffers for passing records between processes.
+
+SharedRing lays a fixed-capacity NumPy structured array out in a
+multiprocessing.shared_memory block, behind a small header holding the
+number of records ever written.  One process (the producer) appends records
+and bumps the counter; one other process (the consumer) copies out
+everything written since its last read.  Nothing is locked and nothing is
+serialized: a record costs one structured-array store on one side and one
+slice copy on the other.
+
+The producer never waits.  When the consumer falls more than a ring behind,
+the oldest records are overwritten and the consumer counts them as dropped,
+which is what a pose or telemetry stream wants (only the newest values
+matter).  The slot being written while the consumer copies is always
+treated as overwritten, so a reader never returns a half-written record.
+
+The block is created by the owning process and attached by name elsewhere
+(see attach_shared_memory).
+"""
+import sys
+import threading
+from multiprocessing import resource_tracker, shared_memory
+from typing import Optional
+
+import numpy as np
+
+# Header: records written so far (uint64), padded to a cache line
+HEADER_BYTES = 64
+
+_attach_lock = threading.Lock()
+
+
+def attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """Attach to an existing shared memory block without taking ownership.
+
+    Before Python 3.13 an attaching process registers the block with its
+    resource tracker, which unlinks it when that process exits, taking it
+    away from the owner and every other reader.  Unregistering afterwards is
+    not enough: spawned children share their parent's tracker, so that would
+    drop the owner's registration too.  Registration is skipped instead, so
+    only the creator ever unlinks.
+
+    Args:
+        name: Name of the block
+
+    Raises:
+        FileNotFoundError: If no block with that name exists
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    with _attach_lock:
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+class SharedRing:
+    """Single-producer, single-consumer ring of NumPy records in shared memory."""
+
+    def __init__(self, dtype: np.dtype, capacity: int, name: Optional[str] = None,
+                 create: bool = False):
+        """Create or attach a ring.
+
+        Args:
+            dtype: Record layout (must match on both sides)
+            capacity: Number of slots (must match on both sides)
+            name: Shared memory name (None with create=True picks one)
+            create: Create and own the block instead of attaching to it
+        """
+        self.dtype = np.dtype(dtype)
+        self.capacity = max(2, int(capacity))
+        size = HEADER_BYTES + self.capacity * self.dtype.itemsize
+        if create:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        else:
+            self._shm = attach_shared_memory(name)
+        self._owner = create
+        self._header = np.ndarray((1,), dtype=np.uint64, buffer=self._shm.buf)
+        self._rows = np.ndarray((self.capacity,), dtype=self.dtype, buffer=self._shm.buf,
+                                offset=HEADER_BYTES)
+        if create:
+            self._header[0] = 0
+
+        # Consumer cursor (records read or skipped so far)
+        self._read = int(self._header[0])
+        self.dropped = 0
+
+    @property
+    def name(self) -> str:
+        """Shared memory name to attach to from the other process."""
+        return self._shm.name
+
+    @property
+    def written(self) -> int:
+        """Records written so far."""
+        return int(self._header[0])
+
+    def push(self, record: tuple):
+        """Append one record (producer only).
+
+        Args:
+            record: Field values in dtype order
+        """
+        count = int(self._header[0])
+        self._rows[count % self.capacity] = record
+        self._header[0] = count + 1
+
+    def read(self) -> np.ndarray:
+        """Copy every record written since the last read (consumer only).
+
+        Returns:
+            Records oldest first; records that were overwritten before they
+            could be read are counted in dropped
+        """
+        start, end = self._read, int(self._header[0])
+        if end == start:
+            return self._rows[:0].copy()
+        start = max(start, end - self.capacity + 1)
+        first, last = start % self.capacity, end % self.capacity
+        if first < last:
+            rows = self._rows[first:last].copy()
+        else:
+            rows = np.concatenate((self._rows[first:], self._rows[:last]))
+
+        # Anything the producer reached while we copied may be torn
+        valid_from = int(self._header[0]) - self.capacity + 1
+        if valid_from > start:
+            rows = rows[valid_from - start:]
+            start = valid_from
+        self.dropped += start - self._read
+        self._read = end
+        return rows
+
+    def get_stats(self) -> dict:
+        """Get the ring's size and counters (as seen by this side)."""
+        written = self.written
+        return {
+            'name': self.name,
+            'capacity': self.capacity,
+            'record_bytes': self.dtype.itemsize,
+            'written': written,
+            'backlog': written - self._read,
+            'dropped': self.dropped,
+        }
+
+    def close(self, unlink: Optional[bool] = None):
+        """Detach from the block.
+
+        Args:
+            unlink: Also destroy the block (default: if this side created it)
+        """
+        self._header = None
+        self._rows = None
+        self._shm.close()
+        if self._owner if unlink is None else unlink:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+
@@ -0,0 +1,164 @@
+"""
+Snapshot-based telemetry publication.
+
+The service thread owns each connection's MavlinkTelemetryData and mutates it
+in place as messages arrive.  TelemetryPublisher hands consumers immutable
+MavlinkTelemetrySnapshot copies instead, on two paths:
+
+- Full rate: subscribers registered with subscribe() get a snapshot after
+  every handled message (in the service thread), for logging and control.
+- Coalesced: take_pending() returns only the newest snapshot per vehicle
+  updated since the last call; the service emits these at the UI rate.
+  Queued deliveries that were overtaken by a newer publication can be
+  recognised with is_current() and dropped.
+
+Snapshots are only built when something consumes them, so a vehicle that
+updates at 250 Hz costs one copy per UI tick when nobody subscribes at full
+rate.
+"""
+import logging
+import threading
+from typing import Callable, Dict, Optional
+
+from models.structs import MavlinkTelemetryData, MavlinkTelemetrySnapshot
+
+logger = logging.getLogger(__name__)
+
+
+class TelemetryPublisher:
+    """Turns in-place telemetry updates into immutable snapshots."""
+
+    def __init__(self):
+        self._subscribers: tuple = ()
+        self._lock = threading.Lock()
+        self._sources: Dict[int, MavlinkTelemetryData] = {}
+        self._sequence: Dict[int, int] = {}
+        self._latest: Dict[int, MavlinkTelemetrySnapshot] = {}
+        self._published: Dict[int, MavlinkTelemetrySnapshot] = {}
+        self._dirty: set = set()
+        self.updates = 0
+        self.coalesced = 0
+        self.subscriber_errors = 0
+
+    @property
+    def has_subscribers(self) -> bool:
+        """True if any full-rate subscriber is registered."""
+        return bool(self._subscribers)
+
+    def subscribe(self, callback: Callable[[int, MavlinkTelemetrySnapshot], None]):
+        """Receive a snapshot after every telemetry update (thread-safe).
+
+        Callbacks run in the service thread and should return quickly.
+
+        Args:
+            callback: Called with (system_id, snapshot)
+        """
+        with self._lock:
+            if callback not in self._subscribers:
+                self._subscribers = self._subscribers + (callback,)
+
+    def unsubscribe(self, callback: Callable[[int, MavlinkTelemetrySnapshot], None]) -> bool:
+        """Remove a full-rate subscriber (thread-safe).
+
+        Returns:
+            True if the callback was subscribed
+        """
+        with self._lock:
+            remaining = tuple(cb for cb in self._subscribers if cb != callback)
+            removed = len(remaining) != len(self._subscribers)
+            self._subscribers = remaining
+            return removed
+
+    def update(self, system_id: int, telemetry: MavlinkTelemetryData):
+        """Record that a vehicle's telemetry changed (service thread only).
+
+        Args:
+            system_id: Vehicle system ID
+            telemetry: The vehicle's live telemetry container
+        """
+        self.updates += 1
+        self._sources[system_id] = telemetry
+        if system_id in self._dirty:
+            self.coalesced += 1
+        else:
+            self._dirty.add(system_id)
+
+        subscribers = self._subscribers
+        if not subscribers:
+            # Built lazily by take_pending()/snapshot()
+            self._latest.pop(system_id, None)
+            return
+        snapshot = self._take_snapshot(system_id, telemetry)
+        for callback in subscribers:
+            try:
+                callback(system_id, snapshot)
+            except Exception as e:
+                self.subscriber_errors += 1
+                logger.warning("Telemetry subscriber %r failed: %s", callback, e)
+
+    def take_pending(self) -> Dict[int, MavlinkTelemetrySnapshot]:
+        """Collect the newest snapshot of every vehicle updated since the last call.
+
+        Returned snapshots become the published ones checked by is_current().
+
+        Returns:
+            Dictionary mapping system_id to snapshot
+        """
+        pending = {}
+        for system_id in self._dirty:
+            pending[system_id] = self.snapshot(system_id)
+        self._dirty.clear()
+        self._published.update(pending)
+        return pending
+
+    def snapshot(self, system_id: int) -> Optional[MavlinkTelemetrySnapshot]:
+        """Get the newest snapshot for a vehicle (service thread only).
+
+        Returns:
+            Snapshot, or None if the vehicle never published telemetry
+        """
+        snapshot = self._latest.get(system_id)
+        if snapshot is None:
+            telemetry = self._sources.get(system_id)
+            if telemetry is None:
+                return None
+            snapshot = self._take_snapshot(system_id, telemetry)
+        return snapshot
+
+    def published(self, system_id: int) -> Optional[MavlinkTelemetrySnapshot]:
+        """Get the last snapshot returned by take_pending() (any thread)."""
+        return self._published.get(system_id)
+
+    def is_current(self, system_id: int, snapshot: MavlinkTelemetrySnapshot) -> bool:
+        """Check that no newer snapshot was published after this one (any thread).
+
+        Lets a consumer that fell behind skip deliveries still in its queue.
+        """
+        return self._published.get(system_id) is snapshot
+
+    def remove(self, system_id: int):
+        """Forget a vehicle (e.g. after it is disconnected)."""
+        self._dirty.discard(system_id)
+        self._sources.pop(system_id, None)
+        self._latest.pop(system_id, None)
+        self._published.pop(system_id, None)
+
+    def get_stats(self) -> dict:
+        """Get publication counters.
+
+        Returns:
+            Dictionary with updates, coalesced, subscribers and subscriber_errors
+        """
+        return {
+            'updates': self.updates,
+            'coalesced': self.coalesced,
+            'subscribers': len(self._subscribers),
+            'subscriber_errors': self.subscriber_errors,
+        }
+
+    def _take_snapshot(self, system_id: int, telemetry: MavlinkTelemetryData) -> MavlinkTelemetrySnapshot:
+        sequence = self._sequence.get(system_id, 0) + 1
+        self._sequence[system_id] = sequence
+        snapshot = MavlinkTelemetrySnapshot.from_telemetry(telemetry, sequence)
+        self._latest[system_id] = snapshot
+        return snapshot
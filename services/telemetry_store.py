@@ -0,0 +1,299 @@
+"""
+Fixed-memory telemetry history.
+
+TelemetryStore keeps one TelemetryRing per vehicle: a preallocated NumPy
+structured array that records the MavlinkTelemetryData fields together with
+the monotonic receive time.  The flight mode text is not recorded: it would
+take about half of every row, and nothing sets it.  Once full, the oldest
+rows are overwritten, so memory stays at capacity * TELEMETRY_DTYPE.itemsize
+per vehicle however long the session runs (about 11 MB for the default 10
+minutes at 250 Hz).
+
+Queries return copies in chronological order: the raw rows of the last N
+seconds, or the same window resampled onto a regular time grid for plotting
+and tracking-error analysis.
+"""
+import bisect
+import operator
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from models.structs import MavlinkTelemetryData
+
+# Continuous fields are linearly interpolated by resample(); the rest hold
+# the previous sample
+CONTINUOUS_FIELDS = (
+    'timestamp',
+    'roll', 'pitch', 'yaw', 'rollspeed', 'pitchspeed', 'yawspeed',
+    'x', 'y', 'z', 'vx', 'vy', 'vz',
+    'battery_voltage',
+)
+DISCRETE_FIELDS = (
+    'system_id', 'armed', 'battery_remaining',
+    'gps_fix_type', 'satellites_visible', 'estimator_status',
+)
+
+TELEMETRY_DTYPE = np.dtype(
+    [('t', 'f8'), ('timestamp', 'f8')]
+    + [(name, 'f4') for name in CONTINUOUS_FIELDS[1:]]
+    + [
+        ('system_id', 'u1'),
+        ('armed', '?'),
+        ('battery_remaining', 'i1'),
+        ('gps_fix_type', 'u1'),
+        ('satellites_visible', 'u1'),
+        ('estimator_status', 'u2'),
+    ]
+)
+
+_TELEMETRY_FIELDS = TELEMETRY_DTYPE.names[1:]
+_read_fields = operator.attrgetter(*_TELEMETRY_FIELDS)
+
+
+class TelemetryRing:
+    """Preallocated ring buffer of telemetry rows for one vehicle.
+
+    One writer thread may append while other threads query.
+    """
+
+    def __init__(self, capacity: int):
+        """Initialize the ring.
+
+        Args:
+            capacity: Number of rows kept before the oldest are overwritten
+        """
+        self.capacity = max(1, int(capacity))
+        self._rows = np.zeros(self.capacity, dtype=TELEMETRY_DTYPE)
+        self._head = 0      # Next row to write
+        self._count = 0
+        self._lock = threading.Lock()
+        self.overwritten = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the preallocated rows."""
+        return self._rows.nbytes
+
+    def append(self, telemetry: MavlinkTelemetryData, t: float = None):
+        """Record the current values of a telemetry container.
+
+        Args:
+            telemetry: Telemetry to copy
+            t: Monotonic receive time (default: now)
+        """
+        if t is None:
+            t = time.monotonic()
+        row = (t,) + _read_fields(telemetry)
+        with self._lock:
+            self._rows[self._head] = row
+            self._head = (self._head + 1) % self.capacity
+            if self._count < self.capacity:
+                self._count += 1
+            else:
+                self.overwritten += 1
+
+    def latest(self) -> Optional[np.void]:
+        """Get a copy of the newest row, or None if empty."""
+        with self._lock:
+            if not self._count:
+                return None
+            return self._rows[self._head - 1].copy()
+
+    @property
+    def span_s(self) -> float:
+        """Time between the oldest and newest row."""
+        with self._lock:
+            if not self._count:
+                return 0.0
+            older, newer = self._segments()
+            first = older if len(older) else newer
+            return float(self._rows['t'][self._head - 1] - first['t'][0])
+
+    def since(self, t0: float, previous: bool = False) -> np.ndarray:
+        """Get every row recorded at or after monotonic time t0, oldest first.
+
+        Args:
+            t0: Start time on the monotonic clock
+            previous: Also include the last row before t0, if any
+        """
+        with self._lock:
+            older, newer = self._segments()
+            split = len(older)
+            if len(newer) and newer['t'][0] <= t0:
+                start = split + bisect.bisect_left(newer['t'], t0)
+            else:
+                start = bisect.bisect_left(older['t'], t0)
+            if previous and start > 0:
+                start -= 1
+            if start >= split:
+                return newer[start - split:].copy()
+            return np.concatenate((older[start:], newer))
+
+    def window(self, seconds: float, now: float = None) -> np.ndarray:
+        """Get the rows of the last ``seconds``, oldest first.
+
+        Args:
+            seconds: Window length
+            now: End of the window on the monotonic clock (default: now)
+        """
+        if now is None:
+            now = time.monotonic()
+        rows = self.since(now - seconds)
+        if len(rows) and rows['t'][-1] > now:
+            rows = rows[:np.searchsorted(rows['t'], now, side='right')]
+        return rows
+
+    def resample(self, seconds: float, rate_hz: float, now: float = None,
+                 fields: Iterable[str] = None) -> np.ndarray:
+        """Resample the last ``seconds`` onto a regular grid.
+
+        Continuous fields are interpolated linearly (NaN outside the recorded
+        span); discrete fields such as armed hold the previous sample.
+
+        Args:
+            seconds: Window length
+            rate_hz: Grid rate
+            now: End of the grid (default: time of the newest row)
+            fields: Fields to fill (default: all); others are left zero
+
+        Returns:
+            Structured array of TELEMETRY_DTYPE with 't' set to the grid times
+        """
+        if now is None:
+            latest = self.latest()
+            if latest is None:
+                return np.zeros(0, dtype=TELEMETRY_DTYPE)
+            now = float(latest['t'])
+        steps = max(1, int(seconds * rate_hz))
+        grid = now - (np.arange(steps, -1, -1) / rate_hz)
+
+        # Include the row before the grid so its first point can be interpolated
+        rows = self.since(grid[0], previous=True)
+        out = np.zeros(len(grid), dtype=TELEMETRY_DTYPE)
+        out['t'] = grid
+        if not len(rows):
+            for name in CONTINUOUS_FIELDS:
+                out[name] = np.nan
+            return out
+
+        t = rows['t']
+        hold = np.clip(np.searchsorted(t, grid, side='right') - 1, 0, len(rows) - 1)
+        for name in (fields if fields is not None else _TELEMETRY_FIELDS):
+            if name in CONTINUOUS_FIELDS:
+                out[name] = np.interp(grid, t, rows[name].astype('f8'),
+                                      left=np.nan, right=np.nan)
+            else:
+                out[name] = rows[name][hold]
+        return out
+
+    def clear(self):
+        """Drop every recorded row (the memory stays allocated)."""
+        with self._lock:
+            self._head = 0
+            self._count = 0
+
+    def _segments(self):
+        """Views of the recorded rows as (older, newer), each in time order."""
+        if self._count < self.capacity:
+            return self._rows[:0], self._rows[:self._count]
+        return self._rows[self._head:], self._rows[:self._head]
+
+
+class TelemetryStore:
+    """Per-vehicle telemetry history with bounded memory."""
+
+    def __init__(self, seconds: float = 600.0, rate_hz: float = 250.0):
+        """Initialize the store.
+
+        Args:
+            seconds: History length each ring is sized for
+            rate_hz: Expected telemetry update rate; faster vehicles keep
+                proportionally less history in the same memory
+        """
+        self._rings: Dict[int, TelemetryRing] = {}
+        self._lock = threading.Lock()
+        self.capacity = 0
+        self.configure(seconds, rate_hz)
+
+    @property
+    def enabled(self) -> bool:
+        """False if the store was configured with no history."""
+        return self.capacity > 0
+
+    def configure(self, seconds: float, rate_hz: float):
+        """Change the ring size; existing history is dropped if it changes."""
+        capacity = max(0, int(seconds * rate_hz))
+        with self._lock:
+            if capacity != self.capacity:
+                self._rings = {}
+            self.capacity = capacity
+
+    def record(self, system_id: int, telemetry: MavlinkTelemetryData, t: float = None):
+        """Append a vehicle's current telemetry (allocates its ring on first use)."""
+        ring = self._rings.get(system_id)
+        if ring is None:
+            if not self.enabled:
+                return
+            with self._lock:
+                ring = self._rings.setdefault(system_id, TelemetryRing(self.capacity))
+        ring.append(telemetry, t)
+
+    def ring(self, system_id: int) -> Optional[TelemetryRing]:
+        """Get a vehicle's ring, or None if nothing was recorded."""
+        return self._rings.get(system_id)
+
+    @property
+    def system_ids(self) -> List[int]:
+        """Vehicles with recorded history."""
+        return sorted(self._rings)
+
+    def window(self, system_id: int, seconds: float, now: float = None) -> np.ndarray:
+        """Get a vehicle's rows for the last ``seconds`` (see TelemetryRing.window)."""
+        ring = self._rings.get(system_id)
+        if ring is None:
+            return np.zeros(0, dtype=TELEMETRY_DTYPE)
+        return ring.window(seconds, now)
+
+    def resample(self, system_id: int, seconds: float, rate_hz: float,
+                 now: float = None, fields: Iterable[str] = None) -> np.ndarray:
+        """Resample a vehicle's recent history (see TelemetryRing.resample)."""
+        ring = self._rings.get(system_id)
+        if ring is None:
+            return np.zeros(0, dtype=TELEMETRY_DTYPE)
+        return ring.resample(seconds, rate_hz, now, fields)
+
+    def clear(self, system_id: int = None):
+        """Release one vehicle's history, or everything."""
+        with self._lock:
+            if system_id is None:
+                self._rings = {}
+            else:
+                self._rings.pop(system_id, None)
+
+    def get_stats(self) -> dict:
+        """Get per-vehicle occupancy.
+
+        Returns:
+            Dictionary with capacity, memory_bytes and per-system 'vehicles'
+            entries of rows, overwritten and span_s
+        """
+        vehicles = {}
+        memory = 0
+        for system_id, ring in list(self._rings.items()):
+            memory += ring.nbytes
+            vehicles[system_id] = {
+                'rows': len(ring),
+                'overwritten': ring.overwritten,
+                'span_s': ring.span_s,
+            }
+        return {
+            'capacity': self.capacity,
+            'memory_bytes': memory,
+            'vehicles': vehicles,
+        }
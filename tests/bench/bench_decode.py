@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark MAVLink telemetry decoding.
+
+Compares the pymavlink decode path against FastTelemetryDecoder on a
+representative mix of the hot telemetry messages, both for decoding alone
+and for decode + dispatch into MavlinkTelemetryData.
+
+Usage:
+    python tests/bench/bench_decode.py [--count N] [--repeat N] [--json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from pymavlink import mavutil  # noqa: E402
+
+from models.structs import MavlinkConnectionConfig  # noqa: E402
+from services.mavlink_codec import FastTelemetryDecoder  # noqa: E402
+from services.mavlink_service import MavlinkConnection  # noqa: E402
+
+
+def build_frames(count: int) -> list:
+    """Encode a telemetry mix similar to a PX4 vehicle's default streams."""
+    mav = mavutil.mavlink.MAVLink(None, srcSystem=1, srcComponent=1)
+    frames = []
+    for i in range(count):
+        slot = i % 10
+        if slot < 4:
+            msg = mav.attitude_encode(i, 0.01 * slot, -0.02, 1.57, 0.0, 0.1, 0.0)
+        elif slot < 8:
+            msg = mav.local_position_ned_encode(i, 1.0, 2.0, -1.5, 0.2, 0.0, -0.1)
+        elif slot == 8:
+            msg = mav.sys_status_encode(1, 1, 1, 250, 12400, 500, 0, 0, 0, 0, 0, 0, 80)
+        else:
+            msg = mav.heartbeat_encode(2, 12, 129, 0, 4)
+        frames.append(bytearray(msg.pack(mav)))
+    return frames
+
+
+def _best_of(repeat: int, fn) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(count: int, repeat: int) -> dict:
+    """Run every case and return messages/second for each."""
+    frames = build_frames(count)
+    mav = mavutil.mavlink.MAVLink(None)
+    decoder = FastTelemetryDecoder(mavutil.mavlink)
+    conn = MavlinkConnection(MavlinkConnectionConfig(connection_string="udpin:127.0.0.1:0"))
+
+    def pymavlink_decode():
+        for frame in frames:
+            mav.decode(frame)
+
+    def fast_decode():
+        for frame in frames:
+            decoder.decode(frame)
+
+    def pymavlink_dispatch():
+        for frame in frames:
+            conn.process_message(mav.decode(frame))
+
+    def fast_dispatch():
+        for frame in frames:
+            conn.process_message(decoder.decode(frame))
+
+    cases = {
+        'pymavlink_decode': pymavlink_decode,
+        'fast_decode': fast_decode,
+        'pymavlink_decode_dispatch': pymavlink_dispatch,
+        'fast_decode_dispatch': fast_dispatch,
+    }
+    results = {name: count / _best_of(repeat, fn) for name, fn in cases.items()}
+    results['decode_speedup'] = results['fast_decode'] / results['pymavlink_decode']
+    results['dispatch_speedup'] = results['fast_decode_dispatch'] / results['pymavlink_decode_dispatch']
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MAVLink telemetry decoding")
+    parser.add_argument('--count', type=int, default=20000, help="Frames per run")
+    parser.add_argument('--repeat', type=int, default=5, help="Runs per case (best is reported)")
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.count, args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for name, value in results.items():
+        unit = "x" if name.endswith('speedup') else " msg/s"
+        print(f"{name:28s} {value:14,.1f}{unit}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Benchmark MavlinkService against 1-64 simulated vehicles over local UDP.
+
+For each vehicle count the benchmark launches scripts/mavlink_sim.py as a
+child process (so its CPU is not charged to the service), connects one
+MavlinkConnection per vehicle, registers a mocap source and a setpoint for
+each, and runs the service for a fixed window.  It reports:
+
+- decoded messages/s and service-process CPU time per decoded message
+  (receive_messages, process_message and the telemetry pipeline),
+- end-to-end mocap latency (ATT_POS_MOCAP time_usec to vehicle receipt)
+  and inter-arrival jitter, as measured by the simulated vehicles,
+- mocap and setpoint rate adherence (received rate / configured rate),
+- resident memory growth over the measurement window.
+
+Results are JSON with the commit they were measured on; pass --baseline to
+compare against an earlier run and fail on regressions.
+
+Usage:
+    python tests/bench/bench_fleet.py [--vehicles 1,4,16,64] [--duration SECS]
+        [--receive-mode poll|thread|selector] [--output PATH]
+        [--baseline PATH [--tolerance FRACTION]]
+"""
+import argparse
+import json
+import os
+import platform
+import signal
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from PyQt5.QtCore import QCoreApplication  # noqa: E402
+
+from models.structs import MavlinkConnectionConfig, MavlinkGlobalSettings, SetpointData  # noqa: E402
+from services.mavlink_service import MavlinkService  # noqa: E402
+
+SIMULATOR = os.path.join(REPO_ROOT, "scripts", "mavlink_sim.py")
+
+# Metrics compared against a baseline: name -> True if higher is better
+REGRESSION_METRICS = {
+    'messages_per_sec': True,
+    'cpu_us_per_message': False,
+    'mocap_latency_p99_ms': False,
+    'mocap_rate_adherence': True,
+    'setpoint_rate_adherence': True,
+}
+
+
+class _PoseSource:
+    """Scene object stand-in with a fixed pose (x, y, z, qw, qx, qy, qz)."""
+
+    def __init__(self, index: int):
+        self.pose = (float(index), 1.0, 0.5, 1.0, 0.0, 0.0, 0.0)
+
+
+def _rss_bytes() -> int:
+    """Current resident set size of this process."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _pump(app, seconds: float):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.01)
+
+
+def _mean(values) -> float:
+    values = list(values)
+    return sum(values) / len(values) if values else 0.0
+
+
+def _vehicle_metrics(report: dict, settings: MavlinkGlobalSettings) -> dict:
+    """Aggregate what the simulated vehicles received.
+
+    Rate adherence is the worst vehicle's received rate over the configured
+    rate; the _mean variants average over the fleet.
+    """
+    mocap = [v['received'].get('ATT_POS_MOCAP', {}) for v in report['vehicles']]
+    setpoint = [v['received'].get('SET_POSITION_TARGET_LOCAL_NED', {}) for v in report['vehicles']]
+    return {
+        'mocap_latency_p50_ms': _mean(m.get('latency_p50_ms', 0.0) for m in mocap),
+        'mocap_latency_p99_ms': max((m.get('latency_p99_ms', 0.0) for m in mocap), default=0.0),
+        'mocap_latency_max_ms': max((m.get('latency_max_ms', 0.0) for m in mocap), default=0.0),
+        'mocap_jitter_ms': _mean(m.get('interval_std_ms', 0.0) for m in mocap),
+        'mocap_gaps': sum(m.get('gaps', 0) for m in mocap),
+        'mocap_rate_adherence': min((m.get('rate_hz', 0.0) for m in mocap), default=0.0)
+                                / settings.default_mocap_rate_hz,
+        'mocap_rate_adherence_mean': _mean(m.get('rate_hz', 0.0) for m in mocap)
+                                     / settings.default_mocap_rate_hz,
+        'setpoint_jitter_ms': _mean(s.get('interval_std_ms', 0.0) for s in setpoint),
+        'setpoint_gaps': sum(s.get('gaps', 0) for s in setpoint),
+        'setpoint_rate_adherence': min((s.get('rate_hz', 0.0) for s in setpoint), default=0.0)
+                                   / settings.default_setpoint_rate_hz,
+        'setpoint_rate_adherence_mean': _mean(s.get('rate_hz', 0.0) for s in setpoint)
+                                        / settings.default_setpoint_rate_hz,
+    }
+
+
+def run(vehicles: int, duration: float, warmup: float, base_port: int,
+        settings: MavlinkGlobalSettings) -> dict:
+    """Measure one vehicle count.
+
+    Args:
+        vehicles: Number of simulated vehicles
+        duration: Measurement window in seconds
+        warmup: Seconds to run before measuring
+        base_port: UDP port of the first simulated vehicle
+        settings: Global settings applied to the service
+
+    Returns:
+        Dictionary of metrics for this vehicle count
+    """
+    app = QCoreApplication.instance() or QCoreApplication([])
+    sim = subprocess.Popen([sys.executable, SIMULATOR, '--vehicles', str(vehicles),
+                            '--base-port', str(base_port), '--json'],
+                           stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    service = MavlinkService()
+    try:
+        if not sim.stderr.readline():  # Banner: the ports are bound
+            raise RuntimeError(f"Simulator failed to start: {sim.stderr.read()}")
+        service.update_global_settings(settings)
+
+        start = time.perf_counter()
+        futures = service.connect_many([
+            MavlinkConnectionConfig(connection_string=f"udpout:127.0.0.1:{base_port + i}")
+            for i in range(vehicles)
+        ])
+        deadline = time.monotonic() + settings.connection_timeout * vehicles
+        while not all(f.done() for f in futures) and time.monotonic() < deadline:
+            app.processEvents()
+            time.sleep(0.005)
+        connect_seconds = time.perf_counter() - start
+        failed = sum(1 for f in futures if not f.done() or f.result() is None)
+        if failed:
+            raise RuntimeError(f"Could not connect to {failed} of {vehicles} simulated vehicles")
+        connections = list(service.get_active_connections().values())
+        for i, conn in enumerate(connections):
+            service.register_mocap_source(conn.status.system_id, _PoseSource(i))
+            service.register_setpoint_source(conn.status.system_id, SetpointData(z=-1.0))
+
+        service.start()
+        _pump(app, warmup)
+        received_before = sum(c.status.messages_received for c in connections)
+        cpu_before = time.process_time()
+        rss_before = _rss_bytes()
+        wall_before = time.perf_counter()
+        _pump(app, duration)
+        elapsed = time.perf_counter() - wall_before
+        cpu = time.process_time() - cpu_before
+        received = sum(c.status.messages_received for c in connections) - received_before
+        rss_growth = _rss_bytes() - rss_before
+        service.stop()
+    finally:
+        for system_id in list(service.get_active_connections()):
+            service.remove_connection(system_id)
+        if sim.poll() is None:
+            sim.send_signal(signal.SIGINT)
+        output, _ = sim.communicate(timeout=10)
+
+    results = {
+        'vehicles': vehicles,
+        'connect_seconds': connect_seconds,
+        'seconds': elapsed,
+        'messages': received,
+        'messages_per_sec': received / elapsed if elapsed > 0 else 0.0,
+        'cpu_percent': 100.0 * cpu / elapsed if elapsed > 0 else 0.0,
+        'cpu_us_per_message': 1e6 * cpu / received if received else 0.0,
+        'rss_growth_kb': rss_growth / 1024.0,
+        'rss_growth_kb_per_min': rss_growth / 1024.0 * 60.0 / elapsed if elapsed > 0 else 0.0,
+    }
+    results.update(_vehicle_metrics(json.loads(output), settings))
+    return results
+
+
+def compare(results: list, baseline: dict, tolerance: float) -> list:
+    """List the metrics that regressed by more than tolerance vs. a baseline run."""
+    previous = {r['vehicles']: r for r in baseline.get('results', [])}
+    regressions = []
+    for current in results:
+        before = previous.get(current['vehicles'])
+        if before is None:
+            continue
+        for name, higher_is_better in REGRESSION_METRICS.items():
+            old, new = before.get(name), current.get(name)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if (-change if higher_is_better else change) > tolerance:
+                regressions.append(f"{current['vehicles']} vehicles: {name} {old:.3f} -> {new:.3f} "
+                                   f"({change:+.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MavlinkService with simulated vehicles")
+    parser.add_argument('--vehicles', default="1,4,16,64", help="Comma-separated vehicle counts")
+    parser.add_argument('--duration', type=float, default=5.0, help="Measurement window per count")
+    parser.add_argument('--warmup', type=float, default=1.0, help="Seconds to run before measuring")
+    parser.add_argument('--base-port', type=int, default=24540, help="UDP port of the first vehicle")
+    parser.add_argument('--receive-mode', default=MavlinkGlobalSettings.receive_mode,
+                        choices=["poll", "thread", "selector"])
+    parser.add_argument('--fast-decode', action='store_true', help="Enable the fast telemetry decoder")
+    parser.add_argument('--output', help="Also write the JSON results to this file")
+    parser.add_argument('--baseline', help="Earlier JSON results to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="Relative change treated as a regression (default 0.2)")
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args()
+
+    settings = MavlinkGlobalSettings(receive_mode=args.receive_mode,
+                                     fast_telemetry_decode=args.fast_decode)
+    results = []
+    for count in (int(v) for v in args.vehicles.split(',') if v.strip()):
+        results.append(run(count, args.duration, args.warmup, args.base_port, settings))
+        if not args.json:
+            r = results[-1]
+            print(f"{count:3d} vehicles: {r['messages_per_sec']:9,.0f} msg/s "
+                  f"{r['cpu_us_per_message']:7.1f} us/msg "
+                  f"mocap p99 {r['mocap_latency_p99_ms']:6.2f} ms jitter {r['mocap_jitter_ms']:5.2f} ms "
+                  f"rate {r['mocap_rate_adherence']:5.1%} | setpoint rate {r['setpoint_rate_adherence']:5.1%} "
+                  f"| rss +{r['rss_growth_kb']:,.0f} KiB")
+
+    document = {
+        'benchmark': 'fleet',
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'settings': {'receive_mode': args.receive_mode, 'fast_decode': args.fast_decode,
+                     'duration_s': args.duration, 'warmup_s': args.warmup},
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(document, f, indent=2)
+    if args.json:
+        print(json.dumps(document, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
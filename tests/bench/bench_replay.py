@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark the receive/dispatch/publish pipeline with a max-speed tlog replay.
+
+Plays a recording (or a synthetic one) through a running MavlinkService as a
+replay: connection at unlimited speed, so the measured rate is what the
+service thread can decode, dispatch, record into the telemetry store and
+publish to the UI without any hardware attached.
+
+Usage:
+    python tests/bench/bench_replay.py [--tlog PATH] [--count N] [--json]
+"""
+import argparse
+import json
+import os
+import struct
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from pymavlink import mavutil  # noqa: E402
+from PyQt5.QtCore import QCoreApplication  # noqa: E402
+
+from models.structs import MavlinkConnectionConfig, MavlinkGlobalSettings  # noqa: E402
+from services.mavlink_service import MavlinkService  # noqa: E402
+
+
+def write_synthetic_tlog(path: str, count: int, rate_hz: float = 250.0):
+    """Write a telemetry mix similar to a PX4 vehicle's default streams."""
+    mav = mavutil.mavlink.MAVLink(None, srcSystem=1, srcComponent=1)
+    start = time.time()
+    with open(path, 'wb') as f:
+        for i in range(count):
+            slot = i % 10
+            if slot < 4:
+                msg = mav.attitude_encode(i, 0.01 * slot, -0.02, 1.57, 0.0, 0.1, 0.0)
+            elif slot < 8:
+                msg = mav.local_position_ned_encode(i, 1.0, 2.0, -1.5, 0.2, 0.0, -0.1)
+            elif slot == 8:
+                msg = mav.sys_status_encode(1, 1, 1, 250, 12400, 500, 80, 0, 0, 0, 0, 0, 0)
+            else:
+                msg = mav.heartbeat_encode(2, 12, 129, 0, 4)
+            usec = int((start + i / rate_hz) * 1e6) & ~3
+            f.write(struct.pack('>Q', usec) + msg.pack(mav))
+
+
+def run(tlog: str, timeout: float = 120.0, fast_decode: bool = False) -> dict:
+    """Replay a tlog at max speed through MavlinkService and time it."""
+    app = QCoreApplication.instance() or QCoreApplication([])
+    service = MavlinkService()
+    service.update_global_settings(MavlinkGlobalSettings(fast_telemetry_decode=fast_decode))
+    ui_updates = []
+    service.telemetry_updated.connect(lambda sys_id, snapshot: ui_updates.append(sys_id))
+
+    if not service.add_connection(MavlinkConnectionConfig(connection_string=f"replay:{tlog}?speed=max")):
+        raise RuntimeError(f"Could not open {tlog}")
+    conn = service.get_connection(next(iter(service.get_all_telemetry())))
+    replay = conn.replay
+    total = replay.get_status()['frames_total']
+
+    start = time.perf_counter()
+    service.start()
+    deadline = time.monotonic() + timeout
+    while conn.status.messages_received < total and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    received = conn.status.messages_received
+    service.stop()
+
+    return {
+        'frames': total,
+        'processed': received,
+        'seconds': elapsed,
+        'messages_per_sec': received / elapsed if elapsed > 0 else 0.0,
+        'log_duration_s': replay.duration_s,
+        'realtime_factor': replay.duration_s / elapsed if elapsed > 0 else 0.0,
+        'ui_updates': len(ui_updates),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the MAVLink pipeline with a tlog replay")
+    parser.add_argument('--tlog', help="Recording to replay (default: synthetic)")
+    parser.add_argument('--count', type=int, default=100000, help="Frames in the synthetic log")
+    parser.add_argument('--fast-decode', action='store_true', help="Enable the fast telemetry decoder")
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tlog = args.tlog
+        if tlog is None:
+            tlog = os.path.join(tmp, "synthetic.tlog")
+            write_synthetic_tlog(tlog, args.count)
+        results = run(tlog, fast_decode=args.fast_decode)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for name, value in results.items():
+        print(f"{name:20s} {value:14,.1f}")
+
+
+if __name__ == '__main__':
+    main()
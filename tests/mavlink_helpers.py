@@ -0,0 +1,74 @@
+"""
+Shared fixtures for the MAVLink tests.
+
+Loopback ports, connection/vehicle pairs and the local vehicle simulator
+(scripts/mavlink_sim.py) live here so that test modules never import each
+other.
+"""
+import os
+import socket
+import sys
+import time
+
+from pymavlink import mavutil
+
+from models.structs import MavlinkConnectionConfig
+from services.mavlink_service import ConnectionState, MavlinkConnection
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts")
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+from mavlink_sim import VehicleFleet  # noqa: E402,F401
+
+
+def free_udp_port() -> int:
+    """Get a loopback UDP port nothing is bound to."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def free_tcp_port() -> int:
+    """Get a loopback TCP port nothing is bound to."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def open_link_pair(system_id: int = 1):
+    """Return (connection, vehicle) joined over loopback UDP, skipping priming."""
+    port = free_udp_port()
+    conn = MavlinkConnection(MavlinkConnectionConfig(connection_string=f"udpin:127.0.0.1:{port}"))
+    conn._connection = mavutil.mavlink_connection(conn.config.connection_string)
+    conn._state = ConnectionState.CONNECTED
+    conn.status.system_id = system_id
+    conn.status.last_heartbeat = time.time()
+    vehicle = mavutil.mavlink_connection(f"udpout:127.0.0.1:{port}", source_system=system_id,
+                                         source_component=1)
+    return conn, vehicle
+
+
+def receive_until(conn, count, timeout=2.0):
+    """Receive on a connection until it has returned count messages."""
+    messages = []
+    deadline = time.time() + timeout
+    while len(messages) < count and time.time() < deadline:
+        messages.extend(conn.receive_messages(max_messages=100))
+        time.sleep(0.005)
+    return messages
+
+
+def pump(conn, gcs, seen, wanted, timeout=2.0):
+    """Receive on the connection (which forwards) and collect what the GCS gets."""
+    deadline = time.monotonic() + timeout
+    while wanted not in seen and time.monotonic() < deadline:
+        conn.receive_messages(max_messages=100)
+        msg = gcs.recv_match(blocking=False)
+        while msg is not None:
+            seen.add(msg.get_type())
+            msg = gcs.recv_match(blocking=False)
+        time.sleep(0.005)
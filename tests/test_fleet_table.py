@@ -0,0 +1,153 @@
+import multiprocessing
+import os
+import threading
+import time
+import unittest
+from multiprocessing import shared_memory
+
+from PyQt5.QtWidgets import QApplication
+
+from models.structs import MavlinkConnectionConfig, MavlinkGlobalSettings, MavlinkTelemetryData
+from services.fleet_table import FleetTableReader, FleetTableWriter, table_size
+from services.mavlink_service import MavlinkService
+
+from mavlink_helpers import VehicleFleet, free_udp_port
+
+
+def _write_under_contention(name, ready, stop):
+    """Writer process: update one row in a loop while busy threads hold the GIL."""
+    def spin():
+        while not stop.is_set():
+            pass
+
+    writer = FleetTableWriter(name)
+    busy = [threading.Thread(target=spin, daemon=True) for _ in range(3)]
+    for thread in busy:
+        thread.start()
+    ready.set()
+    value = 0.0
+    try:
+        while not stop.is_set():
+            value += 1.0
+            writer.update(7, MavlinkTelemetryData(timestamp=value, roll=value, x=value), t=value)
+    finally:
+        writer.close()
+
+
+class FleetTableTests(unittest.TestCase):
+    def test_rows_round_trip_and_are_never_torn(self):
+        name = f"fleet_test_{os.getpid()}"
+        writer = FleetTableWriter(name)
+        reader = FleetTableReader(name)
+        try:
+            self.assertIsNone(reader.read(5))
+            writer.update(5, MavlinkTelemetryData(roll=0.25, mode="OFFBOARD", armed=True), t=12.5)
+            writer.update(9, MavlinkTelemetryData(x=1.0))
+            row = reader.read(5)
+            self.assertEqual((row['t'], row['system_id'], row['connected']), (12.5, 5, True))
+            self.assertEqual((row['roll'], row['mode'], row['armed']), (0.25, "OFFBOARD", True))
+            self.assertEqual(reader.system_ids(), [5, 9])
+            self.assertEqual(reader.writes, 2)
+
+            writer.set_connected(5, False)
+            self.assertFalse(reader.read(5)['connected'])
+            self.assertEqual(reader.read(5)['roll'], 0.25)
+            writer.remove(9)
+            writer.set_connected(9, True)
+            self.assertEqual(reader.snapshot()['system_id'].tolist(), [5])
+
+            # Every field of a row holds the same value, so a torn copy would show
+            stop = threading.Event()
+
+            def write():
+                value = 0.0
+                while not stop.is_set():
+                    value += 1.0
+                    writer.update(7, MavlinkTelemetryData(
+                        timestamp=value, roll=value, x=value, vz=value, battery_voltage=value),
+                        t=value)
+
+            thread = threading.Thread(target=write)
+            thread.start()
+            try:
+                deadline = time.monotonic() + 0.5
+                while time.monotonic() < deadline:
+                    for row in [reader.read(7)] + list(reader.snapshot()):
+                        if row is not None and row['system_id'] == 7:
+                            self.assertEqual({float(row[f]) for f in ('t', 'timestamp', 'roll', 'x', 'vz',
+                                                                      'battery_voltage')}, {row['t']})
+            finally:
+                stop.set()
+                thread.join()
+        finally:
+            reader.close()
+            writer.close()
+        with self.assertRaises(FileNotFoundError):
+            FleetTableReader(name)
+
+    def test_reads_survive_a_writer_preempted_mid_write(self):
+        context = multiprocessing.get_context("spawn")
+        name = f"fleet_contention_{os.getpid()}"
+        ready, stop = context.Event(), context.Event()
+        process = context.Process(target=_write_under_contention, args=(name, ready, stop))
+        process.start()
+        try:
+            self.assertTrue(ready.wait(10.0))
+            with FleetTableReader(name) as reader:
+                reads = 0
+                deadline = time.monotonic() + 2.0
+                while time.monotonic() < deadline:
+                    row = reader.read(7)
+                    if row is not None:
+                        reads += 1
+                        self.assertEqual({float(row[f]) for f in ('t', 'timestamp', 'roll', 'x')},
+                                         {row['t']})
+                    reader.snapshot()
+                self.assertGreater(reads, 0)
+        finally:
+            stop.set()
+            process.join(5.0)
+
+    def test_rejects_blocks_that_are_not_fleet_tables(self):
+        block = shared_memory.SharedMemory(create=True, size=table_size())
+        try:
+            with self.assertRaises(ValueError):
+                FleetTableReader(block.name)
+        finally:
+            block.close()
+            block.unlink()
+
+    def test_service_publishes_connected_vehicles(self):
+        app = QApplication.instance() or QApplication([])
+        name = f"fleet_service_{os.getpid()}"
+        fleet = VehicleFleet(1, base_port=free_udp_port(), base_system_id=41)
+        fleet.start()
+        service = MavlinkService()
+        service.update_global_settings(MavlinkGlobalSettings(fleet_table_name=name))
+        service.on_start()
+        try:
+            reader = FleetTableReader(name)
+            future = service.connect_async(
+                MavlinkConnectionConfig(connection_string=fleet.connection_strings()[0]))
+            deadline = time.monotonic() + 5.0
+            while (reader.read(41) is None or not future.done()) and time.monotonic() < deadline:
+                app.processEvents()
+                service._process_telemetry()
+                time.sleep(0.005)
+            row = reader.read(41)
+            self.assertIsNotNone(row)
+            self.assertTrue(row['connected'])
+            self.assertAlmostEqual(row['battery_voltage'], 12.4, places=5)
+
+            service.remove_connection(41)
+            self.assertIsNone(reader.read(41))
+            reader.close()
+        finally:
+            service.on_stop()
+            fleet.stop()
+        with self.assertRaises(FileNotFoundError):
+            FleetTableReader(name)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+
+from models.structs import MavlinkConnectionConfig, MavlinkStreamProfile
+from services.mavlink_adaptive import (
+    MIN_SETPOINT_SCALE,
+    MIN_TELEMETRY_SCALE,
+    RECOVERY_HOLD,
+    LinkRateController,
+)
+from services.mavlink_service import MavlinkConnection
+from services.mavlink_streams import StreamSubscription
+
+
+class _Link:
+    """Cumulative link counters fed to the controller once per second."""
+
+    def __init__(self, controller):
+        self.controller = controller
+        self.now = 0.0
+        self.dropped = 0
+        self.received = 0
+        self.sent = 0
+        self.scales = []
+
+    def step(self, dropped=0, received=100, sent=1000, rtt_ms=20.0, limit=0.0, telemetry=True):
+        self.now += 1.0
+        self.dropped += dropped
+        self.received += received
+        self.sent += sent
+        if self.controller.update(self.now, self.dropped, self.received, self.sent, rtt_ms,
+                                  limit, can_lower_telemetry=telemetry):
+            self.scales.append((self.controller.telemetry_scale, self.controller.setpoint_scale))
+
+
+class LinkRateControllerTests(unittest.TestCase):
+    def test_lowers_telemetry_first_then_setpoints_and_recovers_in_reverse(self):
+        link = _Link(LinkRateController("test"))
+        link.step()
+        with self.assertLogs("services.mavlink_adaptive", level="INFO") as logs:
+            for _ in range(8):
+                link.step(dropped=20)  # ~17% loss
+        self.assertEqual(link.scales, [(0.5, 1.0), (0.25, 1.0), (MIN_TELEMETRY_SCALE, 1.0),
+                                       (MIN_TELEMETRY_SCALE, 0.5),
+                                       (MIN_TELEMETRY_SCALE, MIN_SETPOINT_SCALE)])
+        self.assertEqual(len(logs.records), 5)
+        self.assertIn("loss", logs.output[0])
+
+        # Borderline measurements hold the rates; only a healthy link recovers
+        link.scales.clear()
+        for _ in range(int(RECOVERY_HOLD) * 2):
+            link.step(rtt_ms=200.0)
+        self.assertEqual(link.scales, [])
+        with self.assertLogs("services.mavlink_adaptive", level="INFO"):
+            for _ in range(int(RECOVERY_HOLD) * 6 + 6):
+                link.step()
+        self.assertEqual(link.scales[:3], [(MIN_TELEMETRY_SCALE, 0.5), (MIN_TELEMETRY_SCALE, 1.0),
+                                           (0.25, 1.0)])
+        self.assertEqual(link.scales[-1], (1.0, 1.0))
+
+    def test_egress_utilization_throttles_setpoints_without_stream_profile(self):
+        link = _Link(LinkRateController("test", max_utilization=0.9))
+        link.step()
+        with self.assertLogs("services.mavlink_adaptive", level="INFO") as logs:
+            link.step(sent=950, limit=1000.0, telemetry=False)
+        self.assertEqual(link.scales, [(1.0, 0.5)])
+        self.assertIn("egress 95% of limit", logs.output[0])
+        link.step(sent=800, limit=1000.0, telemetry=False)
+        self.assertEqual(len(link.scales), 1)
+
+
+class ConnectionRateControlTests(unittest.TestCase):
+    def test_thins_setpoints_and_scales_stream_requests(self):
+        conn = MavlinkConnection(MavlinkConnectionConfig(connection_string="udpout:127.0.0.1:9"))
+        self.assertTrue(all(conn.setpoint_due() for _ in range(4)))
+        controller = LinkRateController("test")
+        conn.attach_rate_controller(controller)
+        controller.setpoint_scale = 0.25
+        self.assertEqual([conn.setpoint_due() for _ in range(8)], [False, False, False, True] * 2)
+        conn.detach_rate_controller()
+        self.assertTrue(conn.setpoint_due())
+
+        sent = []
+        streams = StreamSubscription(lambda command, params: sent.append(params[1]) or True)
+        streams.set_profile("lean", MavlinkStreamProfile(rates={'ATTITUDE': 50.0}))
+        streams.set_rate_scale(0.25)
+        streams.update(0.0)
+        self.assertEqual(sent, [80000])
+        self.assertEqual(streams.get_stats()['requested'], {'ATTITUDE': 80000})
+
+
+if __name__ == '__main__':
+    unittest.main()
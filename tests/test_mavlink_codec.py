@@ -0,0 +1,125 @@
+import unittest
+
+from pymavlink import mavutil
+from pymavlink.dialects.v10 import common as common_v1
+from pymavlink.dialects.v20 import common as common_v2
+
+from services.mavlink_codec import (
+    FastTelemetryDecoder,
+    HotMessageEncoder,
+    peek_header,
+    peek_target_system,
+    target_system_offsets,
+    x25crc,
+)
+
+
+def _frames():
+    """Encode one of each hot message with a pymavlink sender."""
+    mav = mavutil.mavlink.MAVLink(None, srcSystem=7, srcComponent=1)
+    return {
+        "HEARTBEAT": mav.heartbeat_encode(2, 12, 129, 65536, 4).pack(mav),
+        "SYS_STATUS": mav.sys_status_encode(1, 2, 3, 400, 12600, -1, 0, 0, 0, 0, 0, 0, 87).pack(mav),
+        "ATTITUDE": mav.attitude_encode(1000, 0.1, -0.2, 0.3, 0.0, 0.0, 1.5).pack(mav),
+        "LOCAL_POSITION_NED": mav.local_position_ned_encode(2000, 1.0, 2.0, -3.0, 0.0, 0.0, 0.0).pack(mav),
+    }
+
+
+class FastTelemetryDecoderTests(unittest.TestCase):
+    def setUp(self):
+        self.decoder = FastTelemetryDecoder(mavutil.mavlink)
+        self.reference = mavutil.mavlink.MAVLink(None)
+
+    def test_matches_pymavlink_for_hot_messages(self):
+        for name, frame in _frames().items():
+            fast = self.decoder.decode(bytearray(frame))
+            slow = self.reference.decode(bytearray(frame))
+            self.assertIsNotNone(fast, name)
+            self.assertEqual(fast.get_type(), name)
+            self.assertEqual(fast.get_srcSystem(), 7)
+            for field in slow.get_fieldnames():
+                self.assertEqual(getattr(fast, field), getattr(slow, field), f"{name}.{field}")
+
+    def test_corrupt_crc_falls_back(self):
+        frame = bytearray(_frames()["ATTITUDE"])
+        frame[-1] ^= 0xFF
+        self.assertIsNone(self.decoder.decode(frame))
+        self.assertEqual(self.decoder.get_stats()["fallbacks"], 1)
+
+    def test_crc_and_header_helpers(self):
+        self.assertEqual(x25crc(b"123456789"), 0x6F91)
+        frame = _frames()["ATTITUDE"]
+        self.assertEqual(peek_header(frame)[0], mavutil.mavlink.MAVLINK_MSG_ID_ATTITUDE)
+        self.assertIsNone(peek_header(b"\x00\x01"))
+
+
+class TargetSystemTests(unittest.TestCase):
+    def test_reads_target_without_decoding(self):
+        for dialect in (common_v1, common_v2):
+            offsets = target_system_offsets(dialect)
+            mav = dialect.MAVLink(None, srcSystem=255, srcComponent=190)
+            frames = {
+                9: mav.command_long_encode(9, 1, 511, 0, 32, 5000, 0, 0, 0, 0, 0).pack(mav),
+                5: mav.set_position_target_local_ned_encode(
+                    0, 5, 1, 1, 0xFF8, 1.0, 2.0, 3.0, 0, 0, 0, 0, 0, 0, 0, 0).pack(mav),
+                3: mav.ping_encode(1, 2, 3, 1).pack(mav),
+                0: mav.heartbeat_encode(6, 8, 0, 0, 0).pack(mav),
+            }
+            for target, frame in frames.items():
+                self.assertEqual(peek_target_system(frame, offsets), target)
+            # MAVLink 2 trims the zero target bytes at the end of a PING request
+            self.assertEqual(peek_target_system(mav.ping_encode(1, 2, 0, 0).pack(mav), offsets), 0)
+            self.assertIsNone(peek_target_system(frames[9], {}))
+
+
+class _Capture:
+    def __init__(self):
+        self.frames = []
+
+    def write(self, buf):
+        self.frames.append(bytes(buf))
+
+
+def _mav_pair(dialect, signing_key=None):
+    """Two identical senders: one for pymavlink, one for HotMessageEncoder."""
+    pair = []
+    for _ in range(2):
+        mav = dialect.MAVLink(_Capture(), srcSystem=255, srcComponent=190)
+        mav.seq = 250  # exercise sequence wrap-around
+        if signing_key is not None:
+            mav.signing.secret_key = signing_key
+            mav.signing.sign_outgoing = True
+            mav.signing.timestamp = 1234
+            mav.signing.link_id = 3
+        pair.append(mav)
+    return pair
+
+
+class HotMessageEncoderTests(unittest.TestCase):
+    def _assert_matches_pymavlink(self, dialect, signing_key=None):
+        reference, fast = _mav_pair(dialect, signing_key)
+        encoder = HotMessageEncoder(fast)
+        q = (0.7071, 0.0, 0.7071, 0.0)
+        for i in range(8):
+            if dialect is common_v1:
+                reference.att_pos_mocap_send(1000 + i, q, 1.0, 2.0, -0.5 * i)
+            else:
+                reference.att_pos_mocap_send(1000 + i, q, 1.0, 2.0, -0.5 * i, [float("nan")] * 21)
+            encoder.send_att_pos_mocap(1000 + i, q, 1.0, 2.0, -0.5 * i)
+            reference.set_position_target_local_ned_send(0, 1, 1, 1, 0x0DF8, i, 0, -1, 0, 0, 0, 0, 0, 0, 0.5, 0)
+            encoder.send_set_position_target_local_ned(0, 1, 1, 1, 0x0DF8, i, 0, -1, 0, 0, 0, 0, 0, 0, 0.5, 0)
+
+        self.assertEqual(fast.file.frames, reference.file.frames)
+        self.assertEqual(fast.seq, reference.seq)
+        self.assertEqual(fast.total_bytes_sent, reference.total_bytes_sent)
+
+    def test_matches_pymavlink_mavlink1(self):
+        self._assert_matches_pymavlink(common_v1)
+
+    def test_matches_pymavlink_mavlink2_signed(self):
+        self._assert_matches_pymavlink(common_v2)
+        self._assert_matches_pymavlink(common_v2, signing_key=bytes(range(32)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import importlib
+import time
+import unittest
+
+from pymavlink import mavutil
+from PyQt5.QtWidgets import QApplication
+
+from models.structs import MavlinkGlobalSettings
+from services.mavlink_discovery import (
+    DiscoveryScanner,
+    bound_udp_port,
+    gcs_heartbeat_packet,
+    parse_heartbeats,
+    parse_port_list,
+)
+from services.mavlink_service import MavlinkService
+
+from mavlink_helpers import VehicleFleet, free_udp_port
+
+
+# Heartbeats often enough that every scan window sees one
+RATES = {'HEARTBEAT': 5.0, 'ATTITUDE': 20.0}
+
+
+class DiscoveryParsingTests(unittest.TestCase):
+    def test_port_lists_and_bound_ports(self):
+        self.assertEqual(parse_port_list("14550, 14540-14542,14550"), [14540, 14541, 14542, 14550])
+        with self.assertRaises(ValueError):
+            parse_port_list("14560-14550")
+        self.assertEqual(bound_udp_port("udpin:0.0.0.0:14550"), 14550)
+        self.assertIsNone(bound_udp_port("udpout:10.0.0.2:14540"))
+
+    def test_parses_every_heartbeat_in_a_datagram(self):
+        dialect = importlib.import_module(f"pymavlink.dialects.v20.{mavutil.current_dialect}")
+        v2 = dialect.MAVLink(None, srcSystem=4, srcComponent=1)
+        datagram = (gcs_heartbeat_packet()
+                    + bytes(v2.attitude_encode(1, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0).pack(v2))
+                    + bytes(v2.heartbeat_encode(2, 12, 129, 0, 4).pack(v2)))
+        self.assertEqual(parse_heartbeats(datagram), [(255, 0, 6, 8, False, 1), (4, 1, 2, 12, True, 2)])
+        # The hand-built probe is a valid frame
+        self.assertEqual(mavutil.mavlink.MAVLink(None).decode(bytearray(gcs_heartbeat_packet())).type, 6)
+
+
+class DiscoveryScanTests(unittest.TestCase):
+    def test_scans_all_ports_concurrently(self):
+        ports = [free_udp_port(), free_udp_port()]
+        fleets = [VehicleFleet(1, base_port=free_udp_port(), base_system_id=3 + i, rates=RATES,
+                               target=("127.0.0.1", port)) for i, port in enumerate(ports)]
+        for fleet in fleets:
+            fleet.start()
+        try:
+            found = []
+            start = time.monotonic()
+            devices = DiscoveryScanner(bind_address="127.0.0.1").scan(ports, 1.0, on_device=found.append)
+            self.assertLess(time.monotonic() - start, 1.5)
+        finally:
+            for fleet in fleets:
+                fleet.stop()
+        self.assertEqual(sorted((d.system_id, d.port) for d in devices), [(3, ports[0]), (4, ports[1])])
+        self.assertEqual(sorted(d.system_id for d in found), [3, 4])
+        self.assertEqual(devices[0].autopilot, 12)
+
+
+class ServiceDiscoveryTests(unittest.TestCase):
+    def test_discovered_devices_are_auto_connected_and_observed(self):
+        app = QApplication.instance() or QApplication([])
+        service = MavlinkService()
+        port = free_udp_port()
+        service.update_global_settings(MavlinkGlobalSettings(
+            auto_connect_discovered=True, discovery_ports=str(port), discovery_timeout_s=0.5))
+        announced = []
+        service.device_discovered.connect(announced.append)
+        fleet = VehicleFleet(1, base_port=free_udp_port(), base_system_id=9, rates=RATES,
+                             target=("127.0.0.1", port))
+        fleet.start()
+        try:
+            devices = service.discover_devices()
+            self.assertEqual([d.system_id for d in devices], [9])
+            deadline = time.monotonic() + 3.0
+            while 9 not in service.get_active_connections() and time.monotonic() < deadline:
+                app.processEvents()
+                time.sleep(0.01)
+            self.assertIn(9, service.get_active_connections())
+
+            # The connected port is no longer scanned; its heartbeats still report the device
+            conn = service.get_connection(9)
+            deadline = time.monotonic() + 2.0
+            while time.monotonic() < deadline and not any(
+                    d.connection_string == conn.config.connection_string
+                    for d in service.get_discovered_devices()):
+                for msg in conn.receive_messages(max_messages=100):
+                    conn.process_message(msg)
+                time.sleep(0.01)
+            again = service.discover_devices(timeout_secs=0.1)
+            self.assertEqual([(d.system_id, d.connection_string) for d in again],
+                             [(9, f"udpin:0.0.0.0:{port}")])
+            self.assertEqual({d.system_id for d in announced}, {9})
+        finally:
+            for system_id in list(service.get_active_connections()):
+                service.remove_connection(system_id)
+            fleet.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
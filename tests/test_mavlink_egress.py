@@ -0,0 +1,93 @@
+import threading
+import time
+import unittest
+
+from models.structs import MavlinkMessagePriority
+from services.mavlink_egress import EgressLink, EgressScheduler, PrioritizedMessage, TokenBucket
+
+
+def _item(priority, payload, key=None, size=50, timestamp=None):
+    return PrioritizedMessage(priority.value, time.monotonic() if timestamp is None else timestamp,
+                              payload, size, key)
+
+
+class TokenBucketTests(unittest.TestCase):
+    def test_refills_at_rate_up_to_burst(self):
+        bucket = TokenBucket(rate=1000, burst=600)
+        now = time.monotonic()
+        bucket.consume(600, now)
+
+        self.assertAlmostEqual(bucket.delay_for(100, now), 0.1, places=3)
+        self.assertAlmostEqual(bucket.available(now + 0.25), 250, delta=1)
+        self.assertAlmostEqual(bucket.available(now + 5.0), 600)
+
+
+class EgressLinkTests(unittest.TestCase):
+    def test_priority_order_and_coalescing(self):
+        link = EgressLink("link")
+        now = time.monotonic()
+        link.push(_item(MavlinkMessagePriority.NORMAL, "console"))
+        link.push(_item(MavlinkMessagePriority.CRITICAL, "mocap-1", key="mocap"))
+        link.push(_item(MavlinkMessagePriority.CRITICAL, "mocap-2", key="mocap"))
+
+        sent = []
+        while True:
+            item, _delay = link.head(now)
+            if item is None:
+                break
+            link.pop(item)
+            sent.append(item.message)
+
+        self.assertEqual(sent, ["mocap-2", "console"])
+        self.assertEqual(link.get_stats()["priorities"]["critical"]["coalesced"], 1)
+
+    def test_stale_periodic_samples_are_shed(self):
+        link = EgressLink("link")
+        now = time.monotonic()
+        link.push(_item(MavlinkMessagePriority.CRITICAL, "old-mocap", key="mocap", timestamp=now - 1.0))
+        link.push(_item(MavlinkMessagePriority.NORMAL, "old-console", timestamp=now - 10.0))
+
+        item, _delay = link.head(now)
+        self.assertEqual(item.message, "old-console")  # unkeyed traffic is never aged out
+        self.assertEqual(link.get_stats()["priorities"]["critical"]["shed"], 1)
+
+
+class EgressSchedulerTests(unittest.TestCase):
+    def test_saturated_link_sends_critical_first(self):
+        egress = EgressScheduler(name="test-egress")
+        sent = []
+        done = threading.Event()
+
+        def send(label):
+            sent.append(label)
+            if len(sent) == 20:
+                done.set()
+            return 100
+
+        # 2 kB/s with a 600 byte burst: room for only a few frames at once
+        egress.add_link("radio", bytes_per_sec=2000, burst_bytes=600)
+        for i in range(10):
+            egress.submit("radio", MavlinkMessagePriority.NORMAL, lambda i=i: send(f"normal-{i}"), 100)
+        for i in range(10):
+            egress.submit("radio", MavlinkMessagePriority.HIGH, lambda i=i: send(f"high-{i}"), 100)
+        egress.start()
+        try:
+            self.assertTrue(done.wait(3.0))
+        finally:
+            egress.stop()
+
+        self.assertTrue(all(label.startswith("high") for label in sent[:10]))
+        stats = egress.get_link_stats("radio")
+        self.assertEqual(stats["priorities"]["high"]["sent"], 10)
+        self.assertEqual(stats["priorities"]["normal"]["sent"], 10)
+        self.assertEqual(stats["bytes_sent"], 2000)
+        # NORMAL frames waited behind every HIGH frame for the bucket to refill
+        high, normal = (stats["priorities"][p]["queue_delay"] for p in ("high", "normal"))
+        self.assertEqual((high["count"], normal["count"]), (10, 10))
+        self.assertGreater(normal["p50_ms"], high["p50_ms"])
+        self.assertTrue(egress.reset_link_timing("radio"))
+        self.assertEqual(egress.get_link_stats("radio")["priorities"]["high"]["queue_delay"], {"count": 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
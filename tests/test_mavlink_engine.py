@@ -0,0 +1,88 @@
+import os
+import time
+import unittest
+
+from PyQt5.QtWidgets import QApplication
+
+from models.structs import MavlinkConnectionConfig, MavlinkGlobalSettings, MavlinkObjectConfig
+from services.fleet_table import FleetTableReader
+from services.mavlink_service import MavlinkService
+
+from mavlink_helpers import VehicleFleet, free_udp_port
+
+
+class _Pose:
+    def __init__(self, pose):
+        self.pose = pose
+
+
+class EngineProcessTests(unittest.TestCase):
+    def _pump(self, service, until, timeout=10.0):
+        deadline = time.monotonic() + timeout
+        while not until() and time.monotonic() < deadline:
+            service._push_poses()
+            service._process_engine()
+            self.app.processEvents()
+            time.sleep(0.01)
+        return until()
+
+    def test_links_run_in_the_engine_process(self):
+        self.app = QApplication.instance() or QApplication([])
+        fleet = VehicleFleet(2, base_port=free_udp_port(), base_system_id=31)
+        fleet.start()
+        vehicle = fleet.vehicles[0]
+        service = MavlinkService()
+        table_name = f"engine_fleet_{os.getpid()}"
+        service.update_global_settings(MavlinkGlobalSettings(engine_process=True,
+                                                             fleet_table_name=table_name))
+        errors, published = [], set()
+        service.error_occurred.connect(errors.append)
+        service.telemetry_updated.connect(lambda system_id, snapshot: published.add(system_id))
+        service.on_start()
+        try:
+            self.assertIsNotNone(service._engine)
+            futures = [service.connect_async(MavlinkConnectionConfig(connection_string=s))
+                       for s in fleet.connection_strings()]
+            self.assertTrue(self._pump(service, lambda: all(f.done() for f in futures)))
+            self.assertEqual(sorted(f.result(0) for f in futures), [31, 32])
+            self.assertTrue(service.get_active_connections()[31].is_connected)
+
+            # The publish timer delivers snapshots of the mirrored connections
+            self.assertTrue(self._pump(service, lambda: published == {31, 32}))
+
+            # Poses go out through the pose ring, telemetry comes back through its ring
+            service.register_mocap_source(31, _Pose([1.0, 2.0, 3.0, 1.0, 0.0, 0.0, 0.0]))
+            self.assertTrue(self._pump(service, lambda: vehicle.position == [1.0, 3.0, -2.0]))
+            self.assertTrue(self._pump(service, lambda: len(service.get_telemetry_history(31, 5.0)) > 0))
+            self.assertTrue(self._pump(service, lambda: service.get_connection_statistics()[
+                'engine']['telemetry']['written'] > 0))
+
+            with FleetTableReader(table_name) as table:
+                self.assertTrue(self._pump(service, lambda: table.read(31) is not None))
+
+            stats = service.get_connection_statistics()['engine']
+            self.assertTrue(stats['alive'])
+            self.assertNotEqual(stats['pid'], os.getpid())
+
+            # Poses are pushed at the fastest remaining mocap rate, and not at all without sources
+            fast = _Pose([0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0])
+            service.register_mavlink_object(fast, MavlinkObjectConfig(
+                enabled=True, system_id=32, mocap_rate_hz=200.0))
+            self.assertEqual(service._pose_timer.interval(), 5)
+            service.unregister_mavlink_object(fast)
+            self.assertEqual(service._pose_timer.interval(), 10)
+            service.unregister_mocap_source(31)
+            self.assertFalse(service._pose_timer.isActive())
+
+            service.remove_connection(31)
+            service.remove_connection(32)
+            self.assertEqual(service.get_active_connections(), {})
+            self.assertEqual(errors, [])
+        finally:
+            service.on_stop()
+            fleet.stop()
+        self.assertIsNone(service._engine)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,167 @@
+import socket
+import struct
+import time
+import unittest
+
+from pymavlink import mavutil
+
+from models.structs import MavlinkConnectionConfig, MavlinkForwardConfig
+from services.mavlink_codec import v2_dialect
+from services.mavlink_forward import ForwardOutput, MavlinkForwarder, parse_output_address, split_frames
+from services.mavlink_service import MavlinkService
+
+from mavlink_helpers import VehicleFleet, free_tcp_port, free_udp_port, pump
+
+
+class ForwarderTests(unittest.TestCase):
+    def test_splits_stream_into_frames_across_reads(self):
+        mav = v2_dialect().MAVLink(None, srcSystem=255, srcComponent=190)
+        ping = bytes(mav.ping_encode(1, 2, 3, 1).pack(mav))
+        beat = bytes(mav.heartbeat_encode(6, 8, 0, 0, 0).pack(mav))
+        stream = b'\x00junk' + ping + beat[:4]
+        frames, consumed = split_frames(stream)
+        self.assertEqual(frames, [ping])
+        frames, _ = split_frames(stream[consumed:] + beat[4:])
+        self.assertEqual(frames, [beat])
+        self.assertEqual(parse_output_address("tcpin:0.0.0.0:5760"), ("tcpin", "0.0.0.0", 5760))
+        with self.assertRaises(ValueError):
+            parse_output_address("serial:/dev/ttyUSB0:57600")
+
+    def test_uplink_rate_limit_drops_ground_station_flood(self):
+        relayed = []
+        forwarder = MavlinkForwarder(lambda frame, target, output: relayed.append(target))
+        port = free_tcp_port()
+        output = ForwardOutput("gcs", f"tcpin:127.0.0.1:{port}", system_ids=[3],
+                               uplink_rate_limit_bps=600)
+        forwarder.add_output(output)
+        forwarder.start()
+        mav = v2_dialect().MAVLink(None, srcSystem=255, srcComponent=190)
+        client = socket.create_connection(("127.0.0.1", port))
+        try:
+            # 100 PINGs for system 3 (about 2 KiB) in one burst, plus one for another vehicle
+            client.sendall(b''.join(bytes(mav.ping_encode(i, i, 3, 1).pack(mav)) for i in range(100))
+                           + bytes(mav.ping_encode(0, 0, 9, 1).pack(mav)))
+            deadline = time.monotonic() + 2.0
+            while output.frames_in + output.uplink_dropped + output.filtered < 101 \
+                    and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            client.close()
+            forwarder.stop()
+        self.assertEqual(set(relayed), {3})
+        self.assertLess(len(relayed), 50)
+        self.assertEqual(output.frames_in + output.uplink_dropped, 100)
+        self.assertEqual(output.filtered, 1)
+
+    def test_tcp_output_reconnects_after_server_reset(self):
+        port = free_tcp_port()
+        forwarder = MavlinkForwarder(lambda frame, target, output: None)
+        output = ForwardOutput("log", f"tcp:127.0.0.1:{port}")
+        forwarder.add_output(output)
+        mav = v2_dialect().MAVLink(None, srcSystem=4, srcComponent=1)
+        beat = bytes(mav.heartbeat_encode(2, 12, 0, 0, 4).pack(mav))
+
+        def listen():
+            server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            server.bind(("127.0.0.1", port))
+            server.listen(1)
+            server.settimeout(3.0)
+            return server
+
+        def accept_and_receive(server):
+            client, _ = server.accept()
+            client.settimeout(0.05)
+            deadline = time.monotonic() + 3.0
+            while time.monotonic() < deadline:
+                forwarder.forward(beat)
+                try:
+                    if client.recv(4096):
+                        return client
+                except socket.timeout:
+                    pass
+            self.fail("No frames forwarded over the TCP connection")
+
+        server = listen()
+        forwarder.start()
+        client = None
+        try:
+            client = accept_and_receive(server)
+            # Reset the connection, keep sending into it, then restart the server
+            client.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+            client.close()
+            server.close()
+            for _ in range(20):
+                forwarder.forward(beat)
+                time.sleep(0.01)
+            server = listen()
+            client = accept_and_receive(server)
+            self.assertEqual(len(output.streams), 1)
+        finally:
+            if client is not None:
+                client.close()
+            server.close()
+            forwarder.stop()
+
+
+class ServiceForwardTests(unittest.TestCase):
+    def test_forwards_filtered_frames_and_relays_replies(self):
+        service = MavlinkService()
+        fleet = VehicleFleet(1, base_port=free_udp_port(), base_system_id=7,
+                             rates={'HEARTBEAT': 5.0, 'ATTITUDE': 50.0})
+        fleet.start()
+        gcs_port = free_udp_port()
+        gcs = mavutil.mavlink_connection(f"udpin:127.0.0.1:{gcs_port}", source_system=255,
+                                         source_component=190)
+        try:
+            self.assertTrue(service.add_connection(MavlinkConnectionConfig(
+                connection_string=fleet.connection_strings()[0])))
+            conn = service.get_connection(7)
+            self.assertTrue(service.add_forward_output(MavlinkForwardConfig(
+                address=f"udpout:127.0.0.1:{gcs_port}", name="qgc", exclude_messages=['ATTITUDE'])))
+            with self.assertLogs("services.mavlink_service", level="WARNING"):
+                self.assertFalse(service.add_forward_output(MavlinkForwardConfig(
+                    address="udpout:127.0.0.1:1", exclude_messages=['NOT_A_MESSAGE'])))
+
+            seen = set()
+            pump(conn, gcs, seen, 'HEARTBEAT')
+            self.assertIn('HEARTBEAT', seen)
+            self.assertNotIn('ATTITUDE', seen)
+
+            # The ground station's PING is relayed to the vehicle, which answers it
+            gcs.mav.ping_send(int(time.time() * 1e6), 42, 0, 0)
+            pump(conn, gcs, seen, 'PING')
+            self.assertIn('PING', seen)
+            stats = service.get_connection_statistics()['forwarding']['outputs']
+            self.assertEqual([(s['name'], s['frames_in']) for s in stats], [('qgc', 1)])
+            self.assertGreater(stats[0]['filtered'], 0)
+
+            self.assertTrue(service.remove_forward_output("qgc"))
+            self.assertIsNone(service.get_connection_statistics()['forwarding'])
+        finally:
+            for system_id in list(service.get_active_connections()):
+                service.remove_connection(system_id)
+            service.remove_forward_output("qgc")
+            gcs.close()
+            fleet.stop()
+
+    def test_listening_output_can_be_replaced_under_the_same_name(self):
+        service = MavlinkService()
+        udp_port, tcp_port = free_udp_port(), free_tcp_port()
+        try:
+            for name, address in (("udp", f"udpin:127.0.0.1:{udp_port}"),
+                                  ("tcp", f"tcpin:127.0.0.1:{tcp_port}")):
+                self.assertTrue(service.add_forward_output(MavlinkForwardConfig(address=address, name=name)))
+                # Same address, new filters: the old output must let go of the port first
+                self.assertTrue(service.add_forward_output(MavlinkForwardConfig(
+                    address=address, name=name, exclude_messages=['ATTITUDE'])))
+                self.assertEqual(service.get_forward_outputs()[name].exclude_messages, ['ATTITUDE'])
+            stats = service.get_connection_statistics()['forwarding']['outputs']
+            self.assertEqual(sorted(s['name'] for s in stats), ["tcp", "udp"])
+        finally:
+            service.remove_forward_output("udp")
+            service.remove_forward_output("tcp")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import threading
+import time
+import unittest
+
+from PyQt5.QtWidgets import QApplication
+
+from models.structs import MavlinkConnectionConfig
+from services.mavlink_linktest import LinkProbe, grade_link_quality
+from services.mavlink_service import MavlinkService
+
+from mavlink_helpers import VehicleFleet, free_udp_port, open_link_pair, receive_until
+
+
+class LinkProbeTests(unittest.TestCase):
+    def test_matches_replies_and_reports_percentiles(self):
+        probe = LinkProbe()
+        seqs = [probe.next_seq(i * 0.01) for i in range(100)]
+        self.assertEqual(seqs, list(range(1, 101)))
+        # 95 replies after 20 ms, 3 after 200 ms, two lost; seq 10 arrives late
+        for seq in seqs[:95]:
+            if seq != 10:
+                self.assertTrue(probe.on_reply(seq, (seq - 1) * 0.01 + 0.02))
+        for seq in (96, 97, 98, 10):
+            self.assertTrue(probe.on_reply(seq, (seq - 1) * 0.01 + 0.2))
+        self.assertTrue(probe.on_reply(97, 5.0))
+        self.assertFalse(probe.on_reply(500, 5.0))
+
+        result = probe.get_results()
+        self.assertEqual((result['pings_sent'], result['pings_received'], result['lost']), (100, 98, 2))
+        self.assertAlmostEqual(result['loss_rate'], 0.02)
+        self.assertEqual((result['reordered'], result['duplicates']), (1, 1))
+        self.assertAlmostEqual(result['rtt_p50_ms'], 20.0)
+        self.assertAlmostEqual(result['rtt_p99_ms'], 200.0)
+        self.assertAlmostEqual(result['rtt_max_ms'], 200.0)
+        self.assertEqual(grade_link_quality(result), 'fair')
+
+        result.update(loss_rate=0.1)
+        self.assertEqual(grade_link_quality(result), 'poor')
+        result.update(rtt_p99_ms=80.0, loss_rate=0.0)
+        self.assertEqual(grade_link_quality(result), 'good')
+        self.assertEqual(grade_link_quality(LinkProbe().get_results()), 'poor')
+
+
+    def test_vehicle_ping_requests_are_not_replies(self):
+        conn, vehicle = open_link_pair(system_id=4)
+        try:
+            probe = conn.start_link_probe()
+            seq = probe.next_seq(time.monotonic())
+            # The vehicle pinging us (0/0) with a matching seq, then its actual reply
+            vehicle.mav.ping_send(1000, seq, 0, 0)
+            vehicle.mav.ping_send(2000, seq, conn.config.source_system, conn.config.source_component)
+            messages = receive_until(conn, 2)
+            self.assertEqual(len(messages), 2)
+
+            conn.process_message(messages[0])
+            self.assertEqual(probe.get_results()['pings_received'], 0)
+            conn.process_message(messages[1])
+            self.assertEqual(probe.get_results()['pings_received'], 1)
+        finally:
+            conn.disconnect()
+            vehicle.close()
+
+
+class ConnectionTestTests(unittest.TestCase):
+    def test_probes_every_connection_in_parallel(self):
+        app = QApplication.instance() or QApplication([])
+        fleet = VehicleFleet(2, base_port=free_udp_port(), base_system_id=21)
+        fleet.start()
+        service = MavlinkService()
+        try:
+            futures = service.connect_many([MavlinkConnectionConfig(connection_string=s)
+                                            for s in fleet.connection_strings()])
+            deadline = time.monotonic() + 5.0
+            while not all(f.done() for f in futures) and time.monotonic() < deadline:
+                app.processEvents()
+                time.sleep(0.005)
+            self.assertEqual(sorted(f.result(0) for f in futures), [21, 22])
+
+            results = {}
+            worker = threading.Thread(
+                target=lambda: results.update(service._run_connection_test_sync(0.5, 40.0)))
+            started = time.monotonic()
+            worker.start()
+            while worker.is_alive():
+                service._process_telemetry()
+                time.sleep(0.002)
+            # Both links were tested at once, not one after the other
+            self.assertLess(time.monotonic() - started, 2.5)
+
+            self.assertEqual(sorted(results), [21, 22])
+            for result in results.values():
+                self.assertEqual(result['pings_sent'], 20)
+                self.assertEqual(result['lost_packets'], 0)
+                self.assertLessEqual(result['rtt_min_ms'], result['rtt_p50_ms'])
+                self.assertLessEqual(result['rtt_p50_ms'], result['rtt_p99_ms'])
+                self.assertLessEqual(result['rtt_p99_ms'], result['rtt_max_ms'])
+                self.assertEqual(result['latency_ms'], result['rtt_p50_ms'])
+                self.assertGreater(result['rx_bytes_per_sec'], 0)
+                self.assertGreater(result['tx_bytes_per_sec'], 0)
+                self.assertEqual(result['quality'], 'good')
+        finally:
+            for system_id in list(service.get_active_connections()):
+                service.remove_connection(system_id)
+            fleet.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
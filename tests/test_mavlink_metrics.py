@@ -0,0 +1,165 @@
+import unittest
+
+from services.mavlink_metrics import (
+    JitterStats,
+    LinkTimingStats,
+    LogHistogram,
+    MessageRateMeter,
+    RateMeter,
+    SourceStatsTable,
+)
+
+
+class RateMeterTests(unittest.TestCase):
+    def test_rate_counts_events_in_window_and_decays(self):
+        meter = RateMeter(window_secs=1.0, buckets=10)
+        for i in range(100):
+            meter.mark(10.0 + i * 0.01)
+
+        self.assertAlmostEqual(meter.rate(10.99), 100.0)
+        # Only the buckets from 10.6 s onwards are still inside the window
+        self.assertAlmostEqual(meter.rate(11.5), 40.0, delta=1.0)
+        self.assertEqual(meter.rate(13.0), 0.0)
+
+    def test_per_type_rates(self):
+        meter = MessageRateMeter(window_secs=1.0, buckets=10)
+        for i in range(50):
+            now = 5.0 + i * 0.02
+            meter.mark("ATTITUDE", now)
+            if i % 5 == 0:
+                meter.mark("HEARTBEAT", now)
+
+        rates = meter.type_rates(5.99)
+        self.assertAlmostEqual(rates["ATTITUDE"], 50.0)
+        self.assertAlmostEqual(rates["HEARTBEAT"], 10.0)
+        self.assertAlmostEqual(meter.rate(5.99), 60.0)
+
+
+class JitterStatsTests(unittest.TestCase):
+    def test_percentiles_of_interval_deviation(self):
+        stats = JitterStats(period_s=0.01)
+        now = 0.0
+        stats.record(now)
+        for i in range(100):
+            # Every tenth interval is 5 ms late, the rest are exact
+            now += 0.015 if i % 10 == 9 else 0.01
+            stats.record(now)
+
+        result = stats.get_stats()
+        self.assertEqual(result["samples"], 100)
+        self.assertAlmostEqual(result["p50_ms"], 0.0, places=6)
+        self.assertAlmostEqual(result["p99_ms"], 5.0, places=6)
+        self.assertAlmostEqual(result["max_ms"], 5.0, places=6)
+        self.assertAlmostEqual(result["mean_interval_ms"], 10.5, places=6)
+
+
+class LogHistogramTests(unittest.TestCase):
+    def test_percentiles_within_relative_error(self):
+        histogram = LogHistogram()
+        for i in range(1, 1001):
+            histogram.record(i / 1000.0)  # 1 ms .. 1 s
+        stats = histogram.get_stats()
+        self.assertEqual(stats["count"], 1000)
+        self.assertAlmostEqual(stats["min_ms"], 1.0)
+        self.assertAlmostEqual(stats["max_ms"], 1000.0)
+        self.assertAlmostEqual(stats["mean_ms"], 500.5, places=3)
+        for key, expected in (("p50_ms", 500.0), ("p90_ms", 900.0), ("p99_ms", 990.0)):
+            self.assertAlmostEqual(stats[key], expected, delta=expected / 16)
+
+        # Out-of-range values are clamped and reset keeps the preallocated counters
+        counters = histogram._counts
+        histogram.record(-1.0)
+        histogram.record(1e6)
+        self.assertEqual(histogram.get_stats()["max_ms"], 60000.0)
+        histogram.reset()
+        self.assertIs(histogram._counts, counters)
+        self.assertEqual(histogram.get_stats(), {"count": 0})
+
+    def test_link_timing_by_message_type(self):
+        timing = LinkTimingStats()
+        for i in range(11):
+            now = 2.0 + i * 0.02
+            timing.arrival("ATTITUDE", now)
+            timing.processed("ATTITUDE", now)
+            if i % 5 == 0:
+                timing.published(now + 0.003)
+        stats = timing.get_stats()
+        self.assertEqual(stats["inter_arrival"]["ATTITUDE"]["count"], 10)
+        self.assertAlmostEqual(stats["inter_arrival"]["ATTITUDE"]["p50_ms"], 20.0, delta=1.25)
+        # Each publish reports the oldest message it carried: 3 ms, then 83 ms twice
+        ui = stats["ui_latency"]["ATTITUDE"]
+        self.assertEqual(ui["count"], 3)
+        self.assertAlmostEqual(ui["min_ms"], 3.0)
+        self.assertAlmostEqual(ui["max_ms"], 83.0)
+
+        timing.reset()
+        self.assertEqual(timing.get_stats()["inter_arrival"]["ATTITUDE"], {"count": 0})
+
+
+class SourceStatsTableTests(unittest.TestCase):
+    def test_loss_is_counted_per_sender(self):
+        table = SourceStatsTable()
+        now = 1.0
+        # Autopilot (1, 1) and camera (1, 100) interleave their own sequences
+        for seq in range(300):
+            now += 0.01
+            table.record(1, 1, seq & 0xFF, 40, now)
+            if seq % 3 == 0:
+                table.record(1, 100, (seq // 3) & 0xFF, 20, now)
+        self.assertEqual(table.lost, 0)
+
+        # A real gap, then a duplicate, and a late frame that was not lost after all
+        self.assertEqual(table.record(1, 1, 50, 40, now), 6)   # 44..49 missing
+        self.assertEqual(table.record(1, 1, 50, 40, now), 0)   # duplicate
+        self.assertEqual(table.record(1, 1, 51, 40, now), 0)
+        self.assertEqual(table.record(1, 1, 48, 40, now), -1)  # late
+        self.assertEqual(table.record(1, 1, 52, 40, now), 0)
+        # A sender that restarts its sequence after a pause resynchronizes
+        self.assertEqual(table.record(1, 100, 0, 20, now + 5.0), 0)
+        self.assertEqual(table.record(1, 100, 1, 20, now + 5.01), 0)
+        now += 5.01
+
+        autopilot, camera = table.get_stats(now)
+        self.assertEqual((autopilot["system_id"], autopilot["component_id"]), (1, 1))
+        self.assertEqual((autopilot["received"], autopilot["lost"], autopilot["out_of_order"]),
+                         (305, 5, 2))
+        self.assertEqual(autopilot["bytes"], 305 * 40)
+        self.assertAlmostEqual(autopilot["loss_rate"], 5 / 310)
+        self.assertEqual((camera["component_id"], camera["lost"], camera["out_of_order"]), (100, 0, 0))
+        self.assertAlmostEqual(table.loss_rate, 5 / (table.received + 5))
+
+    def test_burst_loss_longer_than_reorder_window_is_counted(self):
+        table = SourceStatsTable()
+        now = 1.0
+        for seq in range(11):
+            now += 0.01
+            table.record(1, 1, seq, 40, now)
+
+        # A 1.5 s dropout at 100 Hz: 150 frames lost, not one late frame
+        now += 1.51
+        self.assertEqual(table.record(1, 1, 161, 40, now), 150)
+        for seq in range(162, 171):
+            now += 0.01
+            table.record(1, 1, seq, 40, now)
+
+        stats, = table.get_stats(now)
+        self.assertEqual((stats["lost"], stats["out_of_order"]), (150, 0))
+
+    def test_late_frames_never_move_the_expected_sequence(self):
+        table = SourceStatsTable()
+        now = 1.0
+        for seq in (0, 1, 2, 3, 4, 5, 2, 3, 6):
+            now += 0.01
+            table.record(1, 1, seq, 40, now)
+
+        stats, = table.get_stats(now)
+        self.assertEqual((stats["lost"], stats["out_of_order"]), (0, 2))
+        # The map wraps with the sequence: 256 frames later 2 is new again
+        for seq in range(7, 256 + 3):
+            now += 0.01
+            self.assertEqual(table.record(1, 1, seq & 0xFF, 40, now), 0)
+        self.assertEqual(table.get_stats(now)[0]["out_of_order"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
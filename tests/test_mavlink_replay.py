@@ -0,0 +1,106 @@
+import os
+import struct
+import tempfile
+import time
+import unittest
+
+from pymavlink import mavutil
+
+from models.structs import MavlinkConnectionConfig
+from services.mavlink_replay import ReplayLink, parse_replay_string
+from services.mavlink_service import MavlinkConnection
+from services.mavlink_tlog import LINK_OUTBOUND
+
+
+def _write_tlog(path, count=20, interval=0.1, start=1000.0):
+    """Write a log of alternating HEARTBEAT/ATTITUDE plus one outbound frame."""
+    vehicle = mavutil.mavlink.MAVLink(None, srcSystem=7, srcComponent=1)
+    gcs = mavutil.mavlink.MAVLink(None, srcSystem=255, srcComponent=0)
+    with open(path, 'wb') as f:
+        for i in range(count):
+            if i % 2:
+                msg = vehicle.attitude_encode(i, 0.01 * i, 0.0, 0.0, 0.0, 0.0, 0.0)
+            else:
+                msg = vehicle.heartbeat_encode(2, 12, 129, 0, 4)
+            usec = int((start + i * interval) * 1e6) & ~3
+            f.write(struct.pack('>Q', usec) + msg.pack(vehicle))
+            if i == 1:
+                sent = gcs.heartbeat_encode(6, 8, 0, 0, 4).pack(gcs)
+                f.write(struct.pack('>Q', usec | LINK_OUTBOUND) + sent)
+
+
+class ReplayStringTests(unittest.TestCase):
+    def test_parse_options(self):
+        self.assertEqual(parse_replay_string("replay:logs/a.tlog"), ("logs/a.tlog", 1.0, False))
+        self.assertEqual(parse_replay_string("replay:a.tlog?speed=max&loop=1"), ("a.tlog", 0.0, True))
+        self.assertEqual(parse_replay_string("replay:a.tlog?speed=4"), ("a.tlog", 4.0, False))
+        with self.assertRaises(ValueError):
+            parse_replay_string("udpin:0.0.0.0:14550")
+
+
+class ReplayLinkTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, "flight.tlog")
+        _write_tlog(self.path)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_max_speed_plays_inbound_frames_and_builds_index(self):
+        link = ReplayLink(self.path, speed=0)
+        self.assertTrue(os.path.exists(self.path + ".idx"))
+        self.assertEqual(link.wait_heartbeat().get_srcSystem(), 7)
+
+        messages = []
+        while True:
+            msg = link.recv_match(blocking=False)
+            if msg is None:
+                break
+            messages.append(msg)
+        link.close()
+
+        self.assertEqual(len(messages), 20)
+        self.assertEqual({m.get_srcSystem() for m in messages}, {7})
+        self.assertEqual(messages[3].time_boot_ms, 3)
+        self.assertTrue(link.finished)
+        self.assertAlmostEqual(link.duration_s, 1.9)
+
+    def test_paced_playback_pause_and_seek(self):
+        link = ReplayLink(self.path, speed=10.0)
+        self.assertIsNotNone(link.recv_match(blocking=False))
+        # The next frame is 0.1 s of log time = 10 ms away at 10x
+        self.assertIsNone(link.recv_match(blocking=False))
+        start = time.monotonic()
+        self.assertIsNotNone(link.recv_match(blocking=True, timeout=1.0))
+        self.assertGreater(time.monotonic() - start, 0.005)
+
+        link.pause()
+        self.assertIsNone(link.recv_match(blocking=True, timeout=0.05))
+        link.seek(1.5)
+        link.resume()
+        msg = link.recv_match(type='ATTITUDE', blocking=True, timeout=1.0)
+        self.assertEqual(msg.time_boot_ms, 15)
+        link.close()
+
+
+class ReplayConnectionTests(unittest.TestCase):
+    def test_replay_connection_updates_telemetry(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "flight.tlog")
+            _write_tlog(path)
+            conn = MavlinkConnection(MavlinkConnectionConfig(
+                connection_string=f"replay:{path}?speed=max"))
+            self.assertTrue(conn.connect())
+            self.assertEqual(conn.status.system_id, 7)
+            self.assertIsNotNone(conn.replay)
+
+            for msg in conn.receive_messages(max_messages=100):
+                conn.process_message(msg)
+            self.assertAlmostEqual(conn.telemetry.roll, 0.19, places=5)
+            self.assertTrue(conn.send_heartbeat())
+            conn.disconnect()
+
+
+if __name__ == '__main__':
+    unittest.main()
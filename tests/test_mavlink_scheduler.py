@@ -0,0 +1,57 @@
+import time
+import unittest
+
+from services.mavlink_scheduler import DeadlineScheduler, MissPolicy
+
+
+class DeadlineSchedulerTests(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = DeadlineScheduler(name="test-deadline")
+        self.scheduler.start()
+
+    def tearDown(self):
+        self.scheduler.stop()
+
+    def test_runs_task_at_requested_rate(self):
+        calls = []
+        self.scheduler.add_task("drone", 0.005, lambda: calls.append(time.monotonic()))
+        time.sleep(0.3)
+        self.scheduler.remove_task("drone")
+
+        # 200 Hz for 0.3 s; allow generous slack for loaded CI machines
+        self.assertGreater(len(calls), 40)
+        self.assertLess(len(calls), 70)
+        self.assertIsNone(self.scheduler.get_task_stats("drone"))
+
+    def test_skip_policy_drops_missed_slots(self):
+        self.scheduler.add_task("slow", 0.01, lambda: time.sleep(0.025), MissPolicy.SKIP)
+        time.sleep(0.3)
+        stats = self.scheduler.get_task_stats("slow")
+
+        self.assertGreater(stats["missed"], 0)
+        self.assertLess(stats["sends"], 15)
+        self.assertEqual(stats["policy"], "skip")
+
+    def test_returning_false_is_not_counted_as_send(self):
+        self.scheduler.add_task("idle", 0.005, lambda: False)
+        time.sleep(0.1)
+        stats = self.scheduler.get_task_stats("idle")
+
+        self.assertEqual(stats["sends"], 0)
+        self.assertEqual(stats["jitter"]["samples"], 0)
+
+    def test_external_timing_records_reported_writes_only(self):
+        self.scheduler.add_task("queued", 0.005, lambda: True, external_timing=True)
+        time.sleep(0.05)
+        self.assertEqual(self.scheduler.get_task_stats("queued")["jitter"]["samples"], 0)
+
+        for t in (10.0, 10.005, 10.010):
+            self.scheduler.record_send("queued", t)
+        stats = self.scheduler.get_task_stats("queued")
+
+        self.assertGreater(stats["sends"], 0)
+        self.assertEqual(stats["jitter"]["samples"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
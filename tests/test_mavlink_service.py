@@ -0,0 +1,235 @@
+import time
+import unittest
+
+from pymavlink import mavutil
+from PyQt5.QtWidgets import QApplication
+
+from models.structs import MavlinkConnectionConfig, MavlinkGlobalSettings, MavlinkObjectConfig
+from services.mavlink_io import MessageInbox, SelectorEngine
+from services.mavlink_scheduler import DeadlineScheduler
+from services.mavlink_service import MavlinkService, ReceiveMode
+
+from mavlink_helpers import VehicleFleet, free_udp_port, open_link_pair, receive_until
+
+
+class MessageInboxTests(unittest.TestCase):
+    def test_drops_oldest_when_full_and_notifies_once_per_drain(self):
+        wakeups = []
+        inbox = MessageInbox(maxsize=3, on_ready=lambda: wakeups.append(1))
+
+        for i in range(5):
+            inbox.put(i)
+
+        self.assertEqual(len(wakeups), 1)
+        self.assertEqual(inbox.get_stats()["dropped"], 2)
+        self.assertEqual(inbox.drain(), [2, 3, 4])
+
+        inbox.put(5)
+        self.assertEqual(len(wakeups), 2)
+
+
+class MavlinkConnectionReceiveTests(unittest.TestCase):
+    def test_receive_thread_decodes_and_queues_messages(self):
+        conn, vehicle = open_link_pair()
+        try:
+            self.assertTrue(conn.start_receive_thread(queue_size=100))
+            self.assertEqual(conn.receive_mode, ReceiveMode.THREAD)
+
+            for i in range(10):
+                vehicle.mav.attitude_send(i, 0.1, 0.2, 0.3, 0.0, 0.0, 0.0)
+            messages = receive_until(conn, 10)
+
+            self.assertEqual(len(messages), 10)
+            self.assertEqual(conn.status.messages_received, 10)
+            stats = conn.get_receive_queue_stats()
+            self.assertEqual(stats["mode"], "thread")
+            self.assertEqual(stats["dropped"], 0)
+        finally:
+            conn.disconnect()
+            vehicle.close()
+
+        self.assertEqual(conn.receive_mode, ReceiveMode.POLL)
+
+    def test_selector_engine_services_chatty_and_quiet_links(self):
+        engine = SelectorEngine(messages_per_link=8)
+        engine.start()
+        chatty, chatty_vehicle = open_link_pair(system_id=1)
+        quiet, quiet_vehicle = open_link_pair(system_id=2)
+        try:
+            # Queue the traffic before attaching so the chatty link has a backlog
+            for i in range(200):
+                chatty_vehicle.mav.attitude_send(i, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+            for i in range(5):
+                quiet_vehicle.mav.attitude_send(i, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+
+            self.assertTrue(chatty.attach_selector_engine(engine, queue_size=1000))
+            self.assertTrue(quiet.attach_selector_engine(engine, queue_size=1000))
+            self.assertEqual(quiet.receive_mode, ReceiveMode.SELECTOR)
+
+            self.assertEqual(len(receive_until(quiet, 5)), 5)
+            self.assertEqual(len(receive_until(chatty, 200)), 200)
+            self.assertEqual(engine.get_stats()["links"], 2)
+            self.assertGreater(engine.get_stats()["budget_exhausted"], 0)
+        finally:
+            chatty.disconnect()
+            quiet.disconnect()
+            chatty_vehicle.close()
+            quiet_vehicle.close()
+            engine.stop()
+
+
+class MavlinkConnectionDispatchTests(unittest.TestCase):
+    def test_custom_handler_runs_after_builtin_and_is_profiled(self):
+        conn, vehicle = open_link_pair()
+        seen = []
+        try:
+            msg_id = conn.register_message_handler("ATTITUDE", seen.append, name="recorder")
+            self.assertEqual(msg_id, mavutil.mavlink.MAVLINK_MSG_ID_ATTITUDE)
+
+            vehicle.mav.attitude_send(0, 0.5, 0.0, 0.0, 0.0, 0.0, 0.0)
+            for msg in receive_until(conn, 1):
+                self.assertTrue(conn.process_message(msg))
+
+            self.assertAlmostEqual(conn.telemetry.roll, 0.5)
+            self.assertEqual(len(seen), 1)
+            handlers = {h["handler"]: h for h in conn.get_handler_stats()["handlers"]}
+            self.assertEqual(handlers["recorder"]["calls"], 1)
+            self.assertEqual(handlers["_handle_attitude"]["calls"], 1)
+        finally:
+            conn.disconnect()
+            vehicle.close()
+
+    def test_decode_filter_skips_unhandled_messages(self):
+        conn, vehicle = open_link_pair()
+        try:
+            conn._install_decode_filter()
+            for i in range(5):
+                vehicle.mav.system_time_send(i, i)  # no handler registered
+                vehicle.mav.attitude_send(i, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+
+            messages = receive_until(conn, 5)
+            time.sleep(0.05)
+            messages.extend(conn.receive_messages(max_messages=100))
+
+            self.assertEqual([m.get_type() for m in messages], ["ATTITUDE"] * 5)
+            self.assertEqual(conn.get_handler_stats()["filtered"], 5)
+            self.assertEqual(conn.status.messages_received, 10)
+            self.assertEqual(conn.packets_dropped, 0)
+        finally:
+            conn.disconnect()
+            vehicle.close()
+
+    def test_loss_is_tracked_per_component(self):
+        conn, vehicle = open_link_pair(system_id=3)
+        companion = mavutil.mavlink_connection(conn.config.connection_string.replace("udpin", "udpout"),
+                                               source_system=3, source_component=191)
+        try:
+            for i in range(20):
+                vehicle.mav.attitude_send(i, 0.1, 0.2, 0.3, 0.0, 0.0, 0.4)
+                companion.mav.heartbeat_send(18, 8, 0, 0, 0)
+            receive_until(conn, 40)
+            self.assertEqual(conn.status.messages_received, 40)
+            self.assertEqual(conn.packets_dropped, 0)
+
+            stats = {(row["system_id"], row["component_id"]): row for row in conn.get_source_stats()}
+            self.assertEqual(sorted(stats), [(3, 1), (3, 191)])
+            self.assertEqual(stats[(3, 191)]["received"], 20)
+            self.assertGreater(stats[(3, 1)]["bytes"], stats[(3, 191)]["bytes"])
+        finally:
+            conn.disconnect()
+            vehicle.close()
+            companion.close()
+
+    def test_fast_decode_updates_telemetry(self):
+        conn, vehicle = open_link_pair()
+        try:
+            conn.set_fast_decode(True)
+            vehicle.mav.local_position_ned_send(0, 1.0, 2.0, -3.0, 0.5, 0.0, 0.0)
+            for msg in receive_until(conn, 1):
+                conn.process_message(msg)
+
+            self.assertAlmostEqual(conn.telemetry.z, -3.0)
+            self.assertAlmostEqual(conn.telemetry.vx, 0.5)
+            self.assertEqual(conn.get_handler_stats()["fast_decode"]["decoded"], 1)
+        finally:
+            conn.disconnect()
+            vehicle.close()
+
+
+class AsyncConnectTests(unittest.TestCase):
+    def setUp(self):
+        # A QApplication (not QCoreApplication) so widget tests can share it
+        self.app = QApplication.instance() or QApplication([])
+        self.service = MavlinkService()
+        self.progress = []
+        self.service.connection_progress.connect(lambda name, state: self.progress.append((name, state)))
+
+    def tearDown(self):
+        for system_id in list(self.service.get_active_connections()):
+            self.service.remove_connection(system_id)
+
+    def _wait(self, futures, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while not all(f.done() for f in futures) and time.monotonic() < deadline:
+            self.app.processEvents()
+            time.sleep(0.005)
+        return [f.result(0) for f in futures]
+
+    def test_connects_fleet_concurrently(self):
+        fleet = VehicleFleet(3, base_port=free_udp_port(), base_system_id=11)
+        fleet.start()
+        try:
+            start = time.monotonic()
+            futures = self.service.connect_many([MavlinkConnectionConfig(connection_string=s)
+                                                 for s in fleet.connection_strings()])
+            self.assertEqual(sorted(self._wait(futures)), [11, 12, 13])
+            # Sequential priming alone used to take 1.5 s per vehicle
+            self.assertLess(time.monotonic() - start, 1.5)
+            self.assertEqual(sorted(self.service.get_active_connections()), [11, 12, 13])
+            self.assertEqual(sorted(state for _, state in self.progress), ["connected"] * 3 + ["connecting"] * 3)
+            self.assertEqual(self.service.get_pending_connections(), [])
+        finally:
+            fleet.stop()
+
+    def test_timeout_and_cancel_report_progress(self):
+        self.service.update_global_settings(MavlinkGlobalSettings(connection_timeout=0.2))
+        silent = MavlinkConnectionConfig(name="silent", connection_string=f"udpout:127.0.0.1:{free_udp_port()}")
+        with self.assertLogs("services.mavlink_service", level="ERROR"):
+            self.assertIsNone(self._wait([self.service.connect_async(silent)])[0])
+
+        self.service.update_global_settings(MavlinkGlobalSettings(connection_timeout=5.0))
+        other = MavlinkConnectionConfig(name="other", connection_string=f"udpout:127.0.0.1:{free_udp_port()}")
+        future = self.service.connect_async(other)
+        self.assertTrue(self.service.cancel_connect("other"))
+        self.assertIsNone(future.result(0))
+        self.assertEqual(self.progress, [("silent", "connecting"), ("silent", "failed"),
+                                         ("other", "connecting"), ("other", "cancelled")])
+        self.assertEqual(self.service.get_active_connections(), {})
+
+
+class MocapScheduleTests(unittest.TestCase):
+    def setUp(self):
+        self.app = QApplication.instance() or QApplication([])
+        self.service = MavlinkService()
+        # Not started: tasks are registered but never run, so only record_send() samples
+        self.scheduler = self.service._mocap_scheduler = DeadlineScheduler(name="test-mocap")
+
+    def test_saving_unchanged_settings_keeps_jitter_stats(self):
+        settings = MavlinkGlobalSettings(default_mocap_rate_hz=50.0)
+        self.service.update_global_settings(settings)
+        self.service.register_mavlink_object(object(), MavlinkObjectConfig(enabled=True, system_id=7,
+                                                                           send_mocap=True))
+        for t in (1.0, 1.02, 1.04):
+            self.scheduler.record_send(7, t)
+
+        self.service.update_global_settings(settings)
+        self.assertEqual(self.scheduler.get_task_stats(7)["jitter"]["samples"], 2)
+
+        self.service.update_global_settings(MavlinkGlobalSettings(default_mocap_rate_hz=100.0))
+        stats = self.scheduler.get_task_stats(7)
+        self.assertEqual(stats["rate_hz"], 100.0)
+        self.assertEqual(stats["jitter"]["samples"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
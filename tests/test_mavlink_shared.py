@@ -0,0 +1,75 @@
+import time
+import unittest
+
+from models.structs import MavlinkConnectionConfig, MocapData
+from services.mavlink_service import MavlinkConnection, ReceiveMode
+from services.mavlink_shared import get_shared_endpoints, open_shared_link, parse_shared_string
+
+from mavlink_helpers import VehicleFleet, free_udp_port
+
+RATES = {'HEARTBEAT': 5.0, 'ATTITUDE': 50.0}
+
+
+class SharedStringTests(unittest.TestCase):
+    def test_parses_address_and_ids(self):
+        self.assertEqual(parse_shared_string("shared:0.0.0.0:14550"), ("0.0.0.0", 14550, None, None))
+        self.assertEqual(parse_shared_string("shared:127.0.0.1:14550?sysid=3&compid=191"),
+                         ("127.0.0.1", 14550, 3, 191))
+        with self.assertRaises(ValueError):
+            parse_shared_string("shared:127.0.0.1:14550?sysid=0")
+        with self.assertRaises(ValueError):
+            parse_shared_string("udpin:0.0.0.0:14550")
+
+
+class SharedEndpointTests(unittest.TestCase):
+    def test_vehicles_on_one_port_are_demultiplexed_by_system_id(self):
+        port = free_udp_port()
+        fleet = VehicleFleet(2, base_port=free_udp_port(), base_system_id=3, rates=RATES,
+                             target=("127.0.0.1", port))
+        fleet.start()
+        pinned = MavlinkConnection(MavlinkConnectionConfig(
+            connection_string=f"shared:127.0.0.1:{port}?sysid=4"))
+        claimed = MavlinkConnection(MavlinkConnectionConfig(
+            connection_string=f"shared:127.0.0.1:{port}"))
+        try:
+            self.assertTrue(pinned.connect(timeout=2.0))
+            self.assertTrue(claimed.connect(timeout=2.0))
+            self.assertEqual((pinned.status.system_id, claimed.status.system_id), (4, 3))
+            [endpoint] = get_shared_endpoints()
+            self.assertEqual(endpoint.link_count, 2)
+            with self.assertRaises(ValueError):
+                open_shared_link(f"shared:127.0.0.1:{port}?sysid=4")
+
+            # One connection reads on its own thread, the other is polled
+            claimed.start_receive_thread()
+            self.assertEqual(claimed.receive_mode, ReceiveMode.THREAD)
+            for conn in (pinned, claimed):
+                for _ in range(5):
+                    conn.send_mocap_data(MocapData(x=float(conn.status.system_id)))
+            sources = {3: [], 4: []}
+            deadline = time.time() + 2.0
+            while not all(len(s) >= 20 for s in sources.values()) and time.time() < deadline:
+                for conn in (pinned, claimed):
+                    for msg in conn.receive_messages(max_messages=100):
+                        sources[conn.status.system_id].append(msg.get_srcSystem())
+                time.sleep(0.005)
+            self.assertEqual(set(sources[3]), {3})
+            self.assertEqual(set(sources[4]), {4})
+            self.assertGreaterEqual(len(sources[3]), 20)
+
+            # Outbound frames reached the vehicle each connection owns
+            deadline = time.time() + 2.0
+            while time.time() < deadline and [v.position[0] for v in fleet.vehicles] != [3.0, 4.0]:
+                time.sleep(0.01)
+            self.assertEqual([v.position[0] for v in fleet.vehicles], [3.0, 4.0])
+            self.assertEqual(pinned.peer_address, "127.0.0.1")
+        finally:
+            pinned.disconnect()
+            claimed.disconnect()
+            fleet.stop()
+        self.assertTrue(endpoint.closed)
+        self.assertEqual(get_shared_endpoints(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import time
+import unittest
+
+from models.structs import MavlinkConnectionConfig, MocapData
+from services.mavlink_service import MavlinkConnection
+
+from mavlink_helpers import VehicleFleet, free_udp_port
+
+
+class SimulatedFleetTests(unittest.TestCase):
+    def test_primed_connection_receives_telemetry_and_ping_replies(self):
+        fleet = VehicleFleet(1, base_port=free_udp_port(), base_system_id=5,
+                             rates={'HEARTBEAT': 5.0, 'ATTITUDE': 50.0})
+        fleet.start()
+        conn = MavlinkConnection(MavlinkConnectionConfig(
+            connection_string=fleet.connection_strings()[0]))
+        try:
+            self.assertTrue(conn.connect())
+            self.assertEqual(conn.status.system_id, 5)
+            self.assertTrue(conn.send_ping())
+            for _ in range(10):
+                conn.send_mocap_data(MocapData(x=1.0, y=2.0, z=-1.0))
+            types = set()
+            deadline = time.time() + 2.0
+            while not {'ATTITUDE', 'PING'} <= types and time.time() < deadline:
+                for msg in conn.receive_messages(max_messages=100):
+                    types.add(msg.get_type())
+                    conn.process_message(msg)
+                time.sleep(0.005)
+            self.assertIn('ATTITUDE', types)
+            self.assertIn('PING', types)
+            self.assertGreater(conn.status.latency_ms, 0.0)
+        finally:
+            conn.disconnect()
+            fleet.stop()
+
+        received = fleet.report()['vehicles'][0]['received']
+        self.assertEqual(received['ATT_POS_MOCAP']['count'], 10)
+        self.assertIn('latency_p99_ms', received['ATT_POS_MOCAP'])
+        self.assertEqual(received['PING']['count'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
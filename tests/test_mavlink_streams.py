@@ -0,0 +1,115 @@
+import time
+import unittest
+from types import SimpleNamespace
+
+from models.structs import MavlinkConnectionConfig, MavlinkStreamProfile
+from services.mavlink_service import MavlinkConnection
+from services.mavlink_streams import (
+    INTERVAL_DEFAULT,
+    INTERVAL_DISABLED,
+    MAV_CMD_SET_MESSAGE_INTERVAL,
+    MAX_ATTEMPTS,
+    StreamSubscription,
+)
+
+from mavlink_helpers import VehicleFleet, free_udp_port
+
+
+ATTITUDE, LOCAL_POSITION_NED, SYS_STATUS = 30, 32, 1
+
+
+def _ack(result=0):
+    return SimpleNamespace(command=MAV_CMD_SET_MESSAGE_INTERVAL, result=result)
+
+
+class StreamSubscriptionTests(unittest.TestCase):
+    def setUp(self):
+        self.sent = []
+        self.streams = StreamSubscription(
+            lambda command, params: self.sent.append((params[0], params[1])) or True,
+            label="test", settle_s=1.0, ack_timeout_s=0.5)
+
+    def test_requests_profile_then_disables_unlisted_streams(self):
+        self.streams.set_profile("lean", MavlinkStreamProfile(rates={'ATTITUDE': 10.0}))
+        observed = {'ATTITUDE': 50.0, 'LOCAL_POSITION_NED': 30.0, 'HEARTBEAT': 1.0,
+                    'PARAM_VALUE': 5.0}
+        self.assertEqual(self.streams.update(0.0, observed), 1)
+        self.assertEqual(self.sent, [(ATTITUDE, 100000)])
+        self.streams.on_command_ack(_ack())
+
+        # Unlisted streams are only disabled once the link has settled
+        self.assertEqual(self.streams.update(0.5, observed), 0)
+        self.assertEqual(self.streams.update(1.0, observed), 1)
+        self.assertEqual(self.sent[-1], (LOCAL_POSITION_NED, INTERVAL_DISABLED))
+        with self.assertLogs("services.mavlink_streams", level="WARNING"):
+            self.streams.on_command_ack(_ack(result=3))
+        self.assertTrue(self.streams.is_settled)
+        self.assertEqual(self.streams.update(5.0, observed), 0)
+
+        # Switching to vehicle defaults restores everything that was changed
+        self.streams.set_profile("", None)
+        self.streams.update(6.0, observed)
+        self.assertEqual(sorted(self.sent[-2:]), [(ATTITUDE, INTERVAL_DEFAULT),
+                                                  (LOCAL_POSITION_NED, INTERVAL_DEFAULT)])
+        stats = self.streams.get_stats()
+        self.assertEqual((stats['accepted'], stats['rejected'], stats['pending']), (1, 1, 2))
+
+    def test_resends_until_acknowledged_and_reapplies(self):
+        profile = MavlinkStreamProfile(rates={'SYS_STATUS': 2.0, 'NOT_A_MESSAGE': 1.0},
+                                       disable_unlisted=False)
+        with self.assertLogs("services.mavlink_streams", level="WARNING") as logs:
+            self.streams.set_profile("lean", profile)
+            for step in range(MAX_ATTEMPTS + 2):
+                self.streams.update(step * 0.5)
+        self.assertEqual(len(logs.records), 2)
+        self.assertEqual(self.sent, [(SYS_STATUS, 500000)] * MAX_ATTEMPTS)
+        self.assertEqual(self.streams.get_stats()['unanswered'], 1)
+
+        self.streams.reapply()
+        self.streams.update(10.0)
+        self.assertEqual(len(self.sent), MAX_ATTEMPTS + 1)
+        self.assertEqual(self.streams.get_stats()['reapplied'], 1)
+
+
+class ConnectionStreamTests(unittest.TestCase):
+    def test_vehicle_streams_follow_profile_and_reapply_after_gap(self):
+        fleet = VehicleFleet(1, base_port=free_udp_port(), base_system_id=4)
+        fleet.start()
+        vehicle = fleet.vehicles[0]
+        conn = MavlinkConnection(MavlinkConnectionConfig(connection_string=fleet.connection_strings()[0]))
+        try:
+            self.assertTrue(conn.connect(timeout=2.0))
+            conn.set_stream_profile("lean", MavlinkStreamProfile(rates={'ATTITUDE': 10.0}))
+            conn._streams._settle_s = 0.3
+
+            def run(seconds):
+                deadline = time.monotonic() + seconds
+                while time.monotonic() < deadline:
+                    for msg in conn.receive_messages(max_messages=100):
+                        conn.process_message(msg)
+                    conn.refresh_rates()
+                    conn.update_stream_subscription(time.monotonic())
+                    time.sleep(0.01)
+
+            run(1.0)
+            self.assertAlmostEqual(vehicle.periods['ATTITUDE'], 0.1)
+            self.assertNotIn('LOCAL_POSITION_NED', vehicle.periods)
+            self.assertNotIn('SYS_STATUS', vehicle.periods)
+            self.assertIn('HEARTBEAT', vehicle.periods)
+            stats = conn.get_stream_stats()
+            self.assertEqual(stats['accepted'], 3)
+            self.assertTrue(stats['settled'])
+
+            # A heartbeat after a long gap (vehicle rebooted) requests the profile again
+            vehicle.periods['SYS_STATUS'] = 0.5
+            conn.status.last_heartbeat -= conn.HEARTBEAT_TIMEOUT + 1
+            run(1.5)
+            self.assertNotIn('SYS_STATUS', vehicle.periods)
+            self.assertEqual(conn.get_stream_stats()['reapplied'], 1)
+        finally:
+            conn.disconnect()
+            fleet.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
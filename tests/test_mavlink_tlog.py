@@ -0,0 +1,107 @@
+import os
+import tempfile
+import time
+import unittest
+
+import numpy as np
+from pymavlink import mavutil
+
+from services.mavlink_tlog import (
+    LINK_OUTBOUND,
+    TlogRecorder,
+    load_tlog_index,
+    scan_tlog,
+)
+
+from mavlink_helpers import open_link_pair, receive_until
+
+
+def _frames(count):
+    mav = mavutil.mavlink.MAVLink(None, srcSystem=1, srcComponent=1)
+    frames = []
+    for i in range(count):
+        if i % 2:
+            msg = mav.attitude_encode(i, 0.1, 0.2, 0.3, 0.0, 0.0, 0.0)
+        else:
+            msg = mav.heartbeat_encode(2, 12, 129, 0, 4)
+        frames.append(bytes(msg.pack(mav)))
+    return frames
+
+
+def _read_tlog(path):
+    log = mavutil.mavlink_connection(path)
+    messages = []
+    while True:
+        msg = log.recv_msg()
+        if msg is None:
+            break
+        messages.append(msg)
+    log.close()
+    return messages
+
+
+class TlogRecorderTests(unittest.TestCase):
+    def test_recording_is_a_readable_tlog_with_matching_index(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            recorder = TlogRecorder(tmp, flush_interval=0.05)
+            recorder.start()
+            frames = _frames(20)
+            for i, frame in enumerate(frames):
+                recorder.record(bytearray(frame), outbound=(i == 0), t=1000.0 + i * 0.01)
+            recorder.stop()
+
+            path = recorder.files[0]
+            messages = _read_tlog(path)
+            self.assertEqual([m.get_msgbuf() for m in messages], frames)
+            self.assertEqual(messages[0]._link, LINK_OUTBOUND)
+            self.assertAlmostEqual(messages[-1]._timestamp, 1000.19, places=5)
+
+            index = load_tlog_index(path, build=False)
+            np.testing.assert_array_equal(index, scan_tlog(path))
+            self.assertEqual(list(index['msg_id'][:2]), [0, 30])
+            self.assertEqual(recorder.get_stats()['frames'], 20)
+
+    def test_rotates_by_size_and_rebuilds_missing_index(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            recorder = TlogRecorder(tmp, max_bytes=400, flush_interval=0.05)
+            recorder.start()
+            for frame in _frames(30):
+                recorder.record(frame)
+            recorder.stop()
+
+            self.assertGreater(len(recorder.files), 1)
+            total = 0
+            for path in recorder.files:
+                self.assertLessEqual(os.path.getsize(path), 400)
+                os.remove(path + ".idx")
+                total += len(load_tlog_index(path))
+                self.assertTrue(os.path.exists(path + ".idx"))
+            self.assertEqual(total, 30)
+
+
+class ConnectionRecordingTests(unittest.TestCase):
+    def test_inbound_and_outbound_frames_are_recorded(self):
+        conn, vehicle = open_link_pair()
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                recorder = TlogRecorder(tmp, flush_interval=0.05)
+                recorder.start()
+                conn.attach_recorder(recorder)
+                vehicle.mav.attitude_send(1, 0.5, 0.0, 0.0, 0.0, 0.0, 0.0)
+                receive_until(conn, 1)
+                conn.send_heartbeat()
+                time.sleep(0.05)
+                conn.detach_recorder()
+                conn.send_heartbeat()
+                recorder.stop()
+
+                messages = _read_tlog(recorder.files[0])
+                directions = [(m.get_type(), m._link) for m in messages]
+                self.assertEqual(directions, [('ATTITUDE', 0), ('HEARTBEAT', LINK_OUTBOUND)])
+        finally:
+            conn.disconnect()
+            vehicle.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+
+import numpy as np
+
+from services.shm_ring import SharedRing
+
+RECORD = np.dtype([('seq', 'u4'), ('value', 'f8')])
+
+
+class SharedRingTests(unittest.TestCase):
+    def test_reads_in_order_and_counts_overwritten_records(self):
+        producer = SharedRing(RECORD, 8, create=True)
+        consumer = SharedRing(RECORD, 8, name=producer.name)
+        try:
+            self.assertEqual(len(consumer.read()), 0)
+            for seq in range(5):
+                producer.push((seq, seq * 0.5))
+            rows = consumer.read()
+            self.assertEqual(rows['seq'].tolist(), [0, 1, 2, 3, 4])
+            self.assertEqual(rows['value'].tolist(), [0.0, 0.5, 1.0, 1.5, 2.0])
+
+            # Wrap around the end of the ring
+            for seq in range(5, 11):
+                producer.push((seq, 0.0))
+            self.assertEqual(consumer.read()['seq'].tolist(), [5, 6, 7, 8, 9, 10])
+
+            # A consumer more than a ring behind keeps only the newest records
+            for seq in range(11, 31):
+                producer.push((seq, 0.0))
+            self.assertEqual(consumer.read()['seq'].tolist(), list(range(24, 31)))
+            stats = consumer.get_stats()
+            self.assertEqual((stats['written'], stats['backlog'], stats['dropped']), (31, 0, 13))
+            self.assertEqual(stats['record_bytes'], RECORD.itemsize)
+        finally:
+            consumer.close()
+            producer.close()
+        with self.assertRaises(FileNotFoundError):
+            SharedRing(RECORD, 8, name=producer.name)
+
+
+if __name__ == '__main__':
+    unittest.main()
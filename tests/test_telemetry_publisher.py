@@ -0,0 +1,69 @@
+import dataclasses
+import unittest
+
+from models.structs import MavlinkTelemetryData, MavlinkTelemetrySnapshot
+from services.telemetry_publisher import TelemetryPublisher
+
+
+class TelemetrySnapshotTests(unittest.TestCase):
+    def test_snapshot_mirrors_telemetry_and_is_frozen(self):
+        telemetry_fields = [f.name for f in dataclasses.fields(MavlinkTelemetryData)]
+        snapshot_fields = [f.name for f in dataclasses.fields(MavlinkTelemetrySnapshot)]
+        self.assertEqual(snapshot_fields, telemetry_fields + ['sequence'])
+
+        telemetry = MavlinkTelemetryData(system_id=3, roll=0.5, mode="OFFBOARD")
+        snapshot = MavlinkTelemetrySnapshot.from_telemetry(telemetry, sequence=7)
+        telemetry.roll = 1.0
+        self.assertEqual(snapshot.roll, 0.5)
+        self.assertEqual(snapshot.mode, "OFFBOARD")
+        self.assertEqual(snapshot.sequence, 7)
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            snapshot.roll = 2.0
+
+
+class TelemetryPublisherTests(unittest.TestCase):
+    def test_pending_updates_are_coalesced(self):
+        publisher = TelemetryPublisher()
+        telemetry = MavlinkTelemetryData(system_id=1)
+        for i in range(5):
+            telemetry.x = float(i)
+            publisher.update(1, telemetry)
+
+        pending = publisher.take_pending()
+        self.assertEqual(list(pending), [1])
+        self.assertEqual(pending[1].x, 4.0)
+        self.assertEqual(publisher.get_stats()['coalesced'], 4)
+        self.assertEqual(publisher.take_pending(), {})
+
+    def test_full_rate_subscribers_see_every_update(self):
+        publisher = TelemetryPublisher()
+        received = []
+        publisher.subscribe(lambda sys_id, snap: received.append(snap.x))
+        publisher.subscribe(lambda sys_id, snap: 1 / 0)
+        telemetry = MavlinkTelemetryData(system_id=2)
+        for i in range(3):
+            telemetry.x = float(i)
+            publisher.update(2, telemetry)
+
+        self.assertEqual(received, [0.0, 1.0, 2.0])
+        self.assertEqual(publisher.get_stats()['subscriber_errors'], 3)
+        # The coalesced path reuses the snapshot already built for subscribers
+        self.assertEqual(publisher.take_pending()[2].sequence, 3)
+
+    def test_superseded_snapshots_are_not_current(self):
+        publisher = TelemetryPublisher()
+        telemetry = MavlinkTelemetryData(system_id=1)
+        publisher.update(1, telemetry)
+        first = publisher.take_pending()[1]
+        self.assertTrue(publisher.is_current(1, first))
+
+        telemetry.z = -1.0
+        publisher.update(1, telemetry)
+        second = publisher.take_pending()[1]
+        self.assertFalse(publisher.is_current(1, first))
+        self.assertTrue(publisher.is_current(1, second))
+        self.assertGreater(second.sequence, first.sequence)
+
+
+if __name__ == '__main__':
+    unittest.main()
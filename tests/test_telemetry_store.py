@@ -0,0 +1,74 @@
+import unittest
+
+import numpy as np
+
+from models.structs import MavlinkTelemetryData
+from services.telemetry_store import TELEMETRY_DTYPE, TelemetryRing, TelemetryStore
+
+
+def _fill(ring, count, rate_hz=100.0, start=10.0):
+    telemetry = MavlinkTelemetryData(system_id=1)
+    for i in range(count):
+        telemetry.x = float(i)
+        telemetry.armed = i >= count // 2
+        ring.append(telemetry, t=start + i / rate_hz)
+
+
+class TelemetryRingTests(unittest.TestCase):
+    def test_memory_is_bounded_and_oldest_rows_overwritten(self):
+        ring = TelemetryRing(capacity=100)
+        _fill(ring, 250)
+
+        self.assertEqual(len(ring), 100)
+        self.assertEqual(ring.overwritten, 150)
+        self.assertEqual(ring.nbytes, 100 * TELEMETRY_DTYPE.itemsize)
+        rows = ring.since(0.0)
+        np.testing.assert_array_equal(rows['x'], np.arange(150, 250, dtype='f4'))
+        self.assertTrue(np.all(np.diff(rows['t']) > 0))
+
+    def test_window_returns_last_seconds_across_wraparound(self):
+        ring = TelemetryRing(capacity=64)
+        _fill(ring, 100)
+        now = 10.0 + 99 / 100.0
+
+        rows = ring.window(0.1, now=now)
+        np.testing.assert_array_equal(rows['x'], np.arange(89, 100, dtype='f4'))
+        self.assertTrue(rows['armed'][-1])
+        self.assertEqual(len(ring.window(0.1, now=now - 5.0)), 0)
+
+    def test_resample_interpolates_and_holds_discrete_fields(self):
+        ring = TelemetryRing(capacity=1000)
+        _fill(ring, 100)
+
+        out = ring.resample(0.5, rate_hz=200.0)
+        self.assertEqual(len(out), 101)
+        self.assertAlmostEqual(out['t'][-1], 10.99)
+        # x rises 1 per 10 ms, so grid points every 5 ms land on half steps
+        np.testing.assert_allclose(out['x'], np.linspace(49.0, 99.0, 101), atol=1e-4)
+        self.assertFalse(out['armed'][0])
+        self.assertTrue(out['armed'][-1])
+
+        early = ring.resample(0.05, rate_hz=100.0, now=10.02)
+        self.assertTrue(np.isnan(early['x'][0]))
+        self.assertEqual(early['x'][-1], 2.0)
+        self.assertFalse(early['armed'][-1])
+
+
+class TelemetryStoreTests(unittest.TestCase):
+    def test_rings_are_allocated_per_vehicle(self):
+        store = TelemetryStore(seconds=1.0, rate_hz=50.0)
+        store.record(1, MavlinkTelemetryData(system_id=1), t=1.0)
+        store.record(2, MavlinkTelemetryData(system_id=2), t=1.0)
+
+        self.assertEqual(store.system_ids, [1, 2])
+        self.assertEqual(store.ring(1).capacity, 50)
+        self.assertEqual(store.get_stats()['memory_bytes'], 2 * 50 * TELEMETRY_DTYPE.itemsize)
+        self.assertEqual(len(store.window(3, 1.0)), 0)
+
+        disabled = TelemetryStore(seconds=0.0)
+        disabled.record(1, MavlinkTelemetryData())
+        self.assertEqual(disabled.system_ids, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
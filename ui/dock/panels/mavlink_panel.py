@@ -15,9 +15,10 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtCore import Qt, pyqtSlot, pyqtSignal, QTimer, QThread
 from PyQt5.QtGui import QFont
+import dataclasses
 import math
 
-from models.structs import MavlinkConnectionConfig, MavlinkTelemetryData
+from models.structs import MavlinkConnectionConfig, MavlinkTelemetryData, MavlinkTelemetrySnapshot
 
 
 class DiscoveryWorker(QThread):
@@ -26,7 +27,7 @@ class DiscoveryWorker(QThread):
     devices_discovered = pyqtSignal(object)
     error = pyqtSignal(str)
 
-    def __init__(self, mavlink_service, timeout_secs: float = 2.0, parent=None):
+    def __init__(self, mavlink_service, timeout_secs: float = None, parent=None):
         super().__init__(parent)
         self._mavlink_service = mavlink_service
         self._timeout_secs = timeout_secs
@@ -198,11 +199,13 @@ class MavlinkPanel(QWidget):
     # Signal emitted when a connection-object link is requested
     object_link_requested = pyqtSignal(str, str)  # connection_name, object_name
     
-    # Connection quality thresholds for test results
-    GOOD_RATE_HZ = 50       # Minimum Hz for 'good' rating
-    GOOD_LATENCY_MS = 50    # Maximum latency for 'good' rating
-    FAIR_RATE_HZ = 20       # Minimum Hz for 'fair' rating
-    FAIR_LATENCY_MS = 100   # Maximum latency for 'fair' rating
+    # Display of connection test grades (graded by the service from RTT percentiles)
+    QUALITY_STYLES = {
+        'good': ('green', '✓ Good'),
+        'fair': ('orange', '◐ Fair'),
+        'poor': ('red', '✗ Poor'),
+        'disconnected': ('gray', '– Disconnected'),
+    }
     
     def __init__(self, parent=None, mavlink_service=None, object_service=None):
         """Initialize the MAVLink panel.
@@ -226,9 +229,19 @@ class MavlinkPanel(QWidget):
         if self.mavlink_service is not None:
             self.mavlink_service.telemetry_updated.connect(self.on_telemetry_updated)
             self.mavlink_service.connection_changed.connect(self.on_connection_changed)
+            self.mavlink_service.connection_progress.connect(self.on_connection_progress)
+            self.mavlink_service.device_discovered.connect(self.on_device_discovered)
             self.mavlink_service.health_updated.connect(self.on_health_updated)
             self.mavlink_service.console_output.connect(self._on_console_output)
             self.mavlink_service.connection_test_complete.connect(self._on_connection_test_complete)
+
+        # Connection attempts started from this panel:
+        # attempt name -> (connection string, name of the card it was started from or None)
+        self._connecting: dict = {}
+
+        # Discovered device cards: (address, port, system_id) -> QFrame
+        self._device_cards: dict = {}
+        self._discovery_progress = None
         
         # Track pending single-connection test
         self._pending_test_connection_name = None
@@ -275,6 +288,10 @@ class MavlinkPanel(QWidget):
         self.connection_input = QLineEdit()
         self.connection_input.setPlaceholderText("udpin:0.0.0.0:14550")
         self.connection_input.setText("udpin:0.0.0.0:14550")
+        self.connection_input.setToolTip(
+            "pymavlink connection string, replay:<file>.tlog for a recording, or\n"
+            "shared:<host>:<port>[?sysid=N] for one of several vehicles on one UDP port"
+        )
         form_layout.addRow("Address:", self.connection_input)
         
         # System ID input
@@ -364,84 +381,112 @@ class MavlinkPanel(QWidget):
         self.discover_btn.setText("Discovering...")
         
         # Clear previous results
-        while self.discovered_layout.count() > 0:
-            child = self.discovered_layout.takeAt(0)
-            if child.widget():
-                child.widget().deleteLater()
+        self._clear_discovered()
         
-        progress = QLabel("Scanning network for MAVLink devices...")
-        progress.setStyleSheet("color: #666;")
-        self.discovered_layout.addWidget(progress)
+        self._discovery_progress = QLabel("Scanning network for MAVLink devices...")
+        self._discovery_progress.setStyleSheet("color: #666;")
+        self.discovered_layout.addWidget(self._discovery_progress)
         
-        # Run discovery in a worker thread to avoid blocking the UI thread
-        self._discovery_worker = DiscoveryWorker(
-            self.mavlink_service,
-            timeout_secs=5.0,
-            parent=self,
-        )
+        # Run discovery in a worker thread to avoid blocking the UI thread;
+        # devices appear as they are found (see on_device_discovered)
+        self._discovery_worker = DiscoveryWorker(self.mavlink_service, parent=self)
         self._discovery_worker.devices_discovered.connect(self._run_discovery)
         self._discovery_worker.error.connect(self._show_discovery_error)
         self._discovery_worker.finished.connect(self._on_discovery_finished)
         self._discovery_worker.start()
-    
-    def _run_discovery(self, devices):
-        """Update UI with discovery results (called when worker completes)."""
-        # Clear layout
+
+    def _clear_discovered(self):
+        """Remove every widget from the discovered devices list."""
         while self.discovered_layout.count() > 0:
             child = self.discovered_layout.takeAt(0)
             if child.widget():
                 child.widget().deleteLater()
-
-        if not devices:
+        self._device_cards.clear()
+        self._discovery_progress = None
+
+    @pyqtSlot(object)
+    def on_device_discovered(self, device):
+        """Add or refresh the card of a device found by discovery."""
+        key = (device.address, device.port, device.system_id)
+        card = self._make_device_card(device)
+        old = self._device_cards.get(key)
+        if old is not None:
+            self.discovered_layout.replaceWidget(old, card)
+            old.deleteLater()
+        else:
+            if not self._device_cards:
+                # Drop the "no devices" placeholder from an earlier scan
+                for i in reversed(range(self.discovered_layout.count())):
+                    widget = self.discovered_layout.itemAt(i).widget()
+                    if widget is not None and widget is not self._discovery_progress:
+                        self.discovered_layout.takeAt(i)
+                        widget.deleteLater()
+            self.discovered_layout.addWidget(card)
+        self._device_cards[key] = card
+        self.discovered_group.setVisible(True)
+    
+    def _run_discovery(self, devices):
+        """Finish a discovery run (called when the worker completes)."""
+        if self._discovery_progress is not None:
+            self.discovered_layout.removeWidget(self._discovery_progress)
+            self._discovery_progress.deleteLater()
+            self._discovery_progress = None
+
+        # Devices normally arrived already through on_device_discovered
+        for device in devices:
+            if (device.address, device.port, device.system_id) not in self._device_cards:
+                self.on_device_discovered(device)
+
+        if not self._device_cards:
             no_devices = QLabel("No devices found. Make sure drones are powered on.")
             no_devices.setStyleSheet("color: #888;")
             self.discovered_layout.addWidget(no_devices)
-        else:
-            for device in devices:
-                card = QFrame()
-                card.setFrameStyle(QFrame.StyledPanel | QFrame.Raised)
-                card.setLineWidth(1)
-                card_layout = QHBoxLayout(card)
-                card_layout.setSpacing(8)
-                card_layout.setContentsMargins(10, 8, 10, 8)
-
-                # --- Left: identification text block ---
-                text_block = QVBoxLayout()
-                text_block.setSpacing(2)
-
-                # Row 1: Firmware · Vehicle type  (most important identity info)
-                firmware = device.autopilot_name if device.autopilot >= 0 else "Unknown firmware"
-                vtype    = device.vehicle_type_name if device.vehicle_type >= 0 else "Unknown type"
-                armed_tag = "  <span style='color:#c00;font-size:9px;'>● ARMED</span>" if device.armed else ""
-                title = QLabel(f"<b>{firmware} · {vtype}</b>{armed_tag}")
-                title.setStyleSheet("font-size: 12px;")
-                text_block.addWidget(title)
-
-                # Row 2: SysID · IP:port
-                sys_str  = f"SysID {device.system_id}" if device.system_id > 0 else "SysID ?"
-                addr_str = f"{device.address}:{device.port}"
-                subtitle = QLabel(f"{sys_str}  ·  {addr_str}")
-                subtitle.setStyleSheet("color: #555; font-size: 10px;")
-                text_block.addWidget(subtitle)
-
-                # Row 3: MAVLink version (minor detail)
-                if device.mavlink_version:
-                    mv_label = QLabel(f"MAVLink v{device.mavlink_version}")
-                    mv_label.setStyleSheet("color: #999; font-size: 9px;")
-                    text_block.addWidget(mv_label)
-
-                card_layout.addLayout(text_block, stretch=1)
-
-                # --- Right: Use button ---
-                use_btn = QPushButton("Use")
-                use_btn.setFixedHeight(28)
-                use_btn.setFixedWidth(48)
-                use_btn.clicked.connect(
-                    lambda checked, d=device: self._use_discovered_device(d)
-                )
-                card_layout.addWidget(use_btn, alignment=Qt.AlignVCenter)
 
-                self.discovered_layout.addWidget(card)
+    def _make_device_card(self, device) -> QFrame:
+        """Build the card showing one discovered device."""
+        card = QFrame()
+        card.setFrameStyle(QFrame.StyledPanel | QFrame.Raised)
+        card.setLineWidth(1)
+        card_layout = QHBoxLayout(card)
+        card_layout.setSpacing(8)
+        card_layout.setContentsMargins(10, 8, 10, 8)
+
+        # --- Left: identification text block ---
+        text_block = QVBoxLayout()
+        text_block.setSpacing(2)
+
+        # Row 1: Firmware · Vehicle type  (most important identity info)
+        firmware = device.autopilot_name if device.autopilot >= 0 else "Unknown firmware"
+        vtype    = device.vehicle_type_name if device.vehicle_type >= 0 else "Unknown type"
+        armed_tag = "  <span style='color:#c00;font-size:9px;'>● ARMED</span>" if device.armed else ""
+        title = QLabel(f"<b>{firmware} · {vtype}</b>{armed_tag}")
+        title.setStyleSheet("font-size: 12px;")
+        text_block.addWidget(title)
+
+        # Row 2: SysID · IP:port
+        sys_str  = f"SysID {device.system_id}" if device.system_id > 0 else "SysID ?"
+        addr_str = f"{device.address}:{device.port}"
+        subtitle = QLabel(f"{sys_str}  ·  {addr_str}")
+        subtitle.setStyleSheet("color: #555; font-size: 10px;")
+        text_block.addWidget(subtitle)
+
+        # Row 3: MAVLink version (minor detail)
+        if device.mavlink_version:
+            mv_label = QLabel(f"MAVLink v{device.mavlink_version}")
+            mv_label.setStyleSheet("color: #999; font-size: 9px;")
+            text_block.addWidget(mv_label)
+
+        card_layout.addLayout(text_block, stretch=1)
+
+        # --- Right: Use button ---
+        use_btn = QPushButton("Use")
+        use_btn.setFixedHeight(28)
+        use_btn.setFixedWidth(48)
+        use_btn.clicked.connect(
+            lambda checked, d=device: self._use_discovered_device(d)
+        )
+        card_layout.addWidget(use_btn, alignment=Qt.AlignVCenter)
+        return card
 
     def _on_discovery_finished(self):
         """Re-enable discovery UI after the worker thread has finished."""
@@ -452,10 +497,7 @@ class MavlinkPanel(QWidget):
     
     def _show_discovery_error(self, message: str):
         """Show discovery error message."""
-        while self.discovered_layout.count() > 0:
-            child = self.discovered_layout.takeAt(0)
-            if child.widget():
-                child.widget().deleteLater()
+        self._clear_discovered()
         
         error = QLabel(f"Discovery failed: {message}")
         error.setStyleSheet("color: red;")
@@ -508,34 +550,20 @@ class MavlinkPanel(QWidget):
         # Multi-connection test result display
         result_text = "<b>Test Results:</b><br>"
         for sys_id, result in test_results.items():
-            rate_hz = result.get('rate_hz', 0)
-            latency_ms = result.get('latency_ms', 0)
-            lost_packets = result.get('lost_packets', 0)
-            messages_sent = result.get('messages_sent', 0)
-            messages_received = result.get('messages_received', 0)
-
-            # Color code based on quality thresholds
-            if rate_hz >= self.GOOD_RATE_HZ and latency_ms < self.GOOD_LATENCY_MS and lost_packets == 0:
-                color = 'green'
-                status = '✓ Good'
-            elif rate_hz >= self.FAIR_RATE_HZ and latency_ms < self.FAIR_LATENCY_MS:
-                color = 'orange'
-                status = '◐ Fair'
-            else:
-                color = 'red'
-                status = '✗ Poor'
-            
+            quality = result.get('quality', 'poor')
+            color, status = self.QUALITY_STYLES.get(quality, ('red', quality))
             result_text += f"<span style='color: {color};'><b>ID {sys_id}:</b> {status}</span><br>"
-            result_text += f"  • Rate: {rate_hz:.0f} Hz (messages/second)<br>"
-            result_text += f"  • Sent: {messages_sent:,} | Received: {messages_received:,}<br>"
-
-            # Always show latency
-            result_text += f"  • Latency: {latency_ms:.1f} ms (round-trip time)<br>"
-
-            # Show dropped packets as ratio of total
-            total_expected = messages_received + lost_packets
-            result_text += f"  • Dropped: {lost_packets} out of {total_expected:,} packet(s)<br>"
-
+            if 'pings_sent' not in result:
+                result_text += "<br>"
+                continue
+
+            result_text += (f"  • RTT: p50 {result['rtt_p50_ms']:.1f} | p95 {result['rtt_p95_ms']:.1f} | "
+                            f"p99 {result['rtt_p99_ms']:.1f} | max {result['rtt_max_ms']:.1f} ms<br>")
+            result_text += (f"  • Pings lost: {result['lost']} out of {result['pings_sent']:,} "
+                            f"({result['loss_rate']:.1%}) | Reordered: {result['reordered']}<br>")
+            result_text += f"  • Rate: {result['rate_hz']:.0f} Hz (messages/second)<br>"
+            result_text += (f"  • Throughput: in {result['rx_bytes_per_sec'] / 1024:.1f} KiB/s | "
+                            f"out {result['tx_bytes_per_sec'] / 1024:.1f} KiB/s<br>")
             result_text += "<br>"
 
         self.test_results_label.setText(result_text)
@@ -860,21 +888,30 @@ class MavlinkPanel(QWidget):
             name=name  # Will be auto-generated if empty
         )
         
-        # Try to connect
-        self.connect_btn.setEnabled(False)
-        self.connect_btn.setText("Connecting...")
-        
-        success = self.mavlink_service.add_connection(config)
-        
-        self.connect_btn.setEnabled(True)
-        self.connect_btn.setText("Connect")
-        
-        if success:
-            # Clear name input for next connection
-            self.name_input.clear()
-            self._refresh_connections_list()
+        # Connect in the background; the result arrives via on_connection_progress
+        self.mavlink_service.connect_async(config)
+        self._connecting[config.name] = (connection_string, None)
+        self.name_input.clear()
+        self._update_connect_button()
+
+    def _update_connect_button(self):
+        """Show how many connection attempts are still in flight."""
+        if self._connecting:
+            self.connect_btn.setText(f"Connect ({len(self._connecting)} connecting...)")
         else:
-            # Show error message
+            self.connect_btn.setText("Connect")
+
+    @pyqtSlot(str, str)
+    def on_connection_progress(self, name: str, state: str):
+        """Handle progress of an asynchronous connection attempt."""
+        if state == "connecting" or name not in self._connecting:
+            return
+        connection_string, card_name = self._connecting.pop(name)
+        self._update_connect_button()
+        if state == "connected":
+            self._refresh_connections_list()
+        elif state == "failed":
+            hint = "\n\nYou can edit the connection to fix the settings." if card_name else ""
             QMessageBox.warning(
                 self,
                 "Connection Failed",
@@ -882,7 +919,7 @@ class MavlinkPanel(QWidget):
                 "Please check:\n"
                 "• Connection string is correct\n"
                 "• Device is powered on and sending heartbeats\n"
-                "• No firewall blocking the connection"
+                "• No firewall blocking the connection" + hint
             )
             # Don't refresh - failed connections don't create new entries
 
@@ -943,26 +980,15 @@ class MavlinkPanel(QWidget):
         else:
             # Connect - get saved config or create new
             all_conns = self.mavlink_service.get_all_connections()
-            if connection_name in all_conns:
-                config = all_conns[connection_name]
-                success = self.mavlink_service.add_connection(config)
-
-                if success:
-                    # Refresh to show as active
-                    self._refresh_connections_list()
-                else:
-                    # Show error message
-                    QMessageBox.warning(
-                        self,
-                        "Connection Failed",
-                        f"Failed to connect to {config.connection_string}\n\n"
-                        "Please check:\n"
-                        "• Connection string is correct\n"
-                        "• Device is powered on and sending heartbeats\n"
-                        "• No firewall blocking the connection\n\n"
-                        "You can edit the connection to fix the settings."
-                    )
-                    # Don't refresh - failed connections don't change the UI state
+            connecting_cards = {card_name for _, card_name in self._connecting.values()}
+            if connection_name in all_conns and connection_name not in connecting_cards:
+                # A copy: the service may rename it, which must not touch the saved entry
+                config = dataclasses.replace(all_conns[connection_name])
+                # The saved entry is replaced once connected (see on_connection_progress)
+                self.mavlink_service.connect_async(config)
+                # Keyed by the attempt's name, which progress reports use
+                self._connecting[config.name] = (config.connection_string, connection_name)
+                self._update_connect_button()
 
     def _on_link_object_clicked(self, connection_name: str):
         """Handle link object button click - show object selection dialog."""
@@ -1060,21 +1086,19 @@ class MavlinkPanel(QWidget):
         if sys_id in test_results:
             result = test_results[sys_id]
             quality = result.get('quality', 'unknown')
-            rate = result.get('rate_hz', 0)
-            latency = result.get('latency_ms', 0)
-            sent = result.get('messages_sent', 0)
-            received = result.get('messages_received', 0)
-            dropped = result.get('lost_packets', 0)
-
-            # Build detailed message
             msg = f"Quality: {quality.upper()}\n"
-            msg += f"Rate: {rate:.1f} Hz (messages/second)\n"
-            msg += f"Messages Sent: {sent:,}\n"
-            msg += f"Messages Received: {received:,}\n"
-            msg += f"Latency: {latency:.1f} ms (round-trip time)\n"
-
-            total_expected = received + dropped
-            msg += f"Dropped Packets: {dropped} out of {total_expected:,}\n"
+            if 'pings_sent' in result:
+                msg += (f"RTT p50 / p95 / p99: {result['rtt_p50_ms']:.1f} / {result['rtt_p95_ms']:.1f} / "
+                        f"{result['rtt_p99_ms']:.1f} ms\n")
+                msg += f"RTT min / max: {result['rtt_min_ms']:.1f} / {result['rtt_max_ms']:.1f} ms\n"
+                msg += (f"Pings Lost: {result['lost']} out of {result['pings_sent']:,} "
+                        f"({result['loss_rate']:.1%})\n")
+                msg += f"Reordered: {result['reordered']} | Duplicates: {result['duplicates']}\n"
+                msg += f"Rate: {result['rate_hz']:.1f} Hz (messages/second)\n"
+                msg += (f"Throughput: in {result['rx_bytes_per_sec'] / 1024:.1f} KiB/s, "
+                        f"out {result['tx_bytes_per_sec'] / 1024:.1f} KiB/s\n")
+                msg += f"Messages Sent: {result['messages_sent']:,}\n"
+                msg += f"Messages Received: {result['messages_received']:,}\n"
 
             QMessageBox.information(
                 self, 
@@ -1242,8 +1266,12 @@ class MavlinkPanel(QWidget):
             self._update_telemetry_display(system_id, telemetry)
     
     @pyqtSlot(int, object)
-    def on_telemetry_updated(self, system_id: int, telemetry: MavlinkTelemetryData):
+    def on_telemetry_updated(self, system_id: int, telemetry: MavlinkTelemetrySnapshot):
         """Handle telemetry update from mavlink service."""
+        # Skip snapshots that a newer publication overtook while queued
+        if self.mavlink_service is not None and \
+                not self.mavlink_service.is_current_telemetry(system_id, telemetry):
+            return
         self._update_telemetry_display(system_id, telemetry)
     
     @pyqtSlot(int, bool)
@@ -362,6 +362,68 @@ class SettingsPanel(QWidget):
             lambda state: self._update_mavlink_setting('auto_connect_discovered', state == 2)
         )
         layout.addRow("Auto Connect Discovered:", self.auto_connect_cb)
+
+        # Discovery Ports
+        self.discovery_ports_edit = QLineEdit(self._mavlink_settings.discovery_ports)
+        self.discovery_ports_edit.setPlaceholderText("14550,14540-14549")
+        self.discovery_ports_edit.setToolTip("UDP ports and ranges to listen on during discovery")
+        self.discovery_ports_edit.textChanged.connect(
+            lambda text: self._update_mavlink_setting('discovery_ports', text)
+        )
+        layout.addRow("Discovery Ports:", self.discovery_ports_edit)
+
+        # Background Discovery
+        self.background_discovery_cb = QCheckBox()
+        self.background_discovery_cb.setChecked(self._mavlink_settings.background_discovery)
+        self.background_discovery_cb.setToolTip("Keep scanning for new MAVLink devices in the background")
+        self.background_discovery_cb.stateChanged.connect(
+            lambda state: self._update_mavlink_setting('background_discovery', state == 2)
+        )
+        layout.addRow("Background Discovery:", self.background_discovery_cb)
+
+        # Stream Profile
+        self.stream_profile_combo = QComboBox()
+        self.stream_profile_combo.setToolTip(
+            "Telemetry streams requested from each vehicle with SET_MESSAGE_INTERVAL")
+        self._fill_stream_profiles()
+        self.stream_profile_combo.currentIndexChanged.connect(
+            lambda index: self._update_mavlink_setting(
+                'stream_profile', self.stream_profile_combo.itemData(index) or "")
+        )
+        layout.addRow("Stream Profile:", self.stream_profile_combo)
+
+        # Adaptive Rate Control
+        self.adaptive_rate_cb = QCheckBox()
+        self.adaptive_rate_cb.setChecked(self._mavlink_settings.adaptive_rate_control)
+        self.adaptive_rate_cb.setToolTip(
+            "Lower telemetry, then setpoint rates on congested links (mocap is never slowed)")
+        self.adaptive_rate_cb.stateChanged.connect(
+            lambda state: self._update_mavlink_setting('adaptive_rate_control', state == 2)
+        )
+        layout.addRow("Adaptive Rates:", self.adaptive_rate_cb)
+
+        # Engine Process
+        self.engine_process_cb = QCheckBox()
+        self.engine_process_cb.setChecked(self._mavlink_settings.engine_process)
+        self.engine_process_cb.setToolTip(
+            "Run vehicle links in a separate process (takes effect after a restart)")
+        self.engine_process_cb.stateChanged.connect(
+            lambda state: self._update_mavlink_setting('engine_process', state == 2)
+        )
+        layout.addRow("Engine Process:", self.engine_process_cb)
+
+        # Fleet Telemetry Table
+        self.fleet_table_edit = QLineEdit(self._mavlink_settings.fleet_table_name)
+        self.fleet_table_edit.setPlaceholderText("off")
+        self.fleet_table_edit.setToolTip(
+            "Shared memory name to publish every vehicle's latest telemetry under "
+            "(read with services.fleet_table.FleetTableReader)")
+        # Applied when editing finishes: every change recreates the shared memory block
+        self.fleet_table_edit.editingFinished.connect(
+            lambda: self._update_mavlink_setting('fleet_table_name',
+                                                 self.fleet_table_edit.text().strip())
+        )
+        layout.addRow("Fleet Table:", self.fleet_table_edit)
         
         group.setLayout(layout)
         return group
@@ -389,6 +451,16 @@ class SettingsPanel(QWidget):
         info_group.setLayout(info_layout)
         return info_group
     
+    def _fill_stream_profiles(self):
+        """List the configured stream profiles and select the active one."""
+        s = self._mavlink_settings
+        combo = self.stream_profile_combo
+        combo.clear()
+        combo.addItem("(vehicle defaults)", "")
+        for name in s.stream_profiles:
+            combo.addItem(name, name)
+        combo.setCurrentIndex(max(0, combo.findData(s.stream_profile)))
+
     def _update_mavlink_setting(self, param, value):
         """Update a MAVLink global setting and emit signal."""
         setattr(self._mavlink_settings, param, value)
@@ -421,7 +493,9 @@ class SettingsPanel(QWidget):
             self.mocap_rate_spin, self.setpoint_rate_spin, self.telemetry_rate_spin,
             self.heartbeat_spin, self.timeout_spin, self.sanitize_cb, self.max_pos_spin,
             self.max_vel_spin, self.max_yaw_spin, self.auto_reconnect_cb, self.reconnect_spin,
-            self.auto_connect_cb
+            self.auto_connect_cb, self.discovery_ports_edit, self.background_discovery_cb,
+            self.stream_profile_combo, self.adaptive_rate_cb, self.engine_process_cb,
+            self.fleet_table_edit
         ]
         for w in widgets:
             w.blockSignals(True)
@@ -441,6 +515,12 @@ class SettingsPanel(QWidget):
         self.auto_reconnect_cb.setChecked(s.auto_reconnect)
         self.reconnect_spin.setValue(s.reconnect_interval)
         self.auto_connect_cb.setChecked(s.auto_connect_discovered)
+        self.discovery_ports_edit.setText(s.discovery_ports)
+        self.background_discovery_cb.setChecked(s.background_discovery)
+        self._fill_stream_profiles()
+        self.adaptive_rate_cb.setChecked(s.adaptive_rate_control)
+        self.engine_process_cb.setChecked(s.engine_process)
+        self.fleet_table_edit.setText(s.fleet_table_name)
         
         for w in widgets:
             w.blockSignals(False)
@@ -21,6 +21,7 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtGui import QFontDatabase, QFont
 import json
+from dataclasses import asdict
 
 from services.input_service import InputService, InputType
 from services.object_service import ObjectService
@@ -30,7 +31,14 @@ from services.storage_service import StorageService
 
 from ui.gl_widget.gl_widget import GLWidget
 from ui.dock.dock_manager import DockManager
-from models.structs import PositionData, MavlinkGlobalSettings, MavlinkConnectionConfig, MavlinkObjectConfig
+from models.structs import (
+    PositionData,
+    MavlinkGlobalSettings,
+    MavlinkConnectionConfig,
+    MavlinkObjectConfig,
+    MavlinkStreamProfile,
+    default_stream_profiles,
+)
 from models.storage_models import AppSettings, ConnectionEntry
 from ui.navbar.navbar import SideNavbar
 from ui.style import load_stylesheet
@@ -579,6 +587,20 @@ class MainWindow(QMainWindow):
             auto_reconnect=saved.auto_reconnect,
             reconnect_interval=saved.reconnect_interval,
             auto_connect_discovered=saved.auto_connect_discovered,
+            discovery_ports=saved.discovery_ports,
+            background_discovery=saved.background_discovery,
+            stream_profile=saved.stream_profile,
+            stream_profiles={
+                name: MavlinkStreamProfile(**profile)
+                for name, profile in saved.stream_profiles.items()
+            } or default_stream_profiles(),
+            adaptive_rate_control=saved.adaptive_rate_control,
+            adaptive_max_loss=saved.adaptive_max_loss,
+            adaptive_max_rtt_ms=saved.adaptive_max_rtt_ms,
+            adaptive_max_utilization=saved.adaptive_max_utilization,
+            link_test_rate_hz=saved.link_test_rate_hz,
+            engine_process=saved.engine_process,
+            fleet_table_name=saved.fleet_table_name,
         )
 
     def _on_save_zoom_sensitivity(self, value: float):
@@ -605,6 +627,19 @@ class MainWindow(QMainWindow):
         settings.auto_reconnect = mavlink_settings.auto_reconnect
         settings.reconnect_interval = mavlink_settings.reconnect_interval
         settings.auto_connect_discovered = mavlink_settings.auto_connect_discovered
+        settings.discovery_ports = mavlink_settings.discovery_ports
+        settings.background_discovery = mavlink_settings.background_discovery
+        settings.stream_profile = mavlink_settings.stream_profile
+        settings.stream_profiles = {
+            name: asdict(profile) for name, profile in mavlink_settings.stream_profiles.items()
+        }
+        settings.adaptive_rate_control = mavlink_settings.adaptive_rate_control
+        settings.adaptive_max_loss = mavlink_settings.adaptive_max_loss
+        settings.adaptive_max_rtt_ms = mavlink_settings.adaptive_max_rtt_ms
+        settings.adaptive_max_utilization = mavlink_settings.adaptive_max_utilization
+        settings.link_test_rate_hz = mavlink_settings.link_test_rate_hz
+        settings.engine_process = mavlink_settings.engine_process
+        settings.fleet_table_name = mavlink_settings.fleet_table_name
         self.storage_service.update_settings(settings)
 
     def _on_connection_changed(self, system_id: int, connected: bool):